@@ -0,0 +1,67 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from AI_engine.services import llm_cache
+from AI_engine.services.llm_gateway import llm_gateway, reset_stats, stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Inspect the LLM gateway: call histograms per backend and lane, "
+        "response cache hit rates per service"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "action",
+            choices=["status", "ping", "reset"],
+            help="status: recorded calls, latency, tokens and cache hit rates; "
+            "ping: check the backends answer; reset: clear the statistics",
+        )
+        parser.add_argument(
+            "--backend",
+            action="append",
+            help="Limit to a backend (e.g. ollama); repeatable",
+        )
+        parser.add_argument("--json", action="store_true", help="Print raw JSON")
+
+    def handle(self, *args, **options):
+        if options["action"] == "reset":
+            reset_stats()
+            self.stdout.write(self.style.SUCCESS("LLM gateway statistics cleared"))
+            return
+
+        if options["action"] == "ping":
+            for backend in options["backend"] or ["ollama"]:
+                ok = llm_gateway.ping(backend)
+                style = self.style.SUCCESS if ok else self.style.ERROR
+                self.stdout.write(style(f"{backend}: {'up' if ok else 'down'}"))
+            return
+
+        result = stats(options["backend"])
+        result["cache"] = llm_cache.stats()
+        if options["json"]:
+            self.stdout.write(json.dumps(result, indent=2))
+            return
+
+        for backend, lanes in result["backends"].items():
+            for lane, lane_stats in lanes.items():
+                self.stdout.write(
+                    f"{backend}/{lane}: {lane_stats['ok']} ok, "
+                    f"{lane_stats['error']} failed, {lane_stats['rejected']} rejected; "
+                    f"latency avg {lane_stats['latency_ms_avg']} ms, "
+                    f"p50 <= {lane_stats['latency_ms_p50']} ms, "
+                    f"p95 <= {lane_stats['latency_ms_p95']} ms; "
+                    f"{lane_stats['prompt_tokens']} prompt / "
+                    f"{lane_stats['completion_tokens']} completion tokens"
+                )
+        for service, service_stats in sorted(result["services"].items()):
+            self.stdout.write(f"  {service}: {service_stats}")
+        for service, counts in sorted(result["cache"].items()):
+            self.stdout.write(
+                f"cache {service}: hit rate {counts['hit_rate']} "
+                f"({counts.get('hit', 0)} fresh, {counts.get('stale', 0)} stale, "
+                f"{counts.get('coalesced', 0)} coalesced, {counts.get('miss', 0)} "
+                f"generated, {counts.get('timeout', 0)} timed out)"
+            )
@@ -2,9 +2,10 @@
 from typing import Dict, Any, List
 import logging
 from django.conf import settings
-import requests
 from django.utils import timezone
 from ..models import UserAnalysis, AIInsight
+from .llm_cache import cached_generate
+from .llm_gateway import BACKGROUND, LLMRequestError, llm_gateway
 
 logger = logging.getLogger(__name__)
 
@@ -25,30 +26,21 @@ class AIAnalysisService:
         self.min_data_points = settings.AI_ENGINE_SETTINGS["MIN_DATA_POINTS"]
         self.risk_threshold = settings.AI_ENGINE_SETTINGS["RISK_THRESHOLD"]
 
-    def generate_text(self, prompt: str) -> Dict[str, Any]:
+    def generate_text(
+        self, prompt: str, service: str = "ai_analysis", lane: str = BACKGROUND
+    ) -> Dict[str, Any]:
         """Generate text response using Ollama"""
         try:
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json={"model": self.model, "prompt": prompt, "stream": False},
+            result = cached_generate(
+                prompt, model=self.model, lane=lane, service=service
             )
-
-            if response.status_code == 200:
-                result = response.json()
-                return {
-                    "text": result["response"],
-                    "metadata": {
-                        "model": self.model,
-                        "finish_reason": result.get("done", True),
-                    },
-                }
-            else:
-                logger.error(
-                    f"Ollama request failed with status {response.status_code}"
-                )
-                raise Exception(
-                    f"Ollama request failed with status {response.status_code}"
-                )
+            return {
+                "text": result.text,
+                "metadata": {
+                    "model": self.model,
+                    "finish_reason": result.data.get("done", True),
+                },
+            }
 
         except Exception as e:
             logger.error(f"Error generating text: {str(e)}")
@@ -705,17 +697,18 @@ class AIAnalysisService:
             analysis_data = self._prepare_session_data(session_data)
 
             # Make API request
-            response = requests.post(
-                f"{self.api_endpoint}/analyze",
-                json=analysis_data,
-                headers={"Authorization": f"Bearer {self.api_key}"},
-            )
-
-            if response.status_code == 200:
-                return response.json()
-            else:
-                logger.error(f"AI analysis failed: {response.text}")
-                return {"error": "Analysis failed", "status": response.status_code}
+            try:
+                result = llm_gateway.request(
+                    "ai_api",
+                    "analyze",
+                    analysis_data,
+                    service="ai_analysis",
+                    headers={"Authorization": f"Bearer {self.api_key}"},
+                )
+            except LLMRequestError as e:
+                logger.error(f"AI analysis failed: {str(e)}")
+                return {"error": "Analysis failed", "status": e.status_code}
+            return result.data
 
         except Exception as e:
             logger.error(f"Error in analyze_session: {str(e)}")
@@ -745,17 +738,18 @@ class AIAnalysisService:
                 logger.error("AI service not properly configured")
                 return []
 
-            response = requests.post(
-                f"{self.api_endpoint}/recommendations",
-                json=user_data,
-                headers={"Authorization": f"Bearer {self.api_key}"},
-            )
-
-            if response.status_code == 200:
-                return response.json().get("recommendations", [])
-            else:
-                logger.error(f"Failed to get recommendations: {response.text}")
+            try:
+                result = llm_gateway.request(
+                    "ai_api",
+                    "recommendations",
+                    user_data,
+                    service="ai_analysis",
+                    headers={"Authorization": f"Bearer {self.api_key}"},
+                )
+            except LLMRequestError as e:
+                logger.error(f"Failed to get recommendations: {str(e)}")
                 return []
+            return result.data.get("recommendations", [])
 
         except Exception as e:
             logger.error(f"Error in get_recommendations: {str(e)}")
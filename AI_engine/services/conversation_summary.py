@@ -2,7 +2,8 @@
 from typing import Dict, List, Any
 import logging
 from django.conf import settings
-import requests
+from .llm_cache import cached_generate
+from .llm_gateway import LLMError
 from ..models import ConversationSummary
 
 logger = logging.getLogger(__name__)
@@ -152,19 +153,14 @@ class ConversationSummaryService:
         try:
             prompt = self._build_summary_prompt(messages)
 
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json={"model": self.model, "prompt": prompt, "stream": False},
-            )
-
-            if response.status_code == 200:
-                result = response.json()
-                return self._parse_summary_response(result["response"])
-            else:
-                logger.error(
-                    f"Ollama request failed with status {response.status_code}"
+            try:
+                result = cached_generate(
+                    prompt, model=self.model, service="conversation_summary"
                 )
+            except LLMError as e:
+                logger.error(f"Ollama request failed: {str(e)}")
                 return self._create_default_summary()
+            return self._parse_summary_response(result.text)
 
         except Exception as e:
             logger.error(f"Error in Ollama summary generation: {str(e)}")
@@ -0,0 +1,269 @@
+# AI_engine/services/llm_cache.py
+"""
+Content-addressed cache of LLM generations with request coalescing
+
+``cached_generate`` sits in front of ``llm_gateway.generate``. A response
+is stored under the SHA-256 of (model, prompt, generation options), so the
+same prompt is answered from the cache whichever user, view or task asks.
+
+- fresh (younger than ``ttl``): returned as is;
+- stale (until ``ttl + stale_ttl``): returned at once, and one caller
+  queues ``AI_engine.tasks.refresh_llm_response`` to regenerate it;
+- missing: single flight. The caller that wins a Redis lock generates;
+  concurrent callers for the same key, in any process, wait for its entry
+  instead of each calling Ollama. A waiter that finds the lock released
+  without an entry (the generation failed) takes over. The lock and the
+  wait last as long as a generation may: the lane's slot queue timeout
+  plus the Ollama request timeout (``backend_config("ollama")``), plus
+  ``LLM_CACHE_TIMEOUT_MARGIN`` seconds.
+
+Failed generations are never cached. Outcomes are counted per calling
+service (``service=``); ``stats()`` and ``manage.py llm_gateway status``
+report the hit rates. Without Redis every call goes to the gateway.
+"""
+
+import hashlib
+import json
+import logging
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django_redis import get_redis_connection
+
+from .llm_gateway import (
+    BACKGROUND,
+    CONNECT_TIMEOUT,
+    LLMResult,
+    LLMUnavailable,
+    backend_config,
+    llm_gateway,
+)
+
+logger = logging.getLogger(__name__)
+
+# Bump to invalidate every cached response
+CACHE_VERSION = 1
+
+ENTRY_KEY = "llm:cache:{key}"
+LOCK_KEY = "llm:cache:lock:{key}"
+STATS_KEY = "llm:metrics:cache"
+OUTCOMES = ("hit", "stale", "coalesced", "miss")
+
+# KEYS: lock; ARGV: token
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def _setting(name: str, default):
+    return getattr(settings, name, default)
+
+
+def _cache():
+    return caches[_setting("LLM_CACHE_ALIAS", "default")]
+
+
+def _redis():
+    return get_redis_connection("default")
+
+
+def request_key(model: str, prompt: str, options: Optional[Dict[str, Any]]) -> str:
+    """Cache key of a generation: the hash of everything that shapes it"""
+    canonical = json.dumps(
+        {"v": CACHE_VERSION, "model": model, "prompt": prompt, "options": options},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def generation_timeout(lane: str) -> int:
+    """Longest a ``lane`` generation may take, queueing for a slot included"""
+    config = backend_config("ollama")
+    queued = config.get("queue_timeout", {}).get(lane, 60)
+    return int(
+        queued
+        + CONNECT_TIMEOUT
+        + config["timeout"]
+        + _setting("LLM_CACHE_TIMEOUT_MARGIN", 30)
+    )
+
+
+def _lock(key: str, lane: str) -> Optional[str]:
+    token = uuid.uuid4().hex
+    timeout = generation_timeout(lane)
+    if _redis().set(LOCK_KEY.format(key=key), token, nx=True, ex=timeout):
+        return token
+    return None
+
+
+def _unlock(key: str, token: str) -> None:
+    try:
+        _redis().register_script(RELEASE_SCRIPT)(
+            keys=[LOCK_KEY.format(key=key)], args=[token]
+        )
+    except Exception as e:
+        logger.warning(f"Could not release LLM cache lock: {e}")
+
+
+def _count(service: str, outcome: str) -> None:
+    try:
+        _redis().hincrby(STATS_KEY, f"{service or 'unknown'}:{outcome}", 1)
+    except Exception as e:
+        logger.warning(f"Could not record LLM cache outcome: {e}")
+
+
+def _result(entry: Dict[str, Any]) -> LLMResult:
+    return LLMResult(
+        text=entry["text"],
+        data={},
+        backend="cache",
+        model=entry["model"],
+        prompt_tokens=entry["prompt_tokens"],
+        completion_tokens=entry["completion_tokens"],
+    )
+
+
+def _fill(
+    key: str,
+    prompt: str,
+    model: Optional[str],
+    lane: str,
+    service: str,
+    options: Optional[Dict[str, Any]],
+    ttl: int,
+    stale_ttl: int,
+) -> LLMResult:
+    result = llm_gateway.generate(
+        prompt, model=model, lane=lane, service=service, options=options
+    )
+    now = time.time()
+    entry = {
+        "text": result.text,
+        "model": result.model,
+        "prompt_tokens": result.prompt_tokens,
+        "completion_tokens": result.completion_tokens,
+        "created_at": now,
+        "fresh_until": now + ttl,
+    }
+    try:
+        _cache().set(ENTRY_KEY.format(key=key), entry, ttl + stale_ttl)
+    except Exception as e:
+        logger.warning(f"Could not cache LLM response: {e}")
+    return result
+
+
+def cached_generate(
+    prompt: str,
+    *,
+    model: Optional[str] = None,
+    lane: str = BACKGROUND,
+    service: str = "",
+    options: Optional[Dict[str, Any]] = None,
+    ttl: Optional[int] = None,
+    stale_ttl: Optional[int] = None,
+) -> LLMResult:
+    """
+    ``llm_gateway.generate`` answered from the response cache when possible.
+    Raises ``LLMUnavailable`` when an identical in-flight generation does
+    not finish within ``generation_timeout(lane)`` seconds.
+    """
+    model = model or _setting("AI_ENGINE_SETTINGS", {}).get("DEFAULT_MODEL", "mistral")
+    ttl = ttl if ttl is not None else _setting("LLM_CACHE_TTL", 6 * 3600)
+    stale_ttl = (
+        stale_ttl if stale_ttl is not None else _setting("LLM_CACHE_STALE_TTL", 86400)
+    )
+    key = request_key(model, prompt, options)
+    args = (key, prompt, model, lane, service, options, ttl, stale_ttl)
+
+    try:
+        entry = _cache().get(ENTRY_KEY.format(key=key))
+        if entry and time.time() < entry["fresh_until"]:
+            _count(service, "hit")
+            return _result(entry)
+        if entry:
+            _revalidate(*args)
+            _count(service, "stale")
+            return _result(entry)
+        token = _lock(key, lane)
+    except Exception as e:
+        logger.warning(f"LLM cache unavailable, generating directly: {e}")
+        return llm_gateway.generate(
+            prompt, model=model, lane=lane, service=service, options=options
+        )
+
+    deadline = time.monotonic() + generation_timeout(lane)
+    delay = 0.05
+    while not token:
+        # Another caller is generating this response: wait for its entry
+        if time.monotonic() >= deadline:
+            _count(service, "timeout")
+            raise LLMUnavailable("Timed out waiting for an identical LLM generation")
+        time.sleep(delay)
+        delay = min(delay * 2, 1.0)
+        entry = _cache().get(ENTRY_KEY.format(key=key))
+        if entry:
+            _count(service, "coalesced")
+            return _result(entry)
+        # Lock released without an entry: the generation failed, take over
+        token = _lock(key, lane)
+
+    _count(service, "miss")
+    try:
+        return _fill(*args)
+    finally:
+        _unlock(key, token)
+
+
+def _revalidate(key: str, *args) -> None:
+    """Queue one regeneration of a stale entry"""
+    # args are refresh()'s after the token: prompt, model, lane, ...
+    token = _lock(key, args[2])
+    if not token:
+        return  # Already being regenerated
+    from ..tasks import refresh_llm_response
+
+    try:
+        refresh_llm_response.delay(key, token, *args)
+    except Exception as e:
+        logger.warning(f"Could not queue LLM cache refresh: {e}")
+        _unlock(key, token)
+
+
+def refresh(
+    key: str,
+    token: str,
+    prompt: str,
+    model: Optional[str],
+    lane: str,
+    service: str,
+    options: Optional[Dict[str, Any]],
+    ttl: int,
+    stale_ttl: int,
+) -> None:
+    """Regenerate a stale entry under the lock taken by ``_revalidate``"""
+    try:
+        _fill(key, prompt, model, lane, service, options, ttl, stale_ttl)
+    finally:
+        _unlock(key, token)
+
+
+def stats() -> Dict[str, Dict[str, Any]]:
+    """Cache outcomes and hit rate per calling service"""
+    result = {}
+    for name, value in _redis().hgetall(STATS_KEY).items():
+        name = name.decode() if isinstance(name, bytes) else name
+        service, outcome = name.rsplit(":", 1)
+        result.setdefault(service, {})[outcome] = int(value)
+    for counts in result.values():
+        served = sum(counts.get(outcome, 0) for outcome in OUTCOMES)
+        cached = served - counts.get("miss", 0)
+        counts["hit_rate"] = round(cached / served, 3) if served else None
+    return result
@@ -0,0 +1,648 @@
+# AI_engine/services/llm_gateway.py
+"""
+Shared gateway for every LLM call (Ollama, Gemini and the external AI API)
+
+Services call ``llm_gateway.generate`` (or ``agenerate`` from async code)
+rather than posting to the model servers themselves. Per backend the
+gateway keeps:
+
+- a pooled keep-alive ``requests.Session``, one per process;
+- a priority semaphore limiting the calls a process has in flight. A free
+  slot goes to the most urgent waiting lane (chat, then crisis, then
+  background), and ``lane_limits`` keeps background analyses from taking
+  every slot;
+- an optional cluster-wide cap (``global_concurrency``), a Redis sorted set
+  of leased slots shared by web and Celery processes, so a burst of
+  analyses cannot pile onto the single Ollama instance;
+- a circuit breaker. After ``failure_threshold`` consecutive failures
+  (connection errors, timeouts, 429 and 5xx) calls fail fast with
+  ``LLMUnavailable`` for ``reset_timeout`` seconds, then one probe call
+  decides whether to close it again.
+
+Every call records its latency and token counts in Redis histograms per
+backend and lane, plus totals per calling service; ``stats()`` and
+``manage.py llm_gateway status`` read them back.
+
+Backends are configured by ``LLM_BACKENDS``, whose entries are merged over
+``default_backends()``.
+"""
+
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django_redis import get_redis_connection
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+CHAT = "chat"
+CRISIS = "crisis"
+BACKGROUND = "background"
+# Most urgent first
+LANES = (CHAT, CRISIS, BACKGROUND)
+
+LATENCY_BUCKETS_MS = (250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+TOKEN_BUCKETS = (16, 64, 256, 1024, 4096)
+
+METRICS_KEY = "llm:metrics:{backend}:{lane}"
+SERVICE_METRICS_KEY = "llm:metrics:services"
+SLOTS_KEY = "llm:slots:{backend}"
+
+CONNECT_TIMEOUT = 3.05
+
+# KEYS: slot set; ARGV: now, lease seconds, limit, token
+ACQUIRE_SLOT_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', tonumber(ARGV[1]) - tonumber(ARGV[2]))
+if redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[3]) then
+    redis.call('ZADD', KEYS[1], ARGV[1], ARGV[4])
+    redis.call('EXPIRE', KEYS[1], math.ceil(tonumber(ARGV[2])))
+    return 1
+end
+return 0
+"""
+
+
+def default_backends() -> Dict[str, Dict[str, Any]]:
+    return {
+        "ollama": {
+            "kind": "ollama",
+            "url": getattr(settings, "OLLAMA_URL", "http://localhost:11434"),
+            "timeout": 60,
+            "pool_size": 10,
+            "max_concurrency": 4,
+            "global_concurrency": 2,
+            "lane_limits": {BACKGROUND: 2},
+            "queue_timeout": {CHAT: 10, CRISIS: 30, BACKGROUND: 300},
+            "failure_threshold": 5,
+            "reset_timeout": 30,
+        },
+        "gemini": {
+            "kind": "gemini",
+            "url": "https://generativelanguage.googleapis.com/v1beta",
+            "timeout": getattr(settings, "CHATBOT_SETTINGS", {}).get(
+                "RESPONSE_TIMEOUT", 30
+            ),
+            "pool_size": 20,
+            "max_concurrency": 16,
+            "global_concurrency": None,
+            "lane_limits": {BACKGROUND: 4},
+            "queue_timeout": {CHAT: 10, CRISIS: 10, BACKGROUND: 60},
+            "failure_threshold": 5,
+            "reset_timeout": 30,
+        },
+        "ai_api": {
+            "kind": "json",
+            "url": getattr(settings, "AI_API_ENDPOINT", None),
+            "timeout": 30,
+            "pool_size": 4,
+            "max_concurrency": 4,
+            "global_concurrency": None,
+            "lane_limits": {},
+            "queue_timeout": {CHAT: 10, CRISIS: 10, BACKGROUND: 60},
+            "failure_threshold": 5,
+            "reset_timeout": 60,
+        },
+    }
+
+
+def backend_config(name: str) -> Dict[str, Any]:
+    overrides = getattr(settings, "LLM_BACKENDS", {})
+    defaults = default_backends()
+    if name not in defaults and name not in overrides:
+        raise LookupError(f"Unknown LLM backend: {name}")
+    return {**defaults.get(name, {}), **overrides.get(name, {})}
+
+
+class LLMError(Exception):
+    """An LLM call that produced no usable response"""
+
+
+class LLMUnavailable(LLMError):
+    """The backend's circuit is open or no slot freed up in time"""
+
+
+class LLMRequestError(LLMError):
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@dataclass
+class LLMResult:
+    text: str
+    data: Dict[str, Any]
+    backend: str
+    model: Optional[str] = None
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latency: float = 0.0
+
+
+class PrioritySemaphore:
+    """
+    Counting semaphore whose free slots go to the most urgent waiting lane.
+    ``lane_limits`` caps the slots a lane may hold at once.
+    """
+
+    def __init__(self, limit: int, lane_limits: Optional[Dict[str, int]] = None):
+        self._cond = threading.Condition()
+        self._free = limit
+        self._waiting = {lane: deque() for lane in LANES}
+        self._active = {lane: 0 for lane in LANES}
+        self._lane_limits = lane_limits or {}
+
+    def _can_enter(self, lane: str, ticket) -> bool:
+        if self._free <= 0 or self._waiting[lane][0] is not ticket:
+            return False
+        for other in LANES[: LANES.index(lane)]:
+            if self._waiting[other]:
+                return False
+        cap = self._lane_limits.get(lane)
+        return cap is None or self._active[lane] < cap
+
+    def acquire(self, lane: str, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        ticket = object()
+        with self._cond:
+            # First come, first served within a lane
+            self._waiting[lane].append(ticket)
+            try:
+                while not self._can_enter(lane, ticket):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+                self._free -= 1
+                self._active[lane] += 1
+                return True
+            finally:
+                self._waiting[lane].remove(ticket)
+                # Waiters held back by this one may go now
+                self._cond.notify_all()
+
+    def release(self, lane: str) -> None:
+        with self._cond:
+            self._free += 1
+            self._active[lane] -= 1
+            self._cond.notify_all()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "free": self._free,
+                "active": dict(self._active),
+                "waiting": {lane: len(q) for lane, q in self._waiting.items()},
+            }
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with a single half-open probe"""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return "open"
+        return "half-open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "open" or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    logger.warning(f"LLM circuit opened after {self.failures} failures")
+                self.opened_at = time.monotonic()
+
+    def cancel(self) -> None:
+        """The allowed call was not made (e.g. no slot); let another probe"""
+        with self._lock:
+            self._probing = False
+
+
+class Backend:
+    """Connection pool, limits and breaker of one backend in this process"""
+
+    def __init__(self, name: str, config: Dict[str, Any]):
+        self.name = name
+        self.config = config
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=config["pool_size"], max_retries=0
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.semaphore = PrioritySemaphore(
+            config["max_concurrency"], config.get("lane_limits")
+        )
+        self.breaker = CircuitBreaker(
+            config["failure_threshold"], config["reset_timeout"]
+        )
+
+    def url(self, path: str) -> str:
+        base = self.config["url"]
+        if not base:
+            raise LLMUnavailable(f"LLM backend {self.name} is not configured")
+        return f"{base.rstrip('/')}/{path.lstrip('/')}"
+
+    def queue_timeout(self, lane: str) -> float:
+        return self.config.get("queue_timeout", {}).get(lane, 60)
+
+
+def _redis():
+    return get_redis_connection("default")
+
+
+def _bucket(value: float, bounds) -> str:
+    for bound in bounds:
+        if value <= bound:
+            return str(bound)
+    return "inf"
+
+
+def _parse(kind: str, data: Dict[str, Any]):
+    """``(text, prompt tokens, completion tokens)`` of a backend response"""
+    if kind == "ollama":
+        return (
+            data.get("response", ""),
+            data.get("prompt_eval_count", 0),
+            data.get("eval_count", 0),
+        )
+    if kind == "gemini":
+        usage = data.get("usageMetadata", {})
+        try:
+            text = data["candidates"][0]["content"]["parts"][0]["text"]
+        except (KeyError, IndexError, TypeError):
+            raise LLMRequestError("Gemini response has no candidate text")
+        return (
+            text,
+            usage.get("promptTokenCount", 0),
+            usage.get("candidatesTokenCount", 0),
+        )
+    return "", 0, 0
+
+
+class LLMGateway:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._backends: Dict[str, Backend] = {}
+
+    def backend(self, name: str) -> Backend:
+        if self._pid != os.getpid():
+            # Forked worker: pooled sockets and locks belong to the parent
+            with self._lock:
+                self._backends = {}
+                self._pid = os.getpid()
+        backend = self._backends.get(name)
+        if backend is None:
+            with self._lock:
+                backend = self._backends.get(name)
+                if backend is None:
+                    backend = Backend(name, backend_config(name))
+                    self._backends[name] = backend
+        return backend
+
+    def generate(
+        self,
+        prompt: str,
+        *,
+        model: Optional[str] = None,
+        lane: str = BACKGROUND,
+        service: str = "",
+        options: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+    ) -> LLMResult:
+        """Complete ``prompt`` with an Ollama model"""
+        model = model or getattr(settings, "AI_ENGINE_SETTINGS", {}).get(
+            "DEFAULT_MODEL", "mistral"
+        )
+        payload = {"model": model, "prompt": prompt, "stream": False}
+        if options:
+            payload["options"] = options
+        result = self.request(
+            "ollama",
+            "api/generate",
+            payload,
+            lane=lane,
+            service=service,
+            timeout=timeout,
+        )
+        result.model = model
+        return result
+
+    async def agenerate(self, prompt: str, **kwargs) -> LLMResult:
+        """``generate`` for async callers; the call runs in a worker thread"""
+        return await sync_to_async(self.generate, thread_sensitive=False)(
+            prompt, **kwargs
+        )
+
+    async def arequest(self, backend_name: str, path: str, payload=None, **kwargs):
+        """``request`` for async callers"""
+        return await sync_to_async(self.request, thread_sensitive=False)(
+            backend_name, path, payload, **kwargs
+        )
+
+    def request(
+        self,
+        backend_name: str,
+        path: str,
+        payload: Optional[Dict[str, Any]] = None,
+        *,
+        method: str = "POST",
+        lane: str = BACKGROUND,
+        service: str = "",
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> LLMResult:
+        """
+        Send one request to ``backend_name`` through its pool, limits and
+        breaker. Raises ``LLMUnavailable`` without calling the backend when
+        its circuit is open or no slot frees up within the lane's queue
+        timeout, and ``LLMRequestError`` when the call fails.
+        """
+        if lane not in LANES:
+            raise ValueError(f"Unknown lane: {lane}")
+        backend = self.backend(backend_name)
+        url = backend.url(path)
+        if not backend.breaker.allow():
+            self._record(backend_name, lane, service, None, 0, 0, "rejected")
+            raise LLMUnavailable(f"LLM backend {backend_name} circuit is open")
+
+        slot = self._acquire(backend, lane)
+        if slot is None:
+            backend.breaker.cancel()
+            self._record(backend_name, lane, service, None, 0, 0, "rejected")
+            raise LLMUnavailable(
+                f"No {backend_name} slot for the {lane} lane within "
+                f"{backend.queue_timeout(lane)}s"
+            )
+
+        started = time.perf_counter()
+        try:
+            response = backend.session.request(
+                method,
+                url,
+                json=payload,
+                headers=headers,
+                timeout=(CONNECT_TIMEOUT, timeout or backend.config["timeout"]),
+            )
+        except requests.RequestException as e:
+            latency = time.perf_counter() - started
+            backend.breaker.failure()
+            self._record(backend_name, lane, service, latency, 0, 0, "error")
+            raise LLMRequestError(f"{backend_name} request failed: {str(e)}")
+        finally:
+            self._release(backend, lane, slot)
+
+        latency = time.perf_counter() - started
+        if response.status_code != 200:
+            if response.status_code == 429 or response.status_code >= 500:
+                backend.breaker.failure()
+            else:
+                backend.breaker.success()
+            self._record(backend_name, lane, service, latency, 0, 0, "error")
+            raise LLMRequestError(
+                f"{backend_name} request failed with status "
+                f"{response.status_code}: {response.text[:200]}",
+                status_code=response.status_code,
+            )
+
+        backend.breaker.success()
+        try:
+            data = response.json()
+            text, prompt_tokens, completion_tokens = _parse(
+                backend.config["kind"], data
+            )
+        except ValueError:
+            self._record(backend_name, lane, service, latency, 0, 0, "error")
+            raise LLMRequestError(f"{backend_name} returned invalid JSON")
+        except LLMRequestError:
+            self._record(backend_name, lane, service, latency, 0, 0, "error")
+            raise
+
+        self._record(
+            backend_name, lane, service, latency, prompt_tokens, completion_tokens
+        )
+        return LLMResult(
+            text=text,
+            data=data,
+            backend=backend_name,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            latency=latency,
+        )
+
+    def ping(self, backend_name: str = "ollama") -> bool:
+        """Whether the backend answers (Ollama: its model list)"""
+        backend = self.backend(backend_name)
+        try:
+            response = backend.session.get(backend.url("api/tags"), timeout=5)
+        except requests.RequestException:
+            return False
+        return response.status_code == 200
+
+    def _acquire(self, backend: Backend, lane: str) -> Optional[str]:
+        """Take a local slot, then a cluster slot; returns the lease token"""
+        timeout = backend.queue_timeout(lane)
+        deadline = time.monotonic() + timeout
+        if not backend.semaphore.acquire(lane, timeout):
+            return None
+
+        limit = backend.config.get("global_concurrency")
+        if not limit:
+            return ""
+        token = uuid.uuid4().hex
+        key = SLOTS_KEY.format(backend=backend.name)
+        # A lease outlives the longest call, so crashed holders expire
+        lease = backend.config["timeout"] + 10
+        # Urgent lanes poll more often and so win most free slots
+        interval = 0.02 * (LANES.index(lane) + 1) ** 2
+        try:
+            script = _redis().register_script(ACQUIRE_SLOT_SCRIPT)
+            while True:
+                if script(keys=[key], args=[time.time(), lease, limit, token]):
+                    return token
+                if time.monotonic() >= deadline:
+                    backend.semaphore.release(lane)
+                    return None
+                time.sleep(interval)
+        except Exception as e:
+            logger.warning(f"LLM slot limiter unavailable, local limit only: {e}")
+            return ""
+
+    def _release(self, backend: Backend, lane: str, token: str) -> None:
+        backend.semaphore.release(lane)
+        if not token:
+            return
+        try:
+            _redis().zrem(SLOTS_KEY.format(backend=backend.name), token)
+        except Exception as e:
+            logger.warning(f"Could not release LLM slot: {e}")
+
+    def _record(
+        self,
+        backend: str,
+        lane: str,
+        service: str,
+        latency: Optional[float],
+        prompt_tokens: int,
+        completion_tokens: int,
+        outcome: str = "ok",
+    ) -> None:
+        key = METRICS_KEY.format(backend=backend, lane=lane)
+        service = service or "unknown"
+        try:
+            pipe = _redis().pipeline(transaction=False)
+            pipe.hincrby(key, outcome, 1)
+            pipe.hincrby(SERVICE_METRICS_KEY, f"{service}:{outcome}", 1)
+            if latency is not None:
+                latency_ms = latency * 1000
+                pipe.hincrby(
+                    key, f"latency:{_bucket(latency_ms, LATENCY_BUCKETS_MS)}", 1
+                )
+                pipe.hincrbyfloat(key, "latency_ms_sum", latency_ms)
+                pipe.hincrbyfloat(
+                    SERVICE_METRICS_KEY, f"{service}:latency_ms_sum", latency_ms
+                )
+            if outcome == "ok":
+                pipe.hincrby(
+                    key, f"tokens:{_bucket(completion_tokens, TOKEN_BUCKETS)}", 1
+                )
+                pipe.hincrby(key, "prompt_tokens", prompt_tokens)
+                pipe.hincrby(key, "completion_tokens", completion_tokens)
+                pipe.hincrby(
+                    SERVICE_METRICS_KEY,
+                    f"{service}:tokens",
+                    prompt_tokens + completion_tokens,
+                )
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Could not record LLM metrics: {e}")
+
+    def breakers(self) -> Dict[str, Dict[str, Any]]:
+        """Breaker and slot state of the backends used by this process"""
+        return {
+            name: {
+                "state": backend.breaker.state,
+                "failures": backend.breaker.failures,
+                **backend.semaphore.snapshot(),
+            }
+            for name, backend in self._backends.items()
+        }
+
+
+def _decode(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _quantile(buckets: Dict[str, int], bounds, q: float):
+    total = sum(buckets.values())
+    if not total:
+        return None
+    seen = 0
+    for bound in [str(b) for b in bounds] + ["inf"]:
+        seen += buckets.get(bound, 0)
+        if seen >= q * total:
+            return bound
+    return "inf"
+
+
+def stats(backends: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Recorded call counts, latency/token histograms and bucketed p50/p95 per
+    backend and lane, and totals per calling service
+    """
+    client = _redis()
+    result = {"backends": {}, "services": {}}
+    for backend in backends or list(
+        {**default_backends(), **getattr(settings, "LLM_BACKENDS", {})}
+    ):
+        for lane in LANES:
+            raw = {
+                _decode(k): _decode(v)
+                for k, v in client.hgetall(
+                    METRICS_KEY.format(backend=backend, lane=lane)
+                ).items()
+            }
+            if not raw:
+                continue
+            latency = {
+                k.split(":", 1)[1]: int(v)
+                for k, v in raw.items()
+                if k.startswith("latency:")
+            }
+            tokens = {
+                k.split(":", 1)[1]: int(v)
+                for k, v in raw.items()
+                if k.startswith("tokens:")
+            }
+            calls = sum(latency.values())
+            result["backends"].setdefault(backend, {})[lane] = {
+                "ok": int(raw.get("ok", 0)),
+                "error": int(raw.get("error", 0)),
+                "rejected": int(raw.get("rejected", 0)),
+                "latency_ms_avg": (
+                    round(float(raw.get("latency_ms_sum", 0)) / calls, 1)
+                    if calls
+                    else None
+                ),
+                "latency_ms_p50": _quantile(latency, LATENCY_BUCKETS_MS, 0.5),
+                "latency_ms_p95": _quantile(latency, LATENCY_BUCKETS_MS, 0.95),
+                "latency_histogram": latency,
+                "completion_tokens_histogram": tokens,
+                "prompt_tokens": int(raw.get("prompt_tokens", 0)),
+                "completion_tokens": int(raw.get("completion_tokens", 0)),
+            }
+    for name, value in client.hgetall(SERVICE_METRICS_KEY).items():
+        service, metric = _decode(name).rsplit(":", 1)
+        value = float(_decode(value))
+        result["services"].setdefault(service, {})[metric] = (
+            round(value, 1) if metric == "latency_ms_sum" else int(value)
+        )
+    return result
+
+
+def reset_stats() -> None:
+    client = _redis()
+    keys = list(client.scan_iter("llm:metrics:*"))
+    if keys:
+        client.delete(*keys)
+
+
+# Process-wide gateway used by the AI engine and chatbot services
+llm_gateway = LLMGateway()
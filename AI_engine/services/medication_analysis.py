@@ -2,7 +2,8 @@
 from typing import Dict, Any
 import logging
 from django.conf import settings
-import requests
+from .llm_cache import cached_generate
+from .llm_gateway import LLMError
 from django.utils import timezone
 from ..models import MedicationEffectAnalysis, AIInsight
 
@@ -214,19 +215,14 @@ class MedicationAnalysisService:
         try:
             prompt = self._build_analysis_prompt(data)
 
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json={"model": self.model, "prompt": prompt, "stream": False},
-            )
-
-            if response.status_code == 200:
-                result = response.json()
-                return self._parse_analysis_response(result["response"])
-            else:
-                logger.error(
-                    f"Ollama request failed with status {response.status_code}"
+            try:
+                result = cached_generate(
+                    prompt, model=self.model, service="medication_analysis"
                 )
+            except LLMError as e:
+                logger.error(f"Ollama request failed: {str(e)}")
                 return self._create_default_analysis()
+            return self._parse_analysis_response(result.text)
 
         except Exception as e:
             logger.error(f"Error in Ollama analysis: {str(e)}")
@@ -1,7 +1,8 @@
 # AI_engine/services/predictive_service.py
 import logging
 from typing import Dict, Any, List
-import requests
+from .llm_cache import cached_generate
+from .llm_gateway import LLMError
 from django.utils import timezone
 from django.core.cache import cache
 from datetime import timedelta
@@ -682,19 +683,14 @@ class PredictiveAnalysisService:
         try:
             prompt = self._build_enhanced_prediction_prompt(data)
 
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json={"model": self.model, "prompt": prompt, "stream": False},
-                timeout=30,
-            )
-
-            if response.status_code == 200:
-                result = response.json()
-                response_text = result.get("response", "{}")
-                return self._parse_enhanced_prediction_response(response_text)
-            else:
-                logger.error(f"Ollama request failed: {response.status_code}")
+            try:
+                result = cached_generate(
+                    prompt, model=self.model, service="predictive_service"
+                )
+            except LLMError as e:
+                logger.error(f"Ollama request failed: {str(e)}")
                 return self._create_default_prediction("ai_request_failed")
+            return self._parse_enhanced_prediction_response(result.text or "{}")
 
         except Exception as e:
             logger.error(f"Error in AI mood trend analysis: {str(e)}")
@@ -1145,19 +1141,14 @@ Provide analysis in JSON format:
 }}
 """
 
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json={"model": self.model, "prompt": prompt, "stream": False},
-                timeout=30,
-            )
-
-            if response.status_code == 200:
-                result = response.json()
-                response_text = result.get("response", "{}")
-                return self._parse_therapy_prediction_response(response_text)
-            else:
-                logger.error(f"Ollama request failed: {response.status_code}")
+            try:
+                result = cached_generate(
+                    prompt, model=self.model, service="predictive_service"
+                )
+            except LLMError as e:
+                logger.error(f"Ollama request failed: {str(e)}")
                 return self._create_default_prediction("therapy_ai_failed")
+            return self._parse_therapy_prediction_response(result.text or "{}")
 
         except Exception as e:
             logger.error(f"Error in AI therapy outcome analysis: {str(e)}")
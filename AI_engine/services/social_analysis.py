@@ -2,13 +2,13 @@
 from typing import Dict, List, Any
 import logging
 from django.conf import settings
-import requests
+from .llm_cache import cached_generate
+from .llm_gateway import LLMError
 from django.utils import timezone
 import numpy as np
 from django.core.cache import cache
 import re
 from collections import defaultdict
-from scipy import stats
 
 logger = logging.getLogger(__name__)
 
@@ -823,6 +823,9 @@ class SocialInteractionAnalysisService:
 
             # Calculate correlations
             try:
+                # scipy.stats takes most of a second to import
+                from scipy import stats
+
                 correlation_coefficient, p_value = stats.pearsonr(
                     activity_values, mood_values
                 )
@@ -897,20 +900,14 @@ class SocialInteractionAnalysisService:
         try:
             prompt = self._build_enhanced_analysis_prompt(data)
 
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json={"model": self.model, "prompt": prompt, "stream": False},
-                timeout=30,
-            )
-
-            if response.status_code == 200:
-                result = response.json()
-                return self._parse_analysis_response(result["response"])
-            else:
-                logger.error(
-                    f"Ollama request failed with status {response.status_code}"
+            try:
+                result = cached_generate(
+                    prompt, model=self.model, service="social_analysis"
                 )
+            except LLMError as e:
+                logger.error(f"Ollama request failed: {str(e)}")
                 return self._create_default_analysis()
+            return self._parse_analysis_response(result.text)
 
         except Exception as e:
             logger.error(f"Error in Ollama analysis: {str(e)}")
@@ -1,7 +1,8 @@
 # AI_engine/services/therapy_analysis.py
 from typing import Dict, List, Any, Optional
 import logging
-import requests
+from .llm_cache import cached_generate
+from .llm_gateway import LLMError, llm_gateway
 import json
 import re
 from django.conf import settings
@@ -34,8 +35,7 @@ class TherapyAnalysisService:
         """Initialize the therapy analysis service"""
         try:
             # Check if Ollama is accessible
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
-            if response.status_code == 200:
+            if llm_gateway.ping("ollama"):
                 self.initialized = True
                 logger.info("Therapy Analysis Service initialized successfully")
                 return True
@@ -428,44 +428,37 @@ class TherapyAnalysisService:
         try:
             prompt = self._build_therapy_analysis_prompt(data)
 
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json={"model": self.model, "prompt": prompt, "stream": False},
-                timeout=30,
-            )
-
-            if response.status_code == 200:
-                result = response.json()
-                response_text = result.get("response", "{}")
-
-                try:
-                    # Try to extract JSON from response
-                    if "```json" in response_text:
-                        json_start = response_text.find("```json") + 7
-                        json_end = response_text.find("```", json_start)
-                        json_str = response_text[json_start:json_end].strip()
-                        analysis = json.loads(json_str)
-                    elif "```" in response_text and response_text.count("```") >= 2:
-                        json_start = response_text.find("```") + 3
-                        json_end = response_text.find("```", json_start)
-                        json_str = response_text[json_start:json_end].strip()
-                        analysis = json.loads(json_str)
-                    else:
-                        # Try to parse the entire response as JSON
-                        analysis = json.loads(response_text)
-
-                    # Validate and enhance the analysis
-                    return self._validate_and_enhance_analysis(analysis)
-
-                except json.JSONDecodeError as e:
-                    logger.error(f"Failed to parse JSON response: {str(e)}")
-                    logger.error(f"Response text: {response_text[:500]}...")
-                    return self._create_fallback_analysis(data)
-
-            else:
-                logger.error(
-                    f"Ollama request failed with status {response.status_code}"
+            try:
+                result = cached_generate(
+                    prompt, model=self.model, service="therapy_analysis"
                 )
+            except LLMError as e:
+                logger.error(f"Ollama request failed: {str(e)}")
+                return self._create_fallback_analysis(data)
+
+            response_text = result.text or "{}"
+            try:
+                # Try to extract JSON from response
+                if "```json" in response_text:
+                    json_start = response_text.find("```json") + 7
+                    json_end = response_text.find("```", json_start)
+                    json_str = response_text[json_start:json_end].strip()
+                    analysis = json.loads(json_str)
+                elif "```" in response_text and response_text.count("```") >= 2:
+                    json_start = response_text.find("```") + 3
+                    json_end = response_text.find("```", json_start)
+                    json_str = response_text[json_start:json_end].strip()
+                    analysis = json.loads(json_str)
+                else:
+                    # Try to parse the entire response as JSON
+                    analysis = json.loads(response_text)
+
+                # Validate and enhance the analysis
+                return self._validate_and_enhance_analysis(analysis)
+
+            except json.JSONDecodeError as e:
+                logger.error(f"Failed to parse JSON response: {str(e)}")
+                logger.error(f"Response text: {response_text[:500]}...")
                 return self._create_fallback_analysis(data)
 
         except Exception as e:
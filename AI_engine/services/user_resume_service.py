@@ -434,7 +434,9 @@ class UserResumeService:
             prompt = self._create_therapist_guidance_prompt(user, dataset, cards_data)
 
             # Get AI analysis
-            ai_response = self.ai_service.generate_text(prompt)
+            ai_response = self.ai_service.generate_text(
+                prompt, service="user_resume_service"
+            )
 
             # Parse AI response into structured guidance
             therapist_guidance = self._parse_therapist_guidance(
@@ -0,0 +1,18 @@
+# AI_engine/tasks.py
+import logging
+
+from celery import shared_task
+
+from .services import llm_cache
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(soft_time_limit=300)
+def refresh_llm_response(key, token, *args):
+    """Regenerate a stale cached LLM response (see services.llm_cache)"""
+    try:
+        llm_cache.refresh(key, token, *args)
+    except Exception as e:
+        # The stale entry keeps being served; the next read queues a retry
+        logger.warning(f"Could not refresh LLM response {key}: {str(e)}")
@@ -1 +1,90 @@
-# Create your tests here.
+import threading
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from AI_engine.services import llm_cache
+from AI_engine.services.llm_gateway import BACKGROUND, CHAT, LLMResult
+
+
+class FakeRedisLock:
+    """SET NX EX, the release script and HINCRBY, safe across threads"""
+
+    def __init__(self):
+        self.values = {}
+        self.counts = {}
+        self.guard = threading.Lock()
+        self.expiries = []
+
+    def set(self, key, value, nx=False, ex=None):
+        with self.guard:
+            if nx and key in self.values:
+                return None
+            self.values[key] = value
+            self.expiries.append(ex)
+            return True
+
+    def register_script(self, script):
+        def release(keys, args):
+            with self.guard:
+                if self.values.get(keys[0]) == args[0]:
+                    del self.values[keys[0]]
+                    return 1
+                return 0
+
+        return release
+
+    def hincrby(self, key, field, amount):
+        with self.guard:
+            self.counts[field] = self.counts.get(field, 0) + amount
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    LLM_BACKENDS={"ollama": {"timeout": 60, "queue_timeout": {BACKGROUND: 300}}},
+    LLM_CACHE_TIMEOUT_MARGIN=30,
+)
+class LLMCacheTest(SimpleTestCase):
+    def setUp(self):
+        llm_cache._cache().clear()
+        self.redis = FakeRedisLock()
+        patcher = mock.patch.object(llm_cache, "_redis", lambda: self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_timeouts_cover_a_queued_generation(self):
+        # Queueing for a slot, then the request itself, then the margin
+        self.assertEqual(llm_cache.generation_timeout(BACKGROUND), 393)
+        self.assertLess(
+            llm_cache.generation_timeout(CHAT), llm_cache.generation_timeout(BACKGROUND)
+        )
+
+    def test_concurrent_identical_requests_generate_once(self):
+        calls = []
+
+        def generate(prompt, **kwargs):
+            calls.append(prompt)
+            time.sleep(0.3)
+            return LLMResult(text="answer", data={}, backend="ollama", model="m")
+
+        results = []
+
+        def ask():
+            results.append(
+                llm_cache.cached_generate("same prompt", model="m", service="test")
+            )
+
+        with mock.patch.object(llm_cache.llm_gateway, "generate", generate):
+            threads = [threading.Thread(target=ask) for _ in range(5)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([result.text for result in results], ["answer"] * 5)
+        self.assertEqual(self.redis.counts, {"test:miss": 1, "test:coalesced": 4})
+        # The lock outlives the longest generation the leader may run
+        self.assertEqual(set(self.redis.expiries), {393})
+        self.assertEqual(self.redis.values, {})
@@ -0,0 +1,280 @@
+# appointments/availability.py
+"""
+Slot-based availability engine
+
+A therapist's ``available_days`` ({"monday": [{"start": "09:00", "end":
+"12:00"}, ...]}) is compiled once into sorted, merged minute intervals per
+weekday. Compiled schedules are memoized by content, so an edited schedule
+simply compiles to a new entry. Free time for a date range is the working
+windows minus the bookings, and the bookings of any number of therapists
+come from a single range query on ``Appointment.time_range``. PostgreSQL
+exclusion constraints on that column refuse overlapping bookings
+regardless of what was checked here.
+"""
+
+import json
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from functools import lru_cache, reduce
+from operator import or_
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import BOOKED_STATUSES, Appointment
+
+WEEKDAYS = (
+    "monday",
+    "tuesday",
+    "wednesday",
+    "thursday",
+    "friday",
+    "saturday",
+    "sunday",
+)
+
+Interval = Tuple[datetime, datetime]
+
+
+def _minutes(value: str) -> int:
+    hours, minutes = value.split(":")
+    hours, minutes = int(hours), int(minutes)
+    if not (0 <= hours < 24 and 0 <= minutes < 60):
+        raise ValueError(value)
+    return hours * 60 + minutes
+
+
+def merge_intervals(intervals: Iterable[tuple]) -> list:
+    """Sort ``intervals`` and join the overlapping or touching ones"""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class WeeklySchedule:
+    """Working hours as sorted, disjoint (start, end) minutes per weekday"""
+
+    def __init__(self, days: Dict[int, Tuple[Tuple[int, int], ...]]):
+        self.days = days
+        self._starts = {
+            weekday: [start for start, _ in intervals]
+            for weekday, intervals in days.items()
+        }
+
+    def __bool__(self):
+        return bool(self.days)
+
+    def windows(self, start: datetime, end: datetime) -> List[Interval]:
+        """Working windows clipped to [start, end), in order"""
+        tz = timezone.get_current_timezone()
+        day = timezone.localtime(start, tz).date()
+        last = timezone.localtime(end, tz).date()
+        windows = []
+        while day <= last:
+            midnight = datetime.combine(day, time.min)
+            for first, final in self.days.get(day.weekday(), ()):
+                window_start = timezone.make_aware(
+                    midnight + timedelta(minutes=first), tz
+                )
+                window_end = timezone.make_aware(
+                    midnight + timedelta(minutes=final), tz
+                )
+                if window_start < end and window_end > start:
+                    windows.append((max(window_start, start), min(window_end, end)))
+            day += timedelta(days=1)
+        return windows
+
+    def covers(self, start: datetime, end: datetime) -> bool:
+        """Whether [start, end) lies inside a single working window"""
+        local_start = timezone.localtime(start)
+        local_end = timezone.localtime(end)
+        if local_start.date() != local_end.date():
+            return False
+        weekday = local_start.weekday()
+        starts = self._starts.get(weekday)
+        if not starts:
+            return False
+        first = local_start.hour * 60 + local_start.minute + local_start.second / 60
+        final = local_end.hour * 60 + local_end.minute + local_end.second / 60
+        index = bisect_right(starts, first) - 1
+        return index >= 0 and final <= self.days[weekday][index][1]
+
+
+@lru_cache(maxsize=2048)
+def _compile(canonical: str) -> WeeklySchedule:
+    days = {}
+    for name, slots in json.loads(canonical).items():
+        name = str(name).lower()
+        if name not in WEEKDAYS or not isinstance(slots, list):
+            continue
+        intervals = []
+        for slot in slots:
+            try:
+                first, final = _minutes(slot["start"]), _minutes(slot["end"])
+            except (KeyError, TypeError, ValueError, AttributeError):
+                continue
+            if first < final:
+                intervals.append((first, final))
+        if intervals:
+            days[WEEKDAYS.index(name)] = tuple(merge_intervals(intervals))
+    return WeeklySchedule(days)
+
+
+def compile_schedule(available_days) -> WeeklySchedule:
+    """Compiled ``available_days``; malformed slots are skipped"""
+    if not isinstance(available_days, dict):
+        available_days = {}
+    return _compile(json.dumps(available_days, sort_keys=True))
+
+
+def _aware(value: datetime) -> datetime:
+    return timezone.make_aware(value) if timezone.is_naive(value) else value
+
+
+def _duration(therapist, duration) -> timedelta:
+    if duration is None:
+        duration = therapist.session_duration
+    if isinstance(duration, timedelta):
+        return duration
+    return timedelta(minutes=duration)
+
+
+def bookings(
+    ranges: Dict[int, Interval], exclude: Optional[int] = None
+) -> Dict[int, List[Interval]]:
+    """
+    Merged booked intervals per therapist id, for the ``(start, end)`` range
+    given for each therapist. One query regardless of the number of
+    therapists; the GiST index behind the exclusion constraint serves it.
+    """
+    if not ranges:
+        return {}
+    overlapping = reduce(
+        or_,
+        (
+            Q(therapist_id=therapist_id, time_range__overlap=(start, end))
+            for therapist_id, (start, end) in ranges.items()
+        ),
+    )
+    rows = Appointment.objects.filter(
+        overlapping, status__in=BOOKED_STATUSES
+    ).values_list("therapist_id", "appointment_date", "duration")
+    if exclude is not None:
+        rows = rows.exclude(pk=exclude)
+
+    booked = defaultdict(list)
+    for therapist_id, start, duration in rows.order_by():
+        booked[therapist_id].append((start, start + duration))
+    return {
+        therapist_id: merge_intervals(busy) for therapist_id, busy in booked.items()
+    }
+
+
+def _subtract(windows: Sequence[Interval], busy: Sequence[Interval]) -> List[Interval]:
+    """Parts of sorted ``windows`` not covered by sorted, merged ``busy``"""
+    free = []
+    index = 0
+    for window_start, window_end in windows:
+        cursor = window_start
+        while index < len(busy) and busy[index][1] <= cursor:
+            index += 1
+        scan = index
+        while scan < len(busy) and busy[scan][0] < window_end:
+            busy_start, busy_end = busy[scan]
+            if busy_start > cursor:
+                free.append((cursor, busy_start))
+            cursor = max(cursor, busy_end)
+            scan += 1
+        if cursor < window_end:
+            free.append((cursor, window_end))
+    return free
+
+
+def free_intervals(
+    therapists, start: datetime, end: datetime
+) -> Dict[int, List[Interval]]:
+    """Free (start, end) intervals of every therapist in [start, end)"""
+    start, end = _aware(start), _aware(end)
+    therapists = list(therapists)
+    booked = bookings({therapist.pk: (start, end) for therapist in therapists})
+    return {
+        therapist.pk: _subtract(
+            compile_schedule(therapist.available_days).windows(start, end),
+            booked.get(therapist.pk, []),
+        )
+        for therapist in therapists
+    }
+
+
+def free_slots(
+    therapist,
+    start: datetime,
+    end: datetime,
+    duration=None,
+    step: Optional[int] = None,
+) -> List[datetime]:
+    """
+    Bookable start times in [start, end) for sessions of ``duration``
+    (default: the therapist's session length), on a ``step``-minute grid
+    """
+    length = _duration(therapist, duration)
+    step = timedelta(minutes=step or getattr(settings, "APPOINTMENT_SLOT_STEP", 30))
+    slots = []
+    for free_start, free_end in free_intervals([therapist], start, end)[therapist.pk]:
+        local = timezone.localtime(free_start)
+        midnight = local.replace(hour=0, minute=0, second=0, microsecond=0)
+        # First grid point at or after the start of the free interval
+        offset = -((midnight - local) // step) * step
+        slot = free_start + (offset - (local - midnight))
+        while slot + length <= free_end:
+            slots.append(slot)
+            slot += step
+    return slots
+
+
+def find_available(
+    requests: Iterable[tuple], exclude: Optional[int] = None
+) -> List[bool]:
+    """
+    Answer many ``(therapist, start, duration)`` questions at once; a None
+    duration means the therapist's session length. One bookings query in
+    total.
+    """
+    requests = [
+        (therapist, _aware(start), _duration(therapist, duration))
+        for therapist, start, duration in requests
+    ]
+    ranges = {}
+    for therapist, start, length in requests:
+        first, final = ranges.get(therapist.pk, (start, start + length))
+        ranges[therapist.pk] = (min(first, start), max(final, start + length))
+    booked = bookings(ranges, exclude=exclude)
+
+    answers = []
+    for therapist, start, length in requests:
+        end = start + length
+        if not compile_schedule(therapist.available_days).covers(start, end):
+            answers.append(False)
+            continue
+        answers.append(not overlaps(booked.get(therapist.pk, []), start, end))
+    return answers
+
+
+def overlaps(busy: Sequence[Interval], start: datetime, end: datetime) -> bool:
+    """Whether [start, end) meets any of the sorted, disjoint ``busy`` intervals"""
+    # The interval starting last before ``end`` is the only candidate
+    index = bisect_right(busy, (end,)) - 1
+    return index >= 0 and busy[index][1] > start
+
+
+def is_available(therapist, start: datetime, duration=None, exclude=None) -> bool:
+    """Whether ``therapist`` can take a session of ``duration`` at ``start``"""
+    return find_available([(therapist, start, duration)], exclude=exclude)[0]
@@ -0,0 +1,50 @@
+# Generated by Django 4.2.7 on 2026-10-18 17:05
+
+import django.contrib.postgres.constraints
+import django.contrib.postgres.fields.ranges
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("appointments", "0004_initial"),
+    ]
+
+    operations = [
+        # Lets the exclusion constraints compare the therapist/patient ids
+        BtreeGistExtension(),
+        migrations.AddField(
+            model_name="appointment",
+            name="time_range",
+            field=django.contrib.postgres.fields.ranges.DateTimeRangeField(
+                blank=True, editable=False, null=True
+            ),
+        ),
+        migrations.RunSQL(
+            "UPDATE appointments_appointment "
+            "SET time_range = tstzrange(appointment_date, appointment_date + duration)",
+            migrations.RunSQL.noop,
+        ),
+        # Fails if booked appointments already overlap; resolve those first
+        migrations.AddConstraint(
+            model_name="appointment",
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(
+                condition=models.Q(
+                    ("status__in", ("scheduled", "confirmed", "rescheduled"))
+                ),
+                expressions=[("therapist", "="), ("time_range", "&&")],
+                name="appointments_no_therapist_overlap",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="appointment",
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(
+                condition=models.Q(
+                    ("status__in", ("scheduled", "confirmed", "rescheduled"))
+                ),
+                expressions=[("patient", "="), ("time_range", "&&")],
+                name="appointments_no_patient_overlap",
+            ),
+        ),
+    ]
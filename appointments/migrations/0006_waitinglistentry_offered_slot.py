@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 17:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("appointments", "0005_appointment_time_range"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="waitinglistentry",
+            name="offered_slot",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
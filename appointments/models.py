@@ -1,5 +1,7 @@
 #appointments/models.py
-from django.db import models
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import DateTimeRangeField, RangeOperators
+from django.db import IntegrityError, models, transaction
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
@@ -11,6 +13,13 @@ from django.db.models.signals import post_save
 from django.dispatch import receiver
 from messaging.models.one_to_one import OneToOneConversation
 
+# Statuses that occupy the therapist's and the patient's time
+BOOKED_STATUSES = ("scheduled", "confirmed", "rescheduled")
+OVERLAP_CONSTRAINTS = (
+    "appointments_no_therapist_overlap",
+    "appointments_no_patient_overlap",
+)
+
 
 class Appointment(models.Model):
     STATUS_CHOICES = [
@@ -33,6 +42,8 @@ class Appointment(models.Model):
     )
     appointment_date = models.DateTimeField()
     duration = models.DurationField(default=timedelta(minutes=60))
+    # [appointment_date, appointment_date + duration), kept in sync on save
+    time_range = DateTimeRangeField(null=True, blank=True, editable=False)
     status = models.CharField(
         max_length=20, choices=STATUS_CHOICES, default="scheduled"
     )
@@ -85,6 +96,24 @@ class Appointment(models.Model):
             models.Index(fields=["therapist", "appointment_date"]),
             models.Index(fields=["patient", "appointment_date"]),
         ]
+        constraints = [
+            ExclusionConstraint(
+                name="appointments_no_therapist_overlap",
+                expressions=[
+                    ("therapist", RangeOperators.EQUAL),
+                    ("time_range", RangeOperators.OVERLAPS),
+                ],
+                condition=models.Q(status__in=BOOKED_STATUSES),
+            ),
+            ExclusionConstraint(
+                name="appointments_no_patient_overlap",
+                expressions=[
+                    ("patient", RangeOperators.EQUAL),
+                    ("time_range", RangeOperators.OVERLAPS),
+                ],
+                condition=models.Q(status__in=BOOKED_STATUSES),
+            ),
+        ]
 
     def __str__(self):
         return (
@@ -102,17 +131,35 @@ class Appointment(models.Model):
                 f"https://meet.mindcare.ai/{str(uuid.uuid4())[:8]}"
             )
 
+        if self.appointment_date and self.duration is not None:
+            self.time_range = (
+                self.appointment_date,
+                self.appointment_date + self.duration,
+            )
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "time_range"}
+
         if not self.pk:  # New appointment
             self.original_date = self.appointment_date
             self.rescheduled_by = None  # Explicitly set to None for new appointments
 
             # Skip validation for new appointments to avoid rescheduled_by validation issues
             kwargs["force_insert"] = True
-            super().save(*args, **kwargs)
         else:
             # Only run validation for existing appointments
             self.full_clean()
-            super().save(*args, **kwargs)
+
+        try:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+        except IntegrityError as e:
+            # The exclusion constraints have the final say on double bookings
+            if any(name in str(e) for name in OVERLAP_CONSTRAINTS):
+                raise ValidationError(
+                    "This time slot conflicts with another appointment"
+                )
+            raise
 
     def clean(self):
         if not self.pk:  # Only for new appointments
@@ -166,25 +213,22 @@ class Appointment(models.Model):
 
     def _validate_availability(self):
         """Check therapist availability"""
-        if not self.therapist.check_availability(
-            self.appointment_date, self.duration.total_seconds() / 60
-        ):
+        if not self.therapist.check_availability(self.appointment_date, self.duration):
             raise ValidationError("Therapist is not available at this time")
 
     def _validate_concurrent_appointments(self):
         """Ensure no overlapping appointments"""
-        end_time = self.appointment_date + self.duration
         conflicting = Appointment.objects.filter(
             models.Q(therapist=self.therapist) | models.Q(patient=self.patient),
-            appointment_date__lt=end_time,
-            status__in=["pending", "confirmed"],
+            status__in=BOOKED_STATUSES,
+            time_range__overlap=(
+                self.appointment_date,
+                self.appointment_date + self.duration,
+            ),
         ).exclude(pk=self.pk)
 
-        for appt in conflicting:
-            if appt.appointment_date + appt.duration > self.appointment_date:
-                raise ValidationError(
-                    "This time slot conflicts with another appointment"
-                )
+        if conflicting.exists():
+            raise ValidationError("This time slot conflicts with another appointment")
 
     @property
     def is_upcoming(self):
@@ -226,6 +270,8 @@ class WaitingListEntry(models.Model):
         default="pending",
     )
     notified_at = models.DateTimeField(null=True, blank=True)
+    # Start of the slot offered when notified; held for a while for this entry
+    offered_slot = models.DateTimeField(null=True, blank=True)
     expires_at = models.DateTimeField()
 
     class Meta:
@@ -291,9 +291,16 @@ class WaitingListEntrySerializer(serializers.ModelSerializer):
             "status",
             "created_at",
             "notified_at",
+            "offered_slot",
+            "expires_at",
+        ]
+        read_only_fields = [
+            "status",
+            "created_at",
+            "notified_at",
+            "offered_slot",
             "expires_at",
         ]
-        read_only_fields = ["status", "created_at", "notified_at", "expires_at"]
 
     def validate_preferred_time_slots(self, value):
         if not isinstance(value, list):
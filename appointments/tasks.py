@@ -0,0 +1,29 @@
+# appointments/tasks.py
+import logging
+from datetime import date
+
+from celery import shared_task
+
+from . import waitlist
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def match_waiting_list():
+    """Expire stale waiting-list entries and offer free slots to the rest"""
+    expired = waitlist.expire_entries()
+    notified = waitlist.match_pending()
+    if expired or notified:
+        logger.info(f"Waiting list: {notified} entries notified, {expired} expired")
+    return {"notified": notified, "expired": expired}
+
+
+@shared_task(bind=True, max_retries=5)
+def rematch_waiting_list(self, therapist_id, day):
+    """Offer a slot freed by a cancellation to the patients waiting that day"""
+    notified = waitlist.rematch(therapist_id, date.fromisoformat(day))
+    if notified is None:
+        # A full matching run is in progress; try again after it
+        raise self.retry(countdown=30)
+    return notified
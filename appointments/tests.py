@@ -1 +1,171 @@
-# Create your tests here.
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from appointments import availability
+from appointments.models import Appointment
+
+MONDAY = datetime(2031, 3, 3, tzinfo=timezone.utc)
+
+
+def at(hour, minute=0, day=0):
+    """UTC (the project's TIME_ZONE) datetime on the test Monday plus ``day`` days"""
+    return MONDAY + timedelta(days=day, hours=hour, minutes=minute)
+
+
+class AvailabilityTest(SimpleTestCase):
+    def test_merge_intervals(self):
+        self.assertEqual(
+            availability.merge_intervals([(5, 7), (1, 3), (3, 4), (6, 9), (10, 11)]),
+            [(1, 4), (5, 9), (10, 11)],
+        )
+        self.assertEqual(availability.merge_intervals([(1, 10), (2, 3)]), [(1, 10)])
+        self.assertEqual(availability.merge_intervals([]), [])
+
+    def test_subtract(self):
+        windows = [(at(9), at(12)), (at(14), at(17))]
+        busy = [(at(8), at(9, 30)), (at(10), at(11)), (at(11, 30), at(14, 30))]
+        self.assertEqual(
+            availability._subtract(windows, busy),
+            [(at(9, 30), at(10)), (at(11), at(11, 30)), (at(14, 30), at(17))],
+        )
+        # Bookings touching a window leave it whole
+        self.assertEqual(
+            availability._subtract(
+                [(at(9), at(12))], [(at(8), at(9)), (at(12), at(13))]
+            ),
+            [(at(9), at(12))],
+        )
+
+    def test_overlaps_is_half_open(self):
+        busy = [(at(10), at(11)), (at(13), at(14))]
+        self.assertFalse(availability.overlaps(busy, at(9), at(10)))
+        self.assertFalse(availability.overlaps(busy, at(11), at(13)))
+        self.assertTrue(availability.overlaps(busy, at(10, 59), at(12)))
+        self.assertTrue(availability.overlaps(busy, at(12), at(13, 1)))
+        self.assertTrue(availability.overlaps(busy, at(9), at(15)))
+        self.assertFalse(availability.overlaps([], at(9), at(15)))
+
+    def test_covers(self):
+        schedule = availability.compile_schedule(
+            {
+                "monday": [
+                    {"start": "09:00", "end": "12:00"},
+                    {"start": "11:00", "end": "13:00"},
+                    {"start": "14:00", "end": "17:00"},
+                ],
+                "Tuesday": [{"start": "10:00", "end": "11:00"}],
+                "friday": [{"start": "bad"}],
+            }
+        )
+        self.assertEqual(
+            schedule.days, {0: ((540, 780), (840, 1020)), 1: ((600, 660),)}
+        )
+        self.assertTrue(schedule.covers(at(9), at(13)))
+        self.assertTrue(schedule.covers(at(16), at(17)))
+        self.assertFalse(schedule.covers(at(12, 30), at(14, 30)))
+        self.assertFalse(schedule.covers(at(8, 30), at(9, 30)))
+        self.assertFalse(schedule.covers(at(16), at(17, 1)))
+        self.assertTrue(schedule.covers(at(10, day=1), at(11, day=1)))
+        self.assertFalse(schedule.covers(at(10, day=4), at(11, day=4)))
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+)
+class BookingTest(TestCase):
+    def setUp(self):
+        patcher = mock.patch("celery.app.task.Task.apply_async")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        User = get_user_model()
+        self.therapist, other = (
+            User.objects.create_user(
+                username=name,
+                email=f"{name}@example.com",
+                password="x",
+                user_type="therapist",
+            ).therapist_profile
+            for name in ("therapist", "other")
+        )
+        self.patient, self.second_patient = (
+            User.objects.create_user(
+                username=name,
+                email=f"{name}@example.com",
+                password="x",
+                user_type="patient",
+            ).patient_profile
+            for name in ("patient", "second")
+        )
+        self.other_therapist = other
+        self.therapist.available_days = {
+            "monday": [
+                {"start": "09:00", "end": "12:00"},
+                {"start": "14:00", "end": "17:00"},
+            ]
+        }
+        self.therapist.save()
+
+    def book(self, start, minutes=60, patient=None, therapist=None, status="confirmed"):
+        return Appointment.objects.create(
+            patient=patient or self.patient,
+            therapist=therapist or self.therapist,
+            appointment_date=start,
+            duration=timedelta(minutes=minutes),
+            status=status,
+        )
+
+    def test_free_slots_start_on_the_grid(self):
+        self.book(at(9, 10), minutes=40)  # Free again from 9:50
+        self.book(at(15), status="cancelled", patient=self.second_patient)
+
+        slots = availability.free_slots(self.therapist, at(0), at(23), 45, step=30)
+        self.assertEqual(
+            slots,
+            [
+                at(10),
+                at(10, 30),
+                at(11),
+                at(14),
+                at(14, 30),
+                at(15),
+                at(15, 30),
+                at(16),
+            ],
+        )
+        self.assertEqual(
+            availability.free_slots(self.therapist, at(9, 50), at(11), 15, step=15),
+            [at(10), at(10, 15), at(10, 30), at(10, 45)],
+        )
+
+    def test_back_to_back_bookings_are_allowed(self):
+        self.book(at(10))
+        self.book(at(11), patient=self.second_patient)
+        self.book(at(9), patient=self.second_patient)
+        self.assertEqual(Appointment.objects.count(), 3)
+        self.assertFalse(availability.is_available(self.therapist, at(10, 30), 30))
+        self.assertTrue(availability.is_available(self.therapist, at(14), 30))
+
+    def test_overlapping_bookings_are_refused(self):
+        self.book(at(10))
+        for start, minutes, patient, therapist in (
+            (at(10, 30), 60, self.second_patient, None),
+            (at(9, 30), 31, self.second_patient, None),
+            (at(9), 180, self.second_patient, None),
+            # The patient cannot be in two sessions either
+            (at(10, 45), 30, None, self.other_therapist),
+        ):
+            with self.subTest(start=start, minutes=minutes), self.assertRaisesMessage(
+                ValidationError, "conflicts with another appointment"
+            ):
+                self.book(start, minutes, patient=patient, therapist=therapist)
+        self.assertEqual(Appointment.objects.count(), 1)
+
+        # Cancelled bookings free their time
+        Appointment.objects.update(status="cancelled")
+        self.book(at(10, 30), patient=self.second_patient)
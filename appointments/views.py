@@ -2,11 +2,12 @@
 from django.utils import timezone
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError as DRFValidationError
 from rest_framework.response import Response
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
 from django.core.exceptions import ValidationError
-from datetime import datetime
+from . import waitlist
 from .models import Appointment, WaitingListEntry
 from .serializers import (
     AppointmentSerializer,
@@ -15,12 +16,18 @@ from .serializers import (
 )
 from therapist.permissions.therapist_permissions import IsVerifiedTherapist
 from core.permissions import IsPatientOrTherapist
-from notifications.models import Notification
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def _drf_error(error: ValidationError) -> DRFValidationError:
+    """A model ValidationError as a 400 response"""
+    if hasattr(error, "error_dict"):
+        return DRFValidationError(error.message_dict)
+    return DRFValidationError(error.messages)
+
+
 @extend_schema_view(
     list=extend_schema(
         description="List appointments. Therapists see their appointments, patients see their own.",
@@ -94,13 +101,25 @@ class AppointmentViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         user = self.request.user
-        # Automatically set patient profile if the user has one
-        if hasattr(user, "patient_profile"):
-            serializer.save(patient_profile=user.patient_profile, rescheduled_by=None)
-        else:
-            serializer.save(
-                rescheduled_by=None
-            )  # Fallback if no patient_profile attribute
+        try:
+            # Automatically set patient profile if the user has one
+            if hasattr(user, "patient_profile"):
+                serializer.save(
+                    patient_profile=user.patient_profile, rescheduled_by=None
+                )
+            else:
+                serializer.save(
+                    rescheduled_by=None
+                )  # Fallback if no patient_profile attribute
+        except ValidationError as e:
+            # e.g. a double booking refused by the exclusion constraints
+            raise _drf_error(e)
+
+    def perform_update(self, serializer):
+        try:
+            serializer.save()
+        except ValidationError as e:
+            raise _drf_error(e)
 
     @extend_schema(
         description="Cancel an appointment",
@@ -136,6 +155,12 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         appointment.status = "cancelled"
         appointment.save()
 
+        # Offer the freed slot to the patients waiting for that day
+        waitlist.schedule_rematch(
+            appointment.therapist_id,
+            timezone.localtime(appointment.appointment_date).date(),
+        )
+
         return Response({"message": "Appointment cancelled successfully"})
 
     @extend_schema(
@@ -280,41 +305,26 @@ class WaitingListEntryViewSet(viewsets.ModelViewSet):
     )
     @action(detail=False, methods=["get"])
     def check_availability(self, request):
-        """Check for available slots matching waiting list entries"""
-        entries = self.get_queryset().filter(status="pending")
-        available_slots = []
-
-        for entry in entries:
-            # Check each preferred time slot
-            for time_slot in entry.preferred_time_slots:
-                time_obj = datetime.strptime(time_slot, "%H:%M").time()
-                check_date = datetime.combine(entry.requested_date, time_obj)
-
-                if entry.therapist.check_availability(check_date):
-                    available_slots.append(
-                        {
-                            "entry_id": entry.id,
-                            "patient_name": entry.patient.user.get_full_name(),
-                            "therapist_name": entry.therapist.user.get_full_name(),
-                            "date": entry.requested_date,
-                            "available_time": time_slot,
-                        }
-                    )
-
-                    # Update entry status to notified
-                    entry.status = "notified"
-                    entry.notified_at = timezone.now()
-                    entry.save()
-
-                    # Create notification for the patient
-                    Notification.objects.create(
-                        recipient=entry.patient.user,
-                        actor=entry.therapist.user,
-                        verb="slot_available",
-                        action_object=entry,
-                        description=f"A slot is available on {entry.requested_date} at {time_slot}",
-                    )
-
+        """
+        Free preferred slots for the pending entries. Read-only: patients
+        are notified by the scheduled matching job.
+        """
+        entries = (
+            self.get_queryset()
+            .filter(status="pending")
+            .select_related("patient__user", "therapist__user")
+            .order_by("created_at", "pk")
+        )
+        available_slots = [
+            {
+                "entry_id": match.entry.id,
+                "patient_name": match.entry.patient.user.get_full_name(),
+                "therapist_name": match.entry.therapist.user.get_full_name(),
+                "date": match.entry.requested_date,
+                "available_time": match.time_slot,
+            }
+            for match in waitlist.find_matches(entries)
+        ]
         return Response(available_slots)
 
     @extend_schema(
@@ -0,0 +1,235 @@
+# appointments/waitlist.py
+"""
+Bulk waiting-list matching
+
+Pending ``WaitingListEntry`` rows are matched against free slots by a
+Celery beat job, a batch of therapists at a time. The bookings of the
+whole batch come from one range query (see ``availability.bookings``).
+Entries are served first come, first served. A slot offered to one entry
+is held for it for ``WAITING_LIST_OFFER_HOLD`` seconds before it can be
+offered to the next patient. Matched entries are
+marked with one ``bulk_update`` and their notifications are written with
+one ``bulk_create``, with one WebSocket push per patient. A cancellation
+rematches only the entries for that therapist and day.
+"""
+
+import logging
+from bisect import insort
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from . import availability
+from .models import WaitingListEntry
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_TYPE = "waiting_list_slot_available"
+# Held while matching so a slot is never offered by two runs at once
+LOCK_KEY = "appointments:waitlist:matching"
+
+
+class Match:
+    """A free preferred slot for a waiting-list entry"""
+
+    def __init__(self, entry, time_slot, start):
+        self.entry = entry
+        self.time_slot = time_slot
+        self.start = start
+
+
+def _day_range(day: date):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+def find_matches(entries: Iterable[WaitingListEntry]) -> List[Match]:
+    """
+    The first free preferred slot of each entry, without side effects.
+    Entries are served in the order given.
+    """
+    entries = list(entries)
+    if not entries:
+        return []
+
+    ranges = {}
+    for entry in entries:
+        first, final = _day_range(entry.requested_date)
+        if entry.therapist_id in ranges:
+            previous = ranges[entry.therapist_id]
+            first, final = min(first, previous[0]), max(final, previous[1])
+        ranges[entry.therapist_id] = (first, final)
+    booked = availability.bookings(ranges)
+
+    # Slots recently offered to other entries count as taken
+    now = timezone.now()
+    hold = timedelta(seconds=getattr(settings, "WAITING_LIST_OFFER_HOLD", 7200))
+    held = defaultdict(list)
+    for therapist_id, offered, minutes in WaitingListEntry.objects.filter(
+        therapist_id__in=list(ranges),
+        status="notified",
+        notified_at__gt=now - hold,
+        offered_slot__gte=min(first for first, _ in ranges.values()),
+        offered_slot__lt=max(final for _, final in ranges.values()),
+    ).values_list("therapist_id", "offered_slot", "therapist__session_duration"):
+        held[therapist_id].append((offered, offered + timedelta(minutes=minutes)))
+    for therapist_id, slots in held.items():
+        booked[therapist_id] = availability.merge_intervals(
+            booked.get(therapist_id, []) + slots
+        )
+
+    matches = []
+    for entry in entries:
+        therapist = entry.therapist
+        schedule = availability.compile_schedule(therapist.available_days)
+        length = timedelta(minutes=therapist.session_duration)
+        busy = booked.setdefault(therapist.pk, [])
+        for time_slot in entry.preferred_time_slots or []:
+            try:
+                slot_time = datetime.strptime(time_slot, "%H:%M").time()
+            except (TypeError, ValueError):
+                continue
+            start = timezone.make_aware(
+                datetime.combine(entry.requested_date, slot_time)
+            )
+            end = start + length
+            if start <= now or not schedule.covers(start, end):
+                continue
+            if availability.overlaps(busy, start, end):
+                continue
+            # Later entries in this run get another slot
+            insort(busy, (start, end))
+            matches.append(Match(entry, time_slot, start))
+            break
+    return matches
+
+
+def notify_matches(matches: List[Match]) -> int:
+    """Mark the matched entries notified and tell their patients"""
+    if not matches:
+        return 0
+    from notifications import inbox, preferences
+    from notifications.models import Notification
+    from notifications.services import UnifiedNotificationService
+
+    service = UnifiedNotificationService()
+    notification_type = service.get_or_create_notification_type(NOTIFICATION_TYPE)
+    now = timezone.now()
+
+    muted = preferences.muted(match.entry.patient.user_id for match in matches)
+
+    entries, notifications = [], []
+    for match in matches:
+        entry = match.entry
+        entry.status = "notified"
+        entry.notified_at = now
+        entry.offered_slot = match.start
+        entries.append(entry)
+        if entry.patient.user_id in muted:
+            continue
+        therapist_name = entry.therapist.user.get_full_name()
+        notifications.append(
+            Notification(
+                user_id=entry.patient.user_id,
+                notification_type=notification_type,
+                title="A slot is available",
+                message=(
+                    f"{therapist_name or 'Your therapist'} has a free slot on "
+                    f"{entry.requested_date} at {match.time_slot}"
+                ),
+                priority="high",
+                metadata={
+                    "waiting_list_entry_id": entry.pk,
+                    "therapist_id": entry.therapist_id,
+                    "date": entry.requested_date.isoformat(),
+                    "time": match.time_slot,
+                },
+                created_at=now,
+            )
+        )
+
+    with transaction.atomic():
+        WaitingListEntry.objects.bulk_update(
+            entries, ["status", "notified_at", "offered_slot"]
+        )
+        Notification.objects.bulk_create(notifications)
+        inbox.record_created(notifications)
+
+    by_recipient = defaultdict(list)
+    for notification in notifications:
+        by_recipient[notification.user_id].append(notification)
+    for user_id, items in by_recipient.items():
+        service.send_in_app_batch(user_id, items)
+    return len(entries)
+
+
+def _pending():
+    return (
+        WaitingListEntry.objects.filter(
+            status="pending",
+            requested_date__gte=timezone.localdate(),
+            expires_at__gt=timezone.now(),
+        )
+        .select_related("patient__user", "therapist__user")
+        .order_by("created_at", "pk")
+    )
+
+
+def expire_entries() -> int:
+    """Close pending entries past their expiry"""
+    return WaitingListEntry.objects.filter(
+        status="pending", expires_at__lte=timezone.now()
+    ).update(status="expired")
+
+
+def match_pending(batch_size: Optional[int] = None) -> Optional[int]:
+    """
+    Match every pending entry, ``batch_size`` therapists at a time.
+    Returns the entries notified, or None when another run holds the lock.
+    """
+    batch_size = batch_size or getattr(settings, "WAITING_LIST_MATCH_BATCH", 100)
+    if not cache.add(LOCK_KEY, 1, timeout=600):
+        return None
+    try:
+        therapist_ids = sorted(
+            set(_pending().order_by().values_list("therapist_id", flat=True))
+        )
+        notified = 0
+        for offset in range(0, len(therapist_ids), batch_size):
+            entries = _pending().filter(
+                therapist_id__in=therapist_ids[offset : offset + batch_size]
+            )
+            notified += notify_matches(find_matches(entries))
+        return notified
+    finally:
+        cache.delete(LOCK_KEY)
+
+
+def rematch(therapist_id: int, day: date) -> Optional[int]:
+    """Match the entries waiting for ``therapist_id`` on ``day``"""
+    if not cache.add(LOCK_KEY, 1, timeout=600):
+        return None
+    try:
+        entries = _pending().filter(therapist_id=therapist_id, requested_date=day)
+        return notify_matches(find_matches(entries))
+    finally:
+        cache.delete(LOCK_KEY)
+
+
+def schedule_rematch(therapist_id: int, day: date) -> None:
+    """Rematch ``therapist_id``'s entries for ``day`` once the transaction commits"""
+    from .tasks import rematch_waiting_list
+
+    def send():
+        try:
+            rematch_waiting_list.delay(therapist_id, day.isoformat())
+        except Exception as e:
+            # The scheduled run picks the entries up instead
+            logger.warning(f"Could not queue waiting-list rematch: {e}")
+
+    transaction.on_commit(send)
@@ -3,7 +3,6 @@ from typing import Dict, Any
 import logging
 import re
 import random  # Add missing import for randomization in humanize_response
-import requests
 from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
@@ -13,6 +12,8 @@ from mood.models import MoodLog
 from ..exceptions import ChatbotAPIError
 from .rag.therapy_rag_service import therapy_rag_service
 from AI_engine.services.crisis_monitoring import crisis_monitoring_service
+from AI_engine.services.llm_gateway import CHAT, CRISIS, LLMError, llm_gateway
+from core.lazy import lazy_service
 
 logger = logging.getLogger(__name__)
 
@@ -69,7 +70,7 @@ These intense emotional waves do pass, even when it doesn't feel like they will.
 """
 
     def __init__(self):
-        self.api_url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
+        self.api_path = "models/gemini-2.0-flash:generateContent"
         self.api_key = settings.GEMINI_API_KEY
         self.timeout = settings.CHATBOT_SETTINGS["RESPONSE_TIMEOUT"]
         self.max_retries = settings.CHATBOT_SETTINGS["MAX_RETRIES"]
@@ -268,64 +269,73 @@ Provide a therapeutic response using the recommended approach.
                 "alternative_approach": "unknown",
             }
 
-    def _call_gemini_api(self, prompt: str) -> Dict[str, Any]:
-        """Make a request to the Gemini API"""
-        try:
-            headers = {
+    def _gemini_request(self, prompt: str, lane: str) -> Dict[str, Any]:
+        """Gateway arguments of a Gemini generateContent call"""
+        return {
+            "backend_name": "gemini",
+            "path": self.api_path,
+            "payload": self._gemini_payload(prompt),
+            "lane": lane,
+            "service": "chatbot",
+            "headers": {
                 "Content-Type": "application/json",
                 "x-goog-api-key": self.api_key,
-            }
+            },
+            "timeout": self.timeout,
+        }
 
-            data = {
-                "contents": [{"parts": [{"text": prompt}]}],
-                "safetySettings": [
-                    {
-                        "category": "HARM_CATEGORY_HARASSMENT",
-                        "threshold": "BLOCK_MEDIUM_AND_ABOVE",
-                    },
-                    {
-                        "category": "HARM_CATEGORY_HATE_SPEECH",
-                        "threshold": "BLOCK_MEDIUM_AND_ABOVE",
-                    },
-                    {
-                        "category": "HARM_CATEGORY_SEXUALLY_EXPLICIT",
-                        "threshold": "BLOCK_MEDIUM_AND_ABOVE",
-                    },
-                    {
-                        "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
-                        "threshold": "BLOCK_MEDIUM_AND_ABOVE",
-                    },
-                ],
-                "generationConfig": {
-                    "temperature": 0.7,
-                    "topK": 40,
-                    "topP": 0.95,
-                    "maxOutputTokens": 1024,
+    def _gemini_payload(self, prompt: str) -> Dict[str, Any]:
+        return {
+            "contents": [{"parts": [{"text": prompt}]}],
+            "safetySettings": [
+                {
+                    "category": "HARM_CATEGORY_HARASSMENT",
+                    "threshold": "BLOCK_MEDIUM_AND_ABOVE",
                 },
-            }
+                {
+                    "category": "HARM_CATEGORY_HATE_SPEECH",
+                    "threshold": "BLOCK_MEDIUM_AND_ABOVE",
+                },
+                {
+                    "category": "HARM_CATEGORY_SEXUALLY_EXPLICIT",
+                    "threshold": "BLOCK_MEDIUM_AND_ABOVE",
+                },
+                {
+                    "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
+                    "threshold": "BLOCK_MEDIUM_AND_ABOVE",
+                },
+            ],
+            "generationConfig": {
+                "temperature": 0.7,
+                "topK": 40,
+                "topP": 0.95,
+                "maxOutputTokens": 1024,
+            },
+        }
 
-            response = requests.post(
-                self.api_url, headers=headers, json=data, timeout=self.timeout
-            )
+    def _gemini_response(self, result) -> Dict[str, Any]:
+        return {
+            "text": result.text,
+            "metadata": {"model": "gemini-pro", "finish_reason": "stop"},
+        }
 
-            if response.status_code == 200:
-                result = response.json()
-                response_text = result["candidates"][0]["content"]["parts"][0]["text"]
-                return {
-                    "text": response_text,
-                    "metadata": {"model": "gemini-pro", "finish_reason": "stop"},
-                }
-            else:
-                logger.error(
-                    f"Gemini API request failed with status {response.status_code}: {response.text}"
-                )
-                raise ChatbotAPIError(
-                    f"Gemini API request failed with status {response.status_code}"
-                )
+    def _call_gemini_api(self, prompt: str, lane: str = CHAT) -> Dict[str, Any]:
+        """Make a request to the Gemini API"""
+        try:
+            result = llm_gateway.request(**self._gemini_request(prompt, lane))
+        except LLMError as e:
+            logger.error(f"Gemini API request error: {str(e)}")
+            raise ChatbotAPIError(f"Gemini API request failed: {str(e)}")
+        return self._gemini_response(result)
 
-        except requests.exceptions.RequestException as e:
+    async def _acall_gemini_api(self, prompt: str, lane: str = CHAT) -> Dict[str, Any]:
+        """``_call_gemini_api`` for async callers"""
+        try:
+            result = await llm_gateway.arequest(**self._gemini_request(prompt, lane))
+        except LLMError as e:
             logger.error(f"Gemini API request error: {str(e)}")
-            raise ChatbotAPIError(f"Gemini API request error: {str(e)}")
+            raise ChatbotAPIError(f"Gemini API request failed: {str(e)}")
+        return self._gemini_response(result)
 
     def _check_content_safety(self, message: str) -> Dict[str, Any]:
         """
@@ -395,7 +405,7 @@ User message category: {category}
 
         # Make request to Gemini API with safety prompt
         try:
-            response = self._call_gemini_api(prompt)
+            response = self._call_gemini_api(prompt, lane=CRISIS)
             return {
                 "content": response["text"],
                 "metadata": response.get("metadata", {}),
@@ -1370,7 +1380,7 @@ Would you be willing to reach out to one of these resources right now? I'm here
                 self._therapy_recommendation,
             )
             # Call Gemini API
-            response = await self._call_gemini_api(prompt)
+            response = await self._acall_gemini_api(prompt)
 
             # Add metadata
             if "metadata" not in response:
@@ -1396,5 +1406,5 @@ Would you be willing to reach out to one of these resources right now? I'm here
             return self._error_response("Unable to get response from chatbot")
 
 
-# Create singleton instance
-chatbot_service = ChatbotService()
+# Built on first use
+chatbot_service = lazy_service(f"{__name__}.chatbot_service", ChatbotService)
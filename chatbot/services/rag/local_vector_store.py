@@ -8,6 +8,8 @@ from django.conf import settings
 import requests
 from tenacity import retry, stop_after_attempt, wait_random_exponential
 
+from core.lazy import lazy_service
+
 logger = logging.getLogger(__name__)
 
 
@@ -462,5 +464,5 @@ class LocalVectorStore:
             return []
 
 
-# Create instance for easy import
-local_vector_store = LocalVectorStore()
+# Built on first use; loading the chunk indexes is slow
+local_vector_store = lazy_service(f"{__name__}.local_vector_store", LocalVectorStore)
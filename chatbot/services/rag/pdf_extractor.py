@@ -1,15 +1,14 @@
 # chatbot/services/rag/pdf_extractor.py
 import os
 import logging
-import pdfplumber
 from typing import List, Dict, Any, Tuple
 import re
-import spacy
 import gc  # Add garbage collector
 from tqdm import tqdm
-import pytesseract
 import unicodedata
 
+from core.lazy import lazy_service
+
 logger = logging.getLogger(__name__)
 
 
@@ -28,6 +27,8 @@ class PDFExtractor:
 
         # Try to load the spaCy model, but have a fallback
         try:
+            import spacy
+
             self.nlp = spacy.load(
                 "en_core_web_sm", disable=["ner", "parser", "attribute_ruler"]
             )
@@ -38,7 +39,7 @@ class PDFExtractor:
             self.nlp.max_length = 2000000
             self.use_spacy = True
             logger.info("Using spaCy for sentence tokenization with sentencizer")
-        except IOError:
+        except (ImportError, IOError):
             logger.warning(
                 "spaCy model 'en_core_web_sm' not found. Using regex fallback for sentence splitting."
             )
@@ -74,6 +75,8 @@ class PDFExtractor:
         if os.path.getsize(pdf_path) < 1024:  # Minimal size threshold
             raise ValueError("PDF file appears corrupted")
 
+        import pdfplumber
+
         try:
             text_content = []
             with pdfplumber.open(pdf_path) as pdf:
@@ -145,6 +148,8 @@ class PDFExtractor:
         Returns:
             Extracted text
         """
+        import pytesseract
+
         # First try with default orientation
         text = pytesseract.image_to_string(img)
 
@@ -369,6 +374,8 @@ class PDFExtractor:
         Returns:
             Cleaned text as a single string without LLM modifications
         """
+        import pdfplumber
+
         raw_text = ""
         with pdfplumber.open(pdf_path) as pdf:
             for page in pdf.pages:
@@ -444,5 +451,5 @@ class PDFExtractor:
         return results
 
 
-# Instantiate extractor for easy import
-pdf_extractor = PDFExtractor()
+# Built on first use; loading spaCy is slow
+pdf_extractor = lazy_service(f"{__name__}.pdf_extractor", PDFExtractor)
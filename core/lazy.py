@@ -0,0 +1,110 @@
+# core/lazy.py
+"""
+Lazily built process-wide services
+
+Heavy singletons (spaCy pipelines, OCR readers, torch, vector indexes) are
+declared with ``lazy_service`` instead of being built when their module is
+imported. The proxy it returns builds the instance on first use, once per
+process, under a lock, so ``migrate`` and other commands that never touch
+a service never pay for it.
+
+Services can be built ahead of the first request with ``warm_up(role)``.
+``LAZY_SERVICE_WARMUP`` maps a process role to the dotted paths of the
+services to build for it:
+
+- "web": after the WSGI/ASGI application is loaded
+- "worker" and each queue a Celery worker consumes: in every pool process,
+  after the fork (see mindcare/celery.py)
+
+Set ``LAZY_SERVICE_WARMUP = {}`` to build everything on first use.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Union
+
+from django.conf import settings
+from django.utils.functional import LazyObject, empty
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WARMUP = {
+    "verification": ["therapist.services.verification_pipeline.service"],
+}
+
+_registry: Dict[str, "LazyService"] = {}
+
+
+class LazyService(LazyObject):
+    """Proxy that builds its service on first attribute access"""
+
+    def __init__(self, name: str, factory: Union[str, Callable]):
+        # Stored directly: attribute assignment on a LazyObject is forwarded
+        self.__dict__["_name"] = name
+        self.__dict__["_factory"] = factory
+        self.__dict__["_lock"] = threading.Lock()
+        super().__init__()
+
+    def _setup(self):
+        with self._lock:
+            if self._wrapped is not empty:
+                return  # Built by another thread meanwhile
+            factory = self._factory
+            if isinstance(factory, str):
+                factory = import_string(factory)
+            started = time.perf_counter()
+            self._wrapped = factory()
+            logger.info(f"Built {self._name} in {time.perf_counter() - started:.2f}s")
+
+    @property
+    def is_built(self) -> bool:
+        return self._wrapped is not empty
+
+    def __repr__(self):
+        state = "built" if self.is_built else "not built"
+        return f"<LazyService {self._name} ({state})>"
+
+    def __copy__(self):
+        return self  # One instance per process
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+def lazy_service(name: str, factory: Union[str, Callable]) -> LazyService:
+    """
+    Register a service built by ``factory`` (a callable or its dotted path)
+    on first use. ``name`` is the dotted path of the returned proxy.
+    """
+    service = _registry.get(name)
+    if service is None:
+        service = _registry[name] = LazyService(name, factory)
+    return service
+
+
+def get(name: str) -> LazyService:
+    """The registered service ``name``, importing its module if needed"""
+    if name not in _registry:
+        import_string(name)
+    return _registry[name]
+
+
+def warm_up(*roles: str) -> List[str]:
+    """Build the services configured for ``roles``; returns their names"""
+    config = getattr(settings, "LAZY_SERVICE_WARMUP", DEFAULT_WARMUP)
+    built = []
+    for role in roles:
+        for name in config.get(role, ()):
+            if name in built:
+                continue
+            try:
+                service = get(name)
+                service._setup()
+            except Exception as e:
+                # The service is retried on first use
+                logger.error(f"Could not warm up {name}: {str(e)}")
+                continue
+            built.append(name)
+    return built
@@ -0,0 +1,59 @@
+# core/management/commands/manage_partitions.py
+from django.core.management.base import BaseCommand, CommandError
+
+from core.partitioning import (
+    drop_expired_partitions,
+    ensure_partitions,
+    partition_specs,
+    partition_status,
+)
+
+
+class Command(BaseCommand):
+    help = "Inspect and maintain monthly partitions of append-only tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "action",
+            choices=["status", "ensure", "prune"],
+            help="status: list partitions; ensure: create upcoming partitions; "
+            "prune: drop partitions past their retention window",
+        )
+        parser.add_argument(
+            "--model",
+            action="append",
+            help="Limit to a model label (e.g. notifications.Notification); repeatable",
+        )
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            default=None,
+            help="Months of partitions to create ahead of the current one",
+        )
+
+    def handle(self, *args, **options):
+        specs = partition_specs()
+        labels = options["model"] or list(specs)
+        unknown = set(labels) - set(specs)
+        if unknown:
+            raise CommandError(f"Not a partitioned model: {', '.join(sorted(unknown))}")
+
+        for label in labels:
+            spec = specs[label]
+            if options["action"] == "status":
+                status = partition_status(spec)
+                state = "partitioned" if status["partitioned"] else "not partitioned"
+                self.stdout.write(
+                    f"{label} ({status['table']} by {status['column']}): {state}, "
+                    f"{len(status['partitions'])} monthly partitions"
+                )
+                for name in status["partitions"]:
+                    self.stdout.write(f"  {name}")
+            elif options["action"] == "ensure":
+                created = ensure_partitions(spec, options["months_ahead"])
+                self.stdout.write(f"{label}: created {len(created)} partitions")
+            else:
+                dropped = drop_expired_partitions(spec)
+                self.stdout.write(f"{label}: dropped {len(dropped)} partitions")
+
+        self.stdout.write(self.style.SUCCESS("Done"))
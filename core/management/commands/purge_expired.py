@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.retention import last_runs, purge, retention_policies
+
+
+class Command(BaseCommand):
+    help = "Inspect and apply the data retention policies"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "action",
+            choices=["status", "run"],
+            help="status: expired rows and the latest run per policy; "
+            "run: purge now, in batches",
+        )
+        parser.add_argument(
+            "--model",
+            action="append",
+            help="Limit to a model label (e.g. notifications.Notification); repeatable",
+        )
+        parser.add_argument(
+            "--max-seconds",
+            type=float,
+            default=None,
+            help="Time budget per model (default: RETENTION_MAX_RUN_SECONDS)",
+        )
+
+    def handle(self, *args, **options):
+        policies = retention_policies()
+        labels = options["model"] or list(policies)
+        unknown = set(labels) - set(policies)
+        if unknown:
+            raise CommandError(f"No retention policy for: {', '.join(sorted(unknown))}")
+
+        runs = last_runs()
+        for label in labels:
+            policy = policies[label]
+            if options["action"] == "status":
+                self.stdout.write(
+                    f"{label} ({policy.column} older than {policy.days} days): "
+                    f"{policy.expired().count()} expired rows"
+                )
+                run = runs.get(label)
+                if run:
+                    self.stdout.write(
+                        f"  last run {run['finished_at']}: {run['deleted']} rows, "
+                        f"{len(run['dropped_partitions'])} partitions, "
+                        f"{run['seconds']}s"
+                    )
+            else:
+                stats = purge(policy, max_seconds=options["max_seconds"])
+                state = "" if stats["complete"] else " (time budget reached)"
+                self.stdout.write(
+                    f"{label}: purged {stats['deleted']} rows in {stats['batches']} "
+                    f"batches, dropped {len(stats['dropped_partitions'])} "
+                    f"partitions{state}"
+                )
+
+        self.stdout.write(self.style.SUCCESS("Done"))
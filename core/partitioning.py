@@ -0,0 +1,513 @@
+# core/partitioning.py
+"""
+Monthly range partitioning for high-volume, append-only tables (PostgreSQL)
+
+Tables listed in ``PARTITIONED_MODELS`` are converted (by migration, with the
+``PartitionByMonth`` operation) into declarative partitioned tables with one
+partition per calendar month plus a default partition. A daily task keeps
+partitions created ahead of time and drops whole partitions once they fall
+out of the retention window, instead of running large ``DELETE`` statements.
+
+Postgres only prunes partitions when the query constrains the partition key,
+so range queries over these tables should go through ``within_partitions``.
+On other database backends every function here is a no-op.
+"""
+
+import logging
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from datetime import timezone as dt_timezone
+from typing import Dict, List, Optional, Tuple
+
+from django.apps import apps
+from django.conf import settings
+from django.db import NotSupportedError, connections, router, transaction
+from django.db.migrations.operations.base import Operation
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# model label -> partition key field and optional retention.
+# Tables that foreign keys point at (AuditLog, ChatMessage and the messaging
+# tables) or that carry unique columns without the partition key (AuditLog's
+# chain sequence) stay plain tables: Postgres could not enforce either once
+# they are partitioned, and PartitionByMonth refuses to convert them.
+DEFAULT_PARTITIONED_MODELS = {
+    "datawarehouse.AccessLog": {"column": "created_at"},
+    "datawarehouse.DataChangeHistory": {"column": "created_at"},
+    # Expired partitions are dropped by the retention engine (core.retention)
+    "notifications.Notification": {"column": "created_at"},
+}
+
+PARTITION_SUFFIX = re.compile(r"_p(\d{4})(\d{2})$")
+LEGACY_SUFFIX = "_unpartitioned"
+
+
+@dataclass(frozen=True)
+class PartitionSpec:
+    """A partitioned model: partition key field and retention window"""
+
+    model_label: str
+    column: str
+    retention_days: Optional[int] = None
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    @property
+    def table(self) -> str:
+        return self.model._meta.db_table
+
+    @property
+    def db_column(self) -> str:
+        return self.model._meta.get_field(self.column).column
+
+    @property
+    def using(self) -> str:
+        return router.db_for_write(self.model)
+
+
+def partition_specs() -> Dict[str, PartitionSpec]:
+    """Configured partitioned models keyed by model label"""
+    configured = getattr(settings, "PARTITIONED_MODELS", DEFAULT_PARTITIONED_MODELS)
+    return {
+        label: PartitionSpec(label, **options) for label, options in configured.items()
+    }
+
+
+def spec_for_model(model) -> Optional[PartitionSpec]:
+    return partition_specs().get(model._meta.label)
+
+
+# ---------------------------------------------------------------------------
+# Month arithmetic and naming
+# ---------------------------------------------------------------------------
+
+
+def month_start(value) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_bounds(month: date) -> Tuple[datetime, datetime]:
+    """UTC ``[start, end)`` bounds of the partition holding ``month``"""
+    start = datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc)
+    end_month = add_months(month, 1)
+    end = datetime(end_month.year, end_month.month, 1, tzinfo=dt_timezone.utc)
+    return start, end
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def default_partition_name(table: str) -> str:
+    return f"{table}_default"
+
+
+# ---------------------------------------------------------------------------
+# Catalog queries
+# ---------------------------------------------------------------------------
+
+
+def is_partitioned(cursor, table: str) -> bool:
+    cursor.execute(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table "
+        "WHERE partrelid = to_regclass(%s))",
+        [table],
+    )
+    return cursor.fetchone()[0]
+
+
+def list_partitions(cursor, table: str) -> List[Tuple[str, date]]:
+    """Monthly partitions of ``table`` as ``(name, month)``, oldest first"""
+    cursor.execute(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(%s)",
+        [table],
+    )
+    partitions = []
+    for (name,) in cursor.fetchall():
+        match = PARTITION_SUFFIX.search(name)
+        if match:
+            partitions.append((name, date(int(match[1]), int(match[2]), 1)))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+# ---------------------------------------------------------------------------
+# Partition maintenance
+# ---------------------------------------------------------------------------
+
+
+def create_month_partition(cursor, table: str, column: str, month: date) -> bool:
+    """
+    Create the partition for ``month`` if it does not exist.
+
+    Rows that already landed in the default partition for that month are
+    moved into the new partition before it is attached.
+    """
+    name = partition_name(table, month)
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [name])
+    if cursor.fetchone()[0]:
+        return False
+
+    start, end = month_bounds(month)
+    default = default_partition_name(table)
+    cursor.execute(
+        f'SELECT EXISTS (SELECT 1 FROM "{default}" '
+        f'WHERE "{column}" >= %s AND "{column}" < %s)',
+        [start, end],
+    )
+    if cursor.fetchone()[0]:
+        cursor.execute(
+            f'CREATE TABLE "{name}" (LIKE "{table}" INCLUDING DEFAULTS '
+            f"INCLUDING CONSTRAINTS)"
+        )
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM "{default}" WHERE "{column}" >= %s '
+            f'AND "{column}" < %s RETURNING *) INSERT INTO "{name}" '
+            f"SELECT * FROM moved",
+            [start, end],
+        )
+        cursor.execute(
+            f'ALTER TABLE "{table}" ATTACH PARTITION "{name}" '
+            f"FOR VALUES FROM (%s) TO (%s)",
+            [start, end],
+        )
+    else:
+        cursor.execute(
+            f'CREATE TABLE "{name}" PARTITION OF "{table}" '
+            f"FOR VALUES FROM (%s) TO (%s)",
+            [start, end],
+        )
+    return True
+
+
+def ensure_partitions(
+    spec: PartitionSpec, months_ahead: Optional[int] = None, now=None
+) -> List[str]:
+    """Create partitions from the current month up to ``months_ahead`` months ahead"""
+    if months_ahead is None:
+        months_ahead = getattr(settings, "PARTITION_PREMAKE_MONTHS", 3)
+    connection = connections[spec.using]
+    if connection.vendor != "postgresql":
+        return []
+
+    current = month_start(now or timezone.now())
+    created = []
+    with transaction.atomic(using=spec.using), connection.cursor() as cursor:
+        if not is_partitioned(cursor, spec.table):
+            return []
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            if create_month_partition(cursor, spec.table, spec.db_column, month):
+                created.append(partition_name(spec.table, month))
+
+    if created:
+        logger.info(f"Created partitions for {spec.table}: {', '.join(created)}")
+    return created
+
+
+def drop_expired_partitions(
+    spec: PartitionSpec, retention_days: Optional[int] = None, now=None
+) -> List[str]:
+    """
+    Drop monthly partitions that lie entirely before the retention cutoff.
+
+    Rows newer than the cutoff are never removed, so a partition is dropped
+    only once its last day has aged out.
+    """
+    retention_days = retention_days or spec.retention_days
+    connection = connections[spec.using]
+    if not retention_days or connection.vendor != "postgresql":
+        return []
+
+    cutoff = (now or timezone.now()) - timedelta(days=retention_days)
+    dropped = []
+    with transaction.atomic(using=spec.using), connection.cursor() as cursor:
+        if not is_partitioned(cursor, spec.table):
+            return []
+        for name, month in list_partitions(cursor, spec.table):
+            if month_bounds(month)[1] > cutoff:
+                break
+            cursor.execute(f'ALTER TABLE "{spec.table}" DETACH PARTITION "{name}"')
+            cursor.execute(f'DROP TABLE "{name}"')
+            dropped.append(name)
+
+    if dropped:
+        logger.info(f"Dropped expired partitions of {spec.table}: {', '.join(dropped)}")
+    return dropped
+
+
+def partition_status(spec: PartitionSpec) -> Dict:
+    """Partition layout of one model, for reporting"""
+    connection = connections[spec.using]
+    status = {
+        "model": spec.model_label,
+        "table": spec.table,
+        "column": spec.db_column,
+        "retention_days": spec.retention_days,
+        "partitioned": False,
+        "partitions": [],
+    }
+    if connection.vendor != "postgresql":
+        return status
+
+    with connection.cursor() as cursor:
+        status["partitioned"] = is_partitioned(cursor, spec.table)
+        if status["partitioned"]:
+            status["partitions"] = [
+                name for name, _ in list_partitions(cursor, spec.table)
+            ]
+    return status
+
+
+def maintain_all(months_ahead: Optional[int] = None) -> Dict[str, Dict[str, List[str]]]:
+    """Create upcoming partitions and drop expired ones for every configured model"""
+    results = {}
+    for label, spec in partition_specs().items():
+        try:
+            results[label] = {
+                "created": ensure_partitions(spec, months_ahead),
+                "dropped": drop_expired_partitions(spec),
+            }
+        except Exception as e:
+            logger.error(f"Partition maintenance failed for {label}: {e}")
+            results[label] = {"created": [], "dropped": [], "error": str(e)}
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Queries
+# ---------------------------------------------------------------------------
+
+
+def within_partitions(queryset, start=None, end=None):
+    """
+    Restrict ``queryset`` to ``[start, end]`` on the model's partition key.
+
+    Constant bounds on the partition key let the planner skip every
+    partition outside the range. For models that are not partitioned this
+    is a plain range filter on ``created_at``-style columns.
+    """
+    spec = spec_for_model(queryset.model)
+    column = spec.column if spec else "created_at"
+    if start is not None:
+        queryset = queryset.filter(**{f"{column}__gte": start})
+    if end is not None:
+        queryset = queryset.filter(**{f"{column}__lte": end})
+    return queryset
+
+
+# ---------------------------------------------------------------------------
+# Table conversion (migration tooling)
+# ---------------------------------------------------------------------------
+
+
+def _table_indexes(cursor, table: str, column: str) -> List[Tuple[str, bool, bool]]:
+    """
+    ``(definition, is_unique, has_column)`` of every non-primary-key index on
+    ``table``; ``has_column`` tells whether ``column`` is one of its keys
+    """
+    cursor.execute(
+        "SELECT pg_get_indexdef(ix.indexrelid), ix.indisunique, "
+        "EXISTS (SELECT 1 FROM pg_attribute a WHERE a.attrelid = ix.indrelid "
+        "AND a.attname = %s AND a.attnum = ANY(ix.indkey)) "
+        "FROM pg_index ix "
+        "WHERE ix.indrelid = to_regclass(%s) AND NOT ix.indisprimary",
+        [column, table],
+    )
+    return cursor.fetchall()
+
+
+def _outgoing_foreign_keys(cursor, table: str) -> List[Tuple[str, str]]:
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = to_regclass(%s) AND contype = 'f' "
+        "AND confrelid <> conrelid",
+        [table],
+    )
+    return cursor.fetchall()
+
+
+def _incoming_foreign_keys(cursor, table: str) -> List[Tuple[str, str]]:
+    """``(referencing table, constraint)`` of every FK that points at ``table``"""
+    cursor.execute(
+        "SELECT conrelid::regclass::text, conname FROM pg_constraint "
+        "WHERE confrelid = to_regclass(%s) AND contype = 'f' AND conparentid = 0",
+        [table],
+    )
+    return cursor.fetchall()
+
+
+def check_partitionable(cursor, table: str, column: str) -> None:
+    """
+    Raise ``NotSupportedError`` unless ``table`` can be partitioned on
+    ``column`` without losing a constraint.
+
+    A partitioned table cannot be the target of a foreign key unless the
+    referencing side carries the partition key too, and its unique indexes
+    must include the partition key. Rather than dropping those foreign keys
+    or downgrading unique indexes to plain ones, the conversion is refused.
+    """
+    problems = [
+        f"foreign key {name} on {referencing}"
+        for referencing, name in _incoming_foreign_keys(cursor, table)
+    ]
+    problems += [
+        f"unique index without {column}: {definition}"
+        for definition, unique, has_column in _table_indexes(cursor, table, column)
+        if unique and not has_column
+    ]
+    if problems:
+        raise NotSupportedError(
+            f"Cannot partition {table} by {column}, it would lose: "
+            + "; ".join(problems)
+        )
+
+
+def _rebuild_table(
+    cursor, table: str, column: str, pk_column: str, partitioned: bool
+) -> None:
+    """Copy ``table`` into a new (partitioned or plain) table of the same name"""
+    if partitioned:
+        check_partitionable(cursor, table, column)
+    indexes = _table_indexes(cursor, table, column)
+    foreign_keys = _outgoing_foreign_keys(cursor, table)
+
+    cursor.execute(
+        "SELECT attidentity <> '' FROM pg_attribute "
+        "WHERE attrelid = to_regclass(%s) AND attname = %s",
+        [table, pk_column],
+    )
+    identity = cursor.fetchone()[0]
+    cursor.execute("SELECT pg_get_serial_sequence(%s, %s)", [table, pk_column])
+    sequence = cursor.fetchone()[0]
+
+    old = f"{table}{LEGACY_SUFFIX}"
+    cursor.execute(f'ALTER TABLE "{table}" RENAME TO "{old}"')
+    cursor.execute(
+        f'CREATE TABLE "{table}" (LIKE "{old}" INCLUDING DEFAULTS INCLUDING IDENTITY '
+        f"INCLUDING CONSTRAINTS INCLUDING STORAGE INCLUDING COMMENTS)"
+        + (f' PARTITION BY RANGE ("{column}")' if partitioned else "")
+    )
+
+    if partitioned:
+        cursor.execute(
+            f'CREATE TABLE "{default_partition_name(table)}" PARTITION OF "{table}" DEFAULT'
+        )
+        cursor.execute(f'SELECT MIN("{column}") FROM "{old}"')
+        oldest = cursor.fetchone()[0]
+        month = month_start(oldest or timezone.now())
+        last = add_months(
+            month_start(timezone.now()),
+            getattr(settings, "PARTITION_PREMAKE_MONTHS", 3),
+        )
+        while month <= last:
+            create_month_partition(cursor, table, column, month)
+            month = add_months(month, 1)
+
+    cursor.execute(f'INSERT INTO "{table}" SELECT * FROM "{old}"')
+    logger.info(f"Copied {cursor.rowcount} rows into the rebuilt {table}")
+
+    if identity:
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence(%s, %s), "
+            f'COALESCE(MAX("{pk_column}"), 0) + 1, false) FROM "{table}"',
+            [table, pk_column],
+        )
+    elif sequence:
+        # Keep the serial sequence alive when the old table is dropped
+        cursor.execute(f'ALTER SEQUENCE {sequence} OWNED BY "{table}"."{pk_column}"')
+
+    # No CASCADE: anything still depending on the old table fails the migration
+    cursor.execute(f'DROP TABLE "{old}"')
+
+    primary_key = [pk_column, column] if partitioned else [pk_column]
+    cursor.execute(
+        f'ALTER TABLE "{table}" ADD PRIMARY KEY ('
+        + ", ".join(f'"{name}"' for name in primary_key)
+        + ")"
+    )
+
+    for definition, _, _ in indexes:
+        cursor.execute(definition.replace(" ON ONLY ", " ON "))
+
+    for name, definition in foreign_keys:
+        cursor.execute(f'ALTER TABLE "{table}" ADD CONSTRAINT "{name}" {definition}')
+
+
+class PartitionByMonth(Operation):
+    """
+    Migration operation converting a model's table to monthly range partitions.
+
+    The table is renamed, recreated and every row copied with a single
+    ``INSERT ... SELECT`` inside the migration transaction. The old table is
+    held under an ACCESS EXCLUSIVE lock from the rename until commit, so
+    reads and writes of it block for the whole copy and index rebuild
+    (roughly the time of a full-table rewrite), and the copy writes the
+    table size again to WAL. Apply it in a maintenance window on large
+    tables.
+
+    The primary key becomes ``(pk, partition key)``. Tables with incoming
+    foreign keys or unique indexes that lack the partition key are refused
+    (see ``check_partitionable``). Reversing rebuilds a plain table at the
+    same cost. Model state is unchanged.
+    """
+
+    reversible = True
+    reduces_to_sql = False
+
+    def __init__(self, model_name: str, column: str):
+        self.model_name = model_name
+        self.column = column
+
+    def deconstruct(self):
+        return (
+            self.__class__.__name__,
+            [],
+            {"model_name": self.model_name, "column": self.column},
+        )
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        self._rebuild(app_label, schema_editor, to_state, partitioned=True)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        self._rebuild(app_label, schema_editor, from_state, partitioned=False)
+
+    def _rebuild(self, app_label, schema_editor, state, partitioned: bool):
+        connection = schema_editor.connection
+        model = state.apps.get_model(app_label, self.model_name)
+        if connection.vendor != "postgresql" or not self.allow_migrate_model(
+            connection.alias, model
+        ):
+            return
+
+        table = model._meta.db_table
+        with connection.cursor() as cursor:
+            if is_partitioned(cursor, table) == partitioned:
+                return
+            _rebuild_table(
+                cursor,
+                table,
+                model._meta.get_field(self.column).column,
+                model._meta.pk.column,
+                partitioned,
+            )
+
+    def describe(self):
+        return f"Partition {self.model_name} by month on {self.column}"
+
+    @property
+    def migration_name_fragment(self):
+        return f"partition_{self.model_name.lower()}"
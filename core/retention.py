@@ -0,0 +1,310 @@
+# core/retention.py
+"""
+Data retention: per-model policies purged in small keyset batches
+
+Each entry of ``RETENTION_POLICIES`` names a model, the datetime field
+that ages it out and how many days to keep past that field (0 for
+expiry fields such as ``expires_at``). ``purge`` removes what is older:
+
+- Monthly partitions that lie wholly before the cutoff are dropped first
+  (see core.partitioning), unless the policy narrows the rows with a
+  ``filter`` or ``scope``.
+- The remaining rows are deleted ``batch_size`` at a time, walking
+  (field, pk) with a keyset cursor, one short transaction per batch, so
+  no statement holds locks for long or writes a burst of WAL.
+- Between batches the run sleeps ``RETENTION_BATCH_PAUSE`` seconds and,
+  on PostgreSQL, waits while a streaming replica is more than
+  ``RETENTION_MAX_REPLICA_LAG`` seconds behind. A run stops after
+  ``RETENTION_MAX_RUN_SECONDS``; the next scheduled run carries on.
+
+Every run logs and caches its figures (rows purged, batches, partitions
+dropped, seconds, time spent throttled); ``last_runs`` reads them back.
+The Celery beat entries are generated from the policies by
+``beat_schedule`` (see mindcare/celery.py).
+
+Offline message queues are not listed: they live in the cache and expire
+with their TTL.
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Dict, Optional, Union
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, router, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# model label -> aging column, days kept and options (see RetentionPolicy)
+DEFAULT_RETENTION_POLICIES = {
+    "notifications.Notification": {
+        "column": "created_at",
+        "days": 30,
+        "collect": "user_id",
+        "after": "notifications.inbox.rebuild",
+        "schedule": {"hour": 3, "minute": 0},
+    },
+    "datawarehouse.JournalInsightCache": {
+        "column": "expires_at",
+        "days": 0,
+        "schedule": {"minute": 15},
+    },
+    "datawarehouse.AIAnalysisDataset": {
+        "column": "expires_at",
+        "days": 7,
+        "schedule": {"hour": 3, "minute": 30},
+    },
+    "datawarehouse.DataProcessingQueue": {
+        "column": "requested_at",
+        "days": 30,
+        "filter": {"status__in": ["completed", "failed", "cancelled"]},
+        "schedule": {"hour": 4, "minute": 0},
+    },
+    # Six years (HIPAA), and only entries covered by a verified checkpoint;
+    # the purge then moves the anchor full chain verification starts from
+    "datawarehouse.AuditLog": {
+        "column": "created_at",
+        "days": 6 * 365,
+        "scope": "datawarehouse.services.audit_chain.verified_only",
+        "after": "datawarehouse.services.audit_chain.record_retention_anchor",
+        "schedule": {"day_of_week": 0, "hour": 4, "minute": 30},
+    },
+    # Only needed until the flushing hash they guard is deleted (feeds.counters)
+    "feeds.CounterFlush": {
+        "column": "flushed_at",
+        "days": 1,
+        "schedule": {"hour": 4, "minute": 45},
+    },
+    # Upload blobs no MediaFile or message uses any more (media_handler.pipeline)
+    "media_handler.MediaBlob": {
+        "column": "released_at",
+        "days": 1,
+        "filter": {"ref_count": 0},
+        "scope": "media_handler.pipeline.unreferenced",
+        "batch_size": 200,
+        "schedule": {"hour": 5, "minute": 0},
+    },
+}
+
+CACHE_KEY = "core:retention:last_run:{label}"
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    """
+    What to purge for one model:
+
+    - ``column``/``days``: rows whose ``column`` field is older than ``days`` ago
+    - ``filter``: extra lookups a row must also match
+    - ``scope``: dotted path of a ``queryset -> queryset`` callable, for
+      conditions that need a query of their own
+    - ``collect``/``after``: values of ``collect`` from the purged rows are
+      passed to the ``after`` callable (``None`` when whole partitions went,
+      or without ``collect``)
+    - ``schedule``: crontab keyword arguments, or an interval in seconds
+    """
+
+    model_label: str
+    column: str
+    days: int
+    filter: Dict[str, Any] = field(default_factory=dict)
+    scope: Optional[str] = None
+    collect: Optional[str] = None
+    after: Optional[str] = None
+    batch_size: Optional[int] = None
+    schedule: Union[Dict[str, Any], float] = field(
+        default_factory=lambda: {"hour": 3, "minute": 0}
+    )
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    @property
+    def using(self) -> str:
+        return router.db_for_write(self.model)
+
+    def cutoff(self, now=None):
+        return (now or timezone.now()) - timedelta(days=self.days)
+
+    def expired(self, now=None):
+        """Queryset of the rows this policy would purge"""
+        queryset = self.model._base_manager.using(self.using).filter(
+            **{f"{self.column}__lt": self.cutoff(now)}, **self.filter
+        )
+        if self.scope:
+            queryset = import_string(self.scope)(queryset)
+        return queryset
+
+
+def retention_policies() -> Dict[str, RetentionPolicy]:
+    """Configured policies keyed by model label"""
+    configured = getattr(settings, "RETENTION_POLICIES", DEFAULT_RETENTION_POLICIES)
+    return {
+        label: RetentionPolicy(label, **options)
+        for label, options in configured.items()
+    }
+
+
+def get_policy(label: str) -> RetentionPolicy:
+    try:
+        return retention_policies()[label]
+    except KeyError:
+        raise LookupError(f"No retention policy for {label}")
+
+
+# ---------------------------------------------------------------------------
+# Throttling
+# ---------------------------------------------------------------------------
+
+
+def replica_lag(using: str = "default") -> float:
+    """
+    Seconds the furthest streaming replica is behind in replaying WAL; 0
+    without replicas, off PostgreSQL, or without the ``pg_monitor`` role
+    """
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return 0.0
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT COALESCE(EXTRACT(EPOCH FROM MAX(replay_lag)), 0) "
+            "FROM pg_stat_replication"
+        )
+        return float(cursor.fetchone()[0])
+
+
+def _throttle(using: str, deadline: float) -> float:
+    """Pause between batches; returns the seconds spent waiting"""
+    started = time.monotonic()
+    time.sleep(getattr(settings, "RETENTION_BATCH_PAUSE", 0.1))
+    max_lag = getattr(settings, "RETENTION_MAX_REPLICA_LAG", 10.0)
+    while time.monotonic() < deadline:
+        lag = replica_lag(using)
+        if lag <= max_lag:
+            break
+        logger.info(f"Retention paused: replica lag {lag:.1f}s > {max_lag:.1f}s")
+        time.sleep(min(lag, 5.0))
+    return time.monotonic() - started
+
+
+# ---------------------------------------------------------------------------
+# Purging
+# ---------------------------------------------------------------------------
+
+
+def _drop_partitions(policy: RetentionPolicy, now=None) -> list:
+    from .partitioning import drop_expired_partitions, spec_for_model
+
+    spec = spec_for_model(policy.model)
+    if not spec or spec.column != policy.column or policy.filter or policy.scope:
+        return []
+    return drop_expired_partitions(spec, retention_days=policy.days, now=now)
+
+
+def purge(
+    policy: RetentionPolicy, now=None, max_seconds: Optional[float] = None
+) -> Dict[str, Any]:
+    """Purge what ``policy`` has retired; returns the run's figures"""
+    started = time.monotonic()
+    max_seconds = max_seconds or getattr(settings, "RETENTION_MAX_RUN_SECONDS", 600)
+    deadline = started + max_seconds
+    batch_size = policy.batch_size or getattr(settings, "RETENTION_BATCH_SIZE", 1000)
+    now = now or timezone.now()
+    using = policy.using
+
+    dropped = _drop_partitions(policy, now)
+
+    expired = policy.expired(now).order_by(policy.column, "pk")
+    columns = ["pk", policy.column] + ([policy.collect] if policy.collect else [])
+    collected = set()
+    deleted = batches = 0
+    throttled = 0.0
+    position = None
+    complete = False
+    while True:
+        page = expired
+        if position is not None:
+            value, pk = position
+            page = page.filter(
+                Q(**{f"{policy.column}__gt": value})
+                | Q(**{policy.column: value, "pk__gt": pk})
+            )
+        rows = list(page.values_list(*columns)[:batch_size])
+        if not rows:
+            complete = True
+            break
+
+        with transaction.atomic(using=using):
+            # Re-checked, so rows that stopped qualifying meanwhile are kept
+            count, _ = (
+                policy.expired(now).filter(pk__in=[row[0] for row in rows]).delete()
+            )
+        deleted += count
+        batches += 1
+        if policy.collect:
+            collected.update(row[2] for row in rows)
+        position = (rows[-1][1], rows[-1][0])
+
+        if len(rows) < batch_size:
+            complete = True
+            break
+        if time.monotonic() >= deadline:
+            break
+        throttled += _throttle(using, deadline)
+
+    if policy.after and (dropped or collected or (deleted and not policy.collect)):
+        import_string(policy.after)(
+            collected if policy.collect and not dropped else None
+        )
+
+    stats = {
+        "model": policy.model_label,
+        "cutoff": policy.cutoff(now).isoformat(),
+        "deleted": deleted,
+        "batches": batches,
+        "dropped_partitions": dropped,
+        "complete": complete,
+        "throttled_seconds": round(throttled, 2),
+        "seconds": round(time.monotonic() - started, 2),
+        "finished_at": timezone.now().isoformat(),
+    }
+    cache.set(CACHE_KEY.format(label=policy.model_label), stats, timeout=None)
+    logger.info(
+        f"Retention {policy.model_label}: purged {deleted} rows in {batches} batches, "
+        f"dropped {len(dropped)} partitions in {stats['seconds']}s"
+        + ("" if complete else " (time budget reached, resuming next run)")
+    )
+    return stats
+
+
+def last_runs() -> Dict[str, Optional[Dict[str, Any]]]:
+    """Figures of the latest run of every policy (``None`` if never run)"""
+    labels = list(retention_policies())
+    keys = {CACHE_KEY.format(label=label): label for label in labels}
+    cached = cache.get_many(list(keys))
+    return {label: cached.get(CACHE_KEY.format(label=label)) for label in labels}
+
+
+def beat_schedule() -> Dict[str, Dict[str, Any]]:
+    """One Celery beat entry per policy, running ``core.tasks.purge_expired``"""
+    from celery.schedules import crontab
+
+    entries = {}
+    for label, policy in retention_policies().items():
+        schedule = policy.schedule
+        entries[f"purge-{label}"] = {
+            "task": "core.tasks.purge_expired",
+            "schedule": (
+                crontab(**schedule) if isinstance(schedule, dict) else float(schedule)
+            ),
+            "args": [label],
+        }
+    return entries
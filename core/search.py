@@ -0,0 +1,74 @@
+# core/search.py
+"""
+Trigram search over denormalized search columns
+
+Searchable models keep a ``search_text`` column: the fields people search
+by, lowercased and with accents stripped ("José Núñez" -> "jose nunez"),
+filled in on save. On PostgreSQL the column carries a ``gin_trgm_ops``
+index, which serves both substring matches (``LIKE '%...%'``) and fuzzy
+word matches (``%>``), so searching never scans the table. Results are
+ranked by word similarity to the query.
+
+Stripping accents in Python keeps the index expression plain; the
+``unaccent`` extension is not IMMUTABLE and cannot be used in an index.
+"""
+
+import unicodedata
+
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connection
+from django.db.models import FloatField, Q, Value
+
+# Shorter queries have no trigram to look up and match word prefixes instead
+MIN_TRIGRAM_LENGTH = 3
+
+
+def normalize_search_text(*values) -> str:
+    """Lowercase, accent-free, single-spaced text of the non-empty ``values``"""
+    parts = []
+    for value in values:
+        if not value:
+            continue
+        if isinstance(value, (list, tuple)):
+            parts.extend(str(item) for item in value if item)
+        else:
+            parts.append(str(value))
+    text = unicodedata.normalize("NFKD", " ".join(parts))
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(text.lower().split())
+
+
+def ranked_search(queryset, query: str, field: str = "search_text"):
+    """
+    Rows of ``queryset`` whose ``field`` contains ``query`` or is similar to
+    it, best matches first, annotated with ``rank``
+    """
+    query = normalize_search_text(query)
+    if not query:
+        return queryset.none()
+
+    if len(query) < MIN_TRIGRAM_LENGTH:
+        # Word prefixes only; the trigram index cannot help here
+        matches = Q(**{f"{field}__startswith": query}) | Q(
+            **{f"{field}__contains": f" {query}"}
+        )
+    elif connection.vendor != "postgresql":
+        matches = Q(**{f"{field}__contains": query})
+    else:
+        matches = None
+
+    if matches is not None:
+        return (
+            queryset.filter(matches)
+            .annotate(rank=Value(1.0, output_field=FloatField()))
+            .order_by("pk")
+        )
+
+    return (
+        queryset.filter(
+            Q(**{f"{field}__contains": query})
+            | Q(**{f"{field}__trigram_word_similar": query})
+        )
+        .annotate(rank=TrigramWordSimilarity(query, field))
+        .order_by("-rank", "pk")
+    )
@@ -0,0 +1,24 @@
+import logging
+
+from celery import shared_task
+
+from . import retention
+from .partitioning import maintain_all
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def maintain_partitions(months_ahead=None):
+    """Create upcoming monthly partitions and drop expired ones"""
+    results = maintain_all(months_ahead)
+    created = sum(len(result["created"]) for result in results.values())
+    dropped = sum(len(result["dropped"]) for result in results.values())
+    logger.info(f"Partition maintenance: {created} created, {dropped} dropped")
+    return results
+
+
+@shared_task
+def purge_expired(model_label):
+    """Apply the retention policy of ``model_label`` (see core.retention)"""
+    return retention.purge(retention.get_policy(model_label))
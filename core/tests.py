@@ -1 +1,33 @@
-# Create your tests here.
+from django.db import NotSupportedError, connection
+from django.test import TestCase
+
+from chatbot.models import ChatMessage
+from datawarehouse.models import AccessLog, AuditLog
+from notifications.models import Notification
+
+from .partitioning import check_partitionable, is_partitioned, partition_specs
+
+
+class PartitionConstraintTest(TestCase):
+    def check(self, model, column):
+        with connection.cursor() as cursor:
+            check_partitionable(cursor, model._meta.db_table, column)
+
+    def test_referenced_tables_are_refused(self):
+        if connection.vendor != "postgresql":
+            self.skipTest("Partitioning is PostgreSQL only")
+        # Field changes reference the audit log, whose chain sequence is unique
+        with self.assertRaisesMessage(NotSupportedError, "(sequence)"):
+            self.check(AuditLog, "created_at")
+        with self.assertRaisesMessage(NotSupportedError, "foreign key"):
+            self.check(ChatMessage, "timestamp")
+
+    def test_configured_tables_are_partitioned(self):
+        if connection.vendor != "postgresql":
+            self.skipTest("Partitioning is PostgreSQL only")
+        self.assertNotIn("datawarehouse.AuditLog", partition_specs())
+        with connection.cursor() as cursor:
+            for model in (AccessLog, Notification):
+                self.assertTrue(is_partitioned(cursor, model._meta.db_table))
+                check_partitionable(cursor, model._meta.db_table, "created_at")
+            self.assertFalse(is_partitioned(cursor, AuditLog._meta.db_table))
@@ -0,0 +1,253 @@
+# datawarehouse/management/commands/benchmark_collection_analytics.py
+"""
+Benchmark the mood/journal collection analytics on a synthetic long-history user
+
+Each analysis is timed on the service method and on the row-wise reference
+loop (``datawarehouse.management.rowwise_analytics``). The word-splitting and
+keyword paths are loops in the services too, since the ``str`` accessor is
+slower than plain loops without pyarrow.
+"""
+
+import random
+import time
+
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand
+
+from datawarehouse.management import rowwise_analytics as rowwise
+from datawarehouse.services.journal_collection_service import (
+    JournalCollectionService,
+)
+from datawarehouse.services.mood_collection_service import MoodCollectionService
+from datawarehouse.services.unified_data_collection_service import (
+    UnifiedDataCollectionService,
+)
+from mood.models import ACTIVITY_CHOICES
+
+JOURNAL_VOCABULARY = (
+    "today i felt happy sad anxious worried grateful tired work job family "
+    "friend partner therapy session goal progress sleep exercise meditation "
+    "the and my was with about after before because really very much"
+).split()
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the vectorized mood/journal analytics against the row-wise "
+        "reference loops on synthetic data (no database access)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--years",
+            type=int,
+            default=5,
+            help="Years of daily history to synthesize (default: 5)",
+        )
+        parser.add_argument(
+            "--logs-per-day",
+            type=int,
+            default=3,
+            help="Mood logs per day (default: 3)",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Timed runs per analysis; the best run is reported (default: 5)",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options["seed"])
+        random.seed(options["seed"])
+        days = options["years"] * 365
+
+        mood_df = self._build_mood_frame(rng, days, options["logs_per_day"])
+        journal_df = self._build_journal_frame(rng, days)
+        self.stdout.write(
+            f"Synthetic user: {len(mood_df)} mood logs, "
+            f"{len(journal_df)} journal entries over {days} days"
+        )
+
+        mood_service = MoodCollectionService()
+        journal_service = JournalCollectionService()
+        unified_service = UnifiedDataCollectionService.__new__(
+            UnifiedDataCollectionService
+        )
+        daily_moods = (
+            mood_df["mood_rating"].groupby(mood_df["logged_at"].dt.date).mean()
+        )
+        unified_journal = journal_df[["created_at", "content"]]
+
+        def rowwise_path(func, service):
+            return lambda data: func(service, data)
+
+        benchmarks = [
+            (
+                "mood.activity_patterns",
+                mood_service._analyze_activity_patterns,
+                rowwise_path(rowwise.mood_activity_patterns, mood_service),
+                mood_df,
+                mood_df,
+            ),
+            (
+                "mood.sleep_correlations",
+                mood_service._analyze_sleep_correlations,
+                rowwise_path(rowwise.mood_sleep_correlations, mood_service),
+                mood_df,
+                mood_df,
+            ),
+            (
+                "journal.total_words",
+                journal_service._calculate_total_words,
+                rowwise_path(rowwise.journal_total_words, journal_service),
+                journal_df,
+                journal_df,
+            ),
+            (
+                "journal.mood_improvement",
+                journal_service._calculate_mood_improvement,
+                rowwise_path(rowwise.journal_mood_improvement, journal_service),
+                journal_df,
+                journal_df,
+            ),
+            (
+                "journal.sentiment",
+                journal_service._analyze_sentiment,
+                rowwise_path(rowwise.journal_sentiment, journal_service),
+                journal_df,
+                journal_df,
+            ),
+            (
+                "journal.topics",
+                journal_service._extract_topics,
+                rowwise_path(rowwise.journal_topics, journal_service),
+                journal_df,
+                journal_df,
+            ),
+            (
+                "journal.emotions",
+                journal_service._track_emotions,
+                rowwise_path(rowwise.journal_emotions, journal_service),
+                journal_df,
+                journal_df,
+            ),
+            (
+                "journal.therapeutic_themes",
+                journal_service._analyze_therapeutic_themes,
+                rowwise_path(rowwise.journal_therapeutic_themes, journal_service),
+                journal_df,
+                journal_df,
+            ),
+            (
+                "unified.mood_patterns",
+                unified_service._analyze_mood_patterns,
+                rowwise_path(rowwise.unified_mood_patterns, unified_service),
+                mood_df,
+                mood_df,
+            ),
+            (
+                "unified.mood_consistency",
+                unified_service._calculate_mood_consistency,
+                rowwise_path(rowwise.unified_mood_consistency, unified_service),
+                daily_moods,
+                mood_df,
+            ),
+            (
+                "unified.writing_patterns",
+                unified_service._analyze_writing_patterns,
+                rowwise_path(rowwise.unified_writing_patterns, unified_service),
+                unified_journal,
+                unified_journal,
+            ),
+            (
+                "unified.content_diversity",
+                unified_service._analyze_content_diversity,
+                rowwise_path(rowwise.unified_content_diversity, unified_service),
+                unified_journal,
+                unified_journal,
+            ),
+        ]
+
+        self.stdout.write(
+            f"  {'analysis':<32} {'row-wise':>12} {'service':>12} {'speedup':>8}"
+        )
+        total_rowwise = total_vectorized = 0.0
+        for name, vectorized, rowwise_func, data, rowwise_data in benchmarks:
+            best_vectorized = self._time(vectorized, data, options["repeat"])
+            # The loops are slow on long histories; a few runs are enough
+            best_rowwise = self._time(
+                rowwise_func, rowwise_data, min(options["repeat"], 2)
+            )
+            total_vectorized += best_vectorized
+            total_rowwise += best_rowwise
+            self.stdout.write(
+                f"  {name:<32} {best_rowwise * 1000:9.2f} ms {best_vectorized * 1000:9.2f} ms"
+                f" {best_rowwise / max(best_vectorized, 1e-9):7.1f}x"
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Total: {total_rowwise * 1000:.2f} ms row-wise, "
+                f"{total_vectorized * 1000:.2f} ms service "
+                f"({total_rowwise / max(total_vectorized, 1e-9):.1f}x)"
+            )
+        )
+
+    def _time(self, func, data, repeat: int) -> float:
+        """Best wall-clock time of ``repeat`` runs on a fresh copy of the data"""
+        timings = []
+        for _ in range(max(1, repeat)):
+            frame = data.copy()
+            start = time.perf_counter()
+            func(frame)
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    def _build_mood_frame(self, rng, days: int, per_day: int) -> pd.DataFrame:
+        """Daily mood logs shaped like ``MoodCollectionService`` input"""
+        size = days * per_day
+        start = pd.Timestamp.now(tz="UTC").normalize() - pd.Timedelta(days=days)
+        offsets = np.sort(rng.integers(0, days * 24 * 60, size=size))
+        activities = np.array([choice for choice, _ in ACTIVITY_CHOICES] + [None])
+        energy = rng.integers(1, 6, size=size).astype("float64")
+        energy[rng.random(size) < 0.2] = np.nan
+
+        return pd.DataFrame(
+            {
+                "id": np.arange(size, dtype="int64"),
+                "mood_rating": rng.integers(1, 11, size=size).astype("float64"),
+                "energy_level": energy,
+                "activities": activities[rng.integers(0, len(activities), size=size)],
+                "notes": [
+                    " ".join(random.choices(JOURNAL_VOCABULARY, k=8))
+                    if rng.random() < 0.5
+                    else None
+                    for _ in range(size)
+                ],
+                "logged_at": start + pd.to_timedelta(offsets, unit="m"),
+            }
+        )
+
+    def _build_journal_frame(self, rng, days: int) -> pd.DataFrame:
+        """One journal entry per day shaped like ``JournalCollectionService`` input"""
+        start = pd.Timestamp.now(tz="UTC").normalize() - pd.Timedelta(days=days)
+        mood_before = rng.integers(1, 11, size=days).astype("float64")
+        mood_before[rng.random(days) < 0.3] = np.nan
+
+        return pd.DataFrame(
+            {
+                "id": np.arange(days, dtype="int64"),
+                "content": [
+                    " ".join(random.choices(JOURNAL_VOCABULARY, k=int(length)))
+                    for length in rng.integers(20, 300, size=days)
+                ],
+                "mood_before": mood_before,
+                "mood_after": rng.integers(1, 11, size=days).astype("float64"),
+                "created_at": start
+                + pd.to_timedelta(np.arange(days), unit="D")
+                + pd.to_timedelta(rng.integers(0, 24 * 60, size=days), unit="m"),
+            }
+        )
@@ -0,0 +1,41 @@
+# datawarehouse/management/commands/run_realtime_consumer.py
+"""
+Run a real-time analytics stream consumer
+"""
+
+import asyncio
+
+from django.core.management.base import BaseCommand
+
+from datawarehouse.services.realtime_analytics import realtime_service
+
+
+class Command(BaseCommand):
+    help = (
+        "Consume real-time analytics events from the Redis stream as a member "
+        "of the handler consumer group (run one per worker process)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--consumer",
+            type=str,
+            default=None,
+            help="Consumer name within the group (default: <hostname>-<pid>)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Messages read per round trip (default: 100)",
+        )
+
+    def handle(self, *args, **options):
+        processor = realtime_service.stream_processor
+        self.stdout.write(
+            f"Consuming {processor.stream.key} as group {processor.stream.group}"
+        )
+        try:
+            asyncio.run(processor.consume(options["consumer"], options["batch_size"]))
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.SUCCESS("Consumer stopped"))
@@ -0,0 +1,65 @@
+# datawarehouse/management/commands/verify_audit_chain.py
+"""
+Management command to verify the audit log hash chain
+"""
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from datawarehouse.services.audit_chain import AuditChainVerifier, audit_writer
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream the audit log hash chain and verify every link, starting from "
+        "the last verified checkpoint"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Verify the whole chain instead of resuming from the checkpoint",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=None,
+            help="Rows fetched per database round trip",
+        )
+        parser.add_argument(
+            "--max-details",
+            type=int,
+            default=100,
+            help="Maximum number of failures to report in detail",
+        )
+
+    def handle(self, *args, **options):
+        # Link rows that are saved but not chained yet
+        audit_writer.chain_pending()
+
+        verifier = AuditChainVerifier(
+            chunk_size=options["chunk_size"], max_details=options["max_details"]
+        )
+        result = verifier.verify(
+            from_checkpoint=not options["full"],
+            progress_callback=self._report_progress,
+        )
+
+        self.stdout.write(json.dumps(result, indent=2))
+        if result["failed_entries"]:
+            raise CommandError(
+                f"Audit chain verification failed for {result['failed_entries']} "
+                f"of {result['checked_entries']} entries"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Verified {result['checked_entries']} entries, checkpoint at "
+                f"sequence {result['verified_sequence']}"
+            )
+        )
+
+    def _report_progress(self, checked: int, total: int):
+        percent = checked / total * 100 if total else 100
+        self.stdout.write(f"  verified {checked}/{total} ({percent:.1f}%)")
@@ -0,0 +1,564 @@
+# datawarehouse/management/rowwise_analytics.py
+"""
+Row-wise reference implementations of the mood/journal collection analytics
+
+These are the per-row loops the vectorized services replaced, kept so the
+golden-output tests can check the vectorized results against them and
+``benchmark_collection_analytics`` can time both paths. They are not used
+by the services.
+
+Each function takes the service instance and the same input as the method
+it mirrors, and returns the same structure. The unified-service loops read
+rows from the same frames the vectorized methods receive instead of model
+instances.
+"""
+
+import re
+import statistics
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+from datawarehouse.services.journal_collection_service import (
+    EMOTION_KEYWORDS,
+    SENTIMENT_KEYWORDS,
+    STOP_WORDS,
+    TOPIC_KEYWORDS,
+)
+from datawarehouse.services.mood_collection_service import SLEEP_KEYWORDS
+
+
+def keyword_hits(texts: Iterable[str], keywords: Iterable[str]) -> List[int]:
+    """``frame_utils.keyword_hits`` as a loop over texts"""
+    keywords = list(keywords)
+    return [sum(1 for keyword in keywords if keyword in text) for text in texts]
+
+
+# MoodCollectionService
+
+
+def mood_activity_patterns(service, df: pd.DataFrame) -> Dict[str, Any]:
+    """``MoodCollectionService._analyze_activity_patterns``"""
+    try:
+        if df.empty or "activities" not in df:
+            return {}
+
+        activity_mood_map = {}
+        total_activities = 0
+
+        for index, row in df.iterrows():
+            if pd.isna(row["activities"]) or pd.isna(row["mood_rating"]):
+                continue
+
+            activities = row["activities"]
+            mood = row["mood_rating"]
+
+            # Handle different activity data formats
+            if isinstance(activities, str):
+                activity_list = [activities]
+            elif isinstance(activities, list):
+                activity_list = activities
+            else:
+                continue
+
+            for activity in activity_list:
+                if activity not in activity_mood_map:
+                    activity_mood_map[activity] = []
+                activity_mood_map[activity].append(mood)
+                total_activities += 1
+
+        activity_analysis = {}
+        for activity, moods in activity_mood_map.items():
+            activity_analysis[activity] = {
+                "avg_mood": float(np.mean(moods)),
+                "count": len(moods),
+                "mood_range": float(np.max(moods) - np.min(moods))
+                if len(moods) > 1
+                else 0.0,
+            }
+
+        return {
+            "total_activities_logged": total_activities,
+            "unique_activities": len(activity_mood_map),
+            "activity_mood_analysis": activity_analysis,
+            "most_mood_boosting": max(
+                activity_analysis.items(),
+                key=lambda x: x[1]["avg_mood"],
+                default=(None, {}),
+            )[0],
+        }
+
+    except Exception:
+        return {}
+
+
+def mood_sleep_correlations(service, df: pd.DataFrame) -> Dict[str, Any]:
+    """``MoodCollectionService._analyze_sleep_correlations``"""
+    sleep_mentions = 0
+    if "notes" in df:
+        for note in df["notes"].dropna():
+            if any(keyword in str(note).lower() for keyword in SLEEP_KEYWORDS):
+                sleep_mentions += 1
+
+    return {
+        "sleep_mentions_in_notes": sleep_mentions,
+        "sleep_impact_detected": sleep_mentions > 0,
+        "note": "Sleep correlation analysis placeholder - integrate with health metrics",
+    }
+
+
+# MoodTrackingCollectionService
+
+
+def tracking_activity_patterns(service, df: pd.DataFrame) -> Dict[str, Any]:
+    """``MoodTrackingCollectionService._analyze_activity_patterns``"""
+    if df.empty or "activities" not in df:
+        return {}
+
+    all_activities = []
+    activity_mood_map = {}
+
+    for idx, row in df.iterrows():
+        activities = row.get("activities", [])
+        mood_score = row.get("mood_score")
+
+        if isinstance(activities, list) and mood_score is not None:
+            for activity in activities:
+                all_activities.append(activity)
+                if activity not in activity_mood_map:
+                    activity_mood_map[activity] = []
+                activity_mood_map[activity].append(mood_score)
+
+    if not all_activities:
+        return {}
+
+    activity_counts = pd.Series(all_activities).value_counts()
+
+    activity_mood_averages = {}
+    for activity, moods in activity_mood_map.items():
+        if moods:
+            activity_mood_averages[activity] = {
+                "average_mood": np.mean(moods),
+                "mood_count": len(moods),
+                "mood_std": np.std(moods) if len(moods) > 1 else 0.0,
+            }
+
+    return {
+        "total_activities_logged": len(all_activities),
+        "unique_activities": len(set(all_activities)),
+        "activity_frequency": activity_counts.head(10).to_dict(),
+        "activity_mood_correlation": activity_mood_averages,
+        "most_positive_activities": sorted(
+            activity_mood_averages.items(),
+            key=lambda x: x[1]["average_mood"],
+            reverse=True,
+        )[:5],
+        "activity_diversity_score": len(set(all_activities)) / len(all_activities),
+    }
+
+
+# JournalCollectionService
+
+
+def journal_total_words(service, df: pd.DataFrame) -> int:
+    """``JournalCollectionService._calculate_total_words``"""
+    if df.empty or "content" not in df:
+        return 0
+
+    total_words = 0
+    for content in df["content"].dropna():
+        if isinstance(content, str):
+            total_words += len(content.split())
+    return total_words
+
+
+def journal_avg_content_length(service, df: pd.DataFrame) -> float:
+    """``JournalCollectionService._calculate_avg_content_length``"""
+    if df.empty or "content" not in df:
+        return 0.0
+
+    word_counts = []
+    for content in df["content"].dropna():
+        if isinstance(content, str):
+            word_counts.append(len(content.split()))
+    return float(np.mean(word_counts)) if word_counts else 0.0
+
+
+def journal_mood_improvement(service, df: pd.DataFrame) -> float:
+    """``JournalCollectionService._calculate_mood_improvement``"""
+    if df.empty or "mood_before" not in df or "mood_after" not in df:
+        return 0.0
+
+    mood_changes = []
+    for index, row in df.iterrows():
+        if pd.notna(row["mood_before"]) and pd.notna(row["mood_after"]):
+            mood_changes.append(row["mood_after"] - row["mood_before"])
+    return float(np.mean(mood_changes)) if mood_changes else 0.0
+
+
+def journal_sentiment(service, df: pd.DataFrame) -> Dict[str, Any]:
+    """``JournalCollectionService._analyze_sentiment``"""
+    if df.empty or "content" not in df:
+        return {}
+
+    positive_words = SENTIMENT_KEYWORDS["positive"]
+    negative_words = SENTIMENT_KEYWORDS["negative"]
+    sentiment_scores = []
+    positive_count = 0
+    negative_count = 0
+    neutral_count = 0
+
+    for content in df["content"].dropna():
+        if not isinstance(content, str):
+            continue
+
+        content_lower = content.lower()
+        pos_score = sum(1 for word in positive_words if word in content_lower)
+        neg_score = sum(1 for word in negative_words if word in content_lower)
+
+        if pos_score > neg_score:
+            positive_count += 1
+            score = (pos_score - neg_score) / max(1, pos_score + neg_score)
+        elif neg_score > pos_score:
+            negative_count += 1
+            score = (neg_score - pos_score) / max(1, pos_score + neg_score) * -1
+        else:
+            neutral_count += 1
+            score = 0
+
+        sentiment_scores.append(score)
+
+    avg_sentiment = float(np.mean(sentiment_scores)) if sentiment_scores else 0.0
+
+    if avg_sentiment > 0.2:
+        trend = "predominantly_positive"
+    elif avg_sentiment < -0.2:
+        trend = "predominantly_negative"
+    else:
+        trend = "balanced"
+
+    return {
+        "average_sentiment_score": avg_sentiment,
+        "sentiment_trend": trend,
+        "positive_entries": positive_count,
+        "negative_entries": negative_count,
+        "neutral_entries": neutral_count,
+        "sentiment_distribution": {
+            "positive": positive_count,
+            "negative": negative_count,
+            "neutral": neutral_count,
+        },
+        "sentiment_consistency": float(np.std(sentiment_scores))
+        if len(sentiment_scores) > 1
+        else 0.0,
+    }
+
+
+def journal_topics(service, df: pd.DataFrame) -> Dict[str, Any]:
+    """``JournalCollectionService._extract_topics``"""
+    if df.empty or "content" not in df:
+        return {}
+
+    all_words = []
+    topic_mentions = {}
+
+    for content in df["content"].dropna():
+        if not isinstance(content, str):
+            continue
+
+        content_lower = content.lower()
+        all_words.extend(re.findall(r"\b\w+\b", content_lower))
+
+        for topic, keywords in TOPIC_KEYWORDS.items():
+            mentions = sum(1 for keyword in keywords if keyword in content_lower)
+            if topic not in topic_mentions:
+                topic_mentions[topic] = 0
+            topic_mentions[topic] += mentions
+
+    filtered_words = [
+        word for word in all_words if word not in STOP_WORDS and len(word) > 2
+    ]
+    word_freq = pd.Series(filtered_words, dtype=object).value_counts()
+
+    return {
+        "total_unique_words": len(set(all_words)),
+        "topic_mentions": topic_mentions,
+        "most_discussed_topic": max(
+            topic_mentions.items(), key=lambda x: x[1], default=(None, 0)
+        )[0],
+        "top_keywords": dict(word_freq.head(10)),
+        "vocabulary_richness": len(set(all_words)) / max(1, len(all_words)),
+        "avg_words_per_entry": len(all_words) / max(1, len(df)),
+    }
+
+
+def journal_emotions(service, df: pd.DataFrame) -> Dict[str, Any]:
+    """``JournalCollectionService._track_emotions``"""
+    if df.empty or "content" not in df:
+        return {}
+
+    emotion_timeline = []
+    emotion_counts = {emotion: 0 for emotion in EMOTION_KEYWORDS}
+
+    for index, row in df.iterrows():
+        if pd.isna(row["content"]) or not isinstance(row["content"], str):
+            continue
+
+        content_lower = row["content"].lower()
+        entry_emotions = []
+
+        for emotion, keywords in EMOTION_KEYWORDS.items():
+            count = sum(1 for keyword in keywords if keyword in content_lower)
+            if count > 0:
+                emotion_counts[emotion] += count
+                entry_emotions.append(emotion)
+
+        emotion_timeline.append(
+            {
+                "date": row["created_at"],
+                "emotions": entry_emotions,
+                "dominant_emotion": max(
+                    [
+                        (e, sum(1 for k in EMOTION_KEYWORDS[e] if k in content_lower))
+                        for e in EMOTION_KEYWORDS
+                    ],
+                    key=lambda x: x[1],
+                    default=(None, 0),
+                )[0],
+            }
+        )
+
+    total_emotion_mentions = sum(emotion_counts.values())
+    emotion_distribution = {
+        emotion: count / max(1, total_emotion_mentions)
+        for emotion, count in emotion_counts.items()
+    }
+
+    return {
+        "emotion_counts": emotion_counts,
+        "emotion_distribution": emotion_distribution,
+        "dominant_emotion": max(
+            emotion_counts.items(), key=lambda x: x[1], default=(None, 0)
+        )[0],
+        "emotional_diversity": len([e for e, c in emotion_counts.items() if c > 0]),
+        "emotion_timeline": emotion_timeline[-10:],
+        "emotional_balance_score": service._calculate_emotional_balance(emotion_counts),
+    }
+
+
+def journal_therapeutic_themes(service, df: pd.DataFrame) -> Dict[str, Any]:
+    """``JournalCollectionService._analyze_therapeutic_themes``"""
+    if df.empty or "content" not in df:
+        return {}
+
+    themes = service.therapeutic_themes
+    theme_counts = {theme: 0 for theme in themes}
+    theme_evolution = []
+
+    for index, row in df.iterrows():
+        if pd.isna(row["content"]) or not isinstance(row["content"], str):
+            continue
+
+        content_lower = row["content"].lower()
+        entry_themes = []
+
+        for theme, keywords in themes.items():
+            count = sum(1 for keyword in keywords if keyword in content_lower)
+            if count > 0:
+                theme_counts[theme] += count
+                entry_themes.append(theme)
+
+        theme_evolution.append(
+            {
+                "date": row["created_at"],
+                "themes": entry_themes,
+                "primary_theme": max(
+                    [
+                        (t, sum(1 for k in themes[t] if k in content_lower))
+                        for t in themes
+                    ],
+                    key=lambda x: x[1],
+                    default=(None, 0),
+                )[0],
+            }
+        )
+
+    positive_themes = ["joy", "gratitude", "self_care", "goals"]
+    negative_themes = ["anxiety", "depression", "anger"]
+    positive_mentions = sum(
+        theme_counts[t] for t in positive_themes if t in theme_counts
+    )
+    negative_mentions = sum(
+        theme_counts[t] for t in negative_themes if t in theme_counts
+    )
+    therapeutic_balance = (positive_mentions - negative_mentions) / max(
+        1, positive_mentions + negative_mentions
+    )
+
+    return {
+        "theme_counts": theme_counts,
+        "primary_theme": max(
+            theme_counts.items(), key=lambda x: x[1], default=(None, 0)
+        )[0],
+        "positive_theme_mentions": positive_mentions,
+        "negative_theme_mentions": negative_mentions,
+        "therapeutic_balance_score": float(therapeutic_balance),
+        "theme_diversity": len([t for t, c in theme_counts.items() if c > 0]),
+        "therapy_engagement_indicators": {
+            "mentions_therapy": theme_counts.get("therapy", 0),
+            "self_care_focus": theme_counts.get("self_care", 0),
+            "goal_orientation": theme_counts.get("goals", 0),
+        },
+        "theme_evolution": theme_evolution[-5:],
+    }
+
+
+# UnifiedDataCollectionService
+
+
+def _daily_moods(df: pd.DataFrame) -> Dict[Any, List[float]]:
+    daily_moods = {}
+    for logged_at, mood in zip(df["logged_at"], df["mood_rating"]):
+        daily_moods.setdefault(logged_at.date(), []).append(mood)
+    return daily_moods
+
+
+def unified_mood_trend(service, df: pd.DataFrame) -> Dict[str, Any]:
+    """``UnifiedDataCollectionService._calculate_mood_trend`` on a mood frame"""
+    daily_moods = _daily_moods(df)
+    if len(daily_moods) < 2:
+        return {"trend": "insufficient_data", "strength": 0.0}
+
+    sorted_days = sorted(daily_moods.keys())
+    daily_averages = [statistics.mean(daily_moods[day]) for day in sorted_days]
+
+    n = len(daily_averages)
+    x_mean = n / 2
+    y_mean = statistics.mean(daily_averages)
+    numerator = sum((i - x_mean) * (y - y_mean) for i, y in enumerate(daily_averages))
+    denominator = sum((i - x_mean) ** 2 for i in range(n))
+    slope = 0 if denominator == 0 else numerator / denominator
+
+    if slope > 0.1:
+        trend = "improving"
+    elif slope < -0.1:
+        trend = "declining"
+    else:
+        trend = "stable"
+
+    return {
+        "trend": trend,
+        "strength": abs(slope),
+        "slope": slope,
+        "daily_averages": daily_averages,
+    }
+
+
+def unified_mood_patterns(service, df: pd.DataFrame) -> Dict[str, Any]:
+    """``UnifiedDataCollectionService._analyze_mood_patterns``"""
+    weekly_moods = defaultdict(list)
+    hourly_moods = defaultdict(list)
+
+    for logged_at, mood in zip(df["logged_at"], df["mood_rating"]):
+        weekly_moods[logged_at.strftime("%A")].append(mood)
+        hourly_moods[logged_at.hour].append(mood)
+
+    return {
+        "weekly_patterns": {
+            day: statistics.mean(scores) for day, scores in weekly_moods.items()
+        },
+        "daily_patterns": {
+            hour: statistics.mean(scores) for hour, scores in hourly_moods.items()
+        },
+        "temporal_insights": {},
+    }
+
+
+def unified_mood_consistency(service, df: pd.DataFrame) -> float:
+    """``UnifiedDataCollectionService._calculate_mood_consistency`` on a mood frame"""
+    daily_moods = _daily_moods(df)
+    if len(daily_moods) < 3:
+        return 0.0
+
+    daily_averages = [statistics.mean(scores) for scores in daily_moods.values()]
+    variance = statistics.variance(daily_averages)
+    consistency = max(0.0, 1.0 - (variance / 25.0))
+    return min(1.0, consistency)
+
+
+def unified_writing_consistency(service, df: pd.DataFrame) -> Dict[str, Any]:
+    """``UnifiedDataCollectionService._calculate_writing_consistency``"""
+    if len(df) < 3:
+        return {"score": 0.0, "pattern": "insufficient_data"}
+
+    daily_counts = defaultdict(int)
+    for created_at in df["created_at"]:
+        daily_counts[created_at.date()] += 1
+
+    daily_entries = list(daily_counts.values())
+    avg_entries = statistics.mean(daily_entries)
+    std_entries = statistics.stdev(daily_entries) if len(daily_entries) > 1 else 0
+    consistency = max(0.0, 1.0 - (std_entries / (avg_entries + 1)))
+
+    return {
+        "score": consistency,
+        "average_entries_per_day": avg_entries,
+        "variability": std_entries,
+        "pattern": "consistent"
+        if consistency > 0.7
+        else "variable"
+        if consistency > 0.3
+        else "irregular",
+    }
+
+
+def unified_writing_patterns(service, df: pd.DataFrame) -> Dict[str, Any]:
+    """``UnifiedDataCollectionService._analyze_writing_patterns``"""
+    hourly_entries = defaultdict(int)
+    weekly_entries = defaultdict(int)
+
+    for created_at in df["created_at"]:
+        hourly_entries[created_at.hour] += 1
+        weekly_entries[created_at.strftime("%A")] += 1
+
+    return {
+        "preferred_times": dict(hourly_entries),
+        "weekly_patterns": dict(weekly_entries),
+        "frequency_analysis": {
+            "total_entries": len(df),
+            "active_hours": len(hourly_entries),
+            "active_days": len(weekly_entries),
+        },
+    }
+
+
+def unified_content_diversity(service, df: pd.DataFrame) -> Dict[str, Any]:
+    """``UnifiedDataCollectionService._analyze_content_diversity``"""
+    if df.empty:
+        return {"score": 0.0, "analysis": "no_content"}
+
+    all_words = set()
+    total_words = 0
+    for content in df["content"]:
+        # Missing content reads as "", like ``entry.content or ""``
+        words = set((content if isinstance(content, str) else "").lower().split())
+        all_words.update(words)
+        total_words += len(words)
+
+    unique_words = len(all_words)
+    avg_words_per_entry = total_words / max(len(df), 1)
+    diversity = min(1.0, unique_words / max(total_words, 1) * 10)
+
+    return {
+        "score": diversity,
+        "unique_words": unique_words,
+        "total_words": total_words,
+        "average_words_per_entry": avg_words_per_entry,
+        "analysis": "diverse"
+        if diversity > 0.7
+        else "moderate"
+        if diversity > 0.4
+        else "repetitive",
+    }
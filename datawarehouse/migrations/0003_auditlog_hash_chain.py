@@ -0,0 +1,48 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        (
+            "datawarehouse",
+            "0002_aianalysisdataset_auditlog_backupjob_encryptionkey_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="auditlog",
+            name="sequence",
+            field=models.BigIntegerField(editable=False, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name="auditlog",
+            name="previous_hash",
+            field=models.CharField(blank=True, default="", max_length=64),
+        ),
+        migrations.CreateModel(
+            name="AuditChainState",
+            fields=[
+                (
+                    "id",
+                    models.PositiveSmallIntegerField(
+                        default=1, editable=False, primary_key=True, serialize=False
+                    ),
+                ),
+                ("last_sequence", models.BigIntegerField(default=0)),
+                ("last_hash", models.CharField(blank=True, default="", max_length=64)),
+                ("verified_sequence", models.BigIntegerField(default=0)),
+                (
+                    "verified_hash",
+                    models.CharField(blank=True, default="", max_length=64),
+                ),
+                ("verified_at", models.DateTimeField(null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "db_table": "datawarehouse_audit_chain_state",
+            },
+        ),
+    ]
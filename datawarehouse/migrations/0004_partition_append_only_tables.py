@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:30
+
+from django.db import migrations
+
+import core.partitioning
+
+
+class Migration(migrations.Migration):
+    """
+    Rebuild the access log and field change history as monthly partitions.
+
+    Each table is copied in full inside this migration's transaction and is
+    locked (ACCESS EXCLUSIVE, no reads or writes) until it commits, so the
+    migration takes about as long as rewriting both tables and their indexes.
+    Apply it in a maintenance window. The audit log itself is not
+    partitioned: its chain sequence is unique and field changes reference it.
+    """
+
+    dependencies = [
+        ("datawarehouse", "0003_auditlog_hash_chain"),
+    ]
+
+    operations = [
+        core.partitioning.PartitionByMonth(model_name="accesslog", column="created_at"),
+        core.partitioning.PartitionByMonth(
+            model_name="datachangehistory", column="created_at"
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("datawarehouse", "0004_partition_append_only_tables"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="auditchainstate",
+            name="anchor_sequence",
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="auditchainstate",
+            name="anchor_hash",
+            field=models.CharField(blank=True, default="", max_length=64),
+        ),
+    ]
@@ -702,6 +702,11 @@ class AuditLog(models.Model):
     severity = models.CharField(max_length=10, choices=AuditSeverity.choices, default=AuditSeverity.LOW)
     compliance_tags = ArrayField(models.CharField(max_length=50), default=list, blank=True)
     integrity_hash = models.CharField(max_length=64)
+    
+    # Hash chain: integrity_hash covers the row content and previous_hash.
+    # sequence stays NULL until the row is chained (see services.audit_chain)
+    sequence = models.BigIntegerField(unique=True, null=True, editable=False)
+    previous_hash = models.CharField(max_length=64, blank=True, default='')
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
@@ -737,6 +742,24 @@ class DataChangeHistory(models.Model):
         ]
 
 
+class AuditChainState(models.Model):
+    """Singleton tracking the audit hash-chain head and the last verified checkpoint"""
+    
+    id = models.PositiveSmallIntegerField(primary_key=True, default=1, editable=False)
+    last_sequence = models.BigIntegerField(default=0)
+    last_hash = models.CharField(max_length=64, blank=True, default='')
+    verified_sequence = models.BigIntegerField(default=0)
+    verified_hash = models.CharField(max_length=64, blank=True, default='')
+    verified_at = models.DateTimeField(null=True)
+    # First sequence left after retention purges and the hash it links to
+    anchor_sequence = models.BigIntegerField(default=0)
+    anchor_hash = models.CharField(max_length=64, blank=True, default='')
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'datawarehouse_audit_chain_state'
+
+
 class BackupType(models.TextChoices):
     """Types of backups"""
     FULL = "full", "Full Backup"
@@ -0,0 +1,430 @@
+# datawarehouse/services/audit_chain.py
+"""
+Hash-chained audit log writer and streaming chain verifier
+
+Audit rows are inserted synchronously, in the caller's transaction, so an
+event is durable as soon as the change it describes commits. Linking rows
+into the chain is deferred: a background thread (and the
+``datawarehouse.tasks.chain_audit_log`` beat task, for rows left behind by
+processes that died) takes the chain head under a row lock, numbers pending
+rows in insert order and links each one to its predecessor through
+``previous_hash``. The chain can then be verified incrementally from the
+last verified checkpoint.
+"""
+
+import atexit
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from ..models import AuditChainState, AuditLog, DataChangeHistory
+
+logger = logging.getLogger(__name__)
+
+# Columns covered by ``integrity_hash`` besides the chain links themselves.
+# ``created_at`` is excluded: it is set at insert time, after hashing.
+CHAIN_FIELDS = (
+    "id",
+    "event_type",
+    "event_name",
+    "description",
+    "metadata",
+    "user_id",
+    "content_type_id",
+    "object_id",
+    "ip_address",
+    "user_agent",
+    "session_id",
+    "severity",
+    "compliance_tags",
+)
+
+
+class AuditJSONEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder that falls back to ``str`` for anything else (e.g. model instances)"""
+
+    def default(self, o):
+        try:
+            return super().default(o)
+        except TypeError:
+            return str(o)
+
+
+def to_json_value(value: Any) -> Any:
+    """Normalize ``value`` to what a JSONField returns after a database round trip"""
+    if value is None:
+        return None
+    return json.loads(json.dumps(value, cls=AuditJSONEncoder))
+
+
+def chain_hash(values: Dict[str, Any], sequence: int, previous_hash: str) -> str:
+    """SHA-256 of the chained columns of one audit row plus its chain links"""
+    payload = {name: values.get(name) for name in CHAIN_FIELDS}
+    payload["sequence"] = sequence
+    payload["previous_hash"] = previous_hash
+    encoded = json.dumps(
+        payload, cls=AuditJSONEncoder, sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def row_hash(audit_log: AuditLog) -> str:
+    """Chain hash of an ``AuditLog`` instance"""
+    values = {name: getattr(audit_log, name) for name in CHAIN_FIELDS}
+    return chain_hash(values, audit_log.sequence, audit_log.previous_hash)
+
+
+def pending_hash(audit_log: AuditLog) -> str:
+    """Hash stored on a row until it is chained; checked when it is linked"""
+    values = {name: getattr(audit_log, name) for name in CHAIN_FIELDS}
+    return chain_hash(values, None, "")
+
+
+class AuditLogWriter:
+    """
+    Writes audit rows immediately and links them into the chain later.
+
+    ``write`` inserts the row (unchained: ``sequence`` is NULL) and its field
+    changes inside a savepoint of the caller's transaction, then returns, so
+    audited requests never wait for the chain lock. Chaining runs on a
+    background thread every ``AUDIT_CHAIN_INTERVAL`` seconds, or as soon as
+    ``AUDIT_BATCH_SIZE`` rows were written. Nothing is kept in memory: rows
+    written by a process that is killed before chaining them are picked up
+    by the next ``chain_pending`` call of any process. With
+    ``AUDIT_ASYNC_CHAINING = False`` every write is chained inline.
+    """
+
+    def __init__(
+        self,
+        batch_size: Optional[int] = None,
+        chain_interval: Optional[float] = None,
+        async_chaining: Optional[bool] = None,
+    ):
+        self.batch_size = batch_size or getattr(settings, "AUDIT_BATCH_SIZE", 500)
+        self.chain_interval = chain_interval or getattr(
+            settings, "AUDIT_CHAIN_INTERVAL", 1.0
+        )
+        self.async_chaining = (
+            async_chaining
+            if async_chaining is not None
+            else getattr(settings, "AUDIT_ASYNC_CHAINING", True)
+        )
+        self._reset()
+        atexit.register(self._chain_at_exit)
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._written = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def write(self, audit_log: AuditLog, changes: Iterable = ()) -> AuditLog:
+        """Insert an unchained ``AuditLog`` and its field changes; returns it saved"""
+        audit_log.sequence = None
+        audit_log.previous_hash = ""
+        audit_log.integrity_hash = pending_hash(audit_log)
+        changes = list(changes)
+        with transaction.atomic():
+            audit_log.save(force_insert=True)
+            if changes:
+                DataChangeHistory.objects.bulk_create(changes)
+            transaction.on_commit(self._written_one)
+        return audit_log
+
+    def _written_one(self) -> None:
+        if not self.async_chaining:
+            try:
+                self.chain_pending()
+            except Exception as e:
+                # The row is saved; the next chain_pending call links it
+                logger.error(f"Audit chaining failed: {e}")
+            return
+
+        self._ensure_thread()
+        with self._lock:
+            self._written += 1
+            written = self._written
+        if written >= self.batch_size:
+            self._wakeup.set()
+
+    def chain_pending(self) -> int:
+        """Chain every unchained row, oldest first; returns the number chained"""
+        chained = 0
+        while True:
+            count = self.chain_batch()
+            chained += count
+            if count < self.batch_size:
+                return chained
+
+    def chain_batch(self) -> int:
+        """Chain up to ``batch_size`` unchained rows in one transaction"""
+        columns = CHAIN_FIELDS + ("integrity_hash",)
+        with transaction.atomic():
+            AuditChainState.objects.get_or_create(pk=1)
+            state = AuditChainState.objects.select_for_update().get(pk=1)
+            rows = list(
+                AuditLog.objects.filter(sequence__isnull=True)
+                .order_by("created_at", "id")
+                .values_list(*columns)[: self.batch_size]
+            )
+            if not rows:
+                return 0
+
+            sequence, previous_hash = state.last_sequence, state.last_hash
+            updates = []
+            for row in rows:
+                values = dict(zip(columns, row))
+                if chain_hash(values, None, "") != values["integrity_hash"]:
+                    logger.critical(
+                        f"Audit entry {values['id']} changed before it was chained"
+                    )
+                sequence += 1
+                integrity_hash = chain_hash(values, sequence, previous_hash)
+                updates.append(
+                    AuditLog(
+                        id=values["id"],
+                        sequence=sequence,
+                        previous_hash=previous_hash,
+                        integrity_hash=integrity_hash,
+                    )
+                )
+                previous_hash = integrity_hash
+
+            AuditLog.objects.bulk_update(
+                updates, ["sequence", "previous_hash", "integrity_hash"]
+            )
+            AuditChainState.objects.filter(pk=1).update(
+                last_sequence=sequence,
+                last_hash=previous_hash,
+                updated_at=timezone.now(),
+            )
+        return len(updates)
+
+    def _chain_at_exit(self) -> None:
+        if self._written:
+            try:
+                self.chain_pending()
+            except Exception as e:
+                # The rows are saved; the next chain_pending call links them
+                logger.warning(f"Audit chaining at exit failed: {e}")
+
+    def _ensure_thread(self) -> None:
+        if self._pid != os.getpid():
+            # Forked worker: the parent's thread does not belong to us
+            self._reset()
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="audit-log-chainer", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(self.chain_interval)
+            self._wakeup.clear()
+            with self._lock:
+                written, self._written = self._written, 0
+            if not written:
+                continue
+            try:
+                self.chain_pending()
+            except Exception as e:
+                logger.error(f"Audit chainer thread error: {e}")
+                with self._lock:
+                    self._written += written
+            finally:
+                close_old_connections()
+
+
+class AuditChainVerifier:
+    """
+    Stream the audit chain in sequence order and check every link.
+
+    Rows are read with ``values_list(...).iterator()``, so memory stays flat
+    regardless of table size; only the first ``max_details`` failures are
+    kept. A clean pass moves the checkpoint forward so the next run only
+    verifies rows appended since; the checkpoint never moves back. A full
+    pass starts at the retention anchor, the first row the retention purge
+    left, linked to the hash of the last row it removed.
+    """
+
+    def __init__(self, chunk_size: Optional[int] = None, max_details: int = 100):
+        self.chunk_size = chunk_size or getattr(
+            settings, "AUDIT_VERIFY_CHUNK_SIZE", 2000
+        )
+        self.max_details = max_details
+
+    def verify(
+        self,
+        queryset=None,
+        from_checkpoint: bool = True,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Verify chained audit rows.
+
+        Args:
+            queryset: Optional ``AuditLog`` queryset to restrict the range
+                (e.g. by date); the checkpoint is only advanced when it is None
+            from_checkpoint: Start after the last verified checkpoint instead of
+                at the beginning of the chain
+            progress_callback: Called as ``callback(checked, total)`` every chunk
+
+        Returns:
+            Summary with counts, capped failure details and the checkpoint
+        """
+        state = AuditChainState.objects.filter(pk=1).first() or AuditChainState()
+        rows = queryset if queryset is not None else AuditLog.objects.all()
+        rows = rows.filter(sequence__isnull=False)
+
+        anchor_sequence = state.anchor_sequence or 1
+        expected_sequence, expected_hash = None, None
+        if from_checkpoint and state.verified_sequence:
+            rows = rows.filter(sequence__gt=state.verified_sequence)
+            if queryset is None:
+                expected_sequence = state.verified_sequence + 1
+                expected_hash = state.verified_hash
+        elif queryset is None:
+            expected_sequence, expected_hash = anchor_sequence, state.anchor_hash
+
+        total = rows.count()
+        columns = CHAIN_FIELDS + ("sequence", "previous_hash", "integrity_hash")
+        checked = failed = corrupted = broken_links = 0
+        details = []
+        clean_sequence, clean_hash = (
+            (state.verified_sequence, state.verified_hash)
+            if from_checkpoint
+            else (anchor_sequence - 1, state.anchor_hash)
+        )
+        clean = queryset is None
+
+        for row in (
+            rows.order_by("sequence")
+            .values_list(*columns)
+            .iterator(chunk_size=self.chunk_size)
+        ):
+            values = dict(zip(columns, row))
+            sequence = values["sequence"]
+            stored_hash = values["integrity_hash"]
+            problems = []
+
+            if chain_hash(values, sequence, values["previous_hash"]) != stored_hash:
+                corrupted += 1
+                problems.append("content_mismatch")
+            if expected_sequence is not None and sequence != expected_sequence:
+                broken_links += 1
+                problems.append(f"missing_sequences_{expected_sequence}_{sequence - 1}")
+            elif expected_hash is not None and values["previous_hash"] != expected_hash:
+                broken_links += 1
+                problems.append("previous_hash_mismatch")
+
+            if problems:
+                failed += 1
+                clean = False
+                if len(details) < self.max_details:
+                    details.append(
+                        {
+                            "id": str(values["id"]),
+                            "sequence": sequence,
+                            "event_name": values["event_name"],
+                            "problems": problems,
+                        }
+                    )
+            elif clean:
+                clean_sequence, clean_hash = sequence, stored_hash
+
+            # Continue from the stored hash so one bad row is reported once
+            expected_sequence, expected_hash = sequence + 1, stored_hash
+            checked += 1
+            if progress_callback and checked % self.chunk_size == 0:
+                progress_callback(checked, total)
+
+        if progress_callback:
+            progress_callback(checked, total)
+
+        if queryset is None and clean_sequence > state.verified_sequence:
+            AuditChainState.objects.get_or_create(pk=1)
+            AuditChainState.objects.filter(
+                pk=1, verified_sequence__lt=clean_sequence
+            ).update(
+                verified_sequence=clean_sequence,
+                verified_hash=clean_hash,
+                verified_at=timezone.now(),
+            )
+
+        return {
+            "checked_entries": checked,
+            "failed_entries": failed,
+            "corrupted_entries": corrupted,
+            "broken_links": broken_links,
+            "details": details,
+            "start_sequence": (
+                state.verified_sequence if from_checkpoint else anchor_sequence - 1
+            ),
+            "verified_sequence": clean_sequence,
+            "unchained_entries": AuditLog.objects.filter(sequence__isnull=True).count(),
+        }
+
+
+def verified_only(queryset):
+    """
+    Restrict ``queryset`` to entries at or before the verified checkpoint,
+    the only ones the retention engine may purge (see core.retention).
+
+    Only a prefix of the chain is purged: a row chained after one that is
+    still retained is kept too, so the retained rows stay contiguous from
+    the anchor ``record_retention_anchor`` stores.
+    """
+    from core.retention import get_policy
+
+    state = AuditChainState.objects.filter(pk=1).first()
+    verified_sequence = state.verified_sequence if state else 0
+    first_kept = (
+        AuditLog.objects.filter(
+            sequence__isnull=False,
+            created_at__gte=get_policy("datawarehouse.AuditLog").cutoff(),
+        )
+        .order_by("sequence")
+        .values_list("sequence", flat=True)
+        .first()
+    )
+    if first_kept is not None:
+        verified_sequence = min(verified_sequence, first_kept - 1)
+    return queryset.filter(sequence__lte=verified_sequence)
+
+
+def record_retention_anchor(purged=None) -> None:
+    """
+    After a retention purge, anchor full verification at the first retained
+    row and the ``previous_hash`` it links to. With nothing retained the
+    anchor follows the checkpoint, which the purge never goes past.
+    """
+    with transaction.atomic():
+        state, _ = AuditChainState.objects.select_for_update().get_or_create(pk=1)
+        first = (
+            AuditLog.objects.filter(sequence__isnull=False)
+            .order_by("sequence")
+            .values_list("sequence", "previous_hash")
+            .first()
+        )
+        anchor = first or (state.verified_sequence + 1, state.verified_hash)
+        if anchor[0] > (state.anchor_sequence or 1):
+            state.anchor_sequence, state.anchor_hash = anchor
+            state.save(update_fields=["anchor_sequence", "anchor_hash", "updated_at"])
+            logger.info(f"Audit chain retention anchor moved to {anchor[0]}")
+
+
+# Process-wide writer used by the audit trail service
+audit_writer = AuditLogWriter()
@@ -15,8 +15,13 @@ from django.utils import timezone
 from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
 
+from core.partitioning import within_partitions
+
 # Import models from the main models module to avoid conflicts
-from ..models import AuditLog, DataChangeHistory, AuditEventType, AuditSeverity
+from ..models import (
+    AuditChainState, AuditLog, DataChangeHistory, AuditEventType, AuditSeverity
+)
+from .audit_chain import AuditChainVerifier, audit_writer, to_json_value
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
@@ -28,6 +33,7 @@ class AuditTrailService:
     
     Features:
     - Automatic change tracking for all models
+    - Buffered, hash-chained audit writes (see audit_chain)
     - User action logging
     - Security event monitoring
     - Data integrity verification
@@ -56,10 +62,15 @@ class AuditTrailService:
         user_agent: Optional[str] = None,
         correlation_id: Optional[str] = None,
         tags: Optional[List[str]] = None,
-        source_module: Optional[str] = None
+        source_module: Optional[str] = None,
+        **extra
     ) -> AuditLog:
         """
         Log an audit event with comprehensive details
+        
+        The returned ``AuditLog`` is saved in the caller's transaction; it is
+        linked into the hash chain shortly after by the audit writer (see
+        audit_chain). Extra keyword arguments are stored in ``metadata``.
         """
         try:
             # Prepare object information
@@ -72,31 +83,41 @@ class AuditTrailService:
                 object_id = str(obj.pk)
                 object_repr = str(obj)[:200]
             
-            # Create audit log entry
-            audit_log = AuditLog.objects.create(
+            metadata = {
+                'occurred_at': timezone.now(),
+                'old_values': self._sanitize_values(old_values),
+                'new_values': self._sanitize_values(new_values),
+                'changed_fields': self._get_changed_fields(old_values, new_values),
+                'action_details': action_details or {},
+                'request_data': self._sanitize_request_data(request_data),
+                'correlation_id': correlation_id,
+                'source_module': source_module,
+                **extra
+            }
+            
+            # Values are frozen to their JSON form so the chain hash matches
+            # what is read back
+            audit_log = AuditLog(
                 event_type=event_type,
-                event_name=event_name,
+                event_name=event_name[:200],
+                description=object_repr or '',
+                metadata=to_json_value({k: v for k, v in metadata.items() if v is not None}),
                 severity=severity,
                 user=user,
-                session_id=session_id,
-                user_agent=user_agent,
+                session_id=(session_id or '')[:100],
+                user_agent=user_agent or '',
                 ip_address=ip_address,
                 content_type=content_type,
                 object_id=object_id,
-                object_repr=object_repr,
-                old_values=self._sanitize_values(old_values),
-                new_values=self._sanitize_values(new_values),
-                changed_fields=self._get_changed_fields(old_values, new_values),
-                action_details=action_details or {},
-                request_data=self._sanitize_request_data(request_data),
-                correlation_id=correlation_id,
-                source_module=source_module,
-                tags=tags or []
+                compliance_tags=tags or []
             )
             
             # Log detailed field changes for sensitive data
+            changes = []
             if old_values and new_values:
-                self._log_field_changes(audit_log, old_values, new_values)
+                changes = self._log_field_changes(audit_log, old_values, new_values)
+            
+            audit_log = audit_writer.write(audit_log, changes)
             
             # Trigger alerts for high-severity events
             if severity in [AuditSeverity.HIGH, AuditSeverity.CRITICAL]:
@@ -106,14 +127,16 @@ class AuditTrailService:
             
         except Exception as e:
             logger.error(f"Error logging audit event: {e}")
-            # Create minimal audit log for the error itself
+            # Write a minimal audit log for the error itself
             try:
-                return AuditLog.objects.create(
-                    event_type=AuditEventType.ERROR,
-                    event_name="audit_logging_error",
-                    severity=AuditSeverity.HIGH,
-                    error_message=str(e),
-                    action_details={"original_event": event_name}
+                return audit_writer.write(
+                    AuditLog(
+                        event_type=event_type,
+                        event_name="audit_logging_error",
+                        description=str(e),
+                        severity=AuditSeverity.HIGH,
+                        metadata={"original_event": event_name}
+                    )
                 )
             except Exception:
                 # If even error logging fails, just log to system logger
@@ -244,11 +267,8 @@ class AuditTrailService:
         if user:
             queryset = queryset.filter(user=user)
         
-        if start_date:
-            queryset = queryset.filter(timestamp__gte=start_date)
-        
-        if end_date:
-            queryset = queryset.filter(timestamp__lte=end_date)
+        # Date bounds on created_at (see core.partitioning.within_partitions)
+        queryset = within_partitions(queryset, start_date, end_date)
         
         if event_types:
             queryset = queryset.filter(event_type__in=event_types)
@@ -268,9 +288,7 @@ class AuditTrailService:
     ) -> Dict[str, Any]:
         """Generate compliance report for audit requirements"""
         
-        queryset = AuditLog.objects.filter(
-            timestamp__range=[start_date, end_date]
-        )
+        queryset = within_partitions(AuditLog.objects.all(), start_date, end_date)
         
         # Filter by event types if specified
         event_types = []
@@ -324,37 +342,38 @@ class AuditTrailService:
     def verify_audit_integrity(
         self,
         start_date: Optional[datetime] = None,
-        end_date: Optional[datetime] = None
+        end_date: Optional[datetime] = None,
+        from_checkpoint: bool = True,
+        progress_callback=None
     ) -> Dict[str, Any]:
-        """Verify the integrity of audit log entries"""
-        
-        queryset = AuditLog.objects.all()
+        """
+        Verify the integrity of the audit hash chain
         
-        if start_date:
-            queryset = queryset.filter(timestamp__gte=start_date)
-        if end_date:
-            queryset = queryset.filter(timestamp__lte=end_date)
+        Without a date range only rows appended since the last verified
+        checkpoint are checked, and a clean run advances the checkpoint.
+        """
         
-        total_entries = queryset.count()
-        corrupted_entries = []
+        queryset = None
+        if start_date or end_date:
+            queryset = within_partitions(AuditLog.objects.all(), start_date, end_date)
         
-        for audit_log in queryset.iterator():
-            if not audit_log.verify_integrity():
-                corrupted_entries.append({
-                    'id': audit_log.id,
-                    'timestamp': audit_log.timestamp.isoformat(),
-                    'event_name': audit_log.event_name,
-                    'stored_checksum': audit_log.checksum,
-                    'calculated_checksum': audit_log._generate_checksum()
-                })
+        result = AuditChainVerifier().verify(
+            queryset=queryset,
+            from_checkpoint=from_checkpoint,
+            progress_callback=progress_callback
+        )
         
-        integrity_percentage = ((total_entries - len(corrupted_entries)) / total_entries * 100) if total_entries > 0 else 100
+        total_entries = result['checked_entries']
+        integrity_percentage = ((total_entries - result['failed_entries']) / total_entries * 100) if total_entries > 0 else 100
         
         return {
             'total_entries': total_entries,
-            'corrupted_entries': len(corrupted_entries),
+            'corrupted_entries': result['corrupted_entries'],
+            'broken_links': result['broken_links'],
             'integrity_percentage': round(integrity_percentage, 2),
-            'corrupted_details': corrupted_entries,
+            'corrupted_details': result['details'],
+            'verified_sequence': result['verified_sequence'],
+            'unchained_entries': result['unchained_entries'],
             'verification_timestamp': timezone.now().isoformat()
         }
     
@@ -413,10 +432,11 @@ class AuditTrailService:
         
         return AuditSeverity.LOW
     
-    def _log_field_changes(self, audit_log: AuditLog, old_values: Dict, new_values: Dict):
-        """Log detailed field-level changes"""
+    def _log_field_changes(self, audit_log: AuditLog, old_values: Dict, new_values: Dict) -> List[DataChangeHistory]:
+        """Build detailed field-level change rows (saved with the audit log)"""
         
         changed_fields = self._get_changed_fields(old_values, new_values)
+        changes = []
         
         for field_name in changed_fields:
             old_value = old_values.get(field_name)
@@ -425,14 +445,16 @@ class AuditTrailService:
             # Determine if field is sensitive
             is_sensitive = field_name.lower() in self.sensitive_fields
             
-            DataChangeHistory.objects.create(
+            changes.append(DataChangeHistory(
                 audit_log=audit_log,
-                field_name=field_name,
+                field_name=field_name[:100],
                 old_value=str(old_value) if not is_sensitive else "[REDACTED]",
                 new_value=str(new_value) if not is_sensitive else "[REDACTED]",
-                field_type=type(old_value).__name__ if old_value else type(new_value).__name__,
+                value_type=type(old_value).__name__ if old_value else type(new_value).__name__,
                 is_encrypted=is_sensitive
-            )
+            ))
+        
+        return changes
     
     def _trigger_audit_alert(self, audit_log: AuditLog):
         """Trigger alerts for high-severity audit events"""
@@ -440,7 +462,7 @@ class AuditTrailService:
             # Send alert to administrators
             logger.warning(
                 f"High-severity audit event: {audit_log.event_name} "
-                f"by user {audit_log.user} at {audit_log.timestamp}"
+                f"by user {audit_log.user} at {audit_log.metadata.get('occurred_at')}"
             )
             
             # Could integrate with notification system here
@@ -477,7 +499,7 @@ def log_model_save(sender, instance, created, **kwargs):
     """Automatically log model saves"""
     
     # Skip audit logs to prevent recursion
-    if sender == AuditLog or sender == DataChangeHistory:
+    if sender in (AuditLog, DataChangeHistory, AuditChainState):
         return
     
     try:
@@ -509,7 +531,7 @@ def log_model_delete(sender, instance, **kwargs):
     """Automatically log model deletions"""
     
     # Skip audit logs to prevent recursion
-    if sender == AuditLog or sender == DataChangeHistory:
+    if sender in (AuditLog, DataChangeHistory, AuditChainState):
         return
     
     try:
@@ -13,9 +13,6 @@ from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional, Union
 from pathlib import Path
 
-from django.core.management import call_command
-from django.core.serializers import serialize
-from django.apps import apps
 from django.db import models, transaction
 from django.utils import timezone
 from django.conf import settings
@@ -23,6 +20,13 @@ from django.contrib.auth import get_user_model
 
 # Import models from main models module to avoid conflicts
 from ..models import BackupJob, RestoreJob
+from .backup_streaming import (
+    ChunkCipher,
+    StreamingBackupReader,
+    StreamingBackupWriter,
+    backup_models,
+    derive_chunk_key,
+)
 
 # Optional cloud storage support
 try:
@@ -50,6 +54,7 @@ class BackupRecoveryService:
     - Point-in-time recovery
     - Automated cleanup and retention policies
     - Encryption support
+    - Streaming, chunked exports with per-chunk SHA-256 and AES-GCM
     """
     
     def __init__(self):
@@ -57,6 +62,8 @@ class BackupRecoveryService:
         self.retention_days = getattr(settings, 'BACKUP_RETENTION_DAYS', 30)
         self.aws_bucket = getattr(settings, 'BACKUP_S3_BUCKET', None)
         self.encryption_key = getattr(settings, 'BACKUP_ENCRYPTION_KEY', None)
+        self.chunk_rows = getattr(settings, 'BACKUP_CHUNK_ROWS', 5000)
+        self.workers = getattr(settings, 'BACKUP_WORKERS', 4)
         
         # Ensure backup directory exists
         os.makedirs(self.backup_base_path, exist_ok=True)
@@ -93,30 +100,29 @@ class BackupRecoveryService:
             
             backup_files = []
             
-            # Database backup
-            db_file = self._backup_database(backup_dir, backup_type)
-            backup_files.append(db_file)
+            # Database backup (chunks are compressed and sealed as they stream)
+            chunk_manifest = self._backup_database(backup_dir, backup_type, encrypt)
             
             # Media files backup
             if include_media:
                 media_file = self._backup_media(backup_dir)
                 if media_file:
+                    if encrypt:
+                        media_file = self._encrypt_backup(media_file)
                     backup_files.append(media_file)
             
             # Create manifest
-            manifest_file = self._create_manifest(backup_dir, backup_files, backup_job)
+            manifest_file = self._create_manifest(
+                backup_dir, backup_files, backup_job, chunk_manifest
+            )
             backup_files.append(manifest_file)
             
-            # Compress backup
+            # Package backup (contents are already compressed)
             compressed_file = self._compress_backup(backup_dir)
             
             # Calculate integrity hash
             integrity_hash = self._calculate_file_hash(compressed_file)
             
-            # Encrypt if requested
-            if encrypt:
-                compressed_file = self._encrypt_backup(compressed_file)
-            
             # Upload to cloud if requested
             cloud_url = None
             if upload_to_cloud and self.aws_bucket:
@@ -124,7 +130,9 @@ class BackupRecoveryService:
             
             # Update backup job
             backup_job.file_path = compressed_file
+            backup_job.storage_location = compressed_file
             backup_job.file_size = os.path.getsize(compressed_file)
+            backup_job.record_count = chunk_manifest.record_count
             backup_job.integrity_hash = integrity_hash
             backup_job.cloud_storage_url = cloud_url
             backup_job.status = "completed"
@@ -146,16 +154,17 @@ class BackupRecoveryService:
             backup_job.save()
             raise
     
-    def _backup_database(self, backup_dir: str, backup_type: str) -> str:
-        """Create database backup"""
-        db_file = os.path.join(backup_dir, "database.json")
-        
-        if backup_type == "full":
-            # Full database backup
-            with open(db_file, 'w') as f:
-                call_command('dumpdata', stdout=f, indent=2)
+    def _backup_database(self, backup_dir: str, backup_type: str, encrypt: bool = True):
+        """Stream a chunked database export into ``backup_dir``"""
+        writer = StreamingBackupWriter(
+            backup_dir,
+            chunk_rows=self.chunk_rows,
+            workers=self.workers,
+            encryption_key=self.encryption_key if encrypt else None,
+        )
+        since_date = None
         
-        elif backup_type == "incremental":
+        if backup_type == "incremental":
             # Incremental backup - only data changed since last backup
             last_backup = BackupJob.objects.filter(
                 status="completed",
@@ -163,17 +172,15 @@ class BackupRecoveryService:
             ).order_by('-completed_at').first()
             
             if last_backup:
-                # Get data modified since last backup
                 since_date = last_backup.completed_at
-                data = self._get_incremental_data(since_date)
-                with open(db_file, 'w') as f:
-                    json.dump(data, f, indent=2, default=str)
-            else:
-                # No previous backup, do full backup
-                with open(db_file, 'w') as f:
-                    call_command('dumpdata', stdout=f, indent=2)
         
-        return db_file
+        def queryset_for(model):
+            if since_date is None:
+                # Full backup (or no previous backup): every row, in pk order
+                return model._base_manager.order_by('pk')
+            return self._get_incremental_queryset(model, since_date)
+        
+        return writer.export(backup_models(), queryset_for=queryset_for)
     
     def _backup_media(self, backup_dir: str) -> Optional[str]:
         """Backup media files"""
@@ -190,9 +197,15 @@ class BackupRecoveryService:
         
         return media_backup
     
-    def _create_manifest(self, backup_dir: str, backup_files: List[str], backup_job: BackupJob) -> str:
+    def _create_manifest(
+        self,
+        backup_dir: str,
+        backup_files: List[str],
+        backup_job: BackupJob,
+        chunk_manifest=None,
+    ) -> str:
         """Create backup manifest with metadata"""
-        manifest_file = os.path.join(backup_dir, "manifest.json")
+        manifest_file = os.path.join(backup_dir, "backup_manifest.json")
         
         manifest = {
             "backup_id": str(backup_job.id),
@@ -207,6 +220,13 @@ class BackupRecoveryService:
                 }
                 for f in backup_files
             ],
+            "database": {
+                "manifest": "manifest.json",
+                "models": len(chunk_manifest.models) if chunk_manifest else 0,
+                "chunks": len(chunk_manifest.chunks) if chunk_manifest else 0,
+                "records": chunk_manifest.record_count if chunk_manifest else 0,
+                "encrypted": chunk_manifest.encrypted if chunk_manifest else False,
+            },
             "database_version": self._get_database_version(),
             "django_version": self._get_django_version(),
         }
@@ -217,11 +237,13 @@ class BackupRecoveryService:
         return manifest_file
     
     def _compress_backup(self, backup_dir: str) -> str:
-        """Compress backup directory"""
-        compressed_file = f"{backup_dir}.tar.gz"
+        """Package backup directory into a single (uncompressed) tar stream"""
+        # Chunks and media are already gzip-compressed, so re-compressing
+        # the container would only burn CPU
+        compressed_file = f"{backup_dir}.tar"
         
         import tarfile
-        with tarfile.open(compressed_file, "w:gz") as tar:
+        with tarfile.open(compressed_file, "w") as tar:
             tar.add(backup_dir, arcname=os.path.basename(backup_dir))
         
         # Remove uncompressed directory
@@ -231,22 +253,15 @@ class BackupRecoveryService:
         return compressed_file
     
     def _encrypt_backup(self, backup_file: str) -> str:
-        """Encrypt backup file"""
+        """Encrypt backup file in authenticated fixed-size frames"""
         if not self.encryption_key:
             return backup_file
         
         encrypted_file = f"{backup_file}.enc"
+        cipher = ChunkCipher(derive_chunk_key(self.encryption_key))
         
-        from cryptography.fernet import Fernet
-        fernet = Fernet(self.encryption_key.encode())
-        
-        with open(backup_file, 'rb') as f:
-            data = f.read()
-        
-        encrypted_data = fernet.encrypt(data)
-        
-        with open(encrypted_file, 'wb') as f:
-            f.write(encrypted_data)
+        with open(backup_file, 'rb') as src, open(encrypted_file, 'wb') as dst:
+            cipher.seal_stream(src, dst, os.path.basename(backup_file))
         
         # Remove unencrypted file
         os.remove(backup_file)
@@ -260,7 +275,7 @@ class BackupRecoveryService:
         
         try:
             s3_client = boto3.client('s3')
-            s3_key = f"mindcare-backups/{timezone.now().strftime('%Y/%m/%d')}/backup_{backup_id}.tar.gz"
+            s3_key = f"mindcare-backups/{timezone.now().strftime('%Y/%m/%d')}/backup_{backup_id}.tar"
             
             s3_client.upload_file(backup_file, self.aws_bucket, s3_key)
             
@@ -278,21 +293,15 @@ class BackupRecoveryService:
                 sha256_hash.update(byte_block)
         return sha256_hash.hexdigest()
     
-    def _get_incremental_data(self, since_date: datetime) -> Dict:
-        """Get data modified since specified date"""
-        data = {}
-        
-        # Get all models that have a modified/updated timestamp
-        for model in apps.get_models():
-            if hasattr(model, 'updated_at') or hasattr(model, 'modified_at'):
-                timestamp_field = 'updated_at' if hasattr(model, 'updated_at') else 'modified_at'
-                queryset = model.objects.filter(**{f"{timestamp_field}__gte": since_date})
-                
-                if queryset.exists():
-                    model_name = f"{model._meta.app_label}.{model._meta.model_name}"
-                    data[model_name] = serialize('json', queryset)
-        
-        return data
+    def _get_incremental_queryset(self, model, since_date: datetime):
+        """Rows of ``model`` modified since ``since_date`` (None if untracked)"""
+        field_names = {f.name for f in model._meta.get_fields()}
+        for timestamp_field in ('updated_at', 'modified_at'):
+            if timestamp_field in field_names:
+                return model._base_manager.filter(
+                    **{f"{timestamp_field}__gte": since_date}
+                ).order_by('pk')
+        return None
     
     def _get_database_version(self) -> str:
         """Get database version info"""
@@ -331,7 +340,10 @@ class BackupRecoveryService:
                 logger.error(f"Failed to cleanup backup {backup.id}: {e}")
     
     def restore_backup(self, backup_job: BackupJob, restore_type: str = "full") -> RestoreJob:
-        """Restore from backup (simplified version)"""
+        """Restore from a chunked backup, replaying chunks in parallel"""
+        if not isinstance(backup_job, BackupJob):
+            backup_job = BackupJob.objects.get(id=backup_job)
+        
         restore_job = RestoreJob.objects.create(
             backup_job=backup_job,
             restore_type=restore_type,
@@ -342,11 +354,26 @@ class BackupRecoveryService:
         try:
             logger.info(f"Starting restore from backup {backup_job.id}")
             
-            # Simplified restore logic
-            restore_job.status = "completed"
+            backup_dir = self._extract_backup(backup_job.storage_location)
+            reader = StreamingBackupReader(backup_dir, self.encryption_key)
+            restore_job.total_records = reader.manifest.record_count
+            restore_job.save(update_fields=['total_records'])
+            
+            # Chunks of the same model are replayed concurrently
+            totals = reader.replay(
+                workers=self.workers,
+                models=restore_job.included_models or None,
+            )
+            
+            restore_job.processed_records = totals["processed"]
+            restore_job.failed_records = totals["failed"]
+            restore_job.status = "completed" if not totals["failed"] else "failed"
             restore_job.completed_at = timezone.now()
             restore_job.save()
             
+            import shutil
+            shutil.rmtree(backup_dir, ignore_errors=True)
+            
             return restore_job
             
         except Exception as e:
@@ -357,6 +384,26 @@ class BackupRecoveryService:
             restore_job.save()
             raise
     
+    def _extract_backup(self, backup_file: str) -> str:
+        """Unpack a backup container next to it and return the backup directory"""
+        import tarfile
+        extract_root = f"{backup_file}.restore"
+        with tarfile.open(backup_file, "r") as tar:
+            members = tar.getmembers()
+            if not members:
+                raise ValueError(f"Backup archive {backup_file} is empty")
+            # Backups only hold plain files and directories below one root
+            for member in members:
+                parts = member.name.split('/')
+                if (
+                    os.path.isabs(member.name)
+                    or '..' in parts
+                    or not (member.isfile() or member.isdir())
+                ):
+                    raise ValueError(f"Unsafe member in backup archive: {member.name}")
+            tar.extractall(extract_root, members=members, filter="data")
+        return os.path.join(extract_root, members[0].name.split('/')[0])
+    
     def get_backup_status(self, backup_id: str) -> Dict[str, Any]:
         """Get detailed backup status"""
         try:
@@ -30,6 +30,8 @@ except ImportError:
     pl = None
 from scipy import stats
 
+from .frame_utils import keyword_hit_matrix
+
 # Configure structured logging
 logger = structlog.get_logger(__name__)
 django_logger = logging.getLogger(__name__)
@@ -1188,15 +1190,13 @@ class DataCollectionService:
         positive_words = ["happy", "good", "great", "excellent", "wonderful", "amazing"]
         negative_words = ["sad", "bad", "terrible", "awful", "horrible", "depressed"]
 
-        sentiments = []
-        for content in df["content"].fillna(""):
-            content_lower = content.lower()
-            positive_count = sum(1 for word in positive_words if word in content_lower)
-            negative_count = sum(1 for word in negative_words if word in content_lower)
-            sentiment = positive_count - negative_count
-            sentiments.append(sentiment)
+        contents = df["content"].fillna("").str.lower()
+        hits = keyword_hit_matrix(
+            contents, {"positive": positive_words, "negative": negative_words}
+        )
+        sentiments = hits["positive"] - hits["negative"]
 
-        avg_sentiment = np.mean(sentiments) if sentiments else 0.0
+        avg_sentiment = sentiments.mean() if not sentiments.empty else 0.0
 
         return {
             "avg_sentiment": float(avg_sentiment),
@@ -1223,12 +1223,11 @@ class DataCollectionService:
             "health": ["health", "exercise", "diet", "physical"],
         }
 
-        topic_counts = {}
-        for content in df["content"].fillna(""):
-            content_lower = content.lower()
-            for topic, keywords in topics.items():
-                count = sum(1 for keyword in keywords if keyword in content_lower)
-                topic_counts[topic] = topic_counts.get(topic, 0) + count
+        contents = df["content"].fillna("").str.lower()
+        topic_counts = {
+            topic: int(count)
+            for topic, count in keyword_hit_matrix(contents, topics).sum().items()
+        }
 
         # Return top 3 topics
         sorted_topics = sorted(topic_counts.items(), key=lambda x: x[1], reverse=True)
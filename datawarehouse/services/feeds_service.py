@@ -1,18 +1,107 @@
 # datawarehouse/services/feeds_service.py
+from array import array
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Dict, List, Any
+from itertools import chain
+from typing import Dict, Iterator, List, Any, Set
 from django.utils import timezone
-from django.db.models import Q
+from django.db.models import Count, Exists, F, OuterRef, Q, Subquery, Sum
 from collections import defaultdict, Counter
 import logging
 import re
 import statistics
 import time
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
 
+class RowStream:
+    """
+    Re-iterable stream of named ``values_list`` rows.
+
+    Every iteration runs one query through a server-side cursor, so a pass
+    over a month of system-wide activity holds one chunk in memory rather
+    than every model instance. ``len()`` is a cached COUNT.
+
+    Nothing is cached between passes: each ``for`` loop over a stream
+    re-runs its query, and a full ``collect_feeds_data`` makes a couple of
+    dozen passes. That trades repeated reads of the same rows for memory
+    that stays flat however large the window is.
+    """
+
+    def __init__(self, queryset, fields: List[str], chunk_size: int = 2000):
+        self.queryset = queryset
+        self.fields = fields
+        self.chunk_size = chunk_size
+        self._count = None
+
+    def __iter__(self) -> Iterator:
+        return (
+            self.queryset.order_by()
+            .values_list(*self.fields, named=True)
+            .iterator(chunk_size=self.chunk_size)
+        )
+
+    def __len__(self) -> int:
+        if self._count is None:
+            self._count = self.queryset.count()
+        return self._count
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+
+class InteractionGraph:
+    """
+    Undirected user interaction graph stored as packed integer edge keys.
+
+    Each edge ``(a, b)`` with ``a < b`` is one int64 ``a << 32 | b``.
+    Edges are buffered in a typed array and periodically folded into a
+    sorted, de-duplicated numpy array, so memory is about 8 bytes per
+    distinct edge regardless of how many interactions produced it.
+    """
+
+    def __init__(self, buffer_size: int = 1_000_000):
+        self.buffer_size = buffer_size
+        self._buffer = array("q")
+        self._edges = np.empty(0, dtype=np.int64)
+
+    def add(self, a: int, b: int) -> None:
+        if a is None or b is None or a == b:
+            return  # Don't count self-interactions
+        if a > b:
+            a, b = b, a
+        self._buffer.append((a << 32) | b)
+        if len(self._buffer) >= self.buffer_size:
+            self._fold()
+
+    def _fold(self) -> None:
+        if self._buffer:
+            self._edges = np.union1d(
+                self._edges, np.frombuffer(self._buffer, dtype=np.int64)
+            )
+            self._buffer = array("q")
+
+    def nodes(self) -> np.ndarray:
+        """Sorted ids of every user with at least one connection"""
+        self._fold()
+        return np.union1d(self._edges >> 32, self._edges & 0xFFFFFFFF)
+
+    def degrees(self) -> np.ndarray:
+        """Number of distinct neighbours of every connected user"""
+        self._fold()
+        endpoints = np.concatenate((self._edges >> 32, self._edges & 0xFFFFFFFF))
+        _, counts = np.unique(endpoints, return_counts=True)
+        return counts
+
+    @property
+    def edge_count(self) -> int:
+        self._fold()
+        return int(self._edges.size)
+
+
 @dataclass
 class FeedsDataSnapshot:
     """Data snapshot for feeds/social interaction analytics"""
@@ -82,7 +171,9 @@ class FeedsCollectionService:
             # Calculate comprehensive analytics
             content_stats = self._analyze_content_statistics(raw_data)
             engagement_analytics = self._analyze_engagement_patterns(raw_data)
-            social_dynamics = self._analyze_social_dynamics(raw_data)
+            social_dynamics = self._analyze_social_dynamics(
+                raw_data, content_stats.get("active_user_ids", set())
+            )
             temporal_patterns = self._analyze_temporal_patterns(raw_data)
             therapeutic_analysis = self._analyze_therapeutic_value(raw_data)
 
@@ -136,7 +227,12 @@ class FeedsCollectionService:
             raise
 
     def _collect_raw_feeds_data(self, user, days: int) -> Dict[str, Any]:
-        """Collect raw feeds data including posts, comments, and reactions"""
+        """
+        Describe the posts, comments and reactions to analyze as row streams.
+
+        Nothing is loaded here: each analysis pass streams just the columns
+        it reads, with related authors joined in SQL.
+        """
         try:
             from feeds.models import Post, Comment, Reaction, Topic
 
@@ -154,38 +250,62 @@ class FeedsCollectionService:
                 comment_filter &= Q(author=user)
                 reaction_filter &= Q(user=user)
 
-            # Collect posts with related data
-            posts = (
-                Post.objects.filter(post_filter)
-                .select_related("author")
-                .prefetch_related(
-                    "reactions", "comments", "media_files", "poll_options"
-                )
-                .order_by("-created_at")
+            # Posts, with denormalized engagement counters
+            posts = RowStream(
+                Post.objects.filter(post_filter).annotate(
+                    has_media=Exists(
+                        Post.media_files.through.objects.filter(post_id=OuterRef("pk"))
+                    )
+                ),
+                [
+                    "id",
+                    "author_id",
+                    "content",
+                    "post_type",
+                    "link_url",
+                    "created_at",
+                    "views_count",
+                    "comments_count",
+                    "reactions_count",
+                    "has_media",
+                ],
             )
 
-            # Collect comments
-            comments = (
-                Comment.objects.filter(comment_filter)
-                .select_related("author", "post", "parent")
-                .prefetch_related("reactions")
-                .order_by("-created_at")
+            # Comments, with the commented post's author joined in
+            comments = RowStream(
+                Comment.objects.filter(comment_filter).annotate(
+                    post_author_id=F("post__author_id")
+                ),
+                [
+                    "id",
+                    "author_id",
+                    "post_id",
+                    "post_author_id",
+                    "content",
+                    "created_at",
+                    "reactions_count",
+                ],
             )
 
-            # Collect reactions
-            reactions = (
-                Reaction.objects.filter(reaction_filter)
-                .select_related("user", "content_type")
-                .order_by("-created_at")
+            # Reactions
+            reactions = RowStream(
+                Reaction.objects.filter(reaction_filter),
+                [
+                    "user_id",
+                    "reaction_type",
+                    "content_type_id",
+                    "object_id",
+                    "created_at",
+                ],
             )
 
             # Collect topics
             topics = Topic.objects.filter(is_active=True)
 
             return {
-                "posts": list(posts),
-                "comments": list(comments),
-                "reactions": list(reactions),
+                "posts": posts,
+                "comments": comments,
+                "reactions": reactions,
                 "topics": list(topics),
                 "start_date": start_date,
                 "end_date": end_date,
@@ -211,20 +331,17 @@ class FeedsCollectionService:
             # Unique users
             unique_users = set()
             for post in posts:
-                if hasattr(post, "author"):
-                    unique_users.add(post.author.id)
+                unique_users.add(post.author_id)
             for comment in comments:
-                if hasattr(comment, "author"):
-                    unique_users.add(comment.author.id)
+                unique_users.add(comment.author_id)
             for reaction in reactions:
-                if hasattr(reaction, "user"):
-                    unique_users.add(reaction.user.id)
+                unique_users.add(reaction.user_id)
 
             # Content statistics
             content_stats = self._calculate_content_metrics(posts, comments)
 
             # Topic distribution
-            topic_distribution = self._analyze_topic_distribution(posts)
+            topic_distribution = self._analyze_topic_distribution(raw_data)
 
             # Post type analysis
             post_type_analysis = self._analyze_post_types(posts)
@@ -234,6 +351,7 @@ class FeedsCollectionService:
                 "total_comments": total_comments,
                 "total_reactions": total_reactions,
                 "total_active_users": len(unique_users),
+                "active_user_ids": unique_users,
                 "content_statistics": content_stats,
                 "topic_distribution": topic_distribution,
                 "post_type_analysis": post_type_analysis,
@@ -246,37 +364,23 @@ class FeedsCollectionService:
     def _calculate_content_metrics(self, posts: List, comments: List) -> Dict[str, Any]:
         """Calculate detailed content metrics"""
         try:
-            # Post content analysis
-            post_lengths = [
-                len(post.content) for post in posts if hasattr(post, "content")
-            ]
-            post_word_counts = [
-                len(post.content.split()) for post in posts if hasattr(post, "content")
-            ]
+            # Post content analysis, plus media and link usage
+            post_lengths = array("I")
+            post_word_counts = array("I")
+            posts_with_media = 0
+            posts_with_links = 0
+            for post in posts:
+                post_lengths.append(len(post.content))
+                post_word_counts.append(len(post.content.split()))
+                posts_with_media += bool(post.has_media)
+                posts_with_links += bool(post.link_url)
 
             # Comment content analysis
-            comment_lengths = [
-                len(comment.content)
-                for comment in comments
-                if hasattr(comment, "content")
-            ]
-            comment_word_counts = [
-                len(comment.content.split())
-                for comment in comments
-                if hasattr(comment, "content")
-            ]
-
-            # Media analysis
-            posts_with_media = sum(
-                1
-                for post in posts
-                if hasattr(post, "media_files") and post.media_files.exists()
-            )
-
-            # Link analysis
-            posts_with_links = sum(
-                1 for post in posts if hasattr(post, "link_url") and post.link_url
-            )
+            comment_lengths = array("I")
+            comment_word_counts = array("I")
+            for comment in comments:
+                comment_lengths.append(len(comment.content))
+                comment_word_counts.append(len(comment.content.split()))
 
             return {
                 "avg_post_length": statistics.mean(post_lengths) if post_lengths else 0,
@@ -311,18 +415,29 @@ class FeedsCollectionService:
             logger.error(f"Error calculating content metrics: {str(e)}")
             return {}
 
-    def _analyze_topic_distribution(self, posts: List) -> Dict[str, Any]:
-        """Analyze distribution of topics in posts"""
+    def _analyze_topic_distribution(self, raw_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Analyze distribution of topics in posts, from the topic label index"""
         try:
-            topic_counts = Counter()
-            posts_with_topics = 0
+            from feeds.labels import trending
+            from feeds.models import PostLabel
 
-            for post in posts:
-                if hasattr(post, "topics") and post.topics:
-                    topic_counts[post.topics] += 1
-                    posts_with_topics += 1
+            labels = PostLabel.objects.filter(
+                kind=PostLabel.KIND_TOPIC,
+                created_at__range=(raw_data["start_date"], raw_data["end_date"]),
+            )
+            if raw_data.get("target_user"):
+                labels = labels.filter(post__author=raw_data["target_user"])
+            topic_counts = Counter(
+                dict(
+                    labels.values("label")
+                    .annotate(count=Count("id"))
+                    .order_by()
+                    .values_list("label", "count")
+                )
+            )
+            posts_with_topics = sum(topic_counts.values())
 
-            total_posts = len(posts)
+            total_posts = len(raw_data.get("posts", []))
 
             # Convert to percentages
             topic_percentages = {}
@@ -341,6 +456,10 @@ class FeedsCollectionService:
                 * 100,
                 "topic_diversity": len(topic_counts),
                 "posts_without_topics": total_posts - posts_with_topics,
+                "trending_topics": [
+                    {"topic": label, "score": round(score, 3)}
+                    for (_, label), score in trending(PostLabel.KIND_TOPIC, 5)
+                ],
             }
 
         except Exception as e:
@@ -350,11 +469,7 @@ class FeedsCollectionService:
     def _analyze_post_types(self, posts: List) -> Dict[str, Any]:
         """Analyze distribution of post types"""
         try:
-            type_counts = Counter()
-
-            for post in posts:
-                if hasattr(post, "post_type"):
-                    type_counts[post.post_type] += 1
+            type_counts = Counter(post.post_type for post in posts)
 
             total_posts = len(posts)
 
@@ -364,12 +479,9 @@ class FeedsCollectionService:
                 type_percentages[post_type] = (count / max(1, total_posts)) * 100
 
             # Analyze polls specifically
-            poll_posts = [
-                post
-                for post in posts
-                if hasattr(post, "post_type") and post.post_type == "poll"
-            ]
-            poll_participation = self._analyze_poll_participation(poll_posts)
+            poll_participation = self._analyze_poll_participation(
+                posts.queryset.filter(post_type="poll")
+            )
 
             return {
                 "type_counts": dict(type_counts),
@@ -387,29 +499,27 @@ class FeedsCollectionService:
             logger.error(f"Error analyzing post types: {str(e)}")
             return {}
 
-    def _analyze_poll_participation(self, poll_posts: List) -> Dict[str, Any]:
-        """Analyze poll participation patterns"""
+    def _analyze_poll_participation(self, poll_posts) -> Dict[str, Any]:
+        """Analyze poll participation patterns (``poll_posts`` is a queryset)"""
         try:
-            if not poll_posts:
-                return {"total_polls": 0, "avg_participation": 0}
+            from feeds.models import PollOption
 
-            total_votes = 0
-            total_options = 0
+            total_polls = poll_posts.count()
+            if not total_polls:
+                return {"total_polls": 0, "avg_participation": 0}
 
-            for poll in poll_posts:
-                if hasattr(poll, "poll_options"):
-                    options = poll.poll_options.all()
-                    total_options += len(options)
-                    for option in options:
-                        if hasattr(option, "votes"):
-                            total_votes += option.votes.count()
+            totals = PollOption.objects.filter(post__in=poll_posts).aggregate(
+                options=Count("id"), votes=Sum("votes_count")
+            )
+            total_votes = totals["votes"] or 0
+            total_options = totals["options"]
 
             return {
-                "total_polls": len(poll_posts),
+                "total_polls": total_polls,
                 "total_votes": total_votes,
                 "total_options": total_options,
-                "avg_votes_per_poll": total_votes / max(1, len(poll_posts)),
-                "avg_options_per_poll": total_options / max(1, len(poll_posts)),
+                "avg_votes_per_poll": total_votes / max(1, total_polls),
+                "avg_options_per_poll": total_options / max(1, total_polls),
                 "avg_votes_per_option": total_votes / max(1, total_options),
             }
 
@@ -457,26 +567,15 @@ class FeedsCollectionService:
             if not posts:
                 return {}
 
-            # Post engagement
-            post_reaction_counts = []
-            post_comment_counts = []
-            post_view_counts = []
+            # Post engagement, from the denormalized counters
+            post_reaction_counts = array("I")
+            post_comment_counts = array("I")
+            post_view_counts = array("I")
 
             for post in posts:
-                reaction_count = 0
-                comment_count = 0
-                view_count = 0
-
-                if hasattr(post, "reactions"):
-                    reaction_count = post.reactions.count()
-                if hasattr(post, "comments"):
-                    comment_count = post.comments.count()
-                if hasattr(post, "views_count"):
-                    view_count = post.views_count
-
-                post_reaction_counts.append(reaction_count)
-                post_comment_counts.append(comment_count)
-                post_view_counts.append(view_count)
+                post_reaction_counts.append(post.reactions_count)
+                post_comment_counts.append(post.comments_count)
+                post_view_counts.append(post.views_count)
 
             # Calculate engagement rates
             avg_reactions_per_post = (
@@ -500,10 +599,9 @@ class FeedsCollectionService:
             )
 
             # Comment engagement
-            comment_reaction_counts = []
-            for comment in comments:
-                if hasattr(comment, "reactions"):
-                    comment_reaction_counts.append(comment.reactions.count())
+            comment_reaction_counts = array(
+                "I", (comment.reactions_count for comment in comments)
+            )
 
             return {
                 "avg_reactions_per_post": avg_reactions_per_post,
@@ -542,16 +640,13 @@ class FeedsCollectionService:
             user_reaction_counts = Counter()
 
             for post in posts:
-                if hasattr(post, "author"):
-                    user_post_counts[post.author.id] += 1
+                user_post_counts[post.author_id] += 1
 
             for comment in comments:
-                if hasattr(comment, "author"):
-                    user_comment_counts[comment.author.id] += 1
+                user_comment_counts[comment.author_id] += 1
 
             for reaction in reactions:
-                if hasattr(reaction, "user"):
-                    user_reaction_counts[reaction.user.id] += 1
+                user_reaction_counts[reaction.user_id] += 1
 
             # Calculate activity distributions
             total_users = len(
@@ -673,16 +768,13 @@ class FeedsCollectionService:
             )
 
             for post in posts:
-                if hasattr(post, "author"):
-                    user_interactions[post.author.id]["posts"] += 1
+                user_interactions[post.author_id]["posts"] += 1
 
             for comment in comments:
-                if hasattr(comment, "author"):
-                    user_interactions[comment.author.id]["comments"] += 1
+                user_interactions[comment.author_id]["comments"] += 1
 
             for reaction in reactions:
-                if hasattr(reaction, "user"):
-                    user_interactions[reaction.user.id]["reactions"] += 1
+                user_interactions[reaction.user_id]["reactions"] += 1
 
             # Calculate diversity scores
             diversity_scores = []
@@ -731,8 +823,7 @@ class FeedsCollectionService:
             positive_reactions = sum(
                 1
                 for reaction in reactions
-                if hasattr(reaction, "reaction_type")
-                and reaction.reaction_type in ["love", "support", "celebrate"]
+                if reaction.reaction_type in ["love", "support", "celebrate"]
             )
 
             total_reactions = len(reactions)
@@ -890,20 +981,13 @@ class FeedsCollectionService:
 
             # Track activity dates for each user
             for post in posts:
-                if hasattr(post, "author") and hasattr(post, "created_at"):
-                    user_activity_dates[post.author.id].add(post.created_at.date())
+                user_activity_dates[post.author_id].add(post.created_at.date())
 
             for comment in comments:
-                if hasattr(comment, "author") and hasattr(comment, "created_at"):
-                    user_activity_dates[comment.author.id].add(
-                        comment.created_at.date()
-                    )
+                user_activity_dates[comment.author_id].add(comment.created_at.date())
 
             for reaction in reactions:
-                if hasattr(reaction, "user") and hasattr(reaction, "created_at"):
-                    user_activity_dates[reaction.user.id].add(
-                        reaction.created_at.date()
-                    )
+                user_activity_dates[reaction.user_id].add(reaction.created_at.date())
 
             # Calculate activity spread
             activity_day_counts = [len(dates) for dates in user_activity_dates.values()]
@@ -954,7 +1038,9 @@ class FeedsCollectionService:
             logger.error(f"Error calculating community engagement score: {str(e)}")
             return 0.0
 
-    def _analyze_social_dynamics(self, raw_data: Dict[str, Any]) -> Dict[str, Any]:
+    def _analyze_social_dynamics(
+        self, raw_data: Dict[str, Any], active_user_ids: Set[int]
+    ) -> Dict[str, Any]:
         """Analyze social dynamics and network patterns"""
         try:
             posts = raw_data.get("posts", [])
@@ -963,7 +1049,7 @@ class FeedsCollectionService:
 
             # Network analysis
             network_analysis = self._calculate_network_metrics(
-                posts, comments, reactions
+                posts, comments, reactions, active_user_ids
             )
 
             # Support interactions
@@ -983,63 +1069,57 @@ class FeedsCollectionService:
             return {}
 
     def _calculate_network_metrics(
-        self, posts: List, comments: List, reactions: List
+        self, posts: List, comments: List, reactions: List, active_user_ids: Set[int]
     ) -> Dict[str, Any]:
         """Calculate social network metrics"""
         try:
             # Build interaction graph
-            user_connections = defaultdict(set)
+            graph = InteractionGraph()
 
             # Comments create connections between users
             for comment in comments:
-                if (
-                    hasattr(comment, "author")
-                    and hasattr(comment, "post")
-                    and hasattr(comment.post, "author")
-                ):
-                    commenter = comment.author.id
-                    post_author = comment.post.author.id
-                    if commenter != post_author:  # Don't count self-interactions
-                        user_connections[commenter].add(post_author)
-                        user_connections[post_author].add(commenter)
+                graph.add(comment.author_id, comment.post_author_id)
 
-            # Reactions also create connections
-            for reaction in reactions:
-                if hasattr(reaction, "user") and hasattr(reaction, "content_object"):
-                    reactor = reaction.user.id
-                    # Get the author of the content being reacted to
-                    content = reaction.content_object
-                    if hasattr(content, "author"):
-                        content_author = content.author.id
-                        if reactor != content_author:
-                            user_connections[reactor].add(content_author)
-                            user_connections[content_author].add(reactor)
+            # Reactions also create connections, with the reacted-to content's
+            # author resolved in SQL once per content type
+            for reactor, content_author in self._iter_reaction_authors(reactions):
+                graph.add(reactor, content_author)
 
             # Calculate network metrics
-            total_users = len(user_connections)
-            connection_counts = [
-                len(connections) for connections in user_connections.values()
-            ]
+            connection_counts = graph.degrees()
+            total_users = int(connection_counts.size)
 
             # Identify highly connected users
             avg_connections = (
-                statistics.mean(connection_counts) if connection_counts else 0
-            )
-            highly_connected = sum(
-                1 for count in connection_counts if count > avg_connections * 2
+                float(connection_counts.mean()) if connection_counts.size else 0
             )
+            highly_connected = int((connection_counts > avg_connections * 2).sum())
+
+            # Active users who neither interacted with nor heard from anyone
+            isolated_users = np.setdiff1d(
+                np.fromiter(
+                    active_user_ids, dtype=np.int64, count=len(active_user_ids)
+                ),
+                graph.nodes(),
+            ).size
 
             return {
                 "total_connected_users": total_users,
                 "avg_connections_per_user": avg_connections,
-                "max_connections": max(connection_counts) if connection_counts else 0,
+                "max_connections": int(connection_counts.max())
+                if connection_counts.size
+                else 0,
                 "highly_connected_users": highly_connected,
-                "isolated_users": sum(1 for count in connection_counts if count == 0),
-                "network_density": self._calculate_network_density(user_connections),
+                "isolated_users": int(isolated_users),
+                "network_density": self._calculate_network_density(
+                    total_users, graph.edge_count
+                ),
                 "connection_distribution": {
-                    "low": sum(1 for count in connection_counts if count <= 2),
-                    "medium": sum(1 for count in connection_counts if 2 < count <= 10),
-                    "high": sum(1 for count in connection_counts if count > 10),
+                    "low": int((connection_counts <= 2).sum()),
+                    "medium": int(
+                        ((connection_counts > 2) & (connection_counts <= 10)).sum()
+                    ),
+                    "high": int((connection_counts > 10).sum()),
                 },
             }
 
@@ -1047,24 +1127,70 @@ class FeedsCollectionService:
             logger.error(f"Error calculating network metrics: {str(e)}")
             return {}
 
-    def _calculate_network_density(self, user_connections: Dict) -> float:
+    def _iter_reaction_authors(self, reactions: RowStream) -> Iterator:
+        """
+        ``(reactor, content author)`` pairs for every reaction.
+
+        Instead of a ``content_object`` lookup per reaction, each content type
+        with an author is streamed once with the author joined by subquery.
+        """
+        from django.contrib.contenttypes.models import ContentType
+
+        content_type_ids = (
+            reactions.queryset.order_by()
+            .values_list("content_type_id", flat=True)
+            .distinct()
+        )
+        for content_type in ContentType.objects.filter(pk__in=content_type_ids):
+            model = content_type.model_class()
+            if model is None or not any(
+                field.name == "author" for field in model._meta.get_fields()
+            ):
+                continue
+            yield from (
+                reactions.queryset.filter(content_type=content_type)
+                .annotate(
+                    content_author_id=Subquery(
+                        model.objects.filter(pk=OuterRef("object_id")).values(
+                            "author_id"
+                        )[:1]
+                    )
+                )
+                .order_by()
+                .values_list("user_id", "content_author_id")
+                .iterator(chunk_size=reactions.chunk_size)
+            )
+
+    def _calculate_network_density(self, total_users: int, total_edges: int) -> float:
         """Calculate network density"""
         try:
-            total_users = len(user_connections)
             if total_users < 2:
                 return 0.0
 
-            actual_connections = (
-                sum(len(connections) for connections in user_connections.values()) / 2
-            )
             possible_connections = (total_users * (total_users - 1)) / 2
 
-            return actual_connections / max(1, possible_connections)
+            return total_edges / max(1, possible_connections)
 
         except Exception as e:
             logger.error(f"Error calculating network density: {str(e)}")
             return 0.0
 
+    def _iter_contents(self, posts: RowStream, comments: RowStream) -> Iterator[str]:
+        """Text of every post, then every comment, streamed"""
+        return chain(
+            (post.content for post in posts),
+            (comment.content for comment in comments),
+        )
+
+    def _iter_activity_times(
+        self, posts: RowStream, comments: RowStream, reactions: RowStream
+    ) -> Iterator[datetime]:
+        return chain(
+            (post.created_at for post in posts),
+            (comment.created_at for comment in comments),
+            (reaction.created_at for reaction in reactions),
+        )
+
     def _analyze_support_interactions(
         self, posts: List, comments: List
     ) -> Dict[str, Any]:
@@ -1100,15 +1226,7 @@ class FeedsCollectionService:
                 r"\bstay.*strong\b",
             ]
 
-            all_content = []
-            for post in posts:
-                if hasattr(post, "content"):
-                    all_content.append(post.content)
-            for comment in comments:
-                if hasattr(comment, "content"):
-                    all_content.append(comment.content)
-
-            for content in all_content:
+            for content in self._iter_contents(posts, comments):
                 content_lower = content.lower()
 
                 if any(
@@ -1127,7 +1245,7 @@ class FeedsCollectionService:
                 ):
                     encouragement += 1
 
-            total_content = len(all_content)
+            total_content = len(posts) + len(comments)
 
             return {
                 "support_requests": support_requests,
@@ -1200,21 +1318,13 @@ class FeedsCollectionService:
 
             topic_counts = defaultdict(int)
 
-            all_content = []
-            for post in posts:
-                if hasattr(post, "content"):
-                    all_content.append(post.content)
-            for comment in comments:
-                if hasattr(comment, "content"):
-                    all_content.append(comment.content)
-
-            for content in all_content:
+            for content in self._iter_contents(posts, comments):
                 content_lower = content.lower()
                 for topic, keywords in mental_health_topics.items():
                     if any(re.search(keyword, content_lower) for keyword in keywords):
                         topic_counts[topic] += 1
 
-            total_content = len(all_content)
+            total_content = len(posts) + len(comments)
             mental_health_content_total = sum(topic_counts.values())
 
             return {
@@ -1271,18 +1381,7 @@ class FeedsCollectionService:
             hourly_activity = defaultdict(int)
             daily_activity = defaultdict(int)
 
-            all_activities = []
-            for post in posts:
-                if hasattr(post, "created_at"):
-                    all_activities.append(post.created_at)
-            for comment in comments:
-                if hasattr(comment, "created_at"):
-                    all_activities.append(comment.created_at)
-            for reaction in reactions:
-                if hasattr(reaction, "created_at"):
-                    all_activities.append(reaction.created_at)
-
-            for activity_time in all_activities:
+            for activity_time in self._iter_activity_times(posts, comments, reactions):
                 hourly_activity[activity_time.hour] += 1
                 daily_activity[activity_time.weekday()] += 1
 
@@ -1313,7 +1412,7 @@ class FeedsCollectionService:
                 "daily_distribution": dict(daily_activity),
                 "peak_hour": peak_hour,
                 "peak_day": day_names[peak_day] if peak_day is not None else None,
-                "total_activities": len(all_activities),
+                "total_activities": len(posts) + len(comments) + len(reactions),
                 "activity_spread": {
                     "hours_active": len(hourly_activity),
                     "days_active": len(daily_activity),
@@ -1332,18 +1431,7 @@ class FeedsCollectionService:
             # Daily activity counts
             daily_counts = defaultdict(int)
 
-            all_activities = []
-            for post in posts:
-                if hasattr(post, "created_at"):
-                    all_activities.append(post.created_at)
-            for comment in comments:
-                if hasattr(comment, "created_at"):
-                    all_activities.append(comment.created_at)
-            for reaction in reactions:
-                if hasattr(reaction, "created_at"):
-                    all_activities.append(reaction.created_at)
-
-            for activity_time in all_activities:
+            for activity_time in self._iter_activity_times(posts, comments, reactions):
                 daily_counts[activity_time.date()] += 1
 
             if not daily_counts:
@@ -1449,21 +1537,13 @@ class FeedsCollectionService:
 
             content_scores = defaultdict(int)
 
-            all_content = []
-            for post in posts:
-                if hasattr(post, "content"):
-                    all_content.append(post.content)
-            for comment in comments:
-                if hasattr(comment, "content"):
-                    all_content.append(comment.content)
-
-            for content in all_content:
+            for content in self._iter_contents(posts, comments):
                 content_lower = content.lower()
                 for category, keywords in therapeutic_indicators.items():
                     if any(re.search(keyword, content_lower) for keyword in keywords):
                         content_scores[category] += 1
 
-            total_content = len(all_content)
+            total_content = len(posts) + len(comments)
             therapeutic_content_total = sum(content_scores.values())
 
             return {
@@ -1506,7 +1586,9 @@ class FeedsCollectionService:
                 r"\bcare\b",
             ]
 
-            distress_posts = []
+            from feeds.models import Comment
+
+            distress_posts = set()
             supportive_responses = 0
 
             # Identify distress posts
@@ -1517,19 +1599,24 @@ class FeedsCollectionService:
                         re.search(keyword, content_lower)
                         for keyword in distress_keywords
                     ):
-                        distress_posts.append(post)
-
-            # Count supportive responses to distress posts
-            for post in distress_posts:
-                if hasattr(post, "comments"):
-                    for comment in post.comments.all():
-                        if hasattr(comment, "content"):
-                            content_lower = comment.content.lower()
-                            if any(
-                                re.search(keyword, content_lower)
-                                for keyword in support_keywords
-                            ):
-                                supportive_responses += 1
+                        distress_posts.add(post.id)
+
+            # Count supportive responses to distress posts, streaming every
+            # comment on the analyzed posts once
+            if distress_posts:
+                for post_id, content in (
+                    Comment.objects.filter(post__in=posts.queryset)
+                    .order_by()
+                    .values_list("post_id", "content")
+                    .iterator(chunk_size=posts.chunk_size)
+                ):
+                    if post_id in distress_posts:
+                        content_lower = content.lower()
+                        if any(
+                            re.search(keyword, content_lower)
+                            for keyword in support_keywords
+                        ):
+                            supportive_responses += 1
 
             # Response effectiveness
             distress_post_count = len(distress_posts)
@@ -1581,24 +1668,20 @@ class FeedsCollectionService:
             crisis_comments = 0
             intervention_responses = 0
 
-            # Identify crisis content
-            all_content = []
+            # Identify crisis content and count intervention responses
             for post in posts:
-                if hasattr(post, "content"):
-                    content = post.content.lower()
-                    all_content.append(content)
-                    if any(re.search(keyword, content) for keyword in crisis_keywords):
-                        crisis_posts += 1
+                content = post.content.lower()
+                if any(re.search(keyword, content) for keyword in crisis_keywords):
+                    crisis_posts += 1
+                if any(
+                    re.search(keyword, content) for keyword in intervention_keywords
+                ):
+                    intervention_responses += 1
 
             for comment in comments:
-                if hasattr(comment, "content"):
-                    content = comment.content.lower()
-                    all_content.append(content)
-                    if any(re.search(keyword, content) for keyword in crisis_keywords):
-                        crisis_comments += 1
-
-            # Count intervention responses
-            for content in all_content:
+                content = comment.content.lower()
+                if any(re.search(keyword, content) for keyword in crisis_keywords):
+                    crisis_comments += 1
                 if any(
                     re.search(keyword, content) for keyword in intervention_keywords
                 ):
@@ -1614,7 +1697,7 @@ class FeedsCollectionService:
                 "crisis_intervention_ratio": intervention_responses
                 / max(1, total_crisis_content),
                 "crisis_content_percentage": (
-                    total_crisis_content / max(1, len(all_content))
+                    total_crisis_content / max(1, len(posts) + len(comments))
                 )
                 * 100,
                 "intervention_effectiveness": intervention_responses
@@ -1635,43 +1718,26 @@ class FeedsCollectionService:
             if not posts and not comments and not reactions:
                 return 0.0
 
-            # Content completeness
-            complete_posts = sum(
-                1
-                for post in posts
-                if hasattr(post, "content")
-                and post.content
-                and hasattr(post, "author")
-                and post.author
-            )
+            # Content completeness, length and engagement in one pass
+            complete_posts = 0
+            engaged_posts = 0
+            total_length = 0
+            for post in posts:
+                complete_posts += bool(post.content and post.author_id)
+                engaged_posts += bool(post.reactions_count or post.comments_count)
+                total_length += len(post.content)
+            for comment in comments:
+                total_length += len(comment.content)
             completeness_score = complete_posts / max(1, len(posts))
 
             # Data richness (average content length)
-            post_lengths = [
-                len(post.content) for post in posts if hasattr(post, "content")
-            ]
-            comment_lengths = [
-                len(comment.content)
-                for comment in comments
-                if hasattr(comment, "content")
-            ]
-
-            avg_content_length = (
-                statistics.mean(post_lengths + comment_lengths)
-                if (post_lengths + comment_lengths)
-                else 0
-            )
+            content_items = len(posts) + len(comments)
+            avg_content_length = total_length / content_items if content_items else 0
             richness_score = min(
                 1.0, avg_content_length / 200
             )  # Normalize to 200 chars
 
             # Engagement quality (content with reactions/comments)
-            engaged_posts = sum(
-                1
-                for post in posts
-                if (hasattr(post, "reactions") and post.reactions.count() > 0)
-                or (hasattr(post, "comments") and post.comments.count() > 0)
-            )
             engagement_score = engaged_posts / max(1, len(posts))
 
             # Overall quality score
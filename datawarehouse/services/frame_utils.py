@@ -0,0 +1,102 @@
+# datawarehouse/services/frame_utils.py
+"""
+Vectorized DataFrame helpers shared by the mood and journal collection services
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+def frame_from_queryset(
+    queryset,
+    fields: Sequence[str],
+    dtypes: Optional[Dict[str, str]] = None,
+    datetime_fields: Iterable[str] = (),
+) -> pd.DataFrame:
+    """
+    Build a column-typed DataFrame straight from ``values_list`` tuples.
+
+    Avoids materialising model instances or per-row dicts: rows are fetched
+    as tuples, transposed once and each column is converted to a NumPy array
+    of the requested dtype.
+
+    Args:
+        queryset: Queryset to read from
+        fields: Field names to select (column order of the result)
+        dtypes: Optional NumPy dtype per field (e.g. ``{"mood_rating": "float64"}``)
+        datetime_fields: Fields converted with ``pd.to_datetime``
+
+    Returns:
+        DataFrame with one column per field (empty if the queryset is empty)
+    """
+    rows = list(queryset.values_list(*fields))
+    if not rows:
+        return pd.DataFrame(columns=list(fields))
+
+    dtypes = dtypes or {}
+    datetime_fields = set(datetime_fields)
+    columns = {}
+    for field, values in zip(fields, zip(*rows)):
+        if field in datetime_fields:
+            columns[field] = pd.to_datetime(pd.Series(values, dtype=object))
+        elif field in dtypes:
+            # None becomes NaN for float dtypes
+            columns[field] = np.array(values, dtype=dtypes[field])
+        else:
+            columns[field] = np.array(values, dtype=object)
+
+    return pd.DataFrame(columns)
+
+
+def lowered_text(series: pd.Series) -> pd.Series:
+    """Lower-cased string values of ``series``; missing and non-string values are dropped"""
+    if not pd.api.types.is_string_dtype(series) and not pd.api.types.is_object_dtype(
+        series
+    ):
+        return pd.Series([], dtype=object)
+    return series.str.lower().dropna()
+
+
+def keyword_hits(texts: pd.Series, keywords: Iterable[str]) -> pd.Series:
+    """
+    Number of ``keywords`` contained (as substrings) in each text.
+
+    Equivalent to ``sum(1 for k in keywords if k in text)`` per row; a
+    repeated keyword counts once per listing. This stays a loop over the
+    texts: without pyarrow every ``str.contains`` call is itself a Python
+    loop, so one call per keyword is slower than one pass of ``in`` checks.
+    """
+    keywords = list(keywords)
+    hits = [sum(map(text.__contains__, keywords)) for text in texts.tolist()]
+    return pd.Series(hits, index=texts.index, dtype="int64")
+
+
+def keyword_hit_matrix(
+    texts: pd.Series, keyword_map: Dict[str, List[str]]
+) -> pd.DataFrame:
+    """Per-text keyword hit counts, one column per group of ``keyword_map``"""
+    return pd.DataFrame(
+        {
+            group: keyword_hits(texts, keywords)
+            for group, keywords in keyword_map.items()
+        },
+        index=texts.index,
+        columns=list(keyword_map.keys()),
+    )
+
+
+def explode_values(
+    df: pd.DataFrame, list_column: str, value_column: str
+) -> pd.DataFrame:
+    """
+    One row per (item, value) pair for a column holding strings or lists.
+
+    Rows whose item or value is missing are dropped; empty lists produce no
+    rows. Groups keep first-appearance order when aggregated with
+    ``groupby(sort=False)``.
+    """
+    frame = df[[list_column, value_column]].dropna()
+    frame = frame.explode(list_column).dropna(subset=[list_column])
+    return frame.reset_index(drop=True)
@@ -11,10 +11,25 @@ import pandas as pd
 import numpy as np
 from dataclasses import dataclass
 import structlog
+import re
+
+from .frame_utils import explode_values, frame_from_queryset
 
 logger = structlog.get_logger(__name__)
 User = get_user_model()
 
+MOOD_FIELDS = (
+    "id",
+    "mood_rating",
+    "energy_level",
+    "activities",
+    "notes",
+    "logged_at",
+    "created_at",
+)
+
+SLEEP_KEYWORDS = ["sleep", "tired", "exhausted", "rested", "insomnia"]
+
 
 @dataclass
 class MoodAnalysisResult:
@@ -71,29 +86,23 @@ class MoodCollectionService:
         try:
             from mood.models import MoodLog
 
-            # Get mood logs with all available fields
-            mood_logs = (
+            # Fetch typed columns directly instead of per-row dicts
+            df = frame_from_queryset(
                 MoodLog.objects.filter(
                     user=user, logged_at__range=(start_date, end_date)
-                )
-                .values(
-                    "id",
-                    "mood_rating",
-                    "energy_level",
-                    "activities",
-                    "notes",
-                    "logged_at",
-                    "created_at",
-                )
-                .order_by("logged_at")
+                ).order_by("logged_at"),
+                MOOD_FIELDS,
+                dtypes={
+                    "id": "int64",
+                    "mood_rating": "float64",
+                    "energy_level": "float64",
+                },
+                datetime_fields=("logged_at", "created_at"),
             )
 
-            if not mood_logs:
+            if df.empty:
                 return self._get_empty_mood_analysis()
 
-            # Convert to DataFrame for analysis
-            df = pd.DataFrame(list(mood_logs))
-            df["logged_at"] = pd.to_datetime(df["logged_at"])
             df = df.sort_values("logged_at")
 
             # Perform comprehensive analysis
@@ -214,44 +223,28 @@ class MoodCollectionService:
             if df.empty or "activities" not in df:
                 return {}
 
-            activity_mood_map = {}
-            total_activities = 0
-
-            for index, row in df.iterrows():
-                if pd.isna(row["activities"]) or pd.isna(row["mood_rating"]):
-                    continue
-
-                activities = row["activities"]
-                mood = row["mood_rating"]
+            # One row per (activity, mood); single-activity strings stay as-is
+            pairs = explode_values(df, "activities", "mood_rating")
+            stats = pairs.groupby("activities", sort=False)["mood_rating"].agg(
+                ["mean", "count", "min", "max"]
+            )
+            mood_range = (stats["max"] - stats["min"]).where(stats["count"] > 1, 0.0)
 
-                # Handle different activity data formats
-                if isinstance(activities, str):
-                    activity_list = [activities]
-                elif isinstance(activities, list):
-                    activity_list = activities
-                else:
-                    continue
-
-                for activity in activity_list:
-                    if activity not in activity_mood_map:
-                        activity_mood_map[activity] = []
-                    activity_mood_map[activity].append(mood)
-                    total_activities += 1
-
-            # Calculate average mood for each activity
-            activity_analysis = {}
-            for activity, moods in activity_mood_map.items():
-                activity_analysis[activity] = {
-                    "avg_mood": float(np.mean(moods)),
-                    "count": len(moods),
-                    "mood_range": float(np.max(moods) - np.min(moods))
-                    if len(moods) > 1
-                    else 0.0,
+            activity_analysis = {
+                activity: {
+                    "avg_mood": float(row_mean),
+                    "count": int(row_count),
+                    "mood_range": float(row_range),
                 }
+                for activity, row_mean, row_count, row_range in zip(
+                    stats.index, stats["mean"], stats["count"], mood_range
+                )
+            }
+            total_activities = len(pairs)
 
             return {
                 "total_activities_logged": total_activities,
-                "unique_activities": len(activity_mood_map),
+                "unique_activities": len(activity_analysis),
                 "activity_mood_analysis": activity_analysis,
                 "most_mood_boosting": max(
                     activity_analysis.items(),
@@ -318,10 +311,11 @@ class MoodCollectionService:
 
             sleep_mentions = 0
             if "notes" in df:
-                sleep_keywords = ["sleep", "tired", "exhausted", "rested", "insomnia"]
-                for note in df["notes"].dropna():
-                    if any(keyword in str(note).lower() for keyword in sleep_keywords):
-                        sleep_mentions += 1
+                notes = df["notes"].dropna().astype(str).str.lower()
+                mentions = notes.str.contains(
+                    "|".join(map(re.escape, SLEEP_KEYWORDS)), regex=True
+                )
+                sleep_mentions = int(mentions.sum())
 
             return {
                 "sleep_mentions_in_notes": sleep_mentions,
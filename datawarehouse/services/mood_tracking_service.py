@@ -13,6 +13,8 @@ import numpy as np
 import logging
 from dataclasses import dataclass
 
+from .frame_utils import explode_values, frame_from_queryset
+
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
@@ -138,25 +140,33 @@ class MoodTrackingCollectionService:
         try:
             from mood.models import MoodLog
 
-            mood_logs = MoodLog.objects.filter(
-                user=user, timestamp__range=(start_date, end_date)
-            ).values(
-                "id",
-                "mood_score",
-                "energy_level",
-                "sleep_hours",
-                "stress_level",
-                "notes",
-                "timestamp",
-                "activities",
+            df = frame_from_queryset(
+                MoodLog.objects.filter(
+                    user=user, timestamp__range=(start_date, end_date)
+                ),
+                (
+                    "id",
+                    "mood_score",
+                    "energy_level",
+                    "sleep_hours",
+                    "stress_level",
+                    "notes",
+                    "timestamp",
+                    "activities",
+                ),
+                dtypes={
+                    "id": "int64",
+                    "mood_score": "float64",
+                    "energy_level": "float64",
+                    "sleep_hours": "float64",
+                    "stress_level": "float64",
+                },
+                datetime_fields=("timestamp",),
             )
 
-            if not mood_logs:
+            if df.empty:
                 return pd.DataFrame()
 
-            # Convert to pandas DataFrame
-            df = pd.DataFrame(list(mood_logs))
-            df["timestamp"] = pd.to_datetime(df["timestamp"])
             df = df.sort_values("timestamp")
 
             return df
@@ -281,40 +291,36 @@ class MoodTrackingCollectionService:
             if df.empty or "activities" not in df:
                 return {}
 
-            # Extract all activities
-            all_activities = []
-            activity_mood_map = {}
-
-            for idx, row in df.iterrows():
-                activities = row.get("activities", [])
-                mood_score = row.get("mood_score")
+            # Only list-valued activity columns carry per-activity data
+            is_list = df["activities"].map(lambda value: isinstance(value, list))
+            pairs = explode_values(df[is_list], "activities", "mood_score")
+            all_activities = pairs["activities"]
 
-                if isinstance(activities, list) and mood_score is not None:
-                    for activity in activities:
-                        all_activities.append(activity)
-                        if activity not in activity_mood_map:
-                            activity_mood_map[activity] = []
-                        activity_mood_map[activity].append(mood_score)
-
-            if not all_activities:
+            if all_activities.empty:
                 return {}
 
             # Calculate activity statistics
-            activity_counts = pd.Series(all_activities).value_counts()
+            activity_counts = all_activities.value_counts()
 
             # Calculate average mood for each activity
-            activity_mood_averages = {}
-            for activity, moods in activity_mood_map.items():
-                if moods:
-                    activity_mood_averages[activity] = {
-                        "average_mood": np.mean(moods),
-                        "mood_count": len(moods),
-                        "mood_std": np.std(moods) if len(moods) > 1 else 0.0,
-                    }
+            grouped = pairs.groupby("activities", sort=False)["mood_score"]
+            stats = grouped.agg(["mean", "count"])
+            stats["std"] = grouped.std(ddof=0)
+            activity_mood_averages = {
+                activity: {
+                    "average_mood": row_mean,
+                    "mood_count": int(row_count),
+                    "mood_std": row_std if row_count > 1 else 0.0,
+                }
+                for activity, row_mean, row_count, row_std in zip(
+                    stats.index, stats["mean"], stats["count"], stats["std"]
+                )
+            }
+            unique_activities = all_activities.nunique()
 
             return {
                 "total_activities_logged": len(all_activities),
-                "unique_activities": len(set(all_activities)),
+                "unique_activities": unique_activities,
                 "activity_frequency": activity_counts.head(10).to_dict(),
                 "activity_mood_correlation": activity_mood_averages,
                 "most_positive_activities": sorted(
@@ -322,10 +328,7 @@ class MoodTrackingCollectionService:
                     key=lambda x: x[1]["average_mood"],
                     reverse=True,
                 )[:5],
-                "activity_diversity_score": len(set(all_activities))
-                / len(all_activities)
-                if all_activities
-                else 0,
+                "activity_diversity_score": unique_activities / len(all_activities),
             }
 
         except Exception as exc:
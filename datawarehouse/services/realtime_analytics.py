@@ -2,15 +2,21 @@
 """
 Real-time Analytics and Streaming Data Processing Service
 Provides live data processing and real-time insights for the MindCare platform
+
+Events are appended to a Redis Stream and dispatched to handlers through a
+consumer group (see ``run_realtime_consumer``); metrics are kept in shared
+Redis sliding windows so every worker reports the same numbers.
 """
 
 import asyncio
 import json
 import logging
-from typing import Dict, Any, List, Callable
+import os
+import socket
+from typing import Dict, Any, List, Callable, Optional, Set
 from datetime import datetime, timedelta
 from dataclasses import dataclass, field
-from collections import defaultdict, deque
+from collections import defaultdict
 import redis
 from django.conf import settings
 from django.utils import timezone
@@ -22,9 +28,17 @@ from asgiref.sync import async_to_sync
 
 from journal.models import JournalEntry
 from mood.models import MoodLog
+from .realtime_windows import ConsumerGroupStream, SlidingCounter, SlidingDistinct
 
 logger = logging.getLogger(__name__)
 
+STREAM_KEY = "rt:events"
+HANDLER_GROUP = "realtime-handlers"
+CRISIS_ALERTS_KEY = "rt:crisis_alerts"
+USER_MOOD_KEY = "rt:mood:{user_id}"
+MAX_CRISIS_ALERTS = 500
+MAX_USER_MOOD_EVENTS = 50
+
 
 @dataclass
 class StreamEvent:
@@ -36,6 +50,28 @@ class StreamEvent:
     data: Dict[str, Any]
     source: str
     priority: str = "normal"  # low, normal, high, critical
+    
+    def to_fields(self) -> Dict[str, str]:
+        """Flat string fields for a Redis Stream entry"""
+        return {
+            'event_type': self.event_type,
+            'user_id': str(self.user_id),
+            'timestamp': self.timestamp.isoformat(),
+            'data': json.dumps(self.data, default=str),
+            'source': self.source,
+            'priority': self.priority
+        }
+    
+    @classmethod
+    def from_fields(cls, fields: Dict[str, str]) -> "StreamEvent":
+        return cls(
+            event_type=fields.get('event_type', 'unknown'),
+            user_id=int(fields.get('user_id', 0)),
+            timestamp=datetime.fromisoformat(fields['timestamp']),
+            data=json.loads(fields.get('data', '{}')),
+            source=fields.get('source', 'unknown'),
+            priority=fields.get('priority', 'normal')
+        )
 
 
 @dataclass
@@ -51,43 +87,79 @@ class RealTimeMetrics:
 
 
 class StreamProcessor:
-    """Processes streaming events with configurable handlers"""
+    """
+    Dispatches streaming events to handlers through a Redis consumer group
     
-    def __init__(self):
+    Any number of workers can run :meth:`consume`; each message is handled
+    by one of them and acknowledged only when every handler succeeded.
+    Events with a handler registered as ``sheddable=False`` (those feeding
+    crisis detection) are never shed under backpressure.
+    """
+    
+    def __init__(self, redis_client):
         self.handlers: Dict[str, List[Callable]] = defaultdict(list)
-        self.event_buffer = deque(maxlen=10000)
-        self.metrics_window = timedelta(minutes=5)
+        self.unsheddable: Set[str] = set()
+        self.stream = ConsumerGroupStream(
+            redis_client,
+            key=getattr(settings, 'REALTIME_STREAM_KEY', STREAM_KEY),
+            group=HANDLER_GROUP,
+            maxlen=getattr(settings, 'REALTIME_STREAM_MAXLEN', 100000),
+            max_backlog=getattr(settings, 'REALTIME_MAX_BACKLOG', 10000),
+            max_deliveries=getattr(settings, 'REALTIME_MAX_DELIVERIES', 5)
+        )
+        self.handler_timeout = getattr(settings, 'REALTIME_HANDLER_TIMEOUT', 5.0)
         
-    def register_handler(self, event_type: str, handler: Callable):
+    def register_handler(self, event_type: str, handler: Callable, sheddable: bool = True):
         """Register a handler for specific event types"""
         self.handlers[event_type].append(handler)
+        if not sheddable:
+            self.unsheddable.add(event_type)
         
-    async def process_event(self, event: StreamEvent):
-        """Process a single streaming event"""
-        try:
-            # Add to buffer for metrics
-            self.event_buffer.append(event)
-            
-            # Process with registered handlers
-            for handler in self.handlers.get(event.event_type, []):
-                try:
-                    await handler(event)
-                except Exception as e:
-                    logger.error(f"Handler error for {event.event_type}: {e}")
-                    
-            # Handle high priority events immediately
-            if event.priority in ["high", "critical"]:
-                await self._handle_priority_event(event)
+    def enqueue(self, event: StreamEvent) -> Optional[str]:
+        """Append an event for the handler group; None if shed by backpressure"""
+        if event.event_type not in self.handlers:
+            return None
+        return self.stream.publish(
+            event.to_fields(),
+            event.priority,
+            sheddable=event.event_type not in self.unsheddable
+        )
+        
+    async def process_event(self, event: StreamEvent) -> bool:
+        """Run the handlers of a single event; False if any of them failed"""
+        succeeded = True
+        for handler in self.handlers.get(event.event_type, []):
+            try:
+                await asyncio.wait_for(handler(event), timeout=self.handler_timeout)
+            except Exception as e:
+                logger.error(f"Handler error for {event.event_type}: {e!r}")
+                succeeded = False
+        return succeeded
+    
+    async def consume(self, consumer: Optional[str] = None, batch_size: int = 100, block_ms: int = 1000):
+        """Consume the stream forever as ``consumer`` within the handler group"""
+        consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        while True:
+            try:
+                messages = await asyncio.to_thread(
+                    self.stream.read, consumer, batch_size, block_ms
+                )
+                processed = []
+                for message_id, fields in messages:
+                    try:
+                        event = StreamEvent.from_fields(fields)
+                    except Exception as e:
+                        logger.error(f"Dropping malformed stream message {message_id}: {e}")
+                        processed.append(message_id)
+                        continue
+                    # Failed messages stay pending and are re-claimed later
+                    if await self.process_event(event):
+                        processed.append(message_id)
+                await asyncio.to_thread(self.stream.ack, *processed)
                 
-        except Exception as e:
-            logger.error(f"Error processing stream event: {e}")
-            
-    async def _handle_priority_event(self, event: StreamEvent):
-        """Handle high-priority events immediately"""
-        if event.event_type == "crisis_indicator":
-            await self._trigger_crisis_alert(event)
-        elif event.event_type == "mood_severe_decline":
-            await self._trigger_mood_alert(event)
+            except Exception as e:
+                logger.error(f"Error in stream consumer: {e}")
+                await asyncio.sleep(5)  # Wait before retrying
 
 
 class RealTimeAnalyticsService:
@@ -105,44 +177,90 @@ class RealTimeAnalyticsService:
     
     def __init__(self):
         self.redis_client = redis.Redis.from_url(
-            getattr(settings, 'REDIS_URL', 'redis://localhost:6379/0')
+            getattr(settings, 'REDIS_URL', 'redis://localhost:6379/0'),
+            decode_responses=True
         )
         self.channel_layer = get_channel_layer()
-        self.stream_processor = StreamProcessor()
-        self.metrics = RealTimeMetrics()
+        self.stream_processor = StreamProcessor(self.redis_client)
+        self.metrics_window = timedelta(
+            seconds=getattr(settings, 'REALTIME_METRICS_WINDOW', 300)
+        )
+        bucket = getattr(settings, 'REALTIME_BUCKET_SECONDS', 10)
+        window = int(self.metrics_window.total_seconds())
+        
+        # Shared sliding windows (identical for every worker)
+        self.event_counter = SlidingCounter("events", window, bucket)
+        self.active_users = SlidingDistinct("users", window, bucket)
+        self.mood_sum = SlidingCounter("mood_sum", window, bucket)
+        self.mood_count = SlidingCounter("mood_count", window, bucket)
+        self.message_counter = SlidingCounter("messages", window, bucket)
+        self.crisis_counter = SlidingCounter("crisis", 3600, 60)
         self._setup_handlers()
         
     def _setup_handlers(self):
         """Setup event handlers for different data types"""
-        self.stream_processor.register_handler("mood_entry", self._handle_mood_event)
-        self.stream_processor.register_handler("journal_entry", self._handle_journal_event)
+        # Handlers that feed crisis detection must see every event
+        self.stream_processor.register_handler(
+            "mood_entry", self._handle_mood_event, sheddable=False
+        )
+        self.stream_processor.register_handler(
+            "journal_entry", self._handle_journal_event, sheddable=False
+        )
         self.stream_processor.register_handler("message", self._handle_message_event)
-        self.stream_processor.register_handler("user_login", self._handle_user_activity)
-        self.stream_processor.register_handler("crisis_indicator", self._handle_crisis_event)
+        self.stream_processor.register_handler(
+            "crisis_indicator", self._handle_crisis_event, sheddable=False
+        )
         
     async def publish_event(self, event: StreamEvent):
         """Publish event to the streaming pipeline"""
         try:
-            # Store in Redis stream
-            stream_key = f"events:{event.event_type}"
-            event_data = {
-                'user_id': event.user_id,
-                'timestamp': event.timestamp.isoformat(),
-                'data': json.dumps(event.data),
-                'source': event.source,
-                'priority': event.priority
-            }
+            # Blocking Redis calls run off the event loop: update the shared
+            # windows in one round trip, then queue the event for the
+            # handlers, which run in the consumer group workers
+            await asyncio.to_thread(self._record_event, event)
+            await asyncio.to_thread(self.stream_processor.enqueue, event)
             
-            self.redis_client.xadd(stream_key, event_data)
-            
-            # Process immediately
-            await self.stream_processor.process_event(event)
+            # High-priority events are acted on here, not behind the queue
+            if event.priority in ["high", "critical"]:
+                await self._handle_priority_event(event)
             
             # Broadcast to WebSocket consumers
             await self._broadcast_event(event)
             
         except Exception as e:
             logger.error(f"Error publishing event: {e}")
+    
+    def _record_event(self, event: StreamEvent):
+        """Add an event to the shared sliding windows and per-user state"""
+        pipe = self.redis_client.pipeline(transaction=False)
+        self.event_counter.add(pipe)
+        self.active_users.add(pipe, event.user_id)
+        
+        if event.event_type == "mood_entry":
+            mood_score = event.data.get('mood_score')
+            if mood_score is not None:
+                self.mood_sum.add(pipe, mood_score)
+                self.mood_count.add(pipe)
+            key = USER_MOOD_KEY.format(user_id=event.user_id)
+            pipe.lpush(key, json.dumps({
+                'timestamp': event.timestamp.isoformat(),
+                'mood_score': mood_score,
+                'notes': event.data.get('notes', '')
+            }, default=str))
+            pipe.ltrim(key, 0, MAX_USER_MOOD_EVENTS - 1)
+            pipe.expire(key, 86400)
+        
+        if event.priority == "critical" or event.event_type == "crisis_indicator":
+            self.crisis_counter.add(pipe)
+            pipe.lpush(CRISIS_ALERTS_KEY, json.dumps(event.to_fields()))
+            pipe.ltrim(CRISIS_ALERTS_KEY, 0, MAX_CRISIS_ALERTS - 1)
+        
+        pipe.execute()
+    
+    async def _handle_priority_event(self, event: StreamEvent):
+        """Handle high-priority events immediately"""
+        if event.event_type in ("crisis_indicator", "mood_severe_decline"):
+            await self._trigger_crisis_alert(event)
             
     async def _broadcast_event(self, event: StreamEvent):
         """Broadcast event to WebSocket consumers"""
@@ -164,10 +282,6 @@ class RealTimeAnalyticsService:
         """Handle mood-related events"""
         mood_score = event.data.get('mood_score', 0)
         
-        # Update real-time mood metrics
-        current_avg = self.metrics.avg_mood_score
-        self.metrics.avg_mood_score = (current_avg + mood_score) / 2
-        
         # Check for severe mood decline
         if mood_score <= 2:  # Assuming 1-10 scale
             crisis_event = StreamEvent(
@@ -198,24 +312,16 @@ class RealTimeAnalyticsService:
             
     async def _handle_message_event(self, event: StreamEvent):
         """Handle messaging events"""
-        # Track communication patterns in real-time
-        await self._update_communication_metrics(event)
-        
-    async def _handle_user_activity(self, event: StreamEvent):
-        """Handle user activity events"""
-        # Update active users count
-        self.redis_client.setex(f"user_active:{event.user_id}", 300, 1)  # 5 min TTL
-        
-        # Count current active users
-        active_count = len(self.redis_client.keys("user_active:*"))
-        self.metrics.active_users = active_count
+        # Track communication volume in the shared window
+        pipe = self.redis_client.pipeline(transaction=False)
+        self.message_counter.add(pipe)
+        await asyncio.to_thread(pipe.execute)
         
     async def _handle_crisis_event(self, event: StreamEvent):
         """Handle crisis indicator events"""
-        self.metrics.crisis_alerts += 1
-        
-        # Trigger immediate notifications
-        await self._trigger_crisis_alert(event)
+        # High-priority ones were already alerted on when published
+        if event.priority not in ["high", "critical"]:
+            await self._trigger_crisis_alert(event)
         
     async def _trigger_crisis_alert(self, event: StreamEvent):
         """Trigger crisis alert notifications"""
@@ -240,26 +346,32 @@ class RealTimeAnalyticsService:
             logger.error(f"Error triggering crisis alert: {e}")
             
     def get_realtime_metrics(self) -> Dict[str, Any]:
-        """Get current real-time metrics"""
-        # Calculate events per minute
-        now = timezone.now()
-        recent_events = [
-            e for e in self.stream_processor.event_buffer
-            if (now - e.timestamp) <= self.stream_processor.metrics_window
-        ]
+        """Get current real-time metrics from the shared windows (one round trip)"""
+        pipe = self.redis_client.pipeline(transaction=False)
+        self.event_counter.read(pipe)
+        self.active_users.read(pipe)
+        self.mood_sum.read(pipe)
+        self.mood_count.read(pipe)
+        self.crisis_counter.read(pipe)
+        pipe.xlen(self.stream_processor.stream.key)
+        events, users, mood_sum, mood_count, crisis, stream_length = pipe.execute()
         
-        events_per_minute = len(recent_events) / self.stream_processor.metrics_window.total_seconds() * 60
-        self.metrics.events_per_minute = events_per_minute
-        self.metrics.last_updated = now
+        mood_count = SlidingCounter.total(mood_count)
+        metrics = RealTimeMetrics(
+            active_users=users,
+            events_per_minute=SlidingCounter.total(events) / self.metrics_window.total_seconds() * 60,
+            avg_mood_score=SlidingCounter.total(mood_sum) / mood_count if mood_count else 0.0,
+            crisis_alerts=int(SlidingCounter.total(crisis))
+        )
         
         return {
-            "active_users": self.metrics.active_users,
-            "events_per_minute": round(self.metrics.events_per_minute, 2),
-            "avg_mood_score": round(self.metrics.avg_mood_score, 2),
-            "crisis_alerts": self.metrics.crisis_alerts,
-            "system_load": self.metrics.system_load,
-            "last_updated": self.metrics.last_updated.isoformat(),
-            "total_events_buffered": len(self.stream_processor.event_buffer)
+            "active_users": metrics.active_users,
+            "events_per_minute": round(metrics.events_per_minute, 2),
+            "avg_mood_score": round(metrics.avg_mood_score, 2),
+            "crisis_alerts": metrics.crisis_alerts,
+            "system_load": metrics.system_load,
+            "last_updated": metrics.last_updated.isoformat(),
+            "total_events_buffered": stream_length
         }
     
     def get_mood_monitoring_data(self, user_id: str) -> Dict[str, Any]:
@@ -271,14 +383,20 @@ class RealTimeAnalyticsService:
             
         now = timezone.now()
         
-        # Get recent mood events for this user from event buffer
-        user_events = [
-            e for e in self.stream_processor.event_buffer 
-            if e.user_id == user_id and e.event_type == "mood_entry"
-            and (now - e.timestamp).total_seconds() <= 86400  # Last 24 hours
-        ]
+        # Recent mood events for this user, newest first, from shared state
+        user_events = []
+        try:
+            for raw in self.redis_client.lrange(USER_MOOD_KEY.format(user_id=user_id), 0, -1):
+                entry = json.loads(raw)
+                entry['timestamp'] = datetime.fromisoformat(entry['timestamp'])
+                if (now - entry['timestamp']).total_seconds() <= 86400:  # Last 24 hours
+                    user_events.append(entry)
+        except Exception as e:
+            logger.error(f"Error reading realtime mood events: {e}")
+            user_events = []
+        user_events.reverse()  # chronological
         
-        # If no recent events in buffer, get data from database
+        # If no recent events in Redis, get data from database
         if not user_events:
             try:
                 # Fallback to database query for recent mood logs
@@ -350,8 +468,10 @@ class RealTimeAnalyticsService:
                 }
         
         
-        # Calculate metrics from event buffer
-        mood_scores = [e.data.get("mood_score", 5) for e in user_events]
+        # Calculate metrics from the recent events
+        mood_scores = [
+            e["mood_score"] if e["mood_score"] is not None else 5 for e in user_events
+        ]
         avg_mood = sum(mood_scores) / len(mood_scores) if mood_scores else 0
         
         # Simple trend calculation
@@ -371,14 +491,14 @@ class RealTimeAnalyticsService:
             "user_id": user_id,
             "recent_mood_data": [
                 {
-                    "timestamp": e.timestamp.isoformat(),
-                    "mood_score": e.data.get("mood_score", 5),
-                    "notes": e.data.get("notes", "")
-                } for e in sorted(user_events, key=lambda x: x.timestamp, reverse=True)[:10]
+                    "timestamp": e["timestamp"].isoformat(),
+                    "mood_score": e["mood_score"] if e["mood_score"] is not None else 5,
+                    "notes": e.get("notes", "")
+                } for e in sorted(user_events, key=lambda x: x["timestamp"], reverse=True)[:10]
             ],
             "avg_mood_24h": round(avg_mood, 2),
             "mood_trend": trend,
-            "last_entry": user_events[-1].timestamp.isoformat() if user_events else None,
+            "last_entry": user_events[-1]["timestamp"].isoformat() if user_events else None,
             "entries_count": len(user_events)
         }
     
@@ -386,11 +506,12 @@ class RealTimeAnalyticsService:
         """Get current crisis detection alerts"""
         now = timezone.now()
         
-        # Get recent crisis events
-        crisis_events = [
-            e for e in self.stream_processor.event_buffer 
-            if e.priority == "critical" and (now - e.timestamp).total_seconds() <= 3600  # Last hour
-        ]
+        # Get recent crisis events (newest first, capped list shared by all workers)
+        crisis_events = []
+        for raw in self.redis_client.lrange(CRISIS_ALERTS_KEY, 0, -1):
+            event = StreamEvent.from_fields(json.loads(raw))
+            if (now - event.timestamp).total_seconds() <= 3600:  # Last hour
+                crisis_events.append(event)
         
         alerts = []
         for event in crisis_events:
@@ -423,8 +544,8 @@ class RealTimeAnalyticsService:
                 priority=event_data.get("priority", "normal")
             )
             
-            # Process event asynchronously
-            async_to_sync(self.stream_processor.process_event)(event)
+            # Record and queue the event for the handler workers
+            async_to_sync(self.publish_event)(event)
             
             return {
                 "event_id": f"{event.event_type}_{event.user_id}_{int(event.timestamp.timestamp())}",
@@ -437,42 +558,9 @@ class RealTimeAnalyticsService:
             logger.error(f"Error processing event: {e}")
             return {"error": str(e)}
         
-    async def start_stream_consumer(self):
-        """Start consuming events from Redis streams"""
-        while True:
-            try:
-                # Consume from multiple streams
-                streams = ["events:mood_entry", "events:journal_entry", "events:message"]
-                for stream in streams:
-                    messages = self.redis_client.xread({stream: '$'}, count=10, block=1000)
-                    
-                    for stream_name, msgs in messages:
-                        for msg_id, fields in msgs:
-                            await self._process_redis_message(fields)
-                            
-            except Exception as e:
-                logger.error(f"Error in stream consumer: {e}")
-                await asyncio.sleep(5)  # Wait before retrying
-                
-    async def _process_redis_message(self, fields: Dict[bytes, bytes]):
-        """Process message from Redis stream"""
-        try:
-            # Convert bytes to strings
-            data = {k.decode(): v.decode() for k, v in fields.items()}
-            
-            event = StreamEvent(
-                event_type=data.get('event_type', 'unknown'),
-                user_id=int(data.get('user_id', 0)),
-                timestamp=datetime.fromisoformat(data.get('timestamp')),
-                data=json.loads(data.get('data', '{}')),
-                source=data.get('source', 'unknown'),
-                priority=data.get('priority', 'normal')
-            )
-            
-            await self.stream_processor.process_event(event)
-            
-        except Exception as e:
-            logger.error(f"Error processing Redis message: {e}")
+    async def start_stream_consumer(self, consumer: Optional[str] = None):
+        """Start consuming events from the Redis stream as part of the handler group"""
+        await self.stream_processor.consume(consumer)
 
 
 # Global service instance
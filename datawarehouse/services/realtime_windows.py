@@ -0,0 +1,201 @@
+# datawarehouse/services/realtime_windows.py
+"""
+Redis-backed sliding windows and consumer-group streams for real-time analytics
+
+State lives in Redis so every worker reads and writes the same numbers.
+Windows are split into fixed buckets, one key per bucket with a TTL, so a
+read touches a constant number of keys however many events were recorded.
+"""
+
+import logging
+import math
+import time
+from typing import Dict, List, Optional, Tuple
+
+from redis.exceptions import ResponseError
+
+logger = logging.getLogger(__name__)
+
+StreamMessage = Tuple[str, Dict[str, str]]
+
+
+class SlidingWindow:
+    """Bucketed time window; subclasses decide what a bucket holds"""
+
+    def __init__(self, name: str, window_seconds: int, bucket_seconds: int = 10):
+        self.name = name
+        self.window_seconds = window_seconds
+        self.bucket_seconds = bucket_seconds
+        self.bucket_count = math.ceil(window_seconds / bucket_seconds)
+        self.ttl = window_seconds + bucket_seconds
+
+    def bucket_key(self, bucket: int) -> str:
+        return f"rt:win:{self.name}:{bucket}"
+
+    def current_bucket(self, now: Optional[float] = None) -> int:
+        return int((now if now is not None else time.time()) // self.bucket_seconds)
+
+    def window_keys(self, now: Optional[float] = None) -> List[str]:
+        """Keys of every bucket in the window, newest first"""
+        current = self.current_bucket(now)
+        return [
+            self.bucket_key(current - offset) for offset in range(self.bucket_count)
+        ]
+
+
+class SlidingCounter(SlidingWindow):
+    """Sum of values recorded during the window"""
+
+    def add(self, pipe, amount: float = 1, now: Optional[float] = None) -> None:
+        key = self.bucket_key(self.current_bucket(now))
+        pipe.incrbyfloat(key, amount)
+        pipe.expire(key, self.ttl)
+
+    def read(self, pipe, now: Optional[float] = None) -> None:
+        """Queue the read; pass the pipeline result to :meth:`total`"""
+        pipe.mget(self.window_keys(now))
+
+    @staticmethod
+    def total(values) -> float:
+        return sum(float(value) for value in values if value is not None)
+
+
+class SlidingDistinct(SlidingWindow):
+    """Approximate distinct members seen during the window (HyperLogLog per bucket)"""
+
+    def add(self, pipe, member, now: Optional[float] = None) -> None:
+        key = self.bucket_key(self.current_bucket(now))
+        pipe.pfadd(key, member)
+        pipe.expire(key, self.ttl)
+
+    def read(self, pipe, now: Optional[float] = None) -> None:
+        """Queue a PFCOUNT over the window; Redis merges the buckets on the fly"""
+        pipe.pfcount(*self.window_keys(now))
+
+
+class ConsumerGroupStream:
+    """
+    A Redis Stream consumed through a consumer group.
+
+    The stream is capped at ``maxlen`` entries. Once the group's backlog
+    (pending plus not yet delivered) reaches ``max_backlog``, low-priority
+    messages are refused so slow handlers cannot grow the stream without
+    bound; messages published with ``sheddable=False`` are always appended.
+    Messages that stay unacknowledged are re-claimed by other consumers and
+    moved to a dead-letter stream after ``max_deliveries``.
+    """
+
+    def __init__(
+        self,
+        client,
+        key: str,
+        group: str,
+        maxlen: int = 100000,
+        max_backlog: int = 10000,
+        max_deliveries: int = 5,
+        claim_idle_ms: int = 60000,
+        shed_priorities=("low", "normal"),
+    ):
+        self.client = client
+        self.key = key
+        self.group = group
+        self.maxlen = maxlen
+        self.max_backlog = max_backlog
+        self.max_deliveries = max_deliveries
+        self.claim_idle_ms = claim_idle_ms
+        self.shed_priorities = set(shed_priorities)
+        self.dead_letter_key = f"{key}:dead"
+        self._group_ready = False
+        self._backlog = (0.0, 0)  # (checked at, value)
+
+    def ensure_group(self) -> None:
+        if self._group_ready:
+            return
+        try:
+            self.client.xgroup_create(self.key, self.group, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._group_ready = True
+
+    def backlog(self, max_age: float = 1.0) -> int:
+        """Pending plus undelivered messages, cached for ``max_age`` seconds"""
+        checked_at, value = self._backlog
+        if time.monotonic() - checked_at < max_age:
+            return value
+
+        self.ensure_group()
+        value = 0
+        for info in self.client.xinfo_groups(self.key):
+            if info.get("name") == self.group:
+                value = int(info.get("pending") or 0) + int(info.get("lag") or 0)
+                break
+        self._backlog = (time.monotonic(), value)
+        return value
+
+    def publish(
+        self, fields: Dict[str, str], priority: str = "normal", sheddable: bool = True
+    ) -> Optional[str]:
+        """Append a message; returns its id, or None if it was shed"""
+        self.ensure_group()
+        if (
+            sheddable
+            and priority in self.shed_priorities
+            and self.backlog() >= self.max_backlog
+        ):
+            logger.warning(f"Backpressure on {self.key}: shedding {priority} event")
+            return None
+        return self.client.xadd(self.key, fields, maxlen=self.maxlen, approximate=True)
+
+    def read(
+        self, consumer: str, count: int = 100, block_ms: int = 1000
+    ) -> List[StreamMessage]:
+        """Claim stale messages from dead consumers, then read new ones"""
+        self.ensure_group()
+        claimed = self.client.xautoclaim(
+            self.key,
+            self.group,
+            consumer,
+            self.claim_idle_ms,
+            start_id="0-0",
+            count=count,
+        )
+        messages = [message for message in claimed[1] if message[1]]
+        if messages:
+            return self._drop_exhausted(messages)
+
+        response = self.client.xreadgroup(
+            self.group, consumer, {self.key: ">"}, count=count, block=block_ms
+        )
+        return [message for _, entries in response or [] for message in entries]
+
+    def ack(self, *message_ids: str) -> None:
+        if message_ids:
+            self.client.xack(self.key, self.group, *message_ids)
+
+    def length(self) -> int:
+        return self.client.xlen(self.key)
+
+    def _drop_exhausted(self, messages: List[StreamMessage]) -> List[StreamMessage]:
+        """Dead-letter re-claimed messages that were delivered too many times"""
+        # One XPENDING per id: a range query can return other pending ids
+        # between them and miss some of these
+        pipe = self.client.pipeline(transaction=False)
+        for message_id, _ in messages:
+            pipe.xpending_range(
+                self.key, self.group, min=message_id, max=message_id, count=1
+            )
+        deliveries = {
+            entry["message_id"]: entry["times_delivered"]
+            for entries in pipe.execute()
+            for entry in entries
+        }
+        retry = []
+        for message_id, fields in messages:
+            if deliveries.get(message_id, 0) > self.max_deliveries:
+                logger.error(f"Dead-lettering {message_id} from {self.key}")
+                self.client.xadd(self.dead_letter_key, fields, maxlen=self.maxlen)
+                self.ack(message_id)
+            else:
+                retry.append((message_id, fields))
+        return retry
@@ -10,6 +10,10 @@ from django.contrib.auth import get_user_model
 import logging
 from dataclasses import dataclass, asdict
 import time
+import numpy as np
+import pandas as pd
+
+from .frame_utils import frame_from_queryset
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
@@ -325,51 +329,48 @@ class UnifiedDataCollectionService:
             from mood.models import MoodLog
             from django.utils import timezone
             from datetime import timedelta
-            import statistics
 
             end_date = timezone.now()
             start_date = end_date - timedelta(days=date_range)
 
-            mood_logs = MoodLog.objects.filter(
-                user=user, timestamp__range=[start_date, end_date]
-            ).order_by("timestamp")
+            df = frame_from_queryset(
+                MoodLog.objects.filter(
+                    user=user, logged_at__range=[start_date, end_date]
+                ).order_by("logged_at"),
+                ("logged_at", "mood_rating"),
+                dtypes={"mood_rating": "float64"},
+                datetime_fields=("logged_at",),
+            )
 
-            if not mood_logs:
+            if df.empty:
                 return {"status": "no_data", "entries_count": 0}
 
-            mood_scores = [log.mood_score for log in mood_logs]
-            daily_moods = {}
-
-            for log in mood_logs:
-                day = log.timestamp.date()
-                if day not in daily_moods:
-                    daily_moods[day] = []
-                daily_moods[day].append(log.mood_score)
+            mood_scores = df["mood_rating"]
+            daily_moods = mood_scores.groupby(df["logged_at"].dt.date).mean()
 
             # Calculate aggregated metrics
             aggregated_data = {
-                "total_entries": len(mood_logs),
+                "total_entries": len(df),
                 "date_range": date_range,
-                "average_mood": statistics.mean(mood_scores) if mood_scores else 0,
-                "median_mood": statistics.median(mood_scores) if mood_scores else 0,
-                "mood_volatility": statistics.stdev(mood_scores)
+                "average_mood": float(mood_scores.mean()),
+                "median_mood": float(mood_scores.median()),
+                "mood_volatility": float(mood_scores.std())
                 if len(mood_scores) > 1
                 else 0,
-                "min_mood": min(mood_scores) if mood_scores else 0,
-                "max_mood": max(mood_scores) if mood_scores else 0,
-                "mood_range": max(mood_scores) - min(mood_scores) if mood_scores else 0,
+                "min_mood": float(mood_scores.min()),
+                "max_mood": float(mood_scores.max()),
+                "mood_range": float(mood_scores.max() - mood_scores.min()),
                 "daily_averages": {
-                    str(day): statistics.mean(scores)
-                    for day, scores in daily_moods.items()
+                    str(day): float(avg) for day, avg in daily_moods.items()
                 },
                 "trend_analysis": self._calculate_mood_trend(daily_moods),
-                "patterns": self._analyze_mood_patterns(mood_logs),
+                "patterns": self._analyze_mood_patterns(df),
                 "consistency_score": self._calculate_mood_consistency(daily_moods),
                 "quality_indicators": {
-                    "data_density": len(mood_logs) / date_range,
+                    "data_density": len(df) / date_range,
                     "temporal_coverage": len(daily_moods) / date_range,
                     "completeness": min(
-                        1.0, len(mood_logs) / (date_range * 0.5)
+                        1.0, len(df) / (date_range * 0.5)
                     ),  # Expect at least 0.5 entries per day for full score
                 },
             }
@@ -394,63 +395,51 @@ class UnifiedDataCollectionService:
             from journal.models import JournalEntry
             from django.utils import timezone
             from datetime import timedelta
-            import statistics
 
             end_date = timezone.now()
             start_date = end_date - timedelta(days=date_range)
 
-            journal_entries = JournalEntry.objects.filter(
-                user=user, timestamp__range=[start_date, end_date]
-            ).order_by("timestamp")
+            df = frame_from_queryset(
+                JournalEntry.objects.filter(
+                    user=user, created_at__range=[start_date, end_date]
+                ).order_by("created_at"),
+                ("created_at", "content"),
+                datetime_fields=("created_at",),
+            )
 
-            if not journal_entries:
+            if df.empty:
                 return {"status": "no_data", "entries_count": 0}
 
             # Analyze text content
-            entries_data = []
-            total_words = 0
-            word_counts = []
-
-            for entry in journal_entries:
-                content = entry.content or ""
-                word_count = len(content.split())
-                word_counts.append(word_count)
-                total_words += word_count
-
-                entries_data.append(
-                    {
-                        "date": entry.timestamp.date().isoformat(),
-                        "word_count": word_count,
-                        "content_length": len(content),
-                        "has_content": bool(content.strip()),
-                    }
-                )
+            contents = df["content"].fillna("")
+            word_counts = contents.str.split().str.len()
+            total_words = int(word_counts.sum())
+            entries_data = pd.DataFrame(
+                {
+                    "date": df["created_at"].dt.strftime("%Y-%m-%d"),
+                    "word_count": word_counts,
+                    "content_length": contents.str.len(),
+                    "has_content": contents.str.strip().str.len() > 0,
+                }
+            ).to_dict("records")
 
             aggregated_data = {
-                "total_entries": len(journal_entries),
+                "total_entries": len(df),
                 "date_range": date_range,
                 "total_words": total_words,
-                "average_words_per_entry": statistics.mean(word_counts)
-                if word_counts
-                else 0,
-                "median_words_per_entry": statistics.median(word_counts)
-                if word_counts
-                else 0,
-                "writing_consistency": self._calculate_writing_consistency(
-                    journal_entries
-                ),
-                "temporal_patterns": self._analyze_writing_patterns(journal_entries),
-                "content_diversity": self._analyze_content_diversity(journal_entries),
+                "average_words_per_entry": float(word_counts.mean()),
+                "median_words_per_entry": float(word_counts.median()),
+                "writing_consistency": self._calculate_writing_consistency(df),
+                "temporal_patterns": self._analyze_writing_patterns(df),
+                "content_diversity": self._analyze_content_diversity(df),
                 "entries_metadata": entries_data,
                 "quality_indicators": {
-                    "data_density": len(journal_entries) / date_range,
-                    "content_richness": total_words / max(len(journal_entries), 1),
-                    "temporal_coverage": len(
-                        set(e.timestamp.date() for e in journal_entries)
-                    )
+                    "data_density": len(df) / date_range,
+                    "content_richness": total_words / max(len(df), 1),
+                    "temporal_coverage": df["created_at"].dt.date.nunique()
                     / date_range,
                     "completeness": min(
-                        1.0, len(journal_entries) / (date_range * 0.3)
+                        1.0, len(df) / (date_range * 0.3)
                     ),  # Expect at least 0.3 entries per day
                 },
             }
@@ -769,26 +758,21 @@ class UnifiedDataCollectionService:
         }
 
     # Helper methods for data analysis
-    def _calculate_mood_trend(self, daily_moods: Dict) -> Dict[str, Any]:
-        """Calculate mood trend over time"""
+    def _calculate_mood_trend(self, daily_moods: pd.Series) -> Dict[str, Any]:
+        """Calculate mood trend over time from per-day average moods"""
         if len(daily_moods) < 2:
             return {"trend": "insufficient_data", "strength": 0.0}
 
         # Simple linear trend calculation
-        import statistics
-
-        sorted_days = sorted(daily_moods.keys())
-        daily_averages = [statistics.mean(daily_moods[day]) for day in sorted_days]
+        daily_averages = daily_moods.sort_index().to_numpy(dtype="float64")
 
         # Calculate slope
         n = len(daily_averages)
-        x_mean = n / 2
-        y_mean = statistics.mean(daily_averages)
+        x_offsets = np.arange(n) - n / 2
+        y_offsets = daily_averages - daily_averages.mean()
 
-        numerator = sum(
-            (i - x_mean) * (y - y_mean) for i, y in enumerate(daily_averages)
-        )
-        denominator = sum((i - x_mean) ** 2 for i in range(n))
+        numerator = float((x_offsets * y_offsets).sum())
+        denominator = float((x_offsets**2).sum())
 
         if denominator == 0:
             slope = 0
@@ -807,10 +791,10 @@ class UnifiedDataCollectionService:
             "trend": trend,
             "strength": abs(slope),
             "slope": slope,
-            "daily_averages": daily_averages,
+            "daily_averages": daily_averages.tolist(),
         }
 
-    def _analyze_mood_patterns(self, mood_logs) -> Dict[str, Any]:
+    def _analyze_mood_patterns(self, df: pd.DataFrame) -> Dict[str, Any]:
         """Analyze patterns in mood data"""
         patterns = {
             "weekly_patterns": {},
@@ -818,65 +802,42 @@ class UnifiedDataCollectionService:
             "temporal_insights": {},
         }
 
-        # Group by day of week
-        from collections import defaultdict
-
-        weekly_moods = defaultdict(list)
-        hourly_moods = defaultdict(list)
-
-        for log in mood_logs:
-            day_of_week = log.timestamp.strftime("%A")
-            hour = log.timestamp.hour
-
-            weekly_moods[day_of_week].append(log.mood_score)
-            hourly_moods[hour].append(log.mood_score)
-
-        # Calculate averages
-        import statistics
+        # Group by day of week and hour, keeping first-seen order
+        logged_at = df["logged_at"].dt
+        weekly_moods = df.groupby(logged_at.day_name(), sort=False)["mood_rating"]
+        hourly_moods = df.groupby(logged_at.hour, sort=False)["mood_rating"]
 
         patterns["weekly_patterns"] = {
-            day: statistics.mean(scores) for day, scores in weekly_moods.items()
+            day: float(avg) for day, avg in weekly_moods.mean().items()
         }
         patterns["daily_patterns"] = {
-            hour: statistics.mean(scores) for hour, scores in hourly_moods.items()
+            int(hour): float(avg) for hour, avg in hourly_moods.mean().items()
         }
 
         return patterns
 
-    def _calculate_mood_consistency(self, daily_moods: Dict) -> float:
-        """Calculate mood consistency score"""
+    def _calculate_mood_consistency(self, daily_moods: pd.Series) -> float:
+        """Calculate mood consistency score from per-day average moods"""
         if len(daily_moods) < 3:
             return 0.0
 
-        import statistics
-
-        daily_averages = [statistics.mean(scores) for scores in daily_moods.values()]
-        variance = statistics.variance(daily_averages) if len(daily_averages) > 1 else 0
+        variance = float(daily_moods.var())
 
         # Convert variance to consistency score (0-1, higher is more consistent)
         consistency = max(0.0, 1.0 - (variance / 25.0))  # Assuming mood scale 1-10
         return min(1.0, consistency)
 
-    def _calculate_writing_consistency(self, journal_entries) -> Dict[str, Any]:
+    def _calculate_writing_consistency(self, df: pd.DataFrame) -> Dict[str, Any]:
         """Calculate writing consistency metrics"""
-        if len(journal_entries) < 3:
+        if len(df) < 3:
             return {"score": 0.0, "pattern": "insufficient_data"}
 
         # Analyze writing frequency
-        from collections import defaultdict
-
-        daily_counts = defaultdict(int)
-
-        for entry in journal_entries:
-            day = entry.timestamp.date()
-            daily_counts[day] += 1
+        daily_counts = df.groupby(df["created_at"].dt.date).size()
 
         # Calculate consistency
-        import statistics
-
-        daily_entries = list(daily_counts.values())
-        avg_entries = statistics.mean(daily_entries)
-        std_entries = statistics.stdev(daily_entries) if len(daily_entries) > 1 else 0
+        avg_entries = float(daily_counts.mean())
+        std_entries = float(daily_counts.std()) if len(daily_counts) > 1 else 0
 
         # Consistency score (lower standard deviation = higher consistency)
         consistency = max(0.0, 1.0 - (std_entries / (avg_entries + 1)))
@@ -892,7 +853,7 @@ class UnifiedDataCollectionService:
             else "irregular",
         }
 
-    def _analyze_writing_patterns(self, journal_entries) -> Dict[str, Any]:
+    def _analyze_writing_patterns(self, df: pd.DataFrame) -> Dict[str, Any]:
         """Analyze temporal patterns in journaling"""
         patterns = {
             "preferred_times": {},
@@ -900,50 +861,39 @@ class UnifiedDataCollectionService:
             "frequency_analysis": {},
         }
 
-        from collections import defaultdict
-
-        hourly_entries = defaultdict(int)
-        weekly_entries = defaultdict(int)
-
-        for entry in journal_entries:
-            hour = entry.timestamp.hour
-            day_of_week = entry.timestamp.strftime("%A")
+        created_at = df["created_at"].dt
+        hourly_entries = df.groupby(created_at.hour, sort=False).size()
+        weekly_entries = df.groupby(created_at.day_name(), sort=False).size()
 
-            hourly_entries[hour] += 1
-            weekly_entries[day_of_week] += 1
-
-        patterns["preferred_times"] = dict(hourly_entries)
-        patterns["weekly_patterns"] = dict(weekly_entries)
+        patterns["preferred_times"] = {
+            int(hour): int(count) for hour, count in hourly_entries.items()
+        }
+        patterns["weekly_patterns"] = {
+            day: int(count) for day, count in weekly_entries.items()
+        }
         patterns["frequency_analysis"] = {
-            "total_entries": len(journal_entries),
+            "total_entries": len(df),
             "active_hours": len(hourly_entries),
             "active_days": len(weekly_entries),
         }
 
         return patterns
 
-    def _analyze_content_diversity(self, journal_entries) -> Dict[str, Any]:
+    def _analyze_content_diversity(self, df: pd.DataFrame) -> Dict[str, Any]:
         """Analyze diversity in journal content"""
-        if not journal_entries:
+        if df.empty:
             return {"score": 0.0, "analysis": "no_content"}
 
-        # Basic content analysis
-        word_sets = []
-        total_words = 0
-
-        for entry in journal_entries:
-            content = entry.content or ""
-            words = set(content.lower().split())
-            word_sets.append(words)
-            total_words += len(words)
-
-        # Calculate diversity
-        all_words = set()
-        for word_set in word_sets:
-            all_words.update(word_set)
+        # Basic content analysis: distinct words per entry, then across entries.
+        # Sets per entry are cheaper than exploding and de-duplicating tokens.
+        entry_words = [
+            set(content.lower().split()) if isinstance(content, str) else set()
+            for content in df["content"].tolist()
+        ]
 
-        unique_words = len(all_words)
-        avg_words_per_entry = total_words / max(len(journal_entries), 1)
+        unique_words = len(set().union(*entry_words))
+        total_words = sum(map(len, entry_words))
+        avg_words_per_entry = total_words / max(len(df), 1)
 
         # Diversity score
         diversity = min(1.0, unique_words / max(total_words, 1) * 10)  # Normalize
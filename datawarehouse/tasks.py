@@ -0,0 +1,17 @@
+# datawarehouse/tasks.py
+import logging
+
+from celery import shared_task
+
+from datawarehouse.services.audit_chain import audit_writer
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def chain_audit_log():
+    """Link saved but unchained audit rows, e.g. left by a process that died"""
+    chained = audit_writer.chain_pending()
+    if chained:
+        logger.info(f"Chained {chained} audit log entries")
+    return chained
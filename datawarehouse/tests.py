@@ -1 +1,656 @@
-# Create your tests here.
+import hashlib
+import io
+import math
+import os
+import shutil
+import tarfile
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from cryptography.exceptions import InvalidTag
+from django.contrib.auth import get_user_model
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+
+from datawarehouse.models import AuditChainState, AuditLog, DataChangeHistory
+from datawarehouse.management import rowwise_analytics as rowwise
+from datawarehouse.services.audit_chain import (
+    AuditChainVerifier,
+    AuditLogWriter,
+    audit_writer,
+)
+from datawarehouse.services.audit_trail import audit_service
+from datawarehouse.services.backup_recovery import BackupRecoveryService
+from datawarehouse.services.backup_streaming import (
+    StreamingBackupReader,
+    StreamingBackupWriter,
+    backup_models,
+)
+from datawarehouse.services.feeds_service import FeedsCollectionService
+from datawarehouse.services.frame_utils import (
+    explode_values,
+    frame_from_queryset,
+    keyword_hit_matrix,
+    keyword_hits,
+    lowered_text,
+)
+from datawarehouse.services.journal_collection_service import (
+    JournalCollectionService,
+)
+from datawarehouse.services.mood_collection_service import MoodCollectionService
+from datawarehouse.services.mood_tracking_service import (
+    MoodTrackingCollectionService,
+)
+from datawarehouse.services.realtime_windows import ConsumerGroupStream
+from datawarehouse.services.unified_data_collection_service import (
+    UnifiedDataCollectionService,
+)
+
+START = datetime(2024, 3, 1, 7, 30, tzinfo=dt_timezone.utc)
+
+JOURNAL_CONTENT = [
+    "Today I felt happy and grateful after my therapy session.",
+    "Work was terrible, I am anxious and worried about the project meeting.",
+    None,
+    "",
+    "My family and friends helped. Exercise and meditation, then good sleep.",
+    "Sad, tired and overwhelmed. Hopeless, empty, down. I feel blue.",
+    "Goal progress: accomplished my plan, proud and excited for the future!",
+    "Angry at my boss; frustrated and irritated. The office is a problem.",
+    "Peaceful day, love my partner. Thankful, blessed and content.",
+    "nervous nervous NERVOUS panic before the doctor appointment",
+    "Nothing special happened today",
+    "Joyful, cheerful, elated: a wonderful amazing excellent perfect day.",
+]
+
+
+class GoldenOutputMixin:
+    """Compare vectorized results with the row-wise reference"""
+
+    def assertSameResult(self, new, old, path="result"):
+        if isinstance(old, dict):
+            self.assertIsInstance(new, dict, path)
+            self.assertEqual(list(new.keys()), list(old.keys()), path)
+            for key in old:
+                self.assertSameResult(new[key], old[key], f"{path}[{key!r}]")
+        elif isinstance(old, (list, tuple)):
+            self.assertEqual(len(new), len(old), path)
+            for index, (a, b) in enumerate(zip(new, old)):
+                self.assertSameResult(a, b, f"{path}[{index}]")
+        elif isinstance(old, (float, np.floating)) or isinstance(new, np.floating):
+            if math.isnan(old):
+                self.assertTrue(math.isnan(new), path)
+            else:
+                self.assertAlmostEqual(float(new), float(old), places=9, msg=path)
+        else:
+            self.assertEqual(new, old, path)
+
+
+def mood_frame():
+    """Three weeks of mood logs with gaps, repeats and missing values"""
+    activities = ["exercise", "reading", None, "exercise", "meditation", "working"]
+    notes = [
+        "Slept badly, tired",
+        None,
+        "great walk",
+        "INSOMNIA again",
+        "",
+        "felt rested",
+        "work stress",
+    ]
+    size = 40
+    # Columns built the way frame_from_queryset builds them
+    return pd.DataFrame(
+        {
+            "id": np.arange(size, dtype="int64"),
+            "mood_rating": np.array([(i * 7) % 10 + 1 for i in range(size)], "float64"),
+            "energy_level": np.array(
+                [None if i % 4 == 0 else i % 5 + 1 for i in range(size)], "float64"
+            ),
+            "activities": np.array(
+                [activities[i % len(activities)] for i in range(size)], object
+            ),
+            "notes": np.array([notes[i % len(notes)] for i in range(size)], object),
+            "logged_at": [
+                pd.Timestamp(START + timedelta(hours=13 * i)) for i in range(size)
+            ],
+        }
+    )
+
+
+def journal_frame():
+    """One entry per content sample, some days skipped and some doubled"""
+    offsets = [0, 1, 1, 2, 4, 5, 5, 6, 9, 10, 10, 11]
+    return pd.DataFrame(
+        {
+            "id": np.arange(len(JOURNAL_CONTENT), dtype="int64"),
+            "content": np.array(JOURNAL_CONTENT, object),
+            "mood_before": [3.0, np.nan, 5.0, 2.0, np.nan, 4.0, 6, 1, 7, 2, 5, np.nan],
+            "mood_after": [6.0, 4.0, np.nan, 2.0, 5.0, 3.0, 8, 1, 9, 4, 5, 8],
+            "created_at": [
+                pd.Timestamp(START + timedelta(days=day, hours=3 * i))
+                for i, day in enumerate(offsets)
+            ],
+        }
+    )
+
+
+class FrameUtilsGoldenTest(GoldenOutputMixin, SimpleTestCase):
+    def test_keyword_hits_match_substring_loop(self):
+        texts = pd.Series(["happy happy day", "", "unhappy and sad", "nothing"])
+        keywords = ["happy", "sad", "happy", "day"]
+
+        self.assertEqual(
+            keyword_hits(texts, keywords).tolist(),
+            rowwise.keyword_hits(texts, keywords),
+        )
+
+    def test_keyword_hit_matrix_columns(self):
+        texts = lowered_text(pd.Series(JOURNAL_CONTENT, dtype=object))
+        groups = {"positive": ["happy", "good"], "negative": ["sad", "bad"]}
+        matrix = keyword_hit_matrix(texts, groups)
+
+        self.assertEqual(list(matrix.columns), ["positive", "negative"])
+        for group, keywords in groups.items():
+            self.assertEqual(
+                matrix[group].tolist(), rowwise.keyword_hits(texts, keywords)
+            )
+
+    def test_lowered_text_drops_missing(self):
+        texts = lowered_text(pd.Series(["A", None, "b"], dtype=object))
+        self.assertEqual(texts.tolist(), ["a", "b"])
+        self.assertTrue(lowered_text(pd.Series([1.0, 2.0])).empty)
+
+    def test_explode_values_pairs(self):
+        df = pd.DataFrame(
+            {
+                "activities": [["a", "b"], "c", None, [], ["a"]],
+                "mood": [1.0, 2.0, 3.0, 4.0, np.nan],
+            }
+        )
+        pairs = explode_values(df, "activities", "mood")
+        self.assertEqual(
+            list(zip(pairs["activities"], pairs["mood"])),
+            [("a", 1.0), ("b", 1.0), ("c", 2.0)],
+        )
+
+
+class FrameFromQuerysetTest(TestCase):
+    def test_matches_values_frame(self):
+        from mood.models import MoodLog
+
+        user = get_user_model().objects.create(
+            username="golden", email="golden@example.com"
+        )
+        for i in range(5):
+            MoodLog.objects.create(
+                user=user,
+                mood_rating=i + 1,
+                energy_level=None if i == 2 else i % 5 + 1,
+                activities="exercise" if i % 2 else None,
+                notes=f"note {i}",
+                logged_at=START + timedelta(days=i),
+            )
+        queryset = MoodLog.objects.filter(user=user).order_by("logged_at")
+        fields = ("id", "mood_rating", "energy_level", "activities", "logged_at")
+
+        new = frame_from_queryset(
+            queryset,
+            fields,
+            dtypes={"id": "int64", "mood_rating": "float64", "energy_level": "float64"},
+            datetime_fields=("logged_at",),
+        )
+        old = pd.DataFrame(list(queryset.values(*fields)))
+        old["logged_at"] = pd.to_datetime(old["logged_at"])
+
+        self.assertEqual(list(new.columns), list(fields))
+        self.assertEqual(new["id"].tolist(), old["id"].tolist())
+        self.assertEqual(new["mood_rating"].tolist(), old["mood_rating"].tolist())
+        self.assertTrue(np.isnan(new["energy_level"][2]))
+        self.assertEqual(new["activities"].tolist(), old["activities"].tolist())
+        self.assertTrue((new["logged_at"] == old["logged_at"]).all())
+
+    def test_empty_queryset(self):
+        from mood.models import MoodLog
+
+        new = frame_from_queryset(MoodLog.objects.none(), ("id", "mood_rating"))
+        self.assertTrue(new.empty)
+        self.assertEqual(list(new.columns), ["id", "mood_rating"])
+
+
+class MoodAnalyticsGoldenTest(GoldenOutputMixin, SimpleTestCase):
+    def setUp(self):
+        self.service = MoodCollectionService()
+        self.df = mood_frame()
+
+    def test_activity_patterns(self):
+        new = self.service._analyze_activity_patterns(self.df.copy())
+        self.assertEqual(new["unique_activities"], 4)
+        self.assertSameResult(
+            new, rowwise.mood_activity_patterns(self.service, self.df.copy())
+        )
+
+    def test_sleep_correlations(self):
+        new = self.service._analyze_sleep_correlations(self.df.copy())
+        self.assertSameResult(
+            new, rowwise.mood_sleep_correlations(self.service, self.df.copy())
+        )
+        self.assertGreater(new["sleep_mentions_in_notes"], 0)
+
+    def test_tracking_activity_patterns(self):
+        service = MoodTrackingCollectionService.__new__(MoodTrackingCollectionService)
+        df = self.df.rename(columns={"mood_rating": "mood_score"})
+        df["activities"] = pd.Series(
+            [
+                [value, "walking"] if isinstance(value, str) else None
+                for value in df["activities"]
+            ],
+            dtype=object,
+        )
+        df.loc[3, "activities"] = "exercise"  # Plain strings are not counted
+
+        new = service._analyze_activity_patterns(df.copy())
+        self.assertEqual(new["unique_activities"], 5)
+        self.assertSameResult(
+            new, rowwise.tracking_activity_patterns(service, df.copy())
+        )
+
+
+class JournalAnalyticsGoldenTest(GoldenOutputMixin, SimpleTestCase):
+    def setUp(self):
+        self.service = JournalCollectionService()
+        self.df = journal_frame()
+
+    def check(self, method, reference):
+        new = getattr(self.service, method)(self.df.copy())
+        self.assertTrue(new)  # The methods return {} / 0 on errors
+        self.assertSameResult(new, reference(self.service, self.df.copy()))
+
+    def test_total_words(self):
+        self.check("_calculate_total_words", rowwise.journal_total_words)
+
+    def test_avg_content_length(self):
+        self.check("_calculate_avg_content_length", rowwise.journal_avg_content_length)
+
+    def test_mood_improvement(self):
+        self.check("_calculate_mood_improvement", rowwise.journal_mood_improvement)
+
+    def test_sentiment(self):
+        self.check("_analyze_sentiment", rowwise.journal_sentiment)
+
+    def test_topics(self):
+        self.check("_extract_topics", rowwise.journal_topics)
+
+    def test_emotions(self):
+        self.check("_track_emotions", rowwise.journal_emotions)
+
+    def test_therapeutic_themes(self):
+        self.check("_analyze_therapeutic_themes", rowwise.journal_therapeutic_themes)
+
+    def test_non_text_content(self):
+        df = pd.DataFrame({"content": [np.nan, np.nan], "created_at": [START, START]})
+        self.assertSameResult(
+            self.service._analyze_sentiment(df.copy()),
+            rowwise.journal_sentiment(self.service, df.copy()),
+        )
+
+
+class UnifiedAnalyticsGoldenTest(GoldenOutputMixin, SimpleTestCase):
+    def setUp(self):
+        self.service = UnifiedDataCollectionService.__new__(
+            UnifiedDataCollectionService
+        )
+        self.mood_df = mood_frame()[["logged_at", "mood_rating"]]
+        self.journal_df = journal_frame()[["created_at", "content"]]
+
+    def daily_moods(self):
+        return (
+            self.mood_df["mood_rating"]
+            .groupby(self.mood_df["logged_at"].dt.date)
+            .mean()
+        )
+
+    def test_mood_trend(self):
+        self.assertSameResult(
+            self.service._calculate_mood_trend(self.daily_moods()),
+            rowwise.unified_mood_trend(self.service, self.mood_df),
+        )
+
+    def test_mood_patterns(self):
+        self.assertSameResult(
+            self.service._analyze_mood_patterns(self.mood_df),
+            rowwise.unified_mood_patterns(self.service, self.mood_df),
+        )
+
+    def test_mood_consistency(self):
+        self.assertSameResult(
+            self.service._calculate_mood_consistency(self.daily_moods()),
+            rowwise.unified_mood_consistency(self.service, self.mood_df),
+        )
+
+    def test_writing_consistency(self):
+        self.assertSameResult(
+            self.service._calculate_writing_consistency(self.journal_df),
+            rowwise.unified_writing_consistency(self.service, self.journal_df),
+        )
+
+    def test_writing_patterns(self):
+        self.assertSameResult(
+            self.service._analyze_writing_patterns(self.journal_df),
+            rowwise.unified_writing_patterns(self.service, self.journal_df),
+        )
+
+    def test_content_diversity(self):
+        self.assertSameResult(
+            self.service._analyze_content_diversity(self.journal_df),
+            rowwise.unified_content_diversity(self.service, self.journal_df),
+        )
+
+
+class AuditLogWriterTest(TestCase):
+    def log(self, name, **kwargs):
+        return audit_service.log_event("update", name, **kwargs)
+
+    def test_log_event_returns_saved_row(self):
+        audit_log = self.log(
+            "profile_update", old_values={"name": "a"}, new_values={"name": "b"}
+        )
+
+        saved = AuditLog.objects.get(pk=audit_log.pk)
+        self.assertIsNone(saved.sequence)  # Chained after the transaction commits
+        self.assertEqual(saved.integrity_hash, audit_log.integrity_hash)
+        self.assertTrue(DataChangeHistory.objects.filter(audit_log=saved).exists())
+
+    def test_rows_of_a_dead_process_are_chained(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            names = [self.log(f"event_{i}").event_name for i in range(5)]
+
+        # A fresh writer (another process) links what the first one left
+        self.assertEqual(AuditLogWriter(batch_size=2).chain_pending(), 5)
+        chained = AuditLog.objects.order_by("sequence")
+        self.assertEqual([row.sequence for row in chained], [1, 2, 3, 4, 5])
+        self.assertEqual([row.event_name for row in chained], names)
+
+        result = AuditChainVerifier().verify(from_checkpoint=False)
+        self.assertEqual(result["checked_entries"], 5)
+        self.assertEqual(result["failed_entries"], 0)
+        self.assertEqual(result["unchained_entries"], 0)
+
+    def test_chaining_continues_the_chain(self):
+        self.log("first")
+        audit_writer.chain_pending()
+        self.log("second")
+        audit_writer.chain_pending()
+
+        result = AuditChainVerifier().verify(from_checkpoint=False)
+        self.assertEqual(result["verified_sequence"], 2)
+        self.assertEqual(result["failed_entries"], 0)
+
+    @override_settings(
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    )
+    def test_full_verification_starts_at_the_retention_anchor(self):
+        from core.retention import get_policy, purge
+
+        for i in range(4):
+            self.log(f"event_{i}")
+        audit_writer.chain_pending()
+        AuditChainVerifier().verify()
+        # Sequence 3 is older than 2, so only 1 and 2 are a purgeable prefix
+        AuditLog.objects.filter(sequence__in=[1, 3]).update(
+            created_at=START - timedelta(days=7 * 365)
+        )
+
+        self.assertEqual(purge(get_policy("datawarehouse.AuditLog"))["deleted"], 1)
+        state = AuditChainState.objects.get()
+        self.assertEqual(state.anchor_sequence, 2)
+        self.assertEqual(
+            state.anchor_hash, AuditLog.objects.get(sequence=2).previous_hash
+        )
+
+        result = AuditChainVerifier().verify(from_checkpoint=False)
+        self.assertEqual(result["failed_entries"], 0)
+        self.assertEqual(result["verified_sequence"], 4)
+
+        # A failed full run leaves the checkpoint where it was
+        AuditLog.objects.filter(sequence=2).update(description="tampered")
+        result = AuditChainVerifier().verify(from_checkpoint=False)
+        self.assertEqual(result["failed_entries"], 1)
+        self.assertEqual(AuditChainState.objects.get().verified_sequence, 4)
+
+
+class FeedsNetworkMetricsTest(TestCase):
+    def test_isolated_users_are_active_users_without_connections(self):
+        from feeds.models import Comment, Post
+
+        User = get_user_model()
+        author, commenter, loner = (
+            User.objects.create_user(
+                username=name, email=f"{name}@example.com", password="x"
+            )
+            for name in ("author", "commenter", "loner")
+        )
+        post = Post.objects.create(author=author, content="hello", tags="therapy")
+        Comment.objects.create(post=post, author=commenter, content="hi")
+        Post.objects.create(author=loner, content="anyone?", tags="therapy")
+
+        service = FeedsCollectionService()
+        raw_data = service._collect_raw_feeds_data(None, 1)
+        content_stats = service._analyze_content_statistics(raw_data)
+        network = service._analyze_social_dynamics(
+            raw_data, content_stats["active_user_ids"]
+        )["network_analysis"]
+
+        self.assertEqual(content_stats["total_active_users"], 3)
+        self.assertEqual(network["total_connected_users"], 2)
+        self.assertEqual(network["isolated_users"], 1)
+
+
+class ConsumerGroupStreamTest(SimpleTestCase):
+    def setUp(self):
+        self.client = mock.MagicMock()
+        self.stream = ConsumerGroupStream(
+            self.client, "rt:test", "group", max_backlog=10, max_deliveries=5
+        )
+        self.stream._group_ready = True
+
+    def test_backpressure_never_sheds_unsheddable_messages(self):
+        self.stream._backlog = (time.monotonic(), 10)  # At the limit
+
+        self.assertIsNone(self.stream.publish({"a": "1"}, "normal"))
+        self.assertIsNotNone(self.stream.publish({"a": "1"}, "normal", sheddable=False))
+        self.assertIsNotNone(self.stream.publish({"a": "1"}, "high"))
+        self.assertEqual(self.client.xadd.call_count, 2)
+
+    def test_delivery_counts_are_read_per_message(self):
+        pipe = self.client.pipeline.return_value
+        pipe.execute.return_value = [
+            [{"message_id": "1-0", "times_delivered": 6}],
+            [{"message_id": "7-0", "times_delivered": 2}],
+        ]
+
+        retry = self.stream._drop_exhausted([("1-0", {"a": "1"}), ("7-0", {"a": "2"})])
+
+        self.assertEqual(retry, [("7-0", {"a": "2"})])
+        self.assertEqual(
+            [call.kwargs for call in pipe.xpending_range.call_args_list],
+            [
+                {"min": "1-0", "max": "1-0", "count": 1},
+                {"min": "7-0", "max": "7-0", "count": 1},
+            ],
+        )
+        self.client.xadd.assert_called_once_with(
+            "rt:test:dead", {"a": "1"}, maxlen=self.stream.maxlen
+        )
+        self.client.xack.assert_called_once_with("rt:test", "group", "1-0")
+
+    def test_crisis_feeding_events_are_not_sheddable(self):
+        from datawarehouse.services.realtime_analytics import realtime_service
+
+        unsheddable = realtime_service.stream_processor.unsheddable
+        for event_type in ("mood_entry", "journal_entry", "crisis_indicator"):
+            self.assertIn(event_type, unsheddable)
+        self.assertNotIn("message", unsheddable)
+
+
+class StreamingBackupFormatTest(SimpleTestCase):
+    def setUp(self):
+        self.backup_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.backup_dir, ignore_errors=True)
+        writer = StreamingBackupWriter(self.backup_dir, encryption_key="secret")
+        for sequence in range(2):
+            payload = f'[{{"chunk": {sequence}}}]'.encode()
+            writer.manifest.chunks.append(
+                writer._write_chunk("feeds.post", sequence, 1, payload)
+            )
+        writer.write_manifest()
+        self.reader = StreamingBackupReader(self.backup_dir, "secret")
+        self.first, self.second = self.reader.manifest.chunks
+
+    def path(self, chunk):
+        return os.path.join(self.backup_dir, chunk.file)
+
+    def rewrite(self, chunk, data):
+        """Replace a chunk file and its manifest hash, as a forger would"""
+        with open(self.path(chunk), "wb") as f:
+            f.write(data)
+        chunk.sha256 = hashlib.sha256(data).hexdigest()
+
+    def test_chunks_round_trip(self):
+        self.assertEqual(self.reader.read_chunk(self.second), b'[{"chunk": 1}]')
+        self.assertTrue(self.reader.verify()["valid"])
+        with self.assertRaises(ValueError):
+            StreamingBackupReader(self.backup_dir)
+
+    def test_flipped_ciphertext_byte_fails_authentication(self):
+        with open(self.path(self.first), "rb") as f:
+            data = bytearray(f.read())
+        data[-1] ^= 1
+        self.rewrite(self.first, bytes(data))
+
+        with self.assertRaises(InvalidTag):
+            self.reader.read_chunk(self.first)
+        self.assertEqual(
+            [c["file"] for c in self.reader.verify()["corrupted"]], [self.first.file]
+        )
+
+    def test_swapped_chunks_fail_authentication(self):
+        # Each chunk is sealed with its own name as AAD
+        with open(self.path(self.first), "rb") as f:
+            first = f.read()
+        with open(self.path(self.second), "rb") as f:
+            second = f.read()
+        self.rewrite(self.first, second)
+        self.rewrite(self.second, first)
+
+        for chunk in (self.first, self.second):
+            with self.assertRaises(InvalidTag):
+                self.reader.read_chunk(chunk)
+
+    def test_manifest_hash_mismatch_is_rejected(self):
+        with open(self.path(self.second), "ab") as f:
+            f.write(b"\0")
+
+        with self.assertRaisesMessage(ValueError, "Checksum mismatch"):
+            self.reader.read_chunk(self.second)
+        self.assertFalse(self.reader.verify()["valid"])
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class StreamingBackupReplayTest(TransactionTestCase):
+    # Only these tables are flushed afterwards, and only these apps' post_migrate
+    # handlers re-run: other apps' would leave audited rows behind
+    available_apps = ["users", "patient", "feeds", "datawarehouse"]
+
+    def setUp(self):
+        # Replayed rows fire the feed signals, which queue tasks on commit
+        patcher = mock.patch("celery.app.task.Task.apply_async")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_export_and_replay_round_trip(self):
+        from feeds.models import Comment, Post
+
+        author = get_user_model().objects.create_user(
+            username="writer", email="writer@example.com", password="x"
+        )
+        posts = Post.objects.bulk_create(
+            Post(author=author, content=f"post {i}", tags="therapy") for i in range(3)
+        )
+        reply, parent = Comment.objects.bulk_create(
+            Comment(post=posts[0], author=author, content=content)
+            for content in ("reply", "root")
+        )
+        # The reply's parent sits in a later chunk than the reply itself
+        Comment.objects.filter(pk=reply.pk).update(parent=parent)
+
+        def snapshot():
+            return (
+                list(Post.objects.order_by("pk").values_list("pk", "content")),
+                list(
+                    Comment.objects.order_by("pk").values_list(
+                        "pk", "post_id", "parent_id", "content"
+                    )
+                ),
+            )
+
+        before = snapshot()
+        backup_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, backup_dir, ignore_errors=True)
+        manifest = StreamingBackupWriter(
+            backup_dir, chunk_rows=1, workers=2, encryption_key="secret"
+        ).export(backup_models(included=["feeds.post", "feeds.comment"]))
+        self.assertEqual(manifest.models, ["feeds.post", "feeds.comment"])
+        self.assertEqual((len(manifest.chunks), manifest.record_count), (5, 5))
+
+        Post.objects.all().delete()
+        reader = StreamingBackupReader(backup_dir, "secret")
+        self.assertTrue(reader.verify()["valid"])
+        self.assertEqual(reader.replay(workers=2), {"processed": 5, "failed": 0})
+        self.assertEqual(snapshot(), before)
+
+
+class ExtractBackupTest(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        with override_settings(BACKUP_BASE_PATH=self.root):
+            self.service = BackupRecoveryService()
+
+    def archive(self, *names):
+        path = os.path.join(self.root, "backup.tar")
+        with tarfile.open(path, "w") as tar:
+            for name in names:
+                info = tarfile.TarInfo(name)
+                info.size = 2
+                tar.addfile(info, io.BytesIO(b"{}"))
+        return path
+
+    def test_extracts_below_the_backup(self):
+        backup_dir = self.service._extract_backup(
+            self.archive("backup_1/manifest.json", "backup_1/chunks/a.json.gz")
+        )
+        self.assertEqual(
+            backup_dir, os.path.join(self.root, "backup.tar.restore", "backup_1")
+        )
+        self.assertTrue(os.path.isfile(os.path.join(backup_dir, "chunks", "a.json.gz")))
+
+    def test_refuses_members_outside_the_backup(self):
+        for name in ("backup_1/../../evil.json", "/tmp/evil.json", "../evil.json"):
+            with self.subTest(name=name), self.assertRaisesMessage(
+                ValueError, "Unsafe member"
+            ):
+                self.service._extract_backup(
+                    self.archive("backup_1/manifest.json", name)
+                )
+        self.assertFalse(os.path.exists(os.path.join(self.root, "evil.json")))
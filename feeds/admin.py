@@ -1,5 +1,6 @@
 from django.contrib import admin
 from django.utils.html import format_html
+from feeds.counters import counter_value
 from feeds.models import Post, Comment, Topic, Reaction, PollOption, PollVote
 
 
@@ -153,8 +154,8 @@ class PollOptionAdmin(admin.ModelAdmin):
     readonly_fields = ["created_at"]
 
     def votes_count(self, obj):
-        """Get the number of votes for this option"""
-        return obj.votes.count()
+        """Get the number of votes for this option, including unflushed votes"""
+        return counter_value(obj, "votes_count")
 
     votes_count.short_description = "Votes"
 
@@ -0,0 +1,60 @@
+# feeds/consumers.py
+import logging
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from feeds import polls
+from feeds.models import Post
+
+logger = logging.getLogger(__name__)
+
+
+class PollResultsConsumer(AsyncJsonWebsocketConsumer):
+    """Streams a poll's result changes; sends the full results on connect"""
+
+    async def connect(self):
+        if self.scope["user"].is_anonymous:
+            await self.close()
+            return
+
+        self.post_id = self.scope["url_route"]["kwargs"]["post_id"]
+        try:
+            snapshot = await self.get_results()
+            if snapshot is None:
+                await self.close(code=4004)
+                return
+            self.group_name = polls.group_name(self.post_id)
+            await self.channel_layer.group_add(self.group_name, self.channel_name)
+            await self.accept()
+            await self.send_json({"type": "poll_snapshot", **snapshot})
+        except Exception as e:
+            logger.error(f"Error in poll results connection: {str(e)}")
+            await self.close()
+
+    async def disconnect(self, close_code):
+        if hasattr(self, "group_name"):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def receive_json(self, content):
+        if content.get("type") == "ping":
+            await self.send_json({"type": "pong"})
+
+    async def poll_results(self, event):
+        """Deltas since the previous push and the new totals"""
+        await self.send_json(
+            {
+                "type": "poll_results",
+                "post_id": event["post_id"],
+                "deltas": event["deltas"],
+                "tallies": event["tallies"],
+                "total_votes": event["total_votes"],
+            }
+        )
+
+    @database_sync_to_async
+    def get_results(self):
+        post = Post.objects.filter(pk=self.post_id).first()
+        if post is None:
+            return None
+        return polls.results(post, self.scope["user"])
@@ -0,0 +1,287 @@
+# feeds/counters.py
+"""
+Denormalized engagement counters for posts, comments, poll options and
+tag/topic statistics
+
+Writes never touch the counted row directly: each change is an ``HINCRBY``
+on a Redis hash of pending deltas, and ``flush_counters`` (run periodically
+by Celery) folds those deltas into the counter columns in batched UPDATEs.
+Reads add the still-pending deltas to the column value, so counts are
+current even between flushes. When Redis is unavailable, or
+``FEED_COUNTERS_WRITE_BEHIND`` is False, deltas are applied to the database
+immediately.
+
+Post views go through ``record_view``, which can sample them
+(``FEED_VIEW_SAMPLE_RATE``) so a viral post does not turn every view into a
+Redis write either.
+"""
+
+import logging
+import random
+import uuid
+from collections import defaultdict
+from typing import Dict, Iterable, Tuple
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import (
+    Case,
+    Count,
+    F,
+    IntegerField,
+    OuterRef,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce, Greatest
+from django_redis import get_redis_connection
+
+from feeds.models import (
+    Comment,
+    CounterFlush,
+    LabelStats,
+    PollOption,
+    PollVote,
+    Post,
+    PostLabel,
+    Reaction,
+)
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = "feeds:counters:pending"
+FLUSHING_KEY = "feeds:counters:flushing"
+# Field of the flushing hash naming the flush, see CounterFlush
+TOKEN_FIELD = "__token__"
+
+COUNTER_FIELDS = {
+    Post: ("comments_count", "reactions_count", "views_count"),
+    Comment: ("replies_count", "reactions_count"),
+    PollOption: ("votes_count",),
+    LabelStats: ("posts_count", "comments_count", "reactions_count"),
+}
+MODELS_BY_NAME = {model._meta.model_name: model for model in COUNTER_FIELDS}
+
+
+def _redis():
+    return get_redis_connection(getattr(settings, "FEED_COUNTERS_CACHE", "default"))
+
+
+def _write_behind() -> bool:
+    return getattr(settings, "FEED_COUNTERS_WRITE_BEHIND", True)
+
+
+def _delta_key(model, pk, field: str) -> str:
+    return f"{model._meta.model_name}:{pk}:{field}"
+
+
+def _parse_delta_key(key) -> Tuple[type, int, str]:
+    if isinstance(key, bytes):
+        key = key.decode()
+    model_name, pk, field = key.split(":")
+    return MODELS_BY_NAME[model_name], int(pk), field
+
+
+def incr(model, pk: int, field: str, delta: int = 1) -> None:
+    """Add ``delta`` to a counter, through Redis when write-behind is enabled"""
+    if not pk or not delta:
+        return
+    if not _write_behind():
+        _apply_deltas(model, field, {pk: delta})
+        return
+
+    def push():
+        try:
+            _redis().hincrby(PENDING_KEY, _delta_key(model, pk, field), delta)
+        except Exception as e:
+            logger.warning(f"Counter write-behind unavailable, writing directly: {e}")
+            _apply_deltas(model, field, {pk: delta})
+
+    # Only count changes that are actually committed
+    transaction.on_commit(push)
+
+
+def record_view(post_id: int) -> None:
+    """Count a post view, sampled at ``FEED_VIEW_SAMPLE_RATE`` (1.0 = every view)"""
+    rate = getattr(settings, "FEED_VIEW_SAMPLE_RATE", 1.0)
+    if rate <= 0:
+        return
+    if rate < 1:
+        if random.random() >= rate:
+            return
+        # Each sampled view stands for 1/rate views on average
+        incr(Post, post_id, "views_count", round(1 / rate))
+        return
+    incr(Post, post_id, "views_count")
+
+
+def attach_pending(objects: Iterable) -> None:
+    """
+    Fetch pending deltas for ``objects`` in one round trip and cache them on
+    each instance as ``_pending_counters`` for ``counter_value``.
+    """
+    objects = [obj for obj in objects if type(obj) in COUNTER_FIELDS and obj.pk]
+    if not objects:
+        return
+    keys = [
+        _delta_key(type(obj), obj.pk, field)
+        for obj in objects
+        for field in COUNTER_FIELDS[type(obj)]
+    ]
+    values = [0] * len(keys)
+    if _write_behind():
+        try:
+            pipe = _redis().pipeline(transaction=False)
+            pipe.hmget(PENDING_KEY, keys)
+            pipe.hmget(FLUSHING_KEY, keys)
+            pending, flushing = pipe.execute()
+            values = [int(a or 0) + int(b or 0) for a, b in zip(pending, flushing)]
+        except Exception as e:
+            logger.warning(f"Could not read pending counter deltas: {e}")
+
+    position = 0
+    for obj in objects:
+        fields = COUNTER_FIELDS[type(obj)]
+        obj._pending_counters = dict(
+            zip(fields, values[position : position + len(fields)])
+        )
+        position += len(fields)
+
+
+def counter_value(obj, field: str) -> int:
+    """Column value plus any deltas not flushed to the database yet"""
+    if getattr(obj, "_pending_counters", None) is None:
+        attach_pending([obj])
+    pending = getattr(obj, "_pending_counters", None) or {}
+    return max(0, (getattr(obj, field) or 0) + pending.get(field, 0))
+
+
+def flush_counters(batch_size: int = 500) -> int:
+    """
+    Fold pending Redis deltas into the counter columns.
+
+    The pending hash is renamed to a flushing key first, so increments that
+    arrive during the flush start a fresh hash. A flushing key left behind
+    by a crashed run is flushed before anything new. The hash carries a
+    token that is recorded as a ``CounterFlush`` in the same transaction as
+    the deltas, so a run that crashed after committing but before deleting
+    the key is not applied twice. Returns the number of counters updated.
+    """
+    client = _redis()
+    lock = client.lock("feeds:counters:flush-lock", timeout=300, blocking=False)
+    if not lock.acquire(blocking=False):
+        return 0
+    try:
+        return _flush(client, batch_size)
+    finally:
+        lock.release()
+
+
+def _flush(client, batch_size: int) -> int:
+    if not client.exists(FLUSHING_KEY):
+        if not client.exists(PENDING_KEY):
+            return 0
+        client.renamenx(PENDING_KEY, FLUSHING_KEY)
+    client.hsetnx(FLUSHING_KEY, TOKEN_FIELD, uuid.uuid4().hex)
+
+    fields = client.hgetall(FLUSHING_KEY)
+    token = fields.pop(TOKEN_FIELD.encode()).decode()
+
+    grouped = defaultdict(dict)
+    for key, delta in fields.items():
+        try:
+            model, pk, field = _parse_delta_key(key)
+        except (KeyError, ValueError):
+            logger.error(f"Skipping malformed counter key {key!r}")
+            continue
+        if int(delta):
+            grouped[(model, field)][pk] = int(delta)
+
+    updated = 0
+    with transaction.atomic():
+        _, created = CounterFlush.objects.get_or_create(token=token)
+        if not created:
+            logger.warning(f"Counter flush {token} was already applied, discarding")
+            grouped = {}
+        for (model, field), deltas in grouped.items():
+            items = list(deltas.items())
+            for start in range(0, len(items), batch_size):
+                _apply_deltas(model, field, dict(items[start : start + batch_size]))
+            updated += len(items)
+
+    client.delete(FLUSHING_KEY)
+    return updated
+
+
+def _apply_deltas(model, field: str, deltas: Dict[int, int]) -> None:
+    """One UPDATE adding a per-row delta to ``field``, never going below zero"""
+    delta = Case(
+        *[When(pk=pk, then=Value(value)) for pk, value in deltas.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    model.objects.filter(pk__in=deltas).update(
+        **{field: Greatest(F(field) + delta, Value(0))}
+    )
+
+
+def _count_subquery(queryset, field: str):
+    counts = (
+        queryset.filter(**{field: OuterRef("pk")})
+        .order_by()
+        .values(field)
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def recount_votes(options) -> int:
+    """Reset ``votes_count`` of the ``options`` queryset from the vote rows"""
+    return options.update(
+        votes_count=_count_subquery(PollVote.objects.all(), "poll_option_id")
+    )
+
+
+def recount_counters() -> Dict[str, int]:
+    """
+    Recompute every counter column (except views) from the related rows.
+
+    Pending deltas are flushed first so they are not applied on top of the
+    fresh counts later.
+    """
+    flush_counters()
+    post_type = ContentType.objects.get_for_model(Post)
+    labelled = PostLabel.objects.filter(
+        kind=OuterRef("kind"), label=OuterRef("label")
+    ).order_by()
+
+    def label_total(expression):
+        totals = labelled.values("kind").annotate(total=expression).values("total")
+        return Coalesce(Subquery(totals, output_field=IntegerField()), 0)
+
+    comment_type = ContentType.objects.get_for_model(Comment)
+    return {
+        "posts": Post.objects.update(
+            comments_count=_count_subquery(Comment.objects.all(), "post_id"),
+            reactions_count=_count_subquery(
+                Reaction.objects.filter(content_type=post_type), "object_id"
+            ),
+        ),
+        "comments": Comment.objects.update(
+            replies_count=_count_subquery(Comment.objects.all(), "parent_id"),
+            reactions_count=_count_subquery(
+                Reaction.objects.filter(content_type=comment_type), "object_id"
+            ),
+        ),
+        "poll_options": recount_votes(PollOption.objects.all()),
+        # After posts, as label totals are sums of the fresh post counters
+        "label_stats": LabelStats.objects.update(
+            posts_count=label_total(Count("pk")),
+            comments_count=label_total(Sum("post__comments_count")),
+            reactions_count=label_total(Sum("post__reactions_count")),
+        ),
+    }
@@ -0,0 +1,304 @@
+# feeds/labels.py
+"""
+Tag/topic inverted index and per-label statistics
+
+Every post has one ``PostLabel`` row per tag and topic, carrying a copy of
+the post's ``created_at``. Filtered feeds read the ``(kind, label,
+-created_at)`` index instead of scanning the posts table, and topic
+analytics read ``LabelStats`` instead of re-aggregating raw posts.
+
+``LabelStats`` counters go through ``feeds.counters`` like every other
+engagement counter. ``comments_count`` and ``reactions_count`` are the
+engagement of the posts currently carrying the label, so relabelling a post
+moves its engagement along with it.
+
+Trending scores use forward decay: an event at time ``t`` adds
+``weight * 2 ** ((t - epoch) / half_life)`` to a Redis sorted set, so
+existing scores never need rewriting as time passes; reading divides by the
+same factor for "now". ``refresh_trending`` periodically moves the epoch
+forward (rescaling the set) before the factors grow too large, and
+snapshots the scores into ``LabelStats.trending_score``.
+"""
+
+import logging
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, FloatField, Value, When
+from django.utils import timezone
+from django_redis import get_redis_connection
+
+from feeds import counters
+from feeds.models import LabelStats, Post, PostLabel, Topic
+
+logger = logging.getLogger(__name__)
+
+TRENDING_KEY = "feeds:trending"
+TRENDING_EPOCH_KEY = "feeds:trending:epoch"
+
+# Relative weight of each kind of activity in the trending score
+POST_WEIGHT = 3.0
+COMMENT_WEIGHT = 2.0
+REACTION_WEIGHT = 1.0
+
+# Rescale once the decay factor reaches 2 ** MAX_EXPONENT
+MAX_EXPONENT = 32
+
+Label = Tuple[str, str]
+
+# Ordering of label-filtered feeds, by the index's copy of the post date
+LABEL_ORDERING = "-labels__created_at"
+
+# (kind, label) -> LabelStats pk; labels come from a small, fixed choice set.
+# Filled only after commit so a rolled back row is never cached, and
+# emptied of deleted rows by the LabelStats post_delete receiver.
+_stats_ids: Dict[Label, int] = {}
+
+
+def normalize_label(value: str) -> str:
+    """Map a display name ("Mental Health") to its stored slug ("mental_health")"""
+    return "_".join(value.strip().lower().replace("-", " ").split())
+
+
+def labels_for(post: Post) -> List[Label]:
+    labels = []
+    if post.tags:
+        labels.append((PostLabel.KIND_TAG, post.tags))
+    if post.topics:
+        labels.append((PostLabel.KIND_TOPIC, post.topics))
+    return labels
+
+
+def resolve_topic(value: str) -> Optional[str]:
+    """Topic slug for a ``topic`` query parameter given as a Topic id or a name"""
+    if value.isdigit():
+        name = Topic.objects.filter(pk=value).values_list("name", flat=True).first()
+        return normalize_label(name) if name else None
+    return normalize_label(value)
+
+
+def with_label(queryset, kind: str, label: str):
+    """
+    Posts of ``queryset`` carrying ``label``, joined to the label index.
+
+    Order the result by ``LABEL_ORDERING`` so the page is read off the
+    ``(kind, label, -created_at)`` index rather than sorted from posts.
+    """
+    return queryset.filter(labels__kind=kind, labels__label=label)
+
+
+def labels_changed(post: Post) -> bool:
+    """Whether the post's tags or topic differ from when it was loaded"""
+    loaded = getattr(post, "_loaded_labels", None)
+    return loaded is None or loaded != (post.tags, post.topics)
+
+
+def stats_ids(labels: Iterable[Label]) -> Dict[Label, int]:
+    """LabelStats primary keys for ``labels``, creating missing rows"""
+    labels = set(labels)
+    found = {label: _stats_ids[label] for label in labels if label in _stats_ids}
+    missing = labels - set(found)
+    if missing:
+        LabelStats.objects.bulk_create(
+            [LabelStats(kind=kind, label=label) for kind, label in missing],
+            ignore_conflicts=True,
+        )
+        fetched = {
+            (kind, label): pk
+            for kind, label, pk in LabelStats.objects.filter(
+                kind__in={kind for kind, _ in missing},
+                label__in={label for _, label in missing},
+            ).values_list("kind", "label", "pk")
+            if (kind, label) in missing
+        }
+        found.update(fetched)
+        transaction.on_commit(lambda: _stats_ids.update(fetched))
+    return found
+
+
+def forget_stats_id(stats: LabelStats) -> None:
+    _stats_ids.pop((stats.kind, stats.label), None)
+
+
+def _add_post_engagement(
+    post: Post, labels: Iterable[Label], sign: int, engaged: bool = True
+) -> None:
+    """Add (``sign=1``) or remove a post and its engagement on ``labels``"""
+    comments = counters.counter_value(post, "comments_count") if engaged else 0
+    reactions = counters.counter_value(post, "reactions_count") if engaged else 0
+    for pk in stats_ids(labels).values():
+        counters.incr(LabelStats, pk, "posts_count", sign)
+        counters.incr(LabelStats, pk, "comments_count", sign * comments)
+        counters.incr(LabelStats, pk, "reactions_count", sign * reactions)
+
+
+def sync_post_labels(post: Post, created: bool = False) -> None:
+    """Bring the post's index rows in line with its tags and topics"""
+    wanted = set(labels_for(post))
+    existing = (
+        set()
+        if created
+        else set(PostLabel.objects.filter(post=post).values_list("kind", "label"))
+    )
+    stale = existing - wanted
+    if stale:
+        # Per-row deletes so the post_delete receiver updates LabelStats
+        for kind, label in stale:
+            PostLabel.objects.filter(post=post, kind=kind, label=label).delete()
+
+    new = wanted - existing
+    if new:
+        PostLabel.objects.bulk_create(
+            [
+                PostLabel(post=post, kind=kind, label=label, created_at=post.created_at)
+                for kind, label in new
+            ],
+            ignore_conflicts=True,
+        )
+        _add_post_engagement(post, new, 1, engaged=not created)
+        if created:
+            transaction.on_commit(lambda: bump_trending(new, POST_WEIGHT))
+    post._loaded_labels = (post.tags, post.topics)
+
+
+def label_removed(post_label: PostLabel) -> None:
+    """Take a post's engagement off a label it no longer carries"""
+    post = Post.objects.filter(pk=post_label.post_id).first()
+    if post is None:
+        pk = stats_ids([(post_label.kind, post_label.label)]).get(
+            (post_label.kind, post_label.label)
+        )
+        counters.incr(LabelStats, pk, "posts_count", -1)
+        return
+    _add_post_engagement(post, [(post_label.kind, post_label.label)], -1)
+
+
+def record_activity(post_id: int, field: str, delta: int, weight: float = 0) -> None:
+    """
+    Add a comment/reaction change on ``post_id`` to its labels' counters.
+
+    Runs after commit, when a post deleted in the same transaction has lost
+    its labels already, so cascaded deletes are not subtracted twice.
+    """
+
+    def apply():
+        labels = list(
+            PostLabel.objects.filter(post_id=post_id).values_list("kind", "label")
+        )
+        for pk in stats_ids(labels).values():
+            counters.incr(LabelStats, pk, field, delta)
+        if weight and labels:
+            bump_trending(labels, weight)
+
+    transaction.on_commit(apply)
+
+
+# Trending
+
+
+def _redis():
+    return get_redis_connection(getattr(settings, "FEED_COUNTERS_CACHE", "default"))
+
+
+def _half_life() -> float:
+    return getattr(settings, "FEED_TRENDING_HALF_LIFE_HOURS", 6) * 3600
+
+
+def _member(label: Label) -> str:
+    return f"{label[0]}:{label[1]}"
+
+
+def _parse_member(member) -> Label:
+    if isinstance(member, bytes):
+        member = member.decode()
+    kind, label = member.split(":", 1)
+    return kind, label
+
+
+def _epoch(client) -> float:
+    epoch = client.get(TRENDING_EPOCH_KEY)
+    if epoch is None:
+        client.set(TRENDING_EPOCH_KEY, time.time(), nx=True)
+        epoch = client.get(TRENDING_EPOCH_KEY)
+    return float(epoch)
+
+
+def bump_trending(labels: Iterable[Label], weight: float) -> None:
+    try:
+        client = _redis()
+        factor = 2 ** ((time.time() - _epoch(client)) / _half_life())
+        pipe = client.pipeline(transaction=False)
+        for label in labels:
+            pipe.zincrby(TRENDING_KEY, weight * factor, _member(label))
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Could not update trending labels: {e}")
+
+
+def trending(kind: Optional[str] = None, limit: int = 10) -> List[Tuple[Label, float]]:
+    """Top labels by decayed activity, as ``((kind, label), score)``"""
+    try:
+        client = _redis()
+        factor = 2 ** ((time.time() - _epoch(client)) / _half_life())
+        # Read the whole set when filtering by kind; it holds a few dozen labels
+        end = limit - 1 if kind is None else -1
+        rows = client.zrevrange(TRENDING_KEY, 0, end, withscores=True)
+    except Exception as e:
+        logger.warning(f"Could not read trending labels: {e}")
+        return [
+            ((row.kind, row.label), row.trending_score)
+            for row in LabelStats.objects.filter(
+                **({"kind": kind} if kind else {})
+            ).order_by("-trending_score")[:limit]
+        ]
+
+    results = []
+    for member, score in rows:
+        label = _parse_member(member)
+        if kind is None or label[0] == kind:
+            results.append((label, score / factor))
+        if len(results) >= limit:
+            break
+    return results
+
+
+def refresh_trending() -> int:
+    """
+    Rescale the trending set to a new epoch when needed and copy the current
+    scores into ``LabelStats.trending_score``. Returns the rows updated.
+    """
+    client = _redis()
+    lock = client.lock("feeds:trending:refresh-lock", timeout=120, blocking=False)
+    if not lock.acquire(blocking=False):
+        return 0
+    try:
+        now = time.time()
+        exponent = (now - _epoch(client)) / _half_life()
+        if exponent >= MAX_EXPONENT:
+            # Bumps racing with the rescale are off by at most one factor
+            pipe = client.pipeline()
+            pipe.zunionstore(TRENDING_KEY, {TRENDING_KEY: 2**-exponent})
+            pipe.set(TRENDING_EPOCH_KEY, now)
+            pipe.execute()
+            exponent = 0
+        factor = 2**exponent
+        scores = {
+            _parse_member(member): score / factor
+            for member, score in client.zrange(TRENDING_KEY, 0, -1, withscores=True)
+        }
+    finally:
+        lock.release()
+
+    ids = stats_ids(scores)
+    if not ids:
+        return 0
+    return LabelStats.objects.filter(pk__in=ids.values()).update(
+        trending_score=Case(
+            *[When(pk=pk, then=Value(scores[label])) for label, pk in ids.items()],
+            default=Value(0.0),
+            output_field=FloatField(),
+        ),
+        trending_updated_at=timezone.now(),
+    )
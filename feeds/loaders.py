@@ -0,0 +1,168 @@
+# feeds/loaders.py
+"""
+Page-level batch loader for feed serializers
+
+Serializing a feed page used to cost several queries per post (reaction
+summary, viewer reaction, counts, author avatar). ``FeedBatchLoader`` is
+primed with the whole page and resolves each of those for every object in a
+constant number of queries (counters come from the denormalized columns
+plus one Redis read for unflushed deltas); serializers read from it through the
+``feed_loader`` context key and fall back to per-object queries without it.
+"""
+
+from collections import defaultdict
+from typing import Dict, Iterable, Optional
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Count
+
+from feeds import counters
+from feeds.models import Comment, PollOption, PollVote, Post, Reaction
+from patient.models import PatientProfile
+from therapist.models import TherapistProfile
+
+CONTEXT_KEY = "feed_loader"
+
+
+def get_loader(context) -> Optional["FeedBatchLoader"]:
+    """Return the loader for a serializer context, creating it on first use"""
+    if context is None:
+        return None
+    loader = context.get(CONTEXT_KEY)
+    if loader is None:
+        request = context.get("request")
+        loader = FeedBatchLoader(getattr(request, "user", None))
+        context[CONTEXT_KEY] = loader
+    return loader
+
+
+class FeedBatchLoader:
+    """
+    Batch-resolves per-object feed data for posts, comments and poll options.
+
+    ``prime`` loads everything for a list of objects at once. Lookups for an
+    object that was never primed load just that object, so results are
+    always correct, only slower, when a caller forgets to prime.
+    """
+
+    def __init__(self, user=None):
+        self.user_id = user.pk if user is not None and user.is_authenticated else None
+        self._loaded = set()
+        self._reactions: Dict[tuple, Dict[str, int]] = defaultdict(dict)
+        self._user_reactions: Dict[tuple, str] = {}
+        self._poll_posts = set()
+        self._poll_user_votes = set()
+        self._avatars: Dict[int, Optional[str]] = {}
+
+    def prime(self, objects: Iterable) -> "FeedBatchLoader":
+        """Load data for every object not loaded yet, grouped by model"""
+        by_model = defaultdict(list)
+        for obj in objects:
+            key = self._key(obj)
+            if key not in self._loaded:
+                by_model[type(obj)].append(obj)
+                self._loaded.add(key)
+
+        author_ids = set()
+        counted = []
+        for model, instances in by_model.items():
+            ids = [obj.pk for obj in instances]
+            author_ids.update(obj.author_id for obj in instances)
+            counted.extend(instances)
+            if model is Post:
+                self._load_reactions(model, ids)
+                self._load_poll_votes(ids)
+                counted.extend(
+                    option
+                    for post in instances
+                    for option in self._prefetched_poll_options(post)
+                )
+            elif model is Comment:
+                self._load_reactions(model, ids)
+        self._load_avatars(author_ids)
+        # Unflushed counter deltas for the whole page in one Redis round trip
+        counters.attach_pending(counted)
+        return self
+
+    # Lookups
+
+    def reactions_summary(self, obj) -> Dict[str, int]:
+        self._ensure(obj)
+        return dict(self._reactions.get(self._key(obj), {}))
+
+    def user_reaction(self, obj) -> Optional[str]:
+        self._ensure(obj)
+        return self._user_reactions.get(self._key(obj))
+
+    def user_has_voted(self, option: PollOption) -> bool:
+        if option.post_id not in self._poll_posts:
+            self._load_poll_votes([option.post_id])
+        return option.pk in self._poll_user_votes
+
+    def avatar_url(self, user_id: int) -> Optional[str]:
+        """Storage URL of the author's profile picture (not made absolute)"""
+        if user_id not in self._avatars:
+            self._load_avatars({user_id})
+        return self._avatars.get(user_id)
+
+    # Batch queries
+
+    def _key(self, obj) -> tuple:
+        return (type(obj), obj.pk)
+
+    def _ensure(self, obj) -> None:
+        if self._key(obj) not in self._loaded:
+            self.prime([obj])
+
+    def _load_reactions(self, model, ids) -> None:
+        content_type = ContentType.objects.get_for_model(model)
+        rows = (
+            Reaction.objects.filter(content_type=content_type, object_id__in=ids)
+            .values("object_id", "reaction_type")
+            .annotate(count=Count("id"))
+            .order_by()
+        )
+        for row in rows:
+            self._reactions[(model, row["object_id"])][row["reaction_type"]] = row[
+                "count"
+            ]
+
+        if self.user_id is not None:
+            for object_id, reaction_type in Reaction.objects.filter(
+                content_type=content_type, object_id__in=ids, user_id=self.user_id
+            ).values_list("object_id", "reaction_type"):
+                self._user_reactions[(model, object_id)] = reaction_type
+
+    def _prefetched_poll_options(self, post: Post):
+        return getattr(post, "_prefetched_objects_cache", {}).get("poll_options", ())
+
+    def _load_poll_votes(self, post_ids) -> None:
+        """The viewer's votes on every option of ``post_ids``"""
+        self._poll_posts.update(post_ids)
+        if self.user_id is not None:
+            self._poll_user_votes.update(
+                PollVote.objects.filter(
+                    post_id__in=post_ids, user_id=self.user_id
+                ).values_list("poll_option_id", flat=True)
+            )
+
+    def _load_avatars(self, user_ids) -> None:
+        user_ids = {user_id for user_id in user_ids if user_id not in self._avatars}
+        if not user_ids:
+            return
+        for user_id in user_ids:
+            self._avatars[user_id] = None
+
+        # Patient pictures are applied last so they win, as in the per-object lookup
+        for model, field_name in (
+            (TherapistProfile, "profile_picture"),
+            (PatientProfile, "profile_pic"),
+        ):
+            storage = model._meta.get_field(field_name).storage
+            for user_id, name in (
+                model.objects.filter(user_id__in=user_ids)
+                .exclude(**{f"{field_name}__isnull": True})
+                .exclude(**{field_name: ""})
+                .values_list("user_id", field_name)
+            ):
+                self._avatars[user_id] = storage.url(name)
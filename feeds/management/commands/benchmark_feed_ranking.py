@@ -0,0 +1,143 @@
+# feeds/management/commands/benchmark_feed_ranking.py
+"""
+Benchmark home feed ranking and timeline paging on synthetic posts
+"""
+
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django_redis import get_redis_connection
+
+from feeds.models import TAG_CHOICES, TOPIC_CHOICES
+from feeds.ranking import Candidate, FeedRanker, FeedTimelineService, post_labels
+
+
+class SyntheticTimelineService(FeedTimelineService):
+    """Timeline service reading candidates from memory instead of the database"""
+
+    def __init__(self, candidates, **kwargs):
+        super().__init__(**kwargs)
+        self.candidates = {candidate.post_id: candidate for candidate in candidates}
+
+    def load_candidates(self, post_ids):
+        return [self.candidates[post_id] for post_id in post_ids]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark feed ranking and keyset-paginated timeline reads on synthetic "
+        "data (no database access; page reads use Redis under a bench: prefix)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=20000)
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument(
+            "--pages", type=int, default=10, help="Pages read per user (default: 10)"
+        )
+        parser.add_argument("--page-size", type=int, default=20)
+        parser.add_argument(
+            "--no-redis",
+            action="store_true",
+            help="Only benchmark ranking, without Redis timelines",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options["seed"])
+        candidates = self._build_candidates(rng, options["posts"])
+        labels = sorted({label for c in candidates for label in c.labels})
+        affinities = [
+            self._build_affinity(rng, labels) for _ in range(options["users"])
+        ]
+        self.stdout.write(
+            f"Synthetic feed: {len(candidates)} posts, {len(affinities)} users, "
+            f"{len(labels)} labels"
+        )
+
+        ranker = FeedRanker()
+        now = time.time()
+        rank_timings = []
+        for affinity in affinities:
+            start = time.perf_counter()
+            ranker.rank(candidates, affinity, now)
+            rank_timings.append(time.perf_counter() - start)
+        self._report("rank all candidates", rank_timings)
+
+        if options["no_redis"]:
+            return
+
+        service = SyntheticTimelineService(
+            candidates, client=get_redis_connection("default"), prefix="bench:feed"
+        )
+        for candidate in candidates:
+            service.index_post(candidate)
+
+        build_timings, page_timings = [], []
+        try:
+            for user_id, affinity in enumerate(affinities, start=1):
+                start = time.perf_counter()
+                service.rebuild(user_id, affinity)
+                build_timings.append(time.perf_counter() - start)
+
+                cursor = None
+                for _ in range(options["pages"]):
+                    start = time.perf_counter()
+                    post_ids, cursor = service.page(
+                        user_id, cursor, options["page_size"]
+                    )
+                    page_timings.append(time.perf_counter() - start)
+                    if cursor is None:
+                        break
+        finally:
+            self._cleanup(service)
+
+        self._report("timeline rebuild", build_timings)
+        self._report("page read", page_timings)
+        self.stdout.write(self.style.SUCCESS("Done"))
+
+    def _report(self, name: str, timings) -> None:
+        timings = np.asarray(timings) * 1000
+        p50, p99 = np.percentile(timings, [50, 99])
+        self.stdout.write(
+            f"  {name:<22} n={len(timings):<6} p50 {p50:8.2f} ms  p99 {p99:8.2f} ms"
+        )
+
+    def _cleanup(self, service: FeedTimelineService) -> None:
+        client = service.client
+        keys = list(client.scan_iter(match=f"{service.prefix}:*", count=1000))
+        for start in range(0, len(keys), 1000):
+            client.delete(*keys[start : start + 1000])
+
+    def _build_candidates(self, rng, count: int):
+        """Posts over the last week with skewed (long-tail) engagement"""
+        tags = [choice for choice, _ in TAG_CHOICES]
+        topics = [choice for choice, _ in TOPIC_CHOICES] + [None]
+        now = time.time()
+        created = now - rng.uniform(0, 7 * 86400, size=count)
+        reactions = rng.zipf(2.0, size=count) - 1
+        comments = rng.zipf(2.5, size=count) - 1
+        views = reactions * rng.integers(5, 50, size=count)
+        tag_idx = rng.integers(0, len(tags), size=count)
+        topic_idx = rng.integers(0, len(topics), size=count)
+        return [
+            Candidate(
+                post_id=i + 1,
+                author_id=int(rng.integers(1, 5000)),
+                created_at=float(created[i]),
+                reactions=int(reactions[i]),
+                comments=int(comments[i]),
+                views=int(views[i]),
+                labels=post_labels(tags[tag_idx[i]], topics[topic_idx[i]]),
+            )
+            for i in range(count)
+        ]
+
+    def _build_affinity(self, rng, labels):
+        chosen = rng.choice(labels, size=min(4, len(labels)), replace=False)
+        weights = rng.random(len(chosen))
+        return {
+            str(label): float(weight / weights.max())
+            for label, weight in zip(chosen, weights)
+        }
@@ -0,0 +1,26 @@
+# feeds/management/commands/feed_counters.py
+from django.core.management.base import BaseCommand
+
+from feeds.counters import flush_counters, recount_counters
+
+
+class Command(BaseCommand):
+    help = "Flush pending feed engagement counters, or rebuild them from scratch"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "action",
+            choices=["flush", "recount"],
+            help="flush: write pending Redis deltas to the database; "
+            "recount: recompute every counter column from the related rows",
+        )
+
+    def handle(self, *args, **options):
+        if options["action"] == "flush":
+            updated = flush_counters()
+            self.stdout.write(self.style.SUCCESS(f"Flushed {updated} counters"))
+            return
+
+        for name, rows in recount_counters().items():
+            self.stdout.write(f"  {name}: {rows} rows recounted")
+        self.stdout.write(self.style.SUCCESS("Counters rebuilt"))
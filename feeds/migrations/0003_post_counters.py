@@ -0,0 +1,51 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:05
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Post = apps.get_model("feeds", "Post")
+    Comment = apps.get_model("feeds", "Comment")
+    Reaction = apps.get_model("feeds", "Reaction")
+    ContentType = apps.get_model("contenttypes", "ContentType")
+
+    def count_of(queryset, field):
+        counts = (
+            queryset.filter(**{field: OuterRef("pk")})
+            .order_by()
+            .values(field)
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+        return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+    content_type = ContentType.objects.filter(app_label="feeds", model="post").first()
+    Post.objects.update(
+        comments_count=count_of(Comment.objects.all(), "post_id"),
+        reactions_count=count_of(
+            Reaction.objects.filter(content_type=content_type), "object_id"
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("feeds", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="comments_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="reactions_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
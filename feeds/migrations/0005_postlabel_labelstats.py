@@ -0,0 +1,134 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_labels(apps, schema_editor):
+    Post = apps.get_model("feeds", "Post")
+    PostLabel = apps.get_model("feeds", "PostLabel")
+    LabelStats = apps.get_model("feeds", "LabelStats")
+
+    batch = []
+    for post_id, tags, topics, created_at in Post.objects.values_list(
+        "id", "tags", "topics", "created_at"
+    ).iterator(chunk_size=2000):
+        for kind, label in (("tag", tags), ("topic", topics)):
+            if label:
+                batch.append(
+                    PostLabel(
+                        post_id=post_id, kind=kind, label=label, created_at=created_at
+                    )
+                )
+        if len(batch) >= 2000:
+            PostLabel.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    PostLabel.objects.bulk_create(batch, ignore_conflicts=True)
+
+    LabelStats.objects.bulk_create(
+        [
+            LabelStats(
+                kind=row["kind"],
+                label=row["label"],
+                posts_count=row["posts"],
+                comments_count=row["comments"] or 0,
+                reactions_count=row["reactions"] or 0,
+            )
+            for row in PostLabel.objects.values("kind", "label")
+            .annotate(
+                posts=Count("id"),
+                comments=Sum("post__comments_count"),
+                reactions=Sum("post__reactions_count"),
+            )
+            .order_by()
+        ]
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("feeds", "0004_comment_polloption_counters"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LabelStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("tag", "Tag"), ("topic", "Topic")], max_length=10
+                    ),
+                ),
+                ("label", models.CharField(max_length=50)),
+                (
+                    "posts_count",
+                    models.PositiveIntegerField(default=0, editable=False),
+                ),
+                (
+                    "comments_count",
+                    models.PositiveIntegerField(default=0, editable=False),
+                ),
+                (
+                    "reactions_count",
+                    models.PositiveIntegerField(default=0, editable=False),
+                ),
+                ("trending_score", models.FloatField(default=0.0)),
+                ("trending_updated_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "verbose_name_plural": "label stats",
+                "unique_together": {("kind", "label")},
+            },
+        ),
+        migrations.CreateModel(
+            name="PostLabel",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("tag", "Tag"), ("topic", "Topic")], max_length=10
+                    ),
+                ),
+                ("label", models.CharField(max_length=50)),
+                ("created_at", models.DateTimeField()),
+                (
+                    "post",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="labels",
+                        to="feeds.post",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["kind", "label", "-created_at"],
+                        name="feeds_label_recent_idx",
+                    )
+                ],
+                "unique_together": {("post", "kind", "label")},
+            },
+        ),
+        migrations.RunPython(backfill_labels, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("feeds", "0005_postlabel_labelstats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="pollvote",
+            name="post",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="poll_votes",
+                to="feeds.post",
+            ),
+        ),
+    ]
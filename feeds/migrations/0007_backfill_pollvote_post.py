@@ -0,0 +1,52 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:21
+
+from django.db import migrations
+from django.db.models import Count, IntegerField, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_poll_votes(apps, schema_editor):
+    PollOption = apps.get_model("feeds", "PollOption")
+    PollVote = apps.get_model("feeds", "PollVote")
+
+    PollVote.objects.update(
+        post_id=Subquery(
+            PollOption.objects.filter(pk=OuterRef("poll_option_id")).values("post_id")
+        )
+    )
+
+    # Keep only the latest vote of users who voted for several options
+    duplicates = (
+        PollVote.objects.values("post_id", "user_id")
+        .annotate(votes=Count("id"), latest=Max("id"))
+        .filter(votes__gt=1)
+        .order_by()
+    )
+    for row in duplicates.iterator():
+        PollVote.objects.filter(post_id=row["post_id"], user_id=row["user_id"]).exclude(
+            pk=row["latest"]
+        ).delete()
+
+    counts = (
+        PollVote.objects.filter(poll_option_id=OuterRef("pk"))
+        .order_by()
+        .values("poll_option_id")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    PollOption.objects.update(
+        votes_count=Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+    )
+
+
+class Migration(migrations.Migration):
+    # The backfill runs in its own transaction: on PostgreSQL the deferred
+    # foreign key checks it queues would make the following ALTER TABLE fail
+    # with "pending trigger events" if both shared one.
+    dependencies = [
+        ("feeds", "0006_pollvote_post"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_poll_votes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("feeds", "0007_backfill_pollvote_post"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="pollvote",
+            name="post",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="poll_votes",
+                to="feeds.post",
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="pollvote",
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name="pollvote",
+            constraint=models.UniqueConstraint(
+                fields=("post", "user"), name="feeds_one_vote_per_poll"
+            ),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("feeds", "0008_pollvote_post_unique"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CounterFlush",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("token", models.CharField(max_length=32, unique=True)),
+                ("flushed_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -105,6 +105,10 @@ class Post(models.Model):
     views_count = models.PositiveIntegerField(default=0)
     tags = models.CharField(max_length=50, choices=TAG_CHOICES)
 
+    # Denormalized counters, maintained by feeds.counters (write-behind)
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
+    reactions_count = models.PositiveIntegerField(default=0, editable=False)
+
     # Generic relations
     reactions = GenericRelation(Reaction)
 
@@ -116,17 +120,17 @@ class Post(models.Model):
             models.Index(fields=["visibility"]),
         ]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        post = super().from_db(db, field_names, values)
+        # Labels as loaded, so saves that leave them alone skip re-indexing
+        if "tags" in field_names and "topics" in field_names:
+            post._loaded_labels = (post.tags, post.topics)
+        return post
+
     def __str__(self):
         return f"{self.author.username}'s post: {self.content[:50]}"
 
-    @property
-    def comments_count(self):
-        return self.comments.count()
-
-    @property
-    def reactions_count(self):
-        return self.reactions.count()
-
     def get_reactions_summary(self):
         """Get summary of reactions by type"""
         reactions = self.reactions.values("reaction_type").annotate(
@@ -135,9 +139,10 @@ class Post(models.Model):
         return {item["reaction_type"]: item["count"] for item in reactions}
 
     def increment_views(self):
-        """Increment the view count"""
-        self.views_count += 1
-        self.save(update_fields=["views_count"])
+        """Record a view; batched into views_count by the counter flusher"""
+        from feeds.counters import record_view
+
+        record_view(self.pk)
 
 
 class Comment(models.Model):
@@ -155,6 +160,10 @@ class Comment(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     is_edited = models.BooleanField(default=False)
 
+    # Denormalized counters, maintained by feeds.counters (write-behind)
+    replies_count = models.PositiveIntegerField(default=0, editable=False)
+    reactions_count = models.PositiveIntegerField(default=0, editable=False)
+
     # Generic relations
     reactions = GenericRelation(Reaction)
 
@@ -164,13 +173,61 @@ class Comment(models.Model):
     def __str__(self):
         return f"Comment by {self.author.username}: {self.content[:50]}"
 
-    @property
-    def replies_count(self):
-        return self.replies.count()
 
-    @property
-    def reactions_count(self):
-        return self.reactions.count()
+class PostLabel(models.Model):
+    """Inverted index entry linking a post to one of its tags or topics"""
+
+    KIND_TAG = "tag"
+    KIND_TOPIC = "topic"
+    KIND_CHOICES = [(KIND_TAG, "Tag"), (KIND_TOPIC, "Topic")]
+
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="labels")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    label = models.CharField(max_length=50)
+    # Copy of post.created_at so label feeds are served from the index alone
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ["post", "kind", "label"]
+        indexes = [
+            models.Index(
+                fields=["kind", "label", "-created_at"], name="feeds_label_recent_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.label} -> post {self.post_id}"
+
+
+class LabelStats(models.Model):
+    """Precomputed per tag/topic counters and trending score"""
+
+    kind = models.CharField(max_length=10, choices=PostLabel.KIND_CHOICES)
+    label = models.CharField(max_length=50)
+    # Denormalized counters, maintained by feeds.counters (write-behind)
+    posts_count = models.PositiveIntegerField(default=0, editable=False)
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
+    reactions_count = models.PositiveIntegerField(default=0, editable=False)
+    # Snapshot of the decayed activity score kept in Redis (see feeds.labels)
+    trending_score = models.FloatField(default=0.0)
+    trending_updated_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ["kind", "label"]
+        verbose_name_plural = "label stats"
+
+    def __str__(self):
+        return f"{self.kind}:{self.label}"
+
+
+class CounterFlush(models.Model):
+    """Token of a counter flush already applied, so a retried flush is skipped"""
+
+    token = models.CharField(max_length=32, unique=True)
+    flushed_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"counter flush {self.token}"
 
 
 class PollOption(models.Model):
@@ -180,6 +237,7 @@ class PollOption(models.Model):
         Post, on_delete=models.CASCADE, related_name="poll_options"
     )
     option_text = models.CharField(max_length=255)
+    votes_count = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -190,8 +248,10 @@ class PollOption(models.Model):
 
 
 class PollVote(models.Model):
-    """User votes on poll options"""
+    """User votes on poll options, one per user per poll"""
 
+    # Copied from the option so the database can enforce one vote per poll
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="poll_votes")
     poll_option = models.ForeignKey(
         PollOption, on_delete=models.CASCADE, related_name="votes"
     )
@@ -199,7 +259,16 @@ class PollVote(models.Model):
     voted_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        unique_together = ["poll_option", "user"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["post", "user"], name="feeds_one_vote_per_poll"
+            )
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.post_id is None and self.poll_option_id is not None:
+            self.post_id = self.poll_option.post_id
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.user.username} voted for {self.poll_option.option_text}"
@@ -0,0 +1,410 @@
+# feeds/polls.py
+"""
+Poll voting with atomic tallies and live results
+
+A user has at most one ``PollVote`` per poll, enforced by the
+``(post, user)`` unique constraint. A vote is written under a lock on the
+voter's row (or, for a first vote, an insert that loses to a concurrent
+one on that constraint), so the database decides whether the vote changed
+and what it replaced; retries and double submits are idempotent.
+
+Live tallies are kept in Redis. Once the vote commits, one Lua script
+records the voter's choice and moves the per-option counts in the same
+step, so concurrent votes cannot double count and a rolled back vote never
+reaches Redis. Results are served from that hash; the database is only
+read to load a poll Redis has not seen yet (or has evicted).
+``PollOption.votes_count`` still goes through ``feeds.counters`` for feed
+serialization.
+
+Result changes are pushed to the ``poll_<post_id>`` channel group at most
+every ``POLL_PUSH_INTERVAL`` seconds, as the per-option deltas since the
+previous push plus the new totals. ``reconcile`` rebuilds the Redis state
+of polls that have gone quiet from ``PollVote`` and corrects any drift
+(votes written outside this module, a lost Redis write).
+
+Without Redis results are counted from the database.
+"""
+
+import logging
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django_redis import get_redis_connection
+
+from feeds import counters
+from feeds.models import PollOption, PollVote, Post
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_KEY = "feeds:polls:active"
+
+# Marks a loaded tally hash, so polls without votes are not reloaded
+LOADED_FIELD = "_loaded"
+
+# KEYS: tally, voters, deltas, active set
+# ARGV: user id, option id ("" to retract), ttl, now, post id
+# Returns {status, previous option}; status -1 means "load the poll first"
+VOTE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return {-1, ''}
+end
+local previous = redis.call('HGET', KEYS[2], ARGV[1]) or ''
+if previous == ARGV[2] then
+    return {0, previous}
+end
+if previous ~= '' then
+    redis.call('HINCRBY', KEYS[1], previous, -1)
+    redis.call('HINCRBY', KEYS[3], previous, -1)
+end
+if ARGV[2] == '' then
+    redis.call('HDEL', KEYS[2], ARGV[1])
+else
+    redis.call('HSET', KEYS[2], ARGV[1], ARGV[2])
+    redis.call('HINCRBY', KEYS[1], ARGV[2], 1)
+    redis.call('HINCRBY', KEYS[3], ARGV[2], 1)
+end
+for i = 1, 3 do
+    redis.call('EXPIRE', KEYS[i], ARGV[3])
+end
+redis.call('ZADD', KEYS[4], ARGV[4], ARGV[5])
+return {1, previous}
+"""
+
+# KEYS: tally, voters
+# ARGV: ttl, replace ("1" to overwrite a loaded poll), option count,
+#       option/count pairs, then user/option pairs
+LOAD_SCRIPT = """
+if ARGV[2] ~= '1' and redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+redis.call('DEL', KEYS[1], KEYS[2])
+redis.call('HSET', KEYS[1], '_loaded', 1)
+local options_end = 3 + tonumber(ARGV[3]) * 2
+for i = 4, options_end, 2 do
+    redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+for i = options_end + 1, #ARGV, 2 do
+    redis.call('HSET', KEYS[2], ARGV[i], ARGV[i + 1])
+end
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+redis.call('EXPIRE', KEYS[2], ARGV[1])
+return 1
+"""
+
+# KEYS: deltas; returns the deltas accumulated since the last push
+TAKE_DELTAS_SCRIPT = """
+local deltas = redis.call('HGETALL', KEYS[1])
+redis.call('DEL', KEYS[1])
+return deltas
+"""
+
+
+class PollError(Exception):
+    """A vote that cannot be cast, such as one for another poll's option"""
+
+
+def _redis():
+    return get_redis_connection("default")
+
+
+def _ttl() -> int:
+    return getattr(settings, "POLL_TALLY_TTL", 7 * 24 * 3600)
+
+
+def _keys(post_id: int) -> Tuple[str, str, str]:
+    prefix = f"feeds:poll:{post_id}"
+    return f"{prefix}:tally", f"{prefix}:voters", f"{prefix}:deltas"
+
+
+def group_name(post_id: int) -> str:
+    return f"poll_{post_id}"
+
+
+def _decode(value) -> str:
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+
+# Loading and reading tallies
+
+
+def _db_states(post_ids: Iterable[int]) -> Dict[int, Tuple[Dict, Dict]]:
+    """
+    Per poll: counts for every option (zeros included) and each voter's
+    choice, in two queries for all of ``post_ids``
+    """
+    states = defaultdict(lambda: ({}, {}))
+    for post_id, option_id in PollOption.objects.filter(
+        post_id__in=post_ids
+    ).values_list("post_id", "pk"):
+        states[post_id][0][option_id] = 0
+    for post_id, user_id, option_id in PollVote.objects.filter(
+        post_id__in=post_ids
+    ).values_list("post_id", "user_id", "poll_option_id"):
+        tallies, voters = states[post_id]
+        voters[user_id] = option_id
+        tallies[option_id] = tallies.get(option_id, 0) + 1
+    return states
+
+
+def _load(client, post_id: int, state=None, replace: bool = False) -> None:
+    tallies, voters = state or _db_states([post_id])[post_id]
+    args = [_ttl(), "1" if replace else "0", len(tallies)]
+    for option_id, count in tallies.items():
+        args += [option_id, count]
+    for user_id, option_id in voters.items():
+        args += [user_id, option_id]
+    tally_key, voters_key, _ = _keys(post_id)
+    client.register_script(LOAD_SCRIPT)(keys=[tally_key, voters_key], args=args)
+
+
+def _parse_tallies(raw) -> Dict[int, int]:
+    return {
+        int(_decode(field)): int(count)
+        for field, count in raw.items()
+        if _decode(field) != LOADED_FIELD
+    }
+
+
+def _read_tallies(client, post_id: int) -> Dict[int, int]:
+    tally_key = _keys(post_id)[0]
+    raw = client.hgetall(tally_key)
+    if not raw:
+        _load(client, post_id)
+        raw = client.hgetall(tally_key)
+    return _parse_tallies(raw)
+
+
+def results(post: Post, user=None) -> Dict:
+    """Vote counts per option, with the viewer's choice when ``user`` is given"""
+    options = list(
+        PollOption.objects.filter(post=post).values_list("pk", "option_text")
+    )
+    choice = None
+    try:
+        client = _redis()
+        tallies = _read_tallies(client, post.pk)
+        if user is not None and user.is_authenticated:
+            raw = client.hget(_keys(post.pk)[1], user.pk)
+            choice = int(raw) if raw else None
+    except Exception as e:
+        logger.warning(f"Poll tallies unavailable, counting votes: {e}")
+        tallies, voters = _db_states([post.pk])[post.pk]
+        if user is not None:
+            choice = voters.get(user.pk)
+
+    return {
+        "post_id": post.pk,
+        "total_votes": sum(tallies.get(pk, 0) for pk, _ in options),
+        "options": [
+            {"id": pk, "option_text": text, "votes_count": max(0, tallies.get(pk, 0))}
+            for pk, text in options
+        ],
+        "user_vote": choice,
+    }
+
+
+# Voting
+
+
+def _record(client, post_id: int, user_id: int, option_id) -> Tuple[int, Optional[int]]:
+    """Run the vote script, loading the poll first if Redis does not have it"""
+    tally_key, voters_key, deltas_key = _keys(post_id)
+    script = client.register_script(VOTE_SCRIPT)
+    args = [user_id, option_id or "", _ttl(), time.time(), post_id]
+    keys = [tally_key, voters_key, deltas_key, ACTIVE_KEY]
+    status, previous = script(keys=keys, args=args)
+    if int(status) == -1:
+        _load(client, post_id)
+        status, previous = script(keys=keys, args=args)
+    previous = _decode(previous)
+    return int(status), int(previous) if previous else None
+
+
+def _write_vote(post: Post, option: PollOption, user) -> Tuple[bool, Optional[int]]:
+    """
+    Point the user's vote at ``option``, serialized on the user's vote row.
+
+    Returns ``(changed, previous option id)`` as the database saw them.
+    """
+    votes = PollVote.objects.filter(post=post, user=user)
+    with transaction.atomic():
+        previous = (
+            votes.select_for_update().values_list("poll_option_id", flat=True).first()
+        )
+        if previous is None:
+            try:
+                # bulk_create skips the post_save receivers; cast_vote counts
+                with transaction.atomic():
+                    PollVote.objects.bulk_create(
+                        [PollVote(post=post, poll_option=option, user=user)]
+                    )
+                return True, None
+            except IntegrityError:
+                # A concurrent first vote won the insert; it is committed now
+                previous = (
+                    votes.select_for_update()
+                    .values_list("poll_option_id", flat=True)
+                    .first()
+                )
+        if previous == option.pk:
+            return False, previous
+        votes.update(poll_option=option, voted_at=timezone.now())
+    return True, previous
+
+
+def _apply(post_id: int, user_id: int, option_id: Optional[int]) -> None:
+    """Mirror a committed vote (``None`` for a retraction) into the tallies"""
+    try:
+        _record(_redis(), post_id, user_id, option_id)
+    except Exception as e:
+        # The rows are right; the poll's next vote queues it for reconcile
+        logger.warning(f"Could not update poll tallies: {e}")
+        return
+    schedule_push(post_id)
+
+
+def cast_vote(post: Post, option_id: int, user) -> Dict:
+    """
+    Vote for ``option_id`` on ``post``, replacing any earlier vote.
+
+    Returns ``{"changed": bool, "previous": option id or None}``; casting
+    the same vote twice changes nothing. The Redis tally follows once the
+    surrounding transaction commits.
+    """
+    option = PollOption.objects.filter(pk=option_id, post=post).first()
+    if option is None:
+        raise PollError("This option does not belong to the poll")
+
+    changed, previous = _write_vote(post, option, user)
+    if changed:
+        if previous:
+            counters.incr(PollOption, previous, "votes_count", -1)
+        counters.incr(PollOption, option.pk, "votes_count", 1)
+        if previous is None:
+            from notifications import fanout
+
+            fanout.notify("poll_vote", option.pk, user.pk, option.option_text[:50])
+        transaction.on_commit(lambda: _apply(post.pk, user.pk, option.pk))
+
+    return {"changed": changed, "previous": previous}
+
+
+def retract_vote(post: Post, user) -> bool:
+    """Remove the user's vote on ``post``; returns whether there was one"""
+    # The post_delete receiver takes the vote off votes_count
+    deleted, _ = PollVote.objects.filter(post=post, user=user).delete()
+    if deleted:
+        transaction.on_commit(lambda: _apply(post.pk, user.pk, None))
+    return bool(deleted)
+
+
+# Live results
+
+
+def _push_interval() -> float:
+    return getattr(settings, "POLL_PUSH_INTERVAL", 1.0)
+
+
+def schedule_push(post_id: int) -> None:
+    """Push this poll's results after the interval, once per interval"""
+    from feeds.tasks import push_poll_results
+
+    interval = _push_interval()
+    try:
+        flag = f"feeds:poll:{post_id}:push-scheduled"
+        if _redis().set(flag, 1, nx=True, px=max(1, int(interval * 1000))):
+            push_poll_results.apply_async((post_id,), countdown=interval)
+    except Exception as e:
+        logger.warning(f"Could not schedule poll results push: {e}")
+
+
+def push_results(post_id: int) -> bool:
+    """Send the deltas since the last push and the totals to subscribers"""
+    client = _redis()
+    deltas_key = _keys(post_id)[2]
+    raw = client.register_script(TAKE_DELTAS_SCRIPT)(keys=[deltas_key])
+    deltas = {
+        int(_decode(raw[i])): int(raw[i + 1])
+        for i in range(0, len(raw), 2)
+        if int(raw[i + 1])
+    }
+    if not deltas:
+        return False
+
+    tallies = _read_tallies(client, post_id)
+    async_to_sync(get_channel_layer().group_send)(
+        group_name(post_id),
+        {
+            "type": "poll.results",
+            "post_id": post_id,
+            "deltas": {str(pk): delta for pk, delta in deltas.items()},
+            "tallies": {str(pk): count for pk, count in tallies.items()},
+            "total_votes": sum(tallies.values()),
+        },
+    )
+    return True
+
+
+# Reconciliation
+
+
+def mark_changed(post_id: int) -> None:
+    """Queue a poll for reconciliation after votes changed outside ``cast_vote``"""
+
+    def add():
+        try:
+            _redis().zadd(ACTIVE_KEY, {post_id: time.time()})
+        except Exception as e:
+            logger.warning(f"Could not queue poll {post_id} for reconciliation: {e}")
+
+    transaction.on_commit(add)
+
+
+def _settle_seconds() -> int:
+    return getattr(settings, "POLL_RECONCILE_SETTLE", 10)
+
+
+def reconcile(post_ids: Optional[List[int]] = None, batch_size: int = 200) -> int:
+    """
+    Rebuild the Redis state of quiet polls from ``PollVote`` and reset their
+    ``votes_count`` columns. Without ``post_ids`` it takes every poll with
+    no vote in the last ``POLL_RECONCILE_SETTLE`` seconds, so votes still on
+    their way from Redis to the database are left alone. Returns the number
+    of polls whose tallies had drifted.
+    """
+    client = _redis()
+    if post_ids is None:
+        cutoff = time.time() - _settle_seconds()
+        post_ids = [
+            int(member) for member in client.zrangebyscore(ACTIVE_KEY, "-inf", cutoff)
+        ]
+        # Polls voted on again meanwhile have a newer score and stay queued
+        client.zremrangebyscore(ACTIVE_KEY, "-inf", cutoff)
+    if not post_ids:
+        return 0
+
+    counters.flush_counters()
+    drifted = 0
+    for start in range(0, len(post_ids), batch_size):
+        batch = post_ids[start : start + batch_size]
+        states = _db_states(batch)
+        for post_id in batch:
+            raw = client.hgetall(_keys(post_id)[0])
+            if not raw:
+                continue  # Expired; loaded fresh on the next read
+            tallies, _ = states[post_id]
+            cached = _parse_tallies(raw)
+            if {k: v for k, v in cached.items() if v} != {
+                k: v for k, v in tallies.items() if v
+            }:
+                logger.info(f"Poll {post_id} tallies drifted, rebuilding")
+                drifted += 1
+            _load(client, post_id, states[post_id], replace=True)
+        counters.recount_votes(PollOption.objects.filter(post_id__in=batch))
+    return drifted
@@ -0,0 +1,385 @@
+# feeds/ranking.py
+"""
+Ranked home feed served from per-user Redis timelines
+
+Posts are scored by recency decay, engagement velocity and the viewer's
+topic/tag affinity (learned from their reactions and comments). Each active
+user has a timeline: a sorted set of post ids by score, read with keyset
+pagination so page cost does not grow with depth.
+
+Timelines are filled with a hybrid fan-out:
+
+- on write, a new post is pushed into the existing timelines of users who
+  recently engaged with its tag or topic, as long as that audience is
+  smaller than ``FEED_FANOUT_LIMIT``;
+- on read, a missing or stale timeline is rebuilt from per-label and global
+  "recent posts" indexes, which also covers posts with audiences too large
+  to fan out.
+"""
+
+import logging
+import math
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.utils import timezone
+from django_redis import get_redis_connection
+
+from feeds.models import Comment, Post, Reaction
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Candidate:
+    """The few post attributes ranking needs"""
+
+    post_id: int
+    author_id: int
+    created_at: float  # Unix timestamp
+    reactions: int
+    comments: int
+    views: int
+    labels: Tuple[str, ...]
+
+
+def post_labels(tags: Optional[str], topics: Optional[str]) -> Tuple[str, ...]:
+    """Tag and topic of a post as affinity labels"""
+    return tuple(sorted({label for label in (tags, topics) if label}))
+
+
+class FeedRanker:
+    """
+    Scores candidates for one viewer.
+
+    ``score = recency * (1 + velocity) * (1 + affinity)`` where recency halves
+    every ``FEED_HALF_LIFE_HOURS``, velocity is the log of weighted
+    engagement per hour of age, and affinity is the viewer's normalized
+    interest in the post's labels.
+    """
+
+    def __init__(
+        self,
+        half_life_hours: Optional[float] = None,
+        velocity_weight: float = 0.5,
+        affinity_weight: float = 1.0,
+    ):
+        self.half_life_hours = half_life_hours or getattr(
+            settings, "FEED_HALF_LIFE_HOURS", 24.0
+        )
+        self.velocity_weight = velocity_weight
+        self.affinity_weight = affinity_weight
+
+    def score(
+        self, candidate: Candidate, affinity: Dict[str, float], now: float
+    ) -> float:
+        age_hours = max(0.0, now - candidate.created_at) / 3600
+        recency = 0.5 ** (age_hours / self.half_life_hours)
+        engagement = (
+            candidate.reactions + 2 * candidate.comments + 0.05 * candidate.views
+        )
+        velocity = math.log1p(engagement / (age_hours + 2))
+        interest = sum(affinity.get(label, 0.0) for label in candidate.labels)
+        return (
+            recency
+            * (1 + self.velocity_weight * velocity)
+            * (1 + self.affinity_weight * interest)
+        )
+
+    def rank(
+        self,
+        candidates: Iterable[Candidate],
+        affinity: Dict[str, float],
+        now: Optional[float] = None,
+    ) -> List[Tuple[float, int]]:
+        """``(score, post_id)`` pairs, best first"""
+        now = now if now is not None else time.time()
+        scored = [
+            (self.score(candidate, affinity, now), candidate.post_id)
+            for candidate in candidates
+        ]
+        scored.sort(reverse=True)
+        return scored
+
+
+def user_affinity(user_id: int) -> Dict[str, float]:
+    """
+    Normalized label weights from the user's recent reactions and comments.
+
+    Cached for ``FEED_AFFINITY_CACHE_TIMEOUT`` seconds; the strongest label
+    has weight 1.0.
+    """
+    cache_key = f"feed_affinity_{user_id}"
+    affinity = cache.get(cache_key)
+    if affinity is not None:
+        return affinity
+
+    since = timezone.now() - timedelta(days=getattr(settings, "FEED_AFFINITY_DAYS", 30))
+    reacted = Reaction.objects.filter(
+        user_id=user_id,
+        content_type=ContentType.objects.get_for_model(Post),
+        created_at__gte=since,
+    ).values("object_id")
+    counts = Counter()
+    for tags, topics in Post.objects.filter(pk__in=reacted).values_list(
+        "tags", "topics"
+    ):
+        counts.update(post_labels(tags, topics))
+    for tags, topics in Comment.objects.filter(
+        author_id=user_id, created_at__gte=since
+    ).values_list("post__tags", "post__topics"):
+        # Commenting is a stronger signal than reacting
+        for label in post_labels(tags, topics):
+            counts[label] += 2
+
+    strongest = max(counts.values(), default=0)
+    affinity = {label: count / strongest for label, count in counts.items()}
+    cache.set(
+        cache_key, affinity, getattr(settings, "FEED_AFFINITY_CACHE_TIMEOUT", 600)
+    )
+    return affinity
+
+
+def encode_cursor(score: float, post_id: int) -> str:
+    return f"{score!r}:{post_id}"
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    score, post_id = cursor.rsplit(":", 1)
+    return float(score), int(post_id)
+
+
+class FeedTimelineService:
+    """Per-user ranked timelines in Redis sorted sets"""
+
+    def __init__(self, client=None, prefix: str = "feed", ranker=None):
+        self._client = client
+        self.prefix = prefix
+        self.ranker = ranker or FeedRanker()
+        self.timeline_size = getattr(settings, "FEED_TIMELINE_SIZE", 500)
+        self.timeline_ttl = getattr(settings, "FEED_TIMELINE_TTL", 900)
+        self.refresh_after = getattr(settings, "FEED_TIMELINE_REFRESH", 60)
+        self.fanout_limit = getattr(settings, "FEED_FANOUT_LIMIT", 5000)
+        self.candidate_days = getattr(settings, "FEED_CANDIDATE_DAYS", 7)
+        self.index_size = getattr(settings, "FEED_INDEX_SIZE", 2000)
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_redis_connection("default")
+        return self._client
+
+    # Keys
+
+    def timeline_key(self, user_id: int) -> str:
+        return f"{self.prefix}:timeline:{user_id}"
+
+    def recent_key(self) -> str:
+        return f"{self.prefix}:recent"
+
+    def label_key(self, label: str) -> str:
+        return f"{self.prefix}:label:{label}"
+
+    def audience_key(self, label: str) -> str:
+        return f"{self.prefix}:audience:{label}"
+
+    # Write path
+
+    def index_post(self, candidate: Candidate) -> None:
+        """Add a post to the global and per-label recency indexes"""
+        pipe = self.client.pipeline(transaction=False)
+        for key in [self.recent_key()] + [
+            self.label_key(label) for label in candidate.labels
+        ]:
+            pipe.zadd(key, {candidate.post_id: candidate.created_at})
+            pipe.zremrangebyrank(key, 0, -self.index_size - 1)
+        pipe.execute()
+
+    def record_interaction(self, user_id: int, labels: Sequence[str]) -> None:
+        """Remember that ``user_id`` engaged with ``labels`` (the fan-out audience)"""
+        now = time.time()
+        cutoff = now - getattr(settings, "FEED_AFFINITY_DAYS", 30) * 86400
+        pipe = self.client.pipeline(transaction=False)
+        for label in labels:
+            pipe.zadd(self.audience_key(label), {user_id: now})
+            pipe.zremrangebyscore(self.audience_key(label), "-inf", cutoff)
+        pipe.execute()
+
+    def fan_out(self, candidate: Candidate) -> int:
+        """
+        Index a new post and push it into the live timelines of its audience.
+
+        Audiences above ``FEED_FANOUT_LIMIT`` are skipped: those readers pick
+        the post up from the indexes when their timeline is rebuilt. Returns
+        the number of timelines written.
+        """
+        self.index_post(candidate)
+
+        audience = set()
+        for label in candidate.labels:
+            key = self.audience_key(label)
+            if self.client.zcard(key) > self.fanout_limit:
+                logger.debug(f"Post {candidate.post_id}: '{label}' audience too large")
+                return 0
+            audience.update(int(user_id) for user_id in self.client.zrange(key, 0, -1))
+        audience.discard(candidate.author_id)
+        if not audience:
+            return 0
+
+        # Only users with a live timeline; the rest will rebuild on read
+        audience = list(audience)
+        pipe = self.client.pipeline(transaction=False)
+        for user_id in audience:
+            pipe.exists(self.timeline_key(user_id))
+        live = [user_id for user_id, exists in zip(audience, pipe.execute()) if exists]
+
+        now = time.time()
+        affinities = cache.get_many([f"feed_affinity_{user_id}" for user_id in live])
+        pipe = self.client.pipeline(transaction=False)
+        for user_id in live:
+            affinity = affinities.get(f"feed_affinity_{user_id}", {})
+            key = self.timeline_key(user_id)
+            pipe.zadd(
+                key, {candidate.post_id: self.ranker.score(candidate, affinity, now)}
+            )
+            pipe.zremrangebyrank(key, 0, -self.timeline_size - 1)
+        pipe.execute()
+        return len(live)
+
+    # Read path
+
+    def page(
+        self, user_id: int, cursor: Optional[str] = None, limit: int = 20
+    ) -> Tuple[List[int], Optional[str]]:
+        """
+        One page of the user's timeline as ``(post_ids, next_cursor)``.
+
+        The cursor is the ``(score, post_id)`` of the last item served, so
+        each page is a single ``ZREVRANGEBYSCORE`` regardless of depth. The
+        timeline is (re)built when missing, or when the first page is
+        requested more than ``FEED_TIMELINE_REFRESH`` seconds after the last
+        build.
+        """
+        key = self.timeline_key(user_id)
+        remaining = self.client.ttl(key)
+        if remaining < 0 or (
+            cursor is None and remaining < self.timeline_ttl - self.refresh_after
+        ):
+            self.rebuild(user_id)
+
+        if cursor:
+            max_score, last_id = decode_cursor(cursor)
+        else:
+            max_score, last_id = "+inf", None
+
+        # Rows tied with the cursor score that were already served are
+        # skipped, so keep reading until the page is full
+        page, start, batch = [], 0, limit + 10
+        while len(page) < limit:
+            rows = self.client.zrevrangebyscore(
+                key, max_score, "-inf", start=start, num=batch, withscores=True
+            )
+            for member, score in rows:
+                if score == float("-inf"):
+                    rows = []  # placeholder of an empty timeline
+                    break
+                post_id = int(member)
+                # Equal scores come back in descending member order
+                if score == max_score and last_id is not None:
+                    if str(post_id) >= str(last_id):
+                        continue
+                page.append((score, post_id))
+                if len(page) == limit:
+                    break
+            if len(rows) < batch:
+                break
+            start += batch
+
+        next_cursor = encode_cursor(*page[-1]) if len(page) == limit else None
+        return [post_id for _, post_id in page], next_cursor
+
+    def rebuild(self, user_id: int, affinity: Optional[Dict[str, float]] = None) -> int:
+        """Re-rank the user's candidate posts into their timeline"""
+        if affinity is None:
+            affinity = user_affinity(user_id)
+        top_labels = sorted(affinity, key=affinity.get, reverse=True)[:5]
+        per_source = self.timeline_size
+
+        pipe = self.client.pipeline(transaction=False)
+        pipe.zrevrange(self.recent_key(), 0, per_source - 1)
+        for label in top_labels:
+            pipe.zrevrange(self.label_key(label), 0, per_source - 1)
+        post_ids = {int(member) for members in pipe.execute() for member in members}
+
+        candidates = self.load_candidates(post_ids)
+        ranked = self.ranker.rank(candidates, affinity)[: self.timeline_size]
+
+        key = self.timeline_key(user_id)
+        pipe = self.client.pipeline()
+        pipe.delete(key)
+        if ranked:
+            pipe.zadd(key, {post_id: score for score, post_id in ranked})
+        else:
+            # Remember "empty" briefly so idle users do not rebuild every request
+            pipe.zadd(key, {0: float("-inf")})
+        pipe.expire(key, self.timeline_ttl)
+        pipe.execute()
+        return len(ranked)
+
+    def load_candidates(self, post_ids: Iterable[int]) -> List[Candidate]:
+        """
+        Candidate rows for ``post_ids``; when the indexes are cold, fall back
+        to posts from the last ``FEED_CANDIDATE_DAYS`` days.
+        """
+        post_ids = list(post_ids)
+        queryset = Post.objects.all()
+        if post_ids:
+            queryset = queryset.filter(pk__in=post_ids)
+        else:
+            since = timezone.now() - timedelta(days=self.candidate_days)
+            queryset = queryset.filter(created_at__gte=since).order_by("-created_at")[
+                : self.timeline_size * 2
+            ]
+
+        return [
+            Candidate(
+                post_id=pk,
+                author_id=author_id,
+                created_at=created_at.timestamp(),
+                reactions=reactions,
+                comments=comments,
+                views=views,
+                labels=post_labels(tags, topics),
+            )
+            for pk, author_id, created_at, reactions, comments, views, tags, topics in queryset.values_list(
+                "pk",
+                "author_id",
+                "created_at",
+                "reactions_count",
+                "comments_count",
+                "views_count",
+                "tags",
+                "topics",
+            )
+        ]
+
+
+def candidate_for(post: Post) -> Candidate:
+    return Candidate(
+        post_id=post.pk,
+        author_id=post.author_id,
+        created_at=post.created_at.timestamp(),
+        reactions=post.reactions_count,
+        comments=post.comments_count,
+        views=post.views_count,
+        labels=post_labels(post.tags, post.topics),
+    )
+
+
+timeline_service = FeedTimelineService()
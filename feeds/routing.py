@@ -0,0 +1,9 @@
+# feeds/routing.py
+from django.urls import path
+
+from .consumers import PollResultsConsumer
+
+websocket_urlpatterns = [
+    # Live results of one poll
+    path("ws/polls/<int:post_id>/", PollResultsConsumer.as_asgi()),
+]
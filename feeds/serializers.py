@@ -1,11 +1,55 @@
 # feeds/serializers.py
+from django.conf import settings
 from rest_framework import serializers
-from feeds.models import Post, Comment, Topic, Reaction, PollOption
+from feeds.models import Post, Comment, Topic, Reaction, PollOption, LabelStats
+from feeds.counters import counter_value
+from feeds.loaders import get_loader
 from django.contrib.contenttypes.models import ContentType
 from media_handler.models import MediaFile
 from media_handler.serializers import MediaFileSerializer
 
 
+class FeedListSerializer(serializers.ListSerializer):
+    """Primes the page-level batch loader with every item before serializing"""
+
+    def to_representation(self, data):
+        items = list(data.all() if hasattr(data, "all") else data)
+        loader = get_loader(self.context)
+        if loader is not None:
+            # Comment previews attached by the feed queryset share the batch
+            previews = [
+                comment
+                for item in items
+                for comment in getattr(item, "preview_comments", ())
+            ]
+            loader.prime(items + previews)
+        return super().to_representation(items)
+
+
+def resolve_profile_pic(serializer, user):
+    """Author avatar URL, batch-loaded when a feed loader is available"""
+    loader = serializer.context.get("feed_loader")
+    if loader is not None:
+        url = loader.avatar_url(user.pk)
+    else:
+        url = None
+        if hasattr(user, "patient_profile") and getattr(
+            user.patient_profile, "profile_pic", None
+        ):
+            url = user.patient_profile.profile_pic.url
+        elif hasattr(user, "profile") and getattr(user.profile, "profile_image", None):
+            url = user.profile.profile_image.url
+        elif hasattr(user, "therapist_profile") and getattr(
+            user.therapist_profile, "profile_picture", None
+        ):
+            url = user.therapist_profile.profile_picture.url
+        elif hasattr(user, "profile_picture") and user.profile_picture:
+            url = user.profile_picture.url
+    if url and serializer.context.get("request"):
+        url = serializer.context["request"].build_absolute_uri(url)
+    return url
+
+
 class TopicSerializer(serializers.ModelSerializer):
     """Serializer for post topics"""
 
@@ -28,6 +72,39 @@ class TopicSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
+class LabelStatsSerializer(serializers.ModelSerializer):
+    """Precomputed counters and trending score of a tag or topic"""
+
+    posts_count = serializers.SerializerMethodField()
+    comments_count = serializers.SerializerMethodField()
+    reactions_count = serializers.SerializerMethodField()
+    trending_score = serializers.SerializerMethodField()
+
+    class Meta:
+        model = LabelStats
+        fields = [
+            "kind",
+            "label",
+            "posts_count",
+            "comments_count",
+            "reactions_count",
+            "trending_score",
+        ]
+
+    def get_posts_count(self, obj):
+        return counter_value(obj, "posts_count")
+
+    def get_comments_count(self, obj):
+        return counter_value(obj, "comments_count")
+
+    def get_reactions_count(self, obj):
+        return counter_value(obj, "reactions_count")
+
+    def get_trending_score(self, obj):
+        """Live score when the view attached one, else the last snapshot"""
+        return getattr(obj, "live_trending_score", obj.trending_score)
+
+
 class ReactionSerializer(serializers.ModelSerializer):
     user = serializers.SerializerMethodField()
 
@@ -81,7 +158,7 @@ class CommentSerializer(serializers.ModelSerializer):
     author_profile_pic = serializers.SerializerMethodField()
     author_user_type = serializers.CharField(source="author.user_type", read_only=True)
     reactions_count = serializers.SerializerMethodField()
-    replies_count = serializers.IntegerField(source="replies.count", read_only=True)
+    replies_count = serializers.SerializerMethodField()
     current_user_reaction = serializers.SerializerMethodField()
 
     class Meta:
@@ -103,35 +180,26 @@ class CommentSerializer(serializers.ModelSerializer):
             "current_user_reaction",
         ]
         read_only_fields = ["author", "created_at", "updated_at", "is_edited"]
+        list_serializer_class = FeedListSerializer
 
     def get_author_name(self, obj):
         return obj.author.get_full_name() or obj.author.username
 
     def get_author_profile_pic(self, obj):
-        user = obj.author
-        url = None
-        if hasattr(user, "patient_profile") and getattr(
-            user.patient_profile, "profile_pic", None
-        ):
-            url = user.patient_profile.profile_pic.url
-        elif hasattr(user, "profile") and getattr(user.profile, "profile_image", None):
-            url = user.profile.profile_image.url
-        elif hasattr(user, "therapist_profile") and getattr(
-            user.therapist_profile, "profile_picture", None
-        ):
-            url = user.therapist_profile.profile_picture.url
-        elif hasattr(user, "profile_picture") and user.profile_picture:
-            url = user.profile_picture.url
-        if url and self.context.get("request"):
-            url = self.context["request"].build_absolute_uri(url)
-        return url
+        return resolve_profile_pic(self, obj.author)
 
     def get_reactions_count(self, obj):
-        return obj.reactions_count
+        return counter_value(obj, "reactions_count")
+
+    def get_replies_count(self, obj):
+        return counter_value(obj, "replies_count")
 
     def get_current_user_reaction(self, obj):
         """Get the current user's reaction to this comment if any"""
         request = self.context.get("request")
+        loader = self.context.get("feed_loader")
+        if loader is not None:
+            return loader.user_reaction(obj)
         if request and request.user.is_authenticated:
             content_type = ContentType.objects.get_for_model(Comment)
             try:
@@ -149,10 +217,18 @@ class CommentSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
+class PollVoteActionSerializer(serializers.Serializer):
+    """Dedicated serializer for poll votes"""
+
+    option = serializers.IntegerField(
+        required=True, help_text="Id of the poll option to vote for"
+    )
+
+
 class PollOptionSerializer(serializers.ModelSerializer):
     """Serializer for poll options"""
 
-    votes_count = serializers.IntegerField(source="votes.count", read_only=True)
+    votes_count = serializers.SerializerMethodField()
     user_has_voted = serializers.SerializerMethodField()
 
     class Meta:
@@ -160,9 +236,15 @@ class PollOptionSerializer(serializers.ModelSerializer):
         fields = ["id", "post", "option_text", "votes_count", "user_has_voted"]
         read_only_fields = ["votes_count"]
 
+    def get_votes_count(self, obj):
+        return counter_value(obj, "votes_count")
+
     def get_user_has_voted(self, obj):
         """Check if current user has voted for this option"""
         request = self.context.get("request")
+        loader = self.context.get("feed_loader")
+        if loader is not None:
+            return loader.user_has_voted(obj)
         if request and request.user.is_authenticated:
             return obj.votes.filter(user=request.user).exists()
         return False
@@ -176,6 +258,7 @@ class PostSerializer(serializers.ModelSerializer):
     reactions_summary = serializers.SerializerMethodField()
     current_user_reaction = serializers.SerializerMethodField()
     comments_count = serializers.SerializerMethodField()
+    views_count = serializers.SerializerMethodField()
     author_name = serializers.SerializerMethodField()
     author_profile_pic = serializers.SerializerMethodField()
     author_user_type = serializers.CharField(source="author.user_type", read_only=True)
@@ -218,14 +301,21 @@ class PostSerializer(serializers.ModelSerializer):
             "updated_at",
             "views_count",
         ]
+        list_serializer_class = FeedListSerializer
 
     def get_reactions_summary(self, obj):
         """Get detailed reactions summary"""
+        loader = self.context.get("feed_loader")
+        if loader is not None:
+            return loader.reactions_summary(obj)
         return obj.get_reactions_summary()
 
     def get_current_user_reaction(self, obj):
         """Get current user's reaction to this post"""
         request = self.context.get("request")
+        loader = self.context.get("feed_loader")
+        if loader is not None:
+            return loader.user_reaction(obj)
         if request and request.user.is_authenticated:
             content_type = ContentType.objects.get_for_model(Post)
             try:
@@ -239,13 +329,15 @@ class PostSerializer(serializers.ModelSerializer):
 
     def get_total_reactions(self, obj):
         """Get total reaction count"""
-        return obj.reactions.count()
+        return counter_value(obj, "reactions_count")
 
     def get_is_liked_by_user(self, obj):
         """Check if current user liked this post"""
         request = self.context.get("request")
+        loader = self.context.get("feed_loader")
+        if loader is not None:
+            return loader.user_reaction(obj) == "like"
         if request and request.user.is_authenticated:
-            content_type = ContentType.objects.get_for_model(Post)
             return obj.reactions.filter(
                 user=request.user, reaction_type="like"
             ).exists()
@@ -253,7 +345,10 @@ class PostSerializer(serializers.ModelSerializer):
 
     def get_comments_count(self, obj):
         """Get total comments count"""
-        return obj.comments.count()
+        return counter_value(obj, "comments_count")
+
+    def get_views_count(self, obj):
+        return counter_value(obj, "views_count")
 
     def get_author_name(self, obj):
         return obj.author.get_full_name() or obj.author.username
@@ -274,23 +369,7 @@ class PostSerializer(serializers.ModelSerializer):
         }
 
     def get_author_profile_pic(self, obj):
-        user = obj.author
-        url = None
-        if hasattr(user, "patient_profile") and getattr(
-            user.patient_profile, "profile_pic", None
-        ):
-            url = user.patient_profile.profile_pic.url
-        elif hasattr(user, "profile") and getattr(user.profile, "profile_image", None):
-            url = user.profile.profile_image.url
-        elif hasattr(user, "therapist_profile") and getattr(
-            user.therapist_profile, "profile_picture", None
-        ):
-            url = user.therapist_profile.profile_picture.url
-        elif hasattr(user, "profile_picture") and user.profile_picture:
-            url = user.profile_picture.url
-        if url and self.context.get("request"):
-            url = self.context["request"].build_absolute_uri(url)
-        return url
+        return resolve_profile_pic(self, obj.author)
 
     def create(self, validated_data):
         file = validated_data.pop("file", None)
@@ -336,9 +415,30 @@ class PostSerializer(serializers.ModelSerializer):
         return data
 
 
+class PostListSerializer(PostSerializer):
+    """Feed page serializer: counters plus a preview of the latest comments"""
+
+    latest_comments = serializers.SerializerMethodField()
+
+    class Meta(PostSerializer.Meta):
+        fields = PostSerializer.Meta.fields + ["latest_comments"]
+
+    def get_latest_comments(self, obj):
+        """Latest comments prefetched by the feed queryset"""
+        comments = getattr(obj, "preview_comments", None)
+        if comments is None:
+            limit = getattr(settings, "FEED_PREVIEW_COMMENTS", 3)
+            comments = obj.comments.select_related("author").order_by("-created_at")
+            comments = comments[:limit]
+        return CommentSerializer(comments, many=True, context=self.context).data
+
+
 class PostDetailSerializer(PostSerializer):
     """Serializer for post detail view with comments"""
 
+    COMMENTS_LIMIT = 10
+    REACTIONS_LIMIT = 20
+
     comments = serializers.SerializerMethodField()
     reactions = serializers.SerializerMethodField()
 
@@ -347,10 +447,20 @@ class PostDetailSerializer(PostSerializer):
 
     def get_comments(self, obj):
         """Get top-level comments on the post"""
-        comments = obj.comments.filter(parent=None).order_by("-created_at")[:10]
+        comments = getattr(obj, "detail_comments", None)
+        if comments is None:
+            comments = (
+                obj.comments.filter(parent=None)
+                .select_related("author")
+                .order_by("-created_at")[: self.COMMENTS_LIMIT]
+            )
         return CommentSerializer(comments, many=True, context=self.context).data
 
     def get_reactions(self, obj):
-        """Get all reactions on the post"""
-        reactions = obj.reactions.all().order_by("-created_at")[:20]
+        """Get the most recent reactions on the post"""
+        reactions = getattr(obj, "detail_reactions", None)
+        if reactions is None:
+            reactions = obj.reactions.select_related("user").order_by("-created_at")[
+                : self.REACTIONS_LIMIT
+            ]
         return ReactionSerializer(reactions, many=True, context=self.context).data
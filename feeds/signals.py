@@ -1,8 +1,20 @@
 # feeds/signals.py
-from django.db.models.signals import post_save
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from feeds.models import Post, Comment, Reaction, PollVote
-from notifications.models import Notification, NotificationType
+from feeds import counters, labels, polls, tasks
+from feeds.models import (
+    Post,
+    PostLabel,
+    LabelStats,
+    Comment,
+    Reaction,
+    PollOption,
+    PollVote,
+)
+from notifications import fanout
+from notifications.models import NotificationType
 from django.core.cache import cache
 
 import logging
@@ -69,142 +81,170 @@ def notify_on_new_post(sender, instance, created, **kwargs):
 @receiver(post_save, sender=Comment)
 def notify_on_comment(sender, instance, created, **kwargs):
     """
-    Send notifications when a new comment is created
+    Notify the post author of a new comment, and the parent comment's author
+    of a reply. Delivery is asynchronous and coalesced (notifications.fanout).
     """
     if created:
-        try:
-            # Notify the post author if someone else commented
-            if instance.post.author != instance.author:
-                # Get or create notification type for comments
-                comment_notification_type = get_or_create_notification_type(
-                    2, "post_comment", "Comment on your post"
-                )
-
-                Notification.objects.create(
-                    user=instance.post.author,
-                    notification_type=comment_notification_type,
-                    title=f"{instance.author.get_full_name() or instance.author.username} commented on your post",
-                    message=instance.content[
-                        :100
-                    ],  # Changed from 'content' to 'message'
-                    read=False,  # Changed from 'is_read' to 'read'
-                )
-
-                # Clear cache for notification count
-                cache.delete(f"user_notifications_{instance.post.author.id}")
-                cache.delete(f"notification_count_{instance.post.author.id}")
-
-            # If this is a reply, notify the parent comment author
-            if instance.parent and instance.parent.author != instance.author:
-                # Get or create notification type for replies
-                reply_notification_type = get_or_create_notification_type(
-                    3, "comment_reply", "Reply to your comment"
-                )
-
-                Notification.objects.create(
-                    user=instance.parent.author,
-                    notification_type=reply_notification_type,
-                    title=f"{instance.author.get_full_name() or instance.author.username} replied to your comment",
-                    message=instance.content[
-                        :100
-                    ],  # Changed from 'content' to 'message'
-                    read=False,  # Changed from 'is_read' to 'read'
-                )
-
-                # Clear cache for notification count
-                cache.delete(f"user_notifications_{instance.parent.author.id}")
-                cache.delete(f"notification_count_{instance.parent.author.id}")
-
-        except Exception as e:
-            logger.error(
-                f"Error creating comment notification: {str(e)}", exc_info=True
+        excerpt = instance.content[:100]
+        fanout.notify("post_comment", instance.post_id, instance.author_id, excerpt)
+        if instance.parent_id:
+            fanout.notify(
+                "comment_reply", instance.parent_id, instance.author_id, excerpt
             )
 
 
 @receiver(post_save, sender=Reaction)
 def notify_on_reaction(sender, instance, created, **kwargs):
-    """
-    Send notifications when a new reaction is added
-    """
-    try:
-        content_object = instance.content_object
-
-        # Skip if no content object or if user is reacting to their own content
-        if not content_object or instance.user == getattr(
-            content_object, "author", None
-        ):
-            return
-
-        # Determine content type and create notification
-        if hasattr(content_object, "author"):
-            author = content_object.author
-
-            # Determine if it's a post or comment
-            is_post = hasattr(content_object, "post_type")
-            content_type = "post" if is_post else "comment"
-
-            # Get or create notification type for reactions
-            reaction_notification_type = get_or_create_notification_type(
-                1, "reaction", "Reaction to your content"
-            )
+    """Notify the author of the post or comment that got a new reaction"""
+    if not created:
+        return
+    model = _reaction_target(instance)
+    if model is not None:
+        fanout.notify(
+            "post_reaction" if model is Post else "comment_reaction",
+            instance.object_id,
+            instance.user_id,
+            instance.reaction_type,
+        )
 
-            # Create notification only once per content and user
-            Notification.objects.update_or_create(
-                user=author,
-                notification_type=reaction_notification_type,
-                object_id=instance.object_id,
-                content_type=instance.content_type,
-                defaults={
-                    "title": f"{instance.user.get_full_name() or instance.user.username} reacted to your {content_type}",
-                    "message": f"{instance.user.get_full_name() or instance.user.username} reacted with {instance.reaction_type}",
-                    "read": False,
-                },
-            )
 
-            # Clear cache for notification count
-            cache.delete(f"user_notifications_{author.id}")
-            cache.delete(f"notification_count_{author.id}")
+@receiver(post_save, sender=PollVote)
+def notify_on_poll_vote(sender, instance, created, **kwargs):
+    """Notify the poll author of a new vote"""
+    if created:
+        fanout.notify(
+            "poll_vote",
+            instance.poll_option_id,
+            instance.user_id,
+            instance.poll_option.option_text[:50],
+        )
+
+
+@receiver(post_save, sender=Comment)
+def count_new_comment(sender, instance, created, **kwargs):
+    """Keep comment and reply counters in step with new comments"""
+    if created:
+        counters.incr(Post, instance.post_id, "comments_count", 1)
+        if instance.parent_id:
+            counters.incr(Comment, instance.parent_id, "replies_count", 1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    counters.incr(Post, instance.post_id, "comments_count", -1)
+    if instance.parent_id:
+        counters.incr(Comment, instance.parent_id, "replies_count", -1)
+
+
+def _reaction_target(reaction):
+    """Model whose reactions_count tracks ``reaction``, if any"""
+    for model in (Post, Comment):
+        if reaction.content_type_id == ContentType.objects.get_for_model(model).id:
+            return model
+    return None
+
+
+@receiver(post_save, sender=Reaction)
+def count_new_reaction(sender, instance, created, **kwargs):
+    """Keep reaction counters in step with new reactions"""
+    model = _reaction_target(instance)
+    if created and model is not None:
+        counters.incr(model, instance.object_id, "reactions_count", 1)
+
 
-    except Exception as e:
-        logger.error(f"Error creating reaction notification: {str(e)}", exc_info=True)
+@receiver(post_delete, sender=Reaction)
+def count_deleted_reaction(sender, instance, **kwargs):
+    model = _reaction_target(instance)
+    if model is not None:
+        counters.incr(model, instance.object_id, "reactions_count", -1)
 
 
 @receiver(post_save, sender=PollVote)
-def notify_on_poll_vote(sender, instance, created, **kwargs):
-    """
-    Send notifications when a user votes on a poll
-    """
+def count_new_vote(sender, instance, created, **kwargs):
+    """Votes saved outside feeds.polls; their Redis tally is reconciled later"""
     if created:
-        try:
-            post = instance.poll_option.post
+        counters.incr(PollOption, instance.poll_option_id, "votes_count", 1)
+    polls.mark_changed(instance.post_id)
 
-            # Skip if user is voting on their own poll
-            if instance.user == post.author:
-                return
 
-            # Get or create notification type for poll votes
-            poll_notification_type = get_or_create_notification_type(
-                5, "poll_vote", "Vote on your poll"
-            )
+@receiver(post_delete, sender=PollVote)
+def count_deleted_vote(sender, instance, **kwargs):
+    counters.incr(PollOption, instance.poll_option_id, "votes_count", -1)
+    polls.mark_changed(instance.post_id)
 
-            # Create notification
-            Notification.objects.create(
-                user=post.author,
-                notification_type=poll_notification_type,
-                title=f"{instance.user.get_full_name() or instance.user.username} voted on your poll",
-                message=f"Option: {instance.poll_option.option_text[:50]}",
-                read=False,
-                metadata={
-                    "poll_option_id": instance.poll_option.id,
-                    "post_id": post.id,
-                },
-            )
 
-            # Clear cache for notification count
-            cache.delete(f"user_notifications_{post.author.id}")
-            cache.delete(f"notification_count_{post.author.id}")
+def _schedule(task, *args):
+    """Queue a feed timeline task once the surrounding transaction commits"""
 
+    def send():
+        try:
+            task.delay(*args)
         except Exception as e:
-            logger.error(
-                f"Error creating poll vote notification: {str(e)}", exc_info=True
-            )
+            logger.warning(f"Could not queue {task.name}: {e}")
+
+    transaction.on_commit(send)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_new_post(sender, instance, created, **kwargs):
+    if created:
+        _schedule(tasks.fan_out_post, instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def track_comment_interaction(sender, instance, created, **kwargs):
+    if created:
+        _schedule(tasks.record_feed_interaction, instance.author_id, instance.post_id)
+
+
+@receiver(post_save, sender=Reaction)
+def track_reaction_interaction(sender, instance, created, **kwargs):
+    if created and _reaction_target(instance) is Post:
+        _schedule(tasks.record_feed_interaction, instance.user_id, instance.object_id)
+
+
+@receiver(post_save, sender=Post)
+def index_post_labels(sender, instance, created, **kwargs):
+    """Keep the tag/topic index and label stats in step with the post"""
+    update_fields = kwargs.get("update_fields")
+    if update_fields is not None and not {"tags", "topics"} & set(update_fields):
+        return
+    if created or labels.labels_changed(instance):
+        labels.sync_post_labels(instance, created=created)
+
+
+@receiver(post_delete, sender=LabelStats)
+def forget_label_stats(sender, instance, **kwargs):
+    labels.forget_stats_id(instance)
+
+
+@receiver(post_delete, sender=PostLabel)
+def count_removed_label(sender, instance, **kwargs):
+    labels.label_removed(instance)
+
+
+@receiver(post_save, sender=Comment)
+def count_label_comment(sender, instance, created, **kwargs):
+    if created:
+        labels.record_activity(
+            instance.post_id, "comments_count", 1, labels.COMMENT_WEIGHT
+        )
+
+
+@receiver(post_delete, sender=Comment)
+def count_label_deleted_comment(sender, instance, **kwargs):
+    labels.record_activity(instance.post_id, "comments_count", -1)
+
+
+@receiver(post_save, sender=Reaction)
+def count_label_reaction(sender, instance, created, **kwargs):
+    if created and _reaction_target(instance) is Post:
+        labels.record_activity(
+            instance.object_id, "reactions_count", 1, labels.REACTION_WEIGHT
+        )
+
+
+@receiver(post_delete, sender=Reaction)
+def count_label_deleted_reaction(sender, instance, **kwargs):
+    if _reaction_target(instance) is Post:
+        labels.record_activity(instance.object_id, "reactions_count", -1)
@@ -0,0 +1,59 @@
+# feeds/tasks.py
+import logging
+
+from celery import shared_task
+
+from feeds.counters import flush_counters
+from feeds.labels import refresh_trending
+from feeds.models import Post
+from feeds.polls import push_results, reconcile
+from feeds.ranking import candidate_for, post_labels, timeline_service
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def flush_feed_counters():
+    """Write pending engagement counter deltas from Redis to the database"""
+    updated = flush_counters()
+    if updated:
+        logger.info(f"Flushed {updated} feed counters")
+    return updated
+
+
+@shared_task
+def refresh_trending_labels():
+    """Rescale the decayed trending scores and snapshot them to LabelStats"""
+    return refresh_trending()
+
+
+@shared_task
+def push_poll_results(post_id):
+    """Send a poll's accumulated result changes to its WebSocket subscribers"""
+    return push_results(post_id)
+
+
+@shared_task
+def reconcile_poll_tallies():
+    """Rebuild Redis tallies of quiet polls from PollVote rows"""
+    drifted = reconcile()
+    if drifted:
+        logger.warning(f"Rebuilt drifted tallies of {drifted} polls")
+    return drifted
+
+
+@shared_task
+def fan_out_post(post_id):
+    """Index a new post and push it into interested users' timelines"""
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None:
+        return 0
+    return timeline_service.fan_out(candidate_for(post))
+
+
+@shared_task
+def record_feed_interaction(user_id, post_id):
+    """Add the user to the fan-out audience of the post's tag and topic"""
+    labels = Post.objects.filter(pk=post_id).values_list("tags", "topics").first()
+    if labels:
+        timeline_service.record_interaction(user_id, post_labels(*labels))
@@ -0,0 +1,335 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from feeds import counters, labels, polls
+from feeds.models import (
+    Comment,
+    CounterFlush,
+    LabelStats,
+    PollOption,
+    PollVote,
+    Post,
+    PostLabel,
+    Reaction,
+)
+from feeds.views import PostViewSet
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    FEED_COUNTERS_WRITE_BEHIND=False,
+)
+class FeedQueryCountTest(TestCase):
+    """Rendering a feed page costs the same number of queries for any page size"""
+
+    def setUp(self):
+        User = get_user_model()
+        self.viewer = User.objects.create_user(
+            username="viewer", email="viewer@example.com", password="x"
+        )
+        self.authors = [
+            User.objects.create_user(
+                username=f"author{i}", email=f"author{i}@example.com", password="x"
+            )
+            for i in range(3)
+        ]
+        self.post_type = ContentType.objects.get_for_model(Post)
+
+    def create_posts(self, count):
+        for i in range(count):
+            author = self.authors[i % len(self.authors)]
+            post = Post.objects.create(
+                author=author, content=f"post {i}", tags="mental_health"
+            )
+            for j in range(4):
+                comment = Comment.objects.create(
+                    post=post, author=self.authors[j % 3], content=f"comment {j}"
+                )
+                Comment.objects.create(
+                    post=post, author=author, content="reply", parent=comment
+                )
+            Reaction.objects.create(
+                user=self.viewer,
+                reaction_type="like",
+                content_type=self.post_type,
+                object_id=post.pk,
+            )
+            if i % 2:
+                options = [
+                    PollOption.objects.create(post=post, option_text=text)
+                    for text in ("yes", "no")
+                ]
+                PollVote.objects.create(
+                    post=post, poll_option=options[0], user=self.viewer
+                )
+
+    def render_page(self, limit):
+        request = APIRequestFactory().get("/feeds/posts/", {"limit": limit})
+        force_authenticate(request, user=self.viewer)
+        response = PostViewSet.as_view({"get": "list"})(request)
+        response.render()
+        self.assertEqual(response.status_code, 200)
+        return response.data["results"]
+
+    def test_page_query_count_is_constant(self):
+        self.create_posts(2)
+        self.render_page(2)  # Warm per-process caches (content types)
+        with CaptureQueriesContext(connection) as small_page:
+            self.assertEqual(len(self.render_page(2)), 2)
+
+        self.create_posts(10)
+        with self.assertNumQueries(len(small_page.captured_queries)):
+            results = self.render_page(12)
+        self.assertEqual(len(results), 12)
+        self.assertTrue(
+            all(post["current_user_reaction"] == "like" for post in results)
+        )
+
+
+class FakeRedisHashes:
+    """The few hash commands ``feeds.counters`` uses, on plain dicts"""
+
+    def __init__(self):
+        self.hashes = {}
+
+    def exists(self, key):
+        return key in self.hashes
+
+    def renamenx(self, src, dst):
+        if dst in self.hashes:
+            return False
+        self.hashes[dst] = self.hashes.pop(src)
+        return True
+
+    def hincrby(self, key, field, delta):
+        fields = self.hashes.setdefault(key, {})
+        fields[field.encode()] = fields.get(field.encode(), 0) + delta
+
+    def hsetnx(self, key, field, value):
+        self.hashes.setdefault(key, {}).setdefault(field.encode(), value.encode())
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def delete(self, key):
+        self.hashes.pop(key, None)
+
+
+class CounterFlushTest(TestCase):
+    def test_retried_flush_is_not_applied_twice(self):
+        author = get_user_model().objects.create_user(
+            username="author", email="author@example.com", password="x"
+        )
+        post = Post.objects.create(author=author, content="post", tags="therapy")
+        client = FakeRedisHashes()
+        client.hincrby(counters.PENDING_KEY, f"post:{post.pk}:views_count", 3)
+
+        # Crash after the database commit, before the flushing key is deleted
+        delete = client.delete
+        client.delete = lambda key: None
+        self.assertEqual(counters._flush(client, 500), 1)
+        client.delete = delete
+        self.assertEqual(counters._flush(client, 500), 0)
+
+        post.refresh_from_db()
+        self.assertEqual(post.views_count, 3)
+        self.assertFalse(client.exists(counters.FLUSHING_KEY))
+        self.assertEqual(CounterFlush.objects.count(), 1)
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    FEED_COUNTERS_WRITE_BEHIND=False,
+)
+class LabelIndexTest(TestCase):
+    def setUp(self):
+        self.author = get_user_model().objects.create_user(
+            username="author", email="author@example.com", password="x"
+        )
+
+    def test_label_feed_is_ordered_by_the_index(self):
+        posts = [
+            Post.objects.create(author=self.author, content=str(i), tags="therapy")
+            for i in range(3)
+        ]
+        Post.objects.create(author=self.author, content="other", tags="wellness")
+        # The index order wins over the posts' own dates
+        PostLabel.objects.filter(post=posts[0]).update(
+            created_at=posts[2].created_at + timedelta(minutes=1)
+        )
+
+        request = APIRequestFactory().get("/feeds/posts/", {"tag": "Therapy"})
+        force_authenticate(request, user=self.author)
+        response = PostViewSet.as_view({"get": "list"})(request)
+        self.assertEqual(
+            [post["id"] for post in response.data["results"]],
+            [posts[0].pk, posts[2].pk, posts[1].pk],
+        )
+
+    def test_save_without_label_change_skips_the_index(self):
+        Post.objects.create(author=self.author, content="post", tags="therapy")
+        post = Post.objects.get()
+        post.content = "edited"
+        with CaptureQueriesContext(connection) as queries:
+            post.save()
+        self.assertFalse(
+            any("feeds_postlabel" in query["sql"] for query in queries.captured_queries)
+        )
+
+        post.tags = "wellness"
+        post.save()
+        self.assertEqual(
+            list(PostLabel.objects.values_list("kind", "label")),
+            [(PostLabel.KIND_TAG, "wellness")],
+        )
+
+    def test_stats_ids_are_cached_after_commit_only(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            ids = labels.stats_ids([(PostLabel.KIND_TAG, "anxiety")])
+        self.assertNotIn((PostLabel.KIND_TAG, "anxiety"), labels._stats_ids)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(
+            labels._stats_ids[(PostLabel.KIND_TAG, "anxiety")],
+            ids[(PostLabel.KIND_TAG, "anxiety")],
+        )
+
+        LabelStats.objects.filter(label="anxiety").get().delete()
+        self.assertNotIn((PostLabel.KIND_TAG, "anxiety"), labels._stats_ids)
+
+
+class FakePollRedis:
+    """Hashes plus Python versions of the ``feeds.polls`` vote and load scripts"""
+
+    def __init__(self):
+        self.hashes = {}
+        self.calls = 0
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def hget(self, key, field):
+        return self.hashes.get(key, {}).get(str(field))
+
+    def set(self, key, value, nx=False, px=None):
+        return True
+
+    def register_script(self, script):
+        return {polls.VOTE_SCRIPT: self.vote, polls.LOAD_SCRIPT: self.load}[script]
+
+    def incr(self, key, field, delta):
+        fields = self.hashes.setdefault(key, {})
+        fields[field] = fields.get(field, 0) + delta
+
+    def vote(self, keys, args):
+        self.calls += 1
+        tally, voters, deltas, _ = keys
+        user, option = str(args[0]), str(args[1])
+        if tally not in self.hashes:
+            return [-1, ""]
+        previous = self.hashes.setdefault(voters, {}).get(user, "")
+        if previous == option:
+            return [0, previous]
+        if previous:
+            self.incr(tally, previous, -1)
+            self.incr(deltas, previous, -1)
+        if option:
+            self.hashes[voters][user] = option
+            self.incr(tally, option, 1)
+            self.incr(deltas, option, 1)
+        else:
+            del self.hashes[voters][user]
+        return [1, previous]
+
+    def load(self, keys, args):
+        tally, voters = keys
+        count = int(args[2])
+        pairs = [str(arg) for arg in args[3:]]
+        self.hashes[tally] = {polls.LOADED_FIELD: 1}
+        self.hashes[tally].update(
+            (pairs[i], int(pairs[i + 1])) for i in range(0, count * 2, 2)
+        )
+        self.hashes[voters] = dict(
+            zip(pairs[count * 2 :: 2], pairs[count * 2 + 1 :: 2])
+        )
+        return 1
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    FEED_COUNTERS_WRITE_BEHIND=False,
+)
+class PollVoteTest(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        author = User.objects.create_user(
+            username="author", email="author@example.com", password="x"
+        )
+        self.voter = User.objects.create_user(
+            username="voter", email="voter@example.com", password="x"
+        )
+        self.post = Post.objects.create(author=author, content="poll", tags="therapy")
+        self.yes, self.no = (
+            PollOption.objects.create(post=self.post, option_text=text)
+            for text in ("yes", "no")
+        )
+        self.redis = FakePollRedis()
+        for target, value in (
+            ("feeds.polls._redis", lambda: self.redis),
+            ("feeds.tasks.push_poll_results.apply_async", mock.DEFAULT),
+            ("notifications.fanout.notify", mock.DEFAULT),
+        ):
+            patcher = mock.patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def assertTalliesMatchRows(self):
+        expected = {option.pk: option.votes.count() for option in (self.yes, self.no)}
+        self.assertEqual(
+            {
+                option["id"]: option["votes_count"]
+                for option in polls.results(self.post)["options"]
+            },
+            expected,
+        )
+        self.assertEqual(
+            dict(PollOption.objects.values_list("pk", "votes_count")), expected
+        )
+
+    def vote(self, option):
+        with self.captureOnCommitCallbacks(execute=True):
+            return polls.cast_vote(self.post, option.pk, self.voter)
+
+    def test_vote_change_and_retract(self):
+        self.assertEqual(self.vote(self.yes), {"changed": True, "previous": None})
+        self.assertTalliesMatchRows()
+        self.assertEqual(
+            self.vote(self.yes), {"changed": False, "previous": self.yes.pk}
+        )
+        self.assertEqual(self.vote(self.no), {"changed": True, "previous": self.yes.pk})
+        self.assertTalliesMatchRows()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(polls.retract_vote(self.post, self.voter))
+        self.assertFalse(PollVote.objects.exists())
+        self.assertTalliesMatchRows()
+
+    def test_rolled_back_vote_leaves_the_tally_alone(self):
+        self.vote(self.yes)
+        calls = self.redis.calls
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                polls.cast_vote(self.post, self.no.pk, self.voter)
+                raise RuntimeError("request failed")
+
+        self.assertEqual(self.redis.calls, calls)
+        self.assertEqual(PollVote.objects.get().poll_option, self.yes)
+        self.assertTalliesMatchRows()
@@ -52,6 +52,21 @@ urlpatterns = [
         PostViewSet.as_view({"get": "like_count"}),
         name="post-like-count",
     ),
+    path(
+        "posts/<int:pk>/vote/",
+        PostViewSet.as_view({"post": "vote"}),
+        name="post-vote",
+    ),
+    path(
+        "posts/<int:pk>/unvote/",
+        PostViewSet.as_view({"post": "unvote"}),
+        name="post-unvote",
+    ),
+    path(
+        "posts/<int:pk>/results/",
+        PostViewSet.as_view({"get": "results"}),
+        name="post-poll-results",
+    ),
     path(
         "posts/<int:pk>/comment_count/",
         PostViewSet.as_view({"get": "comment_count"}),
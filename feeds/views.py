@@ -1,5 +1,7 @@
 #feeds/views.py
-from django.db.models import F, Count, Prefetch
+from django.conf import settings
+from django.db.models import F, Prefetch, Window
+from django.db.models.functions import RowNumber
 from django.contrib.contenttypes.models import ContentType
 from rest_framework import viewsets, status, filters
 from rest_framework.permissions import IsAuthenticated
@@ -9,20 +11,22 @@ from rest_framework.pagination import LimitOffsetPagination  # updated import
 from drf_spectacular.utils import extend_schema, OpenApiResponse
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework.renderers import JSONRenderer, BrowsableAPIRenderer
-from rest_framework import serializers
-from django.db import transaction
-from django.core.cache import cache
 
-from feeds.models import Post, Comment, Topic, Reaction
+from feeds import counters, labels, polls
+from feeds.models import Post, Comment, Topic, Reaction, LabelStats, PostLabel
+from feeds.ranking import timeline_service
+from media_handler.models import MediaFile
 from feeds.serializers import (
     PostSerializer,
+    PostListSerializer,
     PostDetailSerializer,
     CommentSerializer,
     TopicSerializer,
+    LabelStatsSerializer,
+    PollVoteActionSerializer,
     ReactionActionSerializer,
     ReactionSerializer,
 )
-from notifications.models import Notification, NotificationType
 from .serializers import LikeToggleSerializer
 
 import logging
@@ -30,6 +34,26 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+def latest_per_group(queryset, group_field, limit, order_field="-created_at"):
+    """
+    Keep at most ``limit`` rows per ``group_field`` value, newest first.
+
+    Uses a ROW_NUMBER() window, so prefetching it costs the same whether a
+    post has three comments or thirty thousand.
+    """
+    order = F(order_field.lstrip("-"))
+    order = order.desc() if order_field.startswith("-") else order.asc()
+    return (
+        queryset.annotate(
+            group_rank=Window(
+                expression=RowNumber(), partition_by=F(group_field), order_by=order
+            )
+        )
+        .filter(group_rank__lte=limit)
+        .order_by(group_field, "group_rank")
+    )
+
+
 class FeedPagination(LimitOffsetPagination):
     default_limit = 10
     limit_query_param = "limit"
@@ -52,25 +76,64 @@ class PostViewSet(viewsets.ModelViewSet):
     def get_serializer_class(self):
         if self.action == "retrieve":
             return PostDetailSerializer
+        elif self.action in ("list", "home"):
+            return PostListSerializer
         elif self.action == "like":
             return LikeToggleSerializer
+        elif self.action == "react":
+            return ReactionActionSerializer
+        elif self.action == "vote":
+            return PollVoteActionSerializer
         return PostSerializer
 
     def get_queryset(self):
-        """Enhanced queryset with optimized loading"""
-        queryset = (
-            Post.objects.select_related("author")
-            .prefetch_related(
-                "media_files",
-                "reactions",
+        """
+        Feed pages get a slim queryset: counters come from the denormalized
+        columns and only the latest few comments are prefetched. The detail
+        view additionally prefetches what PostDetailSerializer renders.
+        """
+        queryset = Post.objects.select_related("author")
+
+        if self.action in ("list", "home"):
+            preview_size = getattr(settings, "FEED_PREVIEW_COMMENTS", 3)
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    "media_files", queryset=MediaFile.objects.select_related("blob")
+                ),
                 "poll_options",
-                Prefetch("comments", queryset=Comment.objects.select_related("author")),
+                Prefetch(
+                    "comments",
+                    queryset=latest_per_group(
+                        Comment.objects.select_related("author"), "post_id", preview_size
+                    ),
+                    to_attr="preview_comments",
+                ),
             )
-            .annotate(
-                total_reactions=Count("reactions", distinct=True),
-                total_comments=Count("comments", distinct=True),
+        elif self.action == "retrieve":
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    "media_files", queryset=MediaFile.objects.select_related("blob")
+                ),
+                "poll_options",
+                Prefetch(
+                    "comments",
+                    queryset=latest_per_group(
+                        Comment.objects.filter(parent=None).select_related("author"),
+                        "post_id",
+                        PostDetailSerializer.COMMENTS_LIMIT,
+                    ),
+                    to_attr="detail_comments",
+                ),
+                Prefetch(
+                    "reactions",
+                    queryset=latest_per_group(
+                        Reaction.objects.select_related("user"),
+                        "object_id",
+                        PostDetailSerializer.REACTIONS_LIMIT,
+                    ),
+                    to_attr="detail_reactions",
+                ),
             )
-        )
 
         # Apply filters
         author = self.request.query_params.get("author")
@@ -79,11 +142,23 @@ class PostViewSet(viewsets.ModelViewSet):
 
         return self._apply_filters(queryset)
 
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        params = self.request.query_params
+        # Label feeds page through the label index in its own date order
+        if (params.get("topic") or params.get("tag")) and not params.get(
+            filters.OrderingFilter.ordering_param
+        ):
+            queryset = queryset.order_by(labels.LABEL_ORDERING)
+        return queryset
+
     def _apply_filters(self, queryset):
-        # Filter by topic
-        topic_id = self.request.query_params.get("topic")
-        if topic_id:
-            queryset = queryset.filter(topics__id=topic_id)
+        # Filter by topic (a Topic id or name), through the label index
+        topic = self.request.query_params.get("topic")
+        if topic:
+            queryset = labels.with_label(
+                queryset, PostLabel.KIND_TOPIC, labels.resolve_topic(topic) or ""
+            )
 
         # Filter by author/user profile
         author_id = self.request.query_params.get("author")
@@ -95,10 +170,12 @@ class PostViewSet(viewsets.ModelViewSet):
         if post_type:
             queryset = queryset.filter(post_type=post_type)
 
-        # Filter by tags
+        # Filter by tags, through the label index
         tag = self.request.query_params.get("tag")
         if tag:
-            queryset = queryset.filter(tags__contains=[tag])
+            queryset = labels.with_label(
+                queryset, PostLabel.KIND_TAG, labels.normalize_label(tag)
+            )
 
         # Filter for polls only
         polls_only = self.request.query_params.get("polls_only")
@@ -108,9 +185,7 @@ class PostViewSet(viewsets.ModelViewSet):
         # Filter for minimum reactions count
         min_reactions = self.request.query_params.get("min_reactions")
         if min_reactions and min_reactions.isdigit():
-            queryset = queryset.annotate(total_reactions=Count("reactions")).filter(
-                total_reactions__gte=int(min_reactions)
-            )
+            queryset = queryset.filter(reactions_count__gte=int(min_reactions))
 
         return queryset
 
@@ -139,13 +214,37 @@ class PostViewSet(viewsets.ModelViewSet):
         )
         return Response(serializer.data)
 
+    @extend_schema(
+        description="Personalized, ranked home feed. Pass the returned "
+        "next_cursor as ?cursor= to get the following page.",
+        responses={200: PostListSerializer(many=True)},
+    )
+    @action(detail=False, methods=["get"])
+    def home(self, request):
+        limit = request.query_params.get("limit", "")
+        limit = int(limit) if limit.isdigit() else FeedPagination.default_limit
+        limit = max(1, min(limit, FeedPagination.max_limit))
+
+        try:
+            post_ids, next_cursor = timeline_service.page(
+                request.user.id, request.query_params.get("cursor"), limit
+            )
+        except ValueError:
+            return Response(
+                {"error": "Invalid cursor"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        posts = self.get_queryset().in_bulk(post_ids)
+        page = [posts[post_id] for post_id in post_ids if post_id in posts]
+        serializer = self.get_serializer(page, many=True, context={"request": request})
+        return Response({"results": serializer.data, "next_cursor": next_cursor})
+
     def retrieve(self, request, *args, **kwargs):
         """Enhanced retrieve with view count increment"""
         instance = self.get_object()
 
-        # Increment view count
-        Post.objects.filter(pk=instance.pk).update(views_count=F("views_count") + 1)
-        instance.refresh_from_db()
+        # Batched through the counter write-behind instead of a row UPDATE
+        counters.record_view(instance.pk)
 
         serializer = self.get_serializer(instance, context={"request": request})
         return Response(serializer.data)
@@ -200,14 +299,7 @@ class PostViewSet(viewsets.ModelViewSet):
             reaction.reaction_type = reaction_type
             reaction.save()
 
-        if post.author != request.user:
-            Notification.objects.create(
-                user=post.author,
-                notification_type_id=1,  # For reactions
-                title=f"{request.user.get_full_name() or request.user.username} reacted to your post",
-                content=f"{request.user.get_full_name() or request.user.username} reacted with {reaction_type}",
-                is_read=False,
-            )
+        # The post author is notified asynchronously by feeds.signals
 
         return Response(
             {
@@ -246,6 +338,64 @@ class PostViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND,
             )
 
+    @extend_schema(
+        description="Vote on a poll, replacing any earlier vote. Repeating a vote changes nothing.",
+        request=PollVoteActionSerializer,
+        responses={
+            200: {"description": "Vote unchanged or moved to another option"},
+            201: {"description": "Vote recorded"},
+        },
+    )
+    @action(detail=True, methods=["post"], serializer_class=PollVoteActionSerializer)
+    def vote(self, request, pk=None):
+        post = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            outcome = polls.cast_vote(
+                post, serializer.validated_data["option"], request.user
+            )
+        except polls.PollError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        created = outcome["changed"] and outcome["previous"] is None
+        return Response(
+            {
+                "detail": "Vote recorded"
+                if created
+                else "Vote updated"
+                if outcome["changed"]
+                else "Vote unchanged",
+                "results": polls.results(post, request.user),
+            },
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
+
+    @extend_schema(
+        description="Remove user's vote from a poll",
+        responses={200: {"description": "Vote removed successfully"}},
+    )
+    @action(detail=True, methods=["post"])
+    def unvote(self, request, pk=None):
+        post = self.get_object()
+        if polls.retract_vote(post, request.user):
+            return Response(
+                {"detail": "Vote removed successfully"}, status=status.HTTP_200_OK
+            )
+        return Response(
+            {"detail": "No vote found to remove"}, status=status.HTTP_404_NOT_FOUND
+        )
+
+    @extend_schema(
+        description="Current poll results; live updates are sent on ws/polls/<id>/",
+        responses={200: {"description": "Votes per option and the user's vote"}},
+    )
+    @action(detail=True, methods=["get"])
+    def results(self, request, pk=None):
+        post = self.get_object()
+        return Response(polls.results(post, request.user))
+
     @extend_schema(
         description="Get all comments for a post with pagination",
         responses={200: CommentSerializer(many=True)},
@@ -260,7 +410,7 @@ class PostViewSet(viewsets.ModelViewSet):
         else:
             queryset = Comment.objects.filter(post=post, parent__isnull=True)
 
-        queryset = queryset.order_by("-created_at")
+        queryset = queryset.select_related("author").order_by("-created_at")
         return self._paginated_response(queryset, serializer_class=CommentSerializer)
 
     @extend_schema(
@@ -271,19 +421,11 @@ class PostViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=["post"])
     def comment(self, request, pk=None):
         post = self.get_object()
-        serializer = CommentSerializer(data=request.data)
+        serializer = CommentSerializer(
+            data=request.data, context=self.get_serializer_context()
+        )
         serializer.is_valid(raise_exception=True)
         serializer.save(author=request.user, post=post)
-
-        if post.author != request.user:
-            Notification.objects.create(
-                user=post.author,
-                notification_type_id=2,
-                title=f"{request.user.get_full_name() or request.user.username} commented on your post",
-                content=serializer.data["content"][:100],
-                is_read=False,
-            )
-
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     @extend_schema(
@@ -293,8 +435,7 @@ class PostViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=["post"])
     def view(self, request, pk=None):
         post = self.get_object()
-        post.views_count = F("views_count") + 1
-        post.save(update_fields=["views_count"])
+        counters.record_view(post.pk)
         return Response({"detail": "View count incremented"}, status=status.HTTP_200_OK)
 
     @extend_schema(
@@ -370,7 +511,7 @@ class PostViewSet(viewsets.ModelViewSet):
         Returns the number of comments for a post.
         """
         post = self.get_object()
-        count = Comment.objects.filter(post=post).count()
+        count = counters.counter_value(post, "comments_count")
         return Response({"comment_count": count}, status=status.HTTP_200_OK)
 
     def _paginated_response(self, queryset, serializer_class=None):
@@ -398,7 +539,7 @@ class CommentViewSet(viewsets.ModelViewSet):
     pagination_class = FeedPagination
 
     def get_queryset(self):
-        queryset = super().get_queryset()
+        queryset = super().get_queryset().select_related("author")
         post_id = self.request.query_params.get("post")
         if post_id:
             queryset = queryset.filter(post_id=post_id)
@@ -417,74 +558,8 @@ class CommentViewSet(viewsets.ModelViewSet):
         return queryset
 
     def perform_create(self, serializer):
-        """Create a new comment"""
-        try:
-            with transaction.atomic():
-                # Set the author to the current user
-                comment = serializer.save(author=self.request.user)
-
-                # If this is a root comment on a post, directly create notification here
-                # for better performance (avoid signal overhead)
-                if not comment.parent and comment.post.author != self.request.user:
-                    # Get or create notification type
-                    notification_type = NotificationType.objects.get_or_create(
-                        id=2,
-                        defaults={
-                            "name": "post_comment",
-                            "description": "Comment on your post",
-                            "default_enabled": True,
-                            "is_global": True,
-                        },
-                    )[0]
-
-                    # Create notification with correct field names
-                    Notification.objects.create(
-                        user=comment.post.author,
-                        notification_type=notification_type,
-                        title=f"{self.request.user.get_full_name() or self.request.user.username} commented on your post",
-                        message=comment.content[
-                            :100
-                        ],  # Use 'message' instead of 'content'
-                        read=False,  # Use 'read' instead of 'is_read'
-                    )
-
-                    # Clear cache
-                    cache.delete(f"user_notifications_{comment.post.author.id}")
-
-                    # Update post comment count cache
-                    cache.set(
-                        f"post_{comment.post.id}_comment_count",
-                        Comment.objects.filter(post=comment.post, parent=None).count(),
-                        timeout=3600,
-                    )
-
-        except Exception as e:
-            logger.error(f"Error creating comment: {e}", exc_info=True)
-            raise serializers.ValidationError({"detail": str(e)})
-
-        post = serializer.validated_data.get("post")
-        if post and post.author != self.request.user:
-            Notification.objects.create(
-                user=post.author,
-                notification_type_id=2,
-                title=f"{self.request.user.get_full_name() or self.request.user.username} commented on your post",
-                message=serializer.validated_data.get("content", "")[
-                    :100
-                ],  # Changed from 'content' to 'message'
-                read=False,  # Changed from 'is_read' to 'read'
-            )
-
-        parent = serializer.validated_data.get("parent")
-        if parent and parent.author != self.request.user:
-            Notification.objects.create(
-                user=parent.author,
-                notification_type_id=3,
-                title=f"{self.request.user.get_full_name() or self.request.user.username} replied to your comment",
-                message=serializer.validated_data.get("content", "")[
-                    :100
-                ],  # Changed from 'content' to 'message'
-                read=False,  # Changed from 'is_read' to 'read'
-            )
+        """Create a new comment; feeds.signals queues the notifications"""
+        serializer.save(author=self.request.user)
 
     @extend_schema(
         description="Add a reaction to a comment",
@@ -510,15 +585,6 @@ class CommentViewSet(viewsets.ModelViewSet):
             defaults={"reaction_type": reaction_type},
         )
 
-        if comment.author != request.user:
-            Notification.objects.create(
-                user=comment.author,
-                notification_type_id=1,
-                title=f"{request.user.get_full_name() or request.user.username} reacted to your comment",
-                content=f"{request.user.get_full_name() or request.user.username} reacted with {reaction_type}",
-                is_read=False,
-            )
-
         status_code = status.HTTP_201_CREATED if created else status.HTTP_200_OK
         detail = (
             "Reaction added successfully"
@@ -557,3 +623,42 @@ class TopicViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     filter_backends = [filters.SearchFilter]
     search_fields = ["name", "description"]
+
+    @action(detail=False, methods=["get"])
+    def stats(self, request):
+        """
+        Precomputed tag/topic counters, most trending first.
+
+        ``?kind=tag|topic`` (default topic), ``?limit=`` (default 10, max 50).
+        """
+        kind = request.query_params.get("kind", PostLabel.KIND_TOPIC)
+        if kind not in dict(PostLabel.KIND_CHOICES):
+            return Response(
+                {"error": "kind must be 'tag' or 'topic'"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        limit = request.query_params.get("limit", "10")
+        limit = min(int(limit), 50) if limit.isdigit() else 10
+
+        live = dict(labels.trending(kind, limit))
+        if live:
+            rows = {
+                (row.kind, row.label): row
+                for row in LabelStats.objects.filter(
+                    kind=kind, label__in=[label for _, label in live]
+                )
+            }
+            stats = []
+            for key, score in live.items():
+                if key in rows:
+                    rows[key].live_trending_score = score
+                    stats.append(rows[key])
+        else:
+            stats = list(
+                LabelStats.objects.filter(kind=kind).order_by(
+                    "-trending_score", "-posts_count"
+                )[:limit]
+            )
+
+        counters.attach_pending(stats)
+        return Response(LabelStatsSerializer(stats, many=True).data)
@@ -5,3 +5,6 @@ from django.apps import AppConfig
 class MediaHandlerConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "media_handler"
+
+    def ready(self):
+        import media_handler.signals  # noqa
@@ -0,0 +1,176 @@
+# media_handler/delivery.py
+"""
+Media delivery: Django authorizes, the web server sends the bytes
+
+API responses never carry bare storage URLs for uploads. They carry
+short-lived signed URLs to ``media_handler.views.serve_media``:
+
+    /api/v1/media/content/<name>?e=<expires>&s=<signature>
+
+Whoever could see the serialized object may fetch the file until
+``expires``. The view checks the HMAC, which needs no database query,
+and hands the file over according to ``MEDIA_DELIVERY_BACKEND``:
+
+- "x-accel": an empty response with ``X-Accel-Redirect`` pointing at
+  ``MEDIA_ACCEL_PREFIX``. nginx streams the file with sendfile and handles
+  Range requests (see docker/nginx/mindcare.conf).
+- "x-sendfile": the same hand-off with ``X-Sendfile`` (Apache
+  mod_xsendfile, lighttpd).
+- "django": the file is streamed by the worker, honouring single
+  ``Range`` requests. Meant for development and tests.
+- "storage": no hand-off; URLs are the storage's own, e.g. presigned
+  object-storage URLs that already expire.
+
+Expiry is rounded up to a whole ``MEDIA_SIGNED_URL_TTL`` window, so a URL
+stays the same for a while and clients can cache the file.
+"""
+
+import mimetypes
+import os
+import re
+import time
+from urllib.parse import quote, urlencode
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse
+from django.urls import reverse
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+SALT = "media_handler.delivery"
+RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def backend() -> str:
+    return getattr(settings, "MEDIA_DELIVERY_BACKEND", "django")
+
+
+def _signature(name: str, expires: int) -> str:
+    return salted_hmac(SALT, f"{name}:{expires}", algorithm="sha256").hexdigest()[:32]
+
+
+def media_url(name: str, request=None, storage=None) -> str:
+    """URL at which the stored file ``name`` can be fetched for a while"""
+    if not name:
+        return None
+    if backend() == "storage":
+        url = (storage or default_storage).url(name)
+    else:
+        ttl = getattr(settings, "MEDIA_SIGNED_URL_TTL", 3600)
+        # At least one full window left; the same URL for the whole window
+        expires = (int(time.time()) // ttl + 2) * ttl
+        query = urlencode({"e": expires, "s": _signature(name, expires)})
+        url = f"{reverse('media-content', args=[name])}?{query}"
+    return request.build_absolute_uri(url) if request else url
+
+
+def verify(name: str, expires, signature) -> bool:
+    try:
+        expires = int(expires)
+    except (TypeError, ValueError):
+        return False
+    if expires < time.time():
+        return False
+    return constant_time_compare(_signature(name, expires), signature or "")
+
+
+def parse_range(header: str, size: int):
+    """
+    ``(start, end)`` (inclusive) of a single-range ``Range`` header; None to
+    send the whole file; raises ValueError when the range is unsatisfiable
+    """
+    match = RANGE.match(header.strip()) if header else None
+    if not match:
+        return None  # Absent, malformed or multi-range: full response
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("range not satisfiable")
+    return start, end
+
+
+class _RangeReader:
+    """The ``length`` bytes of ``file`` from its current position"""
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b""
+        size = self.remaining if size < 0 else min(size, self.remaining)
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def _stream(name, request, headers):
+    storage = default_storage
+    try:
+        size = storage.size(name)
+        file = storage.open(name, "rb")
+    except (FileNotFoundError, OSError):
+        raise Http404("Media not found")
+
+    try:
+        byte_range = parse_range(request.headers.get("Range"), size)
+        if_range = request.headers.get("If-Range")
+        if byte_range and if_range and if_range != headers["ETag"]:
+            byte_range = None
+    except ValueError:
+        file.close()
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    if byte_range is None:
+        response = FileResponse(file)
+        response["Content-Length"] = size
+    else:
+        start, end = byte_range
+        file.seek(start)
+        response = FileResponse(_RangeReader(file, end - start + 1), status=206)
+        response["Content-Length"] = end - start + 1
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return response
+
+
+def respond(name: str, request):
+    """The response delivering the stored file ``name``"""
+    content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    # Stored names are never reused for other content
+    headers = {
+        "Content-Type": content_type,
+        "ETag": f'"{_signature(name, 0)[:16]}"',
+        "Cache-Control": f"private, max-age={getattr(settings, 'MEDIA_SIGNED_URL_TTL', 3600)}",
+        "Accept-Ranges": "bytes",
+    }
+
+    mode = backend()
+    if mode == "x-accel":
+        prefix = getattr(settings, "MEDIA_ACCEL_PREFIX", "/protected-media/")
+        response = HttpResponse()
+        # A URI to nginx: names kept from user uploads may need escaping
+        response["X-Accel-Redirect"] = prefix + quote(name)
+    elif mode == "x-sendfile":
+        response = HttpResponse()
+        response["X-Sendfile"] = os.path.join(settings.MEDIA_ROOT, name)
+    else:
+        response = _stream(name, request, headers)
+
+    for header, value in headers.items():
+        response[header] = value
+    return response
@@ -0,0 +1,70 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("media_handler", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MediaBlob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("sha256", models.CharField(max_length=64, unique=True)),
+                (
+                    "file",
+                    models.FileField(db_index=True, upload_to="uploads/%Y/%m/%d/"),
+                ),
+                ("size", models.BigIntegerField()),
+                ("mime_type", models.CharField(max_length=100)),
+                ("ref_count", models.PositiveIntegerField(default=0)),
+                (
+                    "released_at",
+                    models.DateTimeField(blank=True, db_index=True, null=True),
+                ),
+                ("variants", models.JSONField(blank=True, default=dict)),
+                (
+                    "variants_status",
+                    models.CharField(
+                        choices=[
+                            ("none", "None"),
+                            ("pending", "Pending"),
+                            ("ready", "Ready"),
+                            ("failed", "Failed"),
+                        ],
+                        default="none",
+                        max_length=10,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="mediafile",
+            name="original_name",
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name="mediafile",
+            name="blob",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="media_files",
+                to="media_handler.mediablob",
+            ),
+        ),
+    ]
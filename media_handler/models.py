@@ -1,9 +1,8 @@
 # media_handler/models.py
-from django.db import models
+from django.db import models, transaction
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 import os
-import magic
 import logging
 from django.core.exceptions import ValidationError
 from django.conf import settings
@@ -11,6 +10,47 @@ from django.conf import settings
 logger = logging.getLogger(__name__)
 
 
+class MediaBlob(models.Model):
+    """
+    Stored file content, shared by every MediaFile with the same bytes.
+    See media_handler.pipeline.
+    """
+
+    VARIANT_STATUSES = (
+        ("none", "None"),
+        ("pending", "Pending"),
+        ("ready", "Ready"),
+        ("failed", "Failed"),
+    )
+
+    sha256 = models.CharField(max_length=64, unique=True)
+    file = models.FileField(upload_to="uploads/%Y/%m/%d/", db_index=True)
+    size = models.BigIntegerField()
+    mime_type = models.CharField(max_length=100)
+    # MediaFile rows using this blob; messages reference it by file name
+    ref_count = models.PositiveIntegerField(default=0)
+    # When ref_count last dropped to (or was created at) zero
+    released_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    # {name: {"name": storage name, "width", "height", "size"}}
+    variants = models.JSONField(default=dict, blank=True)
+    variants_status = models.CharField(
+        max_length=10, choices=VARIANT_STATUSES, default="none"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.mime_type}, {self.ref_count} refs)"
+
+    def variant_urls(self, request=None):
+        """``{variant name: URL}`` of the variants generated so far"""
+        from .delivery import media_url
+
+        return {
+            name: media_url(variant["name"], request, self.file.storage)
+            for name, variant in self.variants.items()
+        }
+
+
 class MediaFile(models.Model):
     MEDIA_TYPES = (
         ("image", "Image"),
@@ -20,6 +60,15 @@ class MediaFile(models.Model):
     )
 
     file = models.FileField(upload_to="uploads/%Y/%m/%d/")
+    # Set by the upload pipeline; null for files stored before it
+    blob = models.ForeignKey(
+        MediaBlob,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="media_files",
+    )
+    original_name = models.CharField(max_length=255, blank=True)
     media_type = models.CharField(max_length=20, choices=MEDIA_TYPES)
     title = models.CharField(max_length=255, blank=True)
     description = models.TextField(blank=True)
@@ -68,47 +117,35 @@ class MediaFile(models.Model):
                 )
 
     def save(self, *args, **kwargs):
-        """Save the file and validate its properties."""
-        if self.file:
-            self.file_size = self.file.size
-            self.mime_type = self._get_mime_type()
-        self.full_clean()  # Run validation before saving
-        super().save(*args, **kwargs)
-
-    def _get_mime_type(self):
-        """Determine MIME type of uploaded file with enhanced error handling."""
-        if not self.file:
-            return None
-
-        try:
-            self.file.seek(0)
-            mime = magic.from_buffer(self.file.read(2048), mime=True)
-            self.file.seek(0)
-
-            # Normalize MIME type
-            mime = mime.lower()
-
-            # Map the MIME type to our media types
-            if any(mime.startswith(t) for t in settings.ALLOWED_MEDIA_TYPES["image"]):
-                self.media_type = "image"
-            elif any(mime.startswith(t) for t in settings.ALLOWED_MEDIA_TYPES["video"]):
-                self.media_type = "video"
-            elif any(mime.startswith(t) for t in settings.ALLOWED_MEDIA_TYPES["audio"]):
-                self.media_type = "audio"
-            else:
-                self.media_type = "document"
-
-            return mime
-        except magic.MagicException as e:
-            logger.error(f"Magic library error: {str(e)}")
-            return "application/octet-stream"
-        except Exception as e:
-            logger.error(f"Unexpected error determining MIME type: {str(e)}")
-            return "application/octet-stream"
+        """Store a new upload through the pipeline, then save."""
+        if not self.file or self.file._committed:
+            return super().save(*args, **kwargs)
+
+        from .pipeline import media_type_for, release, retain, store
+
+        self.original_name = os.path.basename(self.file.name)
+        # Streamed to storage outside the transaction
+        blob = store(self.file)
+        previous = self.blob_id
+        with transaction.atomic():
+            self.blob = blob
+            self.file = blob.file.name
+            self.file_size = blob.size
+            self.mime_type = blob.mime_type
+            self.media_type = media_type_for(blob.mime_type)
+            super().save(*args, **kwargs)
+            # Re-uploading the same content keeps the one reference it had
+            if previous != blob.pk:
+                retain(blob.pk)
+                if previous:
+                    release(previous)
 
     @property
     def filename(self):
-        return os.path.basename(self.file.name)
+        return self.original_name or os.path.basename(self.file.name)
+
+    def variant_urls(self, request=None):
+        return self.blob.variant_urls(request) if self.blob_id else {}
 
     def link_to_profile(self, profile):
         """Link media to a profile using standard ID"""
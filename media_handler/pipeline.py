@@ -0,0 +1,265 @@
+# media_handler/pipeline.py
+"""
+Upload pipeline: streamed, content-addressed storage with image variants
+
+``store`` sniffs the MIME type from the first 2 KB of an upload and
+validates it. It then streams the upload to storage, computing its SHA-256
+as storage reads it, so the file is read once. Identical content is kept
+once: the ``MediaBlob`` with the same hash is reused and the copy just
+written is removed. Stored names are random, so a shared blob never
+carries another uploader's file name.
+
+Blobs are reference counted. ``retain``/``release`` track the MediaFile
+rows pointing at a blob. A blob nobody retains (``released_at`` set) is
+purged by the retention engine (see core.retention) a day later, unless a
+message still stores it in its ``media`` column. Deleting the blob row
+deletes its file and variants.
+
+Image variants (``MEDIA_IMAGE_VARIANTS``, WebP by default) are generated
+after commit by ``media_handler.tasks.generate_media_variants`` on the
+``media`` queue:
+
+    celery -A mindcare worker -Q media -c 2
+"""
+
+import hashlib
+import io
+import logging
+import os
+import uuid
+from typing import Dict, Iterable
+
+import magic
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Case, Exists, F, OuterRef, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import MediaBlob
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_VARIANTS = {
+    "thumbnail": {"max_side": 320, "format": "WEBP", "quality": 75},
+    "large": {"max_side": 1280, "format": "WEBP", "quality": 80},
+}
+
+# Raster formats Pillow can read; anything else gets no variants
+VARIANT_SOURCE_TYPES = (
+    "image/jpeg",
+    "image/png",
+    "image/gif",
+    "image/webp",
+    "image/bmp",
+)
+
+
+class HashingFile(File):
+    """Wraps an upload and hashes whatever storage reads from it"""
+
+    def __init__(self, file, name):
+        super().__init__(file, name)
+        self._reset()
+
+    def _reset(self):
+        self.sha256 = hashlib.sha256()
+        self.bytes_read = 0
+
+    def _update(self, data):
+        self.sha256.update(data)
+        self.bytes_read += len(data)
+        return data
+
+    def read(self, *args):
+        return self._update(self.file.read(*args))
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        # A storage that rewinds reads (and hashes) the file again
+        if offset == 0 and whence == os.SEEK_SET:
+            self._reset()
+        return self.file.seek(offset, whence)
+
+    def chunks(self, chunk_size=None):
+        self.seek(0)
+        while True:
+            data = self.read(chunk_size or self.DEFAULT_CHUNK_SIZE)
+            if not data:
+                break
+            yield data
+
+    def multiple_chunks(self, chunk_size=None):
+        return True
+
+
+def media_type_for(mime_type: str) -> str:
+    """The MediaFile.MEDIA_TYPES key whose ALLOWED_MEDIA_TYPES hold ``mime_type``"""
+    for media_type in ("image", "video", "audio"):
+        if any(
+            mime_type.startswith(t) for t in settings.ALLOWED_MEDIA_TYPES[media_type]
+        ):
+            return media_type
+    return "document"
+
+
+def detect_mime_type(upload) -> str:
+    upload.seek(0)
+    head = upload.read(2048)
+    upload.seek(0)
+    try:
+        return magic.from_buffer(head, mime=True).lower()
+    except Exception as e:
+        logger.error(f"Could not determine MIME type: {str(e)}")
+        return "application/octet-stream"
+
+
+def validate(upload, mime_type: str) -> None:
+    """Reject uploads that are too large or of a type not allowed"""
+    if upload.size > settings.MAX_UPLOAD_SIZE:
+        raise ValidationError(
+            f"File size cannot exceed {settings.MAX_UPLOAD_SIZE / (1024 * 1024)}MB"
+        )
+    media_type = media_type_for(mime_type)
+    allowed_mime_types = settings.ALLOWED_MEDIA_TYPES.get(media_type, [])
+    if not any(mime_type.startswith(t) for t in allowed_mime_types):
+        raise ValidationError(f"Invalid MIME type {mime_type} for {media_type}.")
+
+
+def blob_name(original_name: str) -> str:
+    extension = os.path.splitext(original_name)[1].lower()
+    return timezone.now().strftime("uploads/%Y/%m/%d/") + uuid.uuid4().hex + extension
+
+
+def store(upload) -> MediaBlob:
+    """
+    Validate ``upload``, stream it to storage and return its blob, reusing
+    the existing blob when the content is already stored
+    """
+    mime_type = detect_mime_type(upload)
+    validate(upload, mime_type)
+
+    storage = MediaBlob._meta.get_field("file").storage
+    reader = HashingFile(upload, upload.name)
+    name = storage.save(blob_name(upload.name), reader)
+    sha256 = reader.sha256.hexdigest()
+
+    blob, created = MediaBlob.objects.get_or_create(
+        sha256=sha256,
+        defaults={
+            "file": name,
+            "size": reader.bytes_read,
+            "mime_type": mime_type,
+            "released_at": timezone.now(),
+            "variants_status": (
+                "pending" if mime_type in VARIANT_SOURCE_TYPES else "none"
+            ),
+        },
+    )
+    if not created:
+        storage.delete(name)
+        logger.info(f"Upload {upload.name} deduplicated to blob {blob.pk}")
+    elif blob.variants_status == "pending":
+        from .tasks import generate_media_variants
+
+        transaction.on_commit(lambda: generate_media_variants.delay(blob.pk))
+    return blob
+
+
+def retain(blob_id: int) -> None:
+    MediaBlob.objects.filter(pk=blob_id).update(
+        ref_count=F("ref_count") + 1, released_at=None
+    )
+
+
+def release(blob_id: int) -> None:
+    # Both expressions see the row as it was before this UPDATE
+    MediaBlob.objects.filter(pk=blob_id).update(
+        ref_count=Greatest(F("ref_count") - 1, Value(0)),
+        released_at=Case(
+            When(ref_count__lte=1, then=Value(timezone.now())),
+            default=F("released_at"),
+        ),
+    )
+
+
+def unreferenced(queryset):
+    """Blobs no message stores in its ``media`` column (retention scope)"""
+    from messaging.models import GroupMessage, OneToOneMessage
+
+    for model in (OneToOneMessage, GroupMessage):
+        queryset = queryset.filter(
+            ~Exists(model.objects.filter(media=OuterRef("file")))
+        )
+    return queryset
+
+
+def delete_files(blob: MediaBlob) -> None:
+    """Remove a deleted blob's file and variants from storage"""
+    storage = blob.file.storage
+    for name in [blob.file.name] + [v["name"] for v in blob.variants.values()]:
+        try:
+            storage.delete(name)
+        except Exception as e:
+            logger.error(f"Could not delete {name}: {str(e)}")
+
+
+def generate_variants(blob_id: int) -> MediaBlob:
+    """Render the configured variants of an image blob"""
+    from PIL import Image, ImageOps
+
+    blob = MediaBlob.objects.get(pk=blob_id)
+    if blob.variants_status != "pending":
+        return blob
+
+    config = getattr(settings, "MEDIA_IMAGE_VARIANTS", DEFAULT_VARIANTS)
+    storage = blob.file.storage
+    variants = {}
+    try:
+        largest = max(options["max_side"] for options in config.values())
+        with blob.file.open("rb") as source:
+            image = Image.open(source)
+            # JPEG decoding can skip straight to a reduced scale
+            image.draft("RGB", (largest, largest))
+            image = ImageOps.exif_transpose(image)
+            image.load()
+        mode = "RGBA" if "A" in image.getbands() else "RGB"
+        image = image.convert(mode)
+
+        for name, options in config.items():
+            variant = image.copy()
+            variant.thumbnail((options["max_side"],) * 2, Image.LANCZOS)
+            out = io.BytesIO()
+            variant.save(out, format=options["format"], quality=options["quality"])
+            extension = options["format"].lower()
+            path = storage.save(
+                f"variants/{blob.sha256[:2]}/{blob.sha256}/{name}.{extension}",
+                ContentFile(out.getvalue()),
+            )
+            variants[name] = {
+                "name": path,
+                "width": variant.width,
+                "height": variant.height,
+                "size": out.tell(),
+            }
+        blob.variants_status = "ready"
+    except Exception as e:
+        logger.error(f"Variant generation failed for blob {blob.pk}: {str(e)}")
+        for variant in variants.values():
+            storage.delete(variant["name"])
+        variants = {}
+        blob.variants_status = "failed"
+
+    blob.variants = variants
+    blob.save(update_fields=["variants", "variants_status"])
+    return blob
+
+
+def blobs_by_name(names: Iterable[str]) -> Dict[str, MediaBlob]:
+    """``{storage name: blob}`` for the ``names`` stored by the pipeline"""
+    names = {name for name in names if name}
+    if not names:
+        return {}
+    return {blob.file.name: blob for blob in MediaBlob.objects.filter(file__in=names)}
@@ -1,14 +1,60 @@
 # media_handler/serializers.py
 from rest_framework import serializers
 from .models import MediaFile
+from .delivery import media_url
+from .pipeline import blobs_by_name, store
 import os
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db import models
 
 
+class StoredMediaMixin:
+    """
+    For serializers of models with a ``media`` FileField (messages): uploads
+    go through the pipeline, so identical files are stored once, ``media``
+    is rendered as a signed delivery URL and ``get_media_variants`` returns
+    the variant URLs, looking blobs up once
+    for the whole page being serialized. Declare ``media_variants`` as a
+    SerializerMethodField.
+    """
+
+    def validate_media(self, value):
+        if not value:
+            return value
+        try:
+            return store(value).file.name
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.messages)
+
+    def to_representation(self, instance):
+        rep = super().to_representation(instance)
+        if instance.media:
+            rep["media"] = media_url(instance.media.name, self.context.get("request"))
+        return rep
+
+    def get_media_variants(self, obj):
+        if not obj.media:
+            return {}
+        blobs = self.context.setdefault("media_blobs", {})
+        if obj.media.name not in blobs:
+            names = {obj.media.name}
+            if isinstance(self.parent, serializers.ListSerializer):
+                names.update(
+                    instance.media.name
+                    for instance in self.parent.instance or ()
+                    if instance.media
+                )
+            found = blobs_by_name(names)
+            blobs.update({name: found.get(name) for name in names})
+        blob = blobs[obj.media.name]
+        return blob.variant_urls(self.context.get("request")) if blob else {}
+
+
 class MediaFileSerializer(serializers.ModelSerializer):
     url = serializers.SerializerMethodField()
+    variants = serializers.SerializerMethodField()
     file = serializers.FileField()
     content_type = serializers.PrimaryKeyRelatedField(
         queryset=ContentType.objects.all(), required=False, allow_null=True
@@ -23,6 +69,7 @@ class MediaFileSerializer(serializers.ModelSerializer):
             "id",
             "file",
             "url",
+            "variants",
             "title",
             "description",
             "media_type",
@@ -38,10 +85,11 @@ class MediaFileSerializer(serializers.ModelSerializer):
 
     def get_url(self, obj):
         """Generate absolute URL for file access."""
-        request = self.context.get("request")
-        if obj.file and hasattr(obj.file, "url"):
-            return request.build_absolute_uri(obj.file.url)
-        return None
+        return media_url(obj.file.name, self.context.get("request"))
+
+    def get_variants(self, obj):
+        """Thumbnail and WebP URLs, once generated; ``{}`` until then."""
+        return obj.variant_urls(self.context.get("request"))
 
     def validate_file(self, value):
         """Validate file size and type."""
@@ -97,4 +145,8 @@ class MediaFileSerializer(serializers.ModelSerializer):
         request = self.context.get("request")
         if request and request.user.is_authenticated:
             validated_data["uploaded_by"] = request.user
-        return super().create(validated_data)
+        try:
+            return super().create(validated_data)
+        except DjangoValidationError as e:
+            # Raised by the upload pipeline after sniffing the content
+            raise serializers.ValidationError({"file": e.messages})
@@ -0,0 +1,19 @@
+# media_handler/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from . import pipeline
+from .models import MediaBlob, MediaFile
+
+
+@receiver(post_delete, sender=MediaFile)
+def release_blob(sender, instance, **kwargs):
+    if instance.blob_id:
+        pipeline.release(instance.blob_id)
+
+
+@receiver(post_delete, sender=MediaBlob)
+def delete_blob_files(sender, instance, **kwargs):
+    # Only once the row is gone for good
+    transaction.on_commit(lambda: pipeline.delete_files(instance))
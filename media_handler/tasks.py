@@ -0,0 +1,16 @@
+# media_handler/tasks.py
+import logging
+
+from celery import shared_task
+
+from . import pipeline
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(soft_time_limit=120)
+def generate_media_variants(blob_id):
+    """Render the thumbnails and WebP variants of an uploaded image"""
+    blob = pipeline.generate_variants(blob_id)
+    logger.info(f"Variants of blob {blob_id}: {blob.variants_status}")
+    return blob.variants_status
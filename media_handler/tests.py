@@ -1 +1,124 @@
-# Create your tests here.
+import shutil
+import tempfile
+import time
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from media_handler import delivery
+from media_handler.models import MediaBlob, MediaFile
+
+PDF = b"%PDF-1.4\n% test document\n"
+
+
+class MediaBlobRefCountTest(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def upload(self, media_file, content, name="notes.pdf"):
+        media_file.file = SimpleUploadedFile(name, content)
+        media_file.save()
+        return MediaBlob.objects.get(pk=media_file.blob_id)
+
+    def test_reuploading_the_same_content_keeps_one_reference(self):
+        media_file = MediaFile(title="notes")
+        blob = self.upload(media_file, PDF)
+        self.assertEqual(blob.ref_count, 1)
+
+        self.assertEqual(self.upload(media_file, PDF, "copy.pdf").ref_count, 1)
+
+        other = self.upload(media_file, PDF + b"v2")
+        self.assertEqual(other.ref_count, 1)
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 0)
+        self.assertIsNotNone(blob.released_at)
+
+    def test_shared_content_counts_each_file(self):
+        first, second = MediaFile(title="a"), MediaFile(title="b")
+        self.upload(first, PDF)
+        blob = self.upload(second, PDF)
+        self.assertEqual(first.blob_id, second.blob_id)
+        self.assertEqual(blob.ref_count, 2)
+
+
+class DeliveryTest(SimpleTestCase):
+    def test_parse_range(self):
+        self.assertEqual(delivery.parse_range("bytes=0-99", 1000), (0, 99))
+        self.assertEqual(delivery.parse_range("bytes=990-2000", 1000), (990, 999))
+        # Open-ended and suffix ranges
+        self.assertEqual(delivery.parse_range("bytes=900-", 1000), (900, 999))
+        self.assertEqual(delivery.parse_range("bytes=-100", 1000), (900, 999))
+        self.assertEqual(delivery.parse_range("bytes=-5000", 1000), (0, 999))
+        # Whole file for no, malformed and multi-range headers
+        for header in (None, "", "bytes=-", "items=0-1", "bytes=0-1,5-9"):
+            self.assertIsNone(delivery.parse_range(header, 1000))
+        for header in ("bytes=1000-", "bytes=5-1", "bytes=-0"):
+            with self.assertRaises(ValueError):
+                delivery.parse_range(header, 1000)
+
+    def test_verify_rejects_tampering_and_expiry(self):
+        expires = int(time.time()) + 60
+        signature = delivery._signature("uploads/a.pdf", expires)
+        self.assertTrue(delivery.verify("uploads/a.pdf", expires, signature))
+        self.assertFalse(delivery.verify("uploads/b.pdf", expires, signature))
+        self.assertFalse(delivery.verify("uploads/a.pdf", expires + 1, signature))
+        self.assertFalse(delivery.verify("uploads/a.pdf", expires, "0" * 32))
+        self.assertFalse(delivery.verify("uploads/a.pdf", "soon", signature))
+        self.assertFalse(delivery.verify("uploads/a.pdf", expires, None))
+
+        expired = int(time.time()) - 1
+        self.assertFalse(
+            delivery.verify(
+                "uploads/a.pdf", expired, delivery._signature("uploads/a.pdf", expired)
+            )
+        )
+
+    @override_settings(
+        MEDIA_DELIVERY_BACKEND="x-accel", MEDIA_ACCEL_PREFIX="/protected-media/"
+    )
+    def test_accel_redirect_is_an_escaped_uri(self):
+        request = RequestFactory().get("/")
+        response = delivery.respond("uploads/my notes 100%?#é.pdf", request)
+        self.assertEqual(
+            response["X-Accel-Redirect"],
+            "/protected-media/uploads/my%20notes%20100%25%3F%23%C3%A9.pdf",
+        )
+
+
+class StreamingDeliveryTest(SimpleTestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings = override_settings(
+            MEDIA_ROOT=media_root, MEDIA_DELIVERY_BACKEND="django"
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.name = default_storage.save("uploads/data.bin", ContentFile(b"0123456789"))
+
+    def fetch(self, **headers):
+        request = RequestFactory().get("/", headers=headers)
+        response = delivery.respond(self.name, request)
+        body = b"".join(response.streaming_content) if response.streaming else b""
+        return response, body
+
+    def test_ranges(self):
+        response, body = self.fetch(Range="bytes=2-4")
+        self.assertEqual((response.status_code, body), (206, b"234"))
+        self.assertEqual(response["Content-Range"], "bytes 2-4/10")
+
+        response, body = self.fetch(Range="bytes=-3")
+        self.assertEqual((response.status_code, body), (206, b"789"))
+
+        response, body = self.fetch(Range="bytes=0-1,4-5")
+        self.assertEqual((response.status_code, body), (200, b"0123456789"))
+
+        response, _ = self.fetch(Range="bytes=10-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */10")
@@ -1,6 +1,6 @@
 # media_handler/urls.py
 from django.urls import path
-from .views import MediaFileViewSet
+from .views import MediaFileViewSet, serve_media
 
 urlpatterns = [
     path(
@@ -20,4 +20,5 @@ urlpatterns = [
         ),
         name="media-detail",
     ),
+    path("content/<path:name>", serve_media, name="media-content"),
 ]
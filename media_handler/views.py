@@ -1,10 +1,13 @@
 # media_handler/views.py
 from rest_framework import viewsets, permissions
+from django.http import HttpResponseForbidden
+from django.views.decorators.http import require_safe
 from rest_framework.parsers import MultiPartParser, FormParser
 from django.core.exceptions import ValidationError
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
 import logging
+from . import delivery
 from .models import MediaFile
 from .serializers import MediaFileSerializer
 from .permissions import IsUploaderOrReadOnly
@@ -64,7 +67,7 @@ class MediaFileViewSet(viewsets.ModelViewSet):
         )
 
     def get_queryset(self):
-        queryset = MediaFile.objects.all()
+        queryset = MediaFile.objects.select_related("blob")
         filters = {}
 
         media_type = self.request.query_params.get("media_type")
@@ -80,3 +83,17 @@ class MediaFileViewSet(viewsets.ModelViewSet):
             filters["uploaded_by"] = self.request.user
 
         return queryset.filter(**filters)
+
+
+@require_safe
+def serve_media(request, name):
+    """
+    Deliver an upload from a signed URL (see media_handler.delivery). The
+    signature is the authorization, so <img>/<video> tags work without the
+    API's auth headers.
+    """
+    if delivery.backend() == "storage" or not delivery.verify(
+        name, request.GET.get("e"), request.GET.get("s")
+    ):
+        return HttpResponseForbidden("Invalid or expired media link")
+    return delivery.respond(name, request)
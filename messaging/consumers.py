@@ -10,6 +10,8 @@ from django.core.exceptions import ObjectDoesNotExist
 from messaging.models.one_to_one import OneToOneMessage, OneToOneConversation
 from messaging.models.group import GroupMessage, GroupConversation
 from django.conf import settings
+from users import activity
+from media_handler.delivery import media_url
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
@@ -110,6 +112,9 @@ class BaseWebSocketConsumer(AsyncWebsocketConsumer):
 
             # Handle heartbeat/ping messages
             if message_type in ["ping", "pong", "heartbeat"]:
+                # Heartbeats keep connected but idle users online
+                if hasattr(self, "user") and not self.user.is_anonymous:
+                    await self.record_activity()
                 # Respond to client pings
                 if message_type == "ping":
                     await self.send(text_data=json.dumps({"type": "pong"}))
@@ -415,6 +420,11 @@ class BaseWebSocketConsumer(AsyncWebsocketConsumer):
             logger.error(f"Error updating user status: {str(e)}", exc_info=True)
             return False
 
+    @database_sync_to_async
+    def record_activity(self):
+        """Record the user as seen now; written to the user row in batches"""
+        activity.touch(self.user.id)
+
     async def handle_new_message(self, data):
         """Abstract method to be implemented by subclasses"""
         raise NotImplementedError("Subclasses must implement handle_new_message")
@@ -540,6 +550,7 @@ class OneToOneChatConsumer(BaseWebSocketConsumer):
                 "timestamp": message["timestamp"],
                 "message_type": message_type,
                 "media_url": message.get("media_url"),
+                "media_variants": message.get("media_variants", {}),
                 "metadata": metadata,
                 "conversation_type": "one_to_one",
             }
@@ -579,7 +590,7 @@ class OneToOneChatConsumer(BaseWebSocketConsumer):
             
             if media_id:
                 from media_handler.models import MediaFile
-                media = MediaFile.objects.get(id=media_id)
+                media = MediaFile.objects.select_related("blob").get(id=media_id)
                 message.media = media.file
                 message.save()
 
@@ -598,7 +609,9 @@ class OneToOneChatConsumer(BaseWebSocketConsumer):
 
             # Add media URL if present
             if message.media:
-                result["media_url"] = message.media.url
+                result["media_url"] = media_url(message.media.name)
+                if media_id:
+                    result["media_variants"] = media.variant_urls()
 
             return result
 
@@ -727,6 +740,7 @@ class GroupChatConsumer(BaseWebSocketConsumer):
                 "timestamp": message["timestamp"],
                 "message_type": message_type,
                 "media_url": message.get("media_url"),
+                "media_variants": message.get("media_variants", {}),
                 "metadata": metadata,
                 "conversation_type": "group",
             }
@@ -766,7 +780,7 @@ class GroupChatConsumer(BaseWebSocketConsumer):
             
             if media_id:
                 from media_handler.models import MediaFile
-                media = MediaFile.objects.get(id=media_id)
+                media = MediaFile.objects.select_related("blob").get(id=media_id)
                 message.media = media.file
                 message.save()
 
@@ -785,7 +799,9 @@ class GroupChatConsumer(BaseWebSocketConsumer):
 
             # Add media URL if present
             if message.media:
-                result["media_url"] = message.media.url
+                result["media_url"] = media_url(message.media.name)
+                if media_id:
+                    result["media_variants"] = media.variant_urls()
 
             return result
 
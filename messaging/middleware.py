@@ -16,6 +16,8 @@ from rest_framework_simplejwt.exceptions import (
 )  # Add this import
 from urllib.parse import parse_qs
 
+from users import activity
+
 logger = logging.getLogger(__name__)
 
 
@@ -203,12 +205,15 @@ class WebSocketAuthMiddleware(BaseMiddleware):
 
 
 class OnlineStatusMiddleware:
+    """Records user activity; users.activity writes it to the user rows in batches"""
+
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
-        if request.user.is_authenticated:
-            # Update last activity time
-            request.user.last_activity = timezone.now()
-            request.user.save(update_fields=["last_activity"])
-        return self.get_response(request)
+        response = self.get_response(request)
+        # Checked afterwards so users authenticated by DRF (JWT) are seen too
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            activity.touch(user.pk)
+        return response
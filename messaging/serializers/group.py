@@ -1,5 +1,6 @@
 # messaging/serializers/group.py
 from rest_framework import serializers
+from media_handler.serializers import StoredMediaMixin
 from django.conf import settings
 from ..models.group import GroupConversation, GroupMessage
 import logging
@@ -78,7 +79,7 @@ class GroupConversationSerializer(serializers.ModelSerializer):
             return None
 
 
-class GroupMessageSerializer(serializers.ModelSerializer):
+class GroupMessageSerializer(StoredMediaMixin, serializers.ModelSerializer):
     MESSAGE_TYPE_CHOICES = (
         ("text", "Text Message"),
         ("system", "System Message"),
@@ -101,6 +102,7 @@ class GroupMessageSerializer(serializers.ModelSerializer):
         allow_null=True,
         help_text="Upload media files (images, videos, PDFs, etc.)",
     )
+    media_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = GroupMessage
@@ -113,6 +115,7 @@ class GroupMessageSerializer(serializers.ModelSerializer):
             "timestamp",
             "edit_history",
             "media",
+            "media_variants",
         ]
         read_only_fields = ["id", "sender", "timestamp"]
 
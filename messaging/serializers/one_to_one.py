@@ -1,5 +1,7 @@
 # messaging/serializers/one_to_one.py
 from rest_framework import serializers
+from media_handler import delivery
+from media_handler.serializers import StoredMediaMixin
 from ..models.one_to_one import OneToOneConversation, OneToOneMessage
 import logging
 
@@ -92,11 +94,8 @@ class OneToOneConversationSerializer(serializers.ModelSerializer):
             if message:
                 media_url = None
                 if message.media:
-                    request = self.context.get("request")
-                    media_url = (
-                        request.build_absolute_uri(message.media.url)
-                        if request
-                        else message.media.url
+                    media_url = delivery.media_url(
+                        message.media.name, self.context.get("request")
                     )
                 return {
                     "id": message.id,
@@ -166,7 +165,7 @@ class OneToOneConversationSerializer(serializers.ModelSerializer):
         return conversation
 
 
-class OneToOneMessageSerializer(serializers.ModelSerializer):
+class OneToOneMessageSerializer(StoredMediaMixin, serializers.ModelSerializer):
     MESSAGE_TYPE_CHOICES = (
         ("text", "Text Message"),
         ("system", "System Message"),
@@ -191,6 +190,7 @@ class OneToOneMessageSerializer(serializers.ModelSerializer):
         allow_null=True,
         help_text="Upload media files (images, videos, PDFs, etc.)",
     )
+    media_variants = serializers.SerializerMethodField()
 
     def __init__(self, *args, **kwargs):
         """Dynamically adjust fields based on the request method."""
@@ -215,6 +215,7 @@ class OneToOneMessageSerializer(serializers.ModelSerializer):
             "sender_name",
             "timestamp",
             "media",
+            "media_variants",
         ]
         read_only_fields = ["id", "sender", "sender_name", "timestamp"]
 
@@ -239,14 +240,3 @@ class OneToOneMessageSerializer(serializers.ModelSerializer):
         instance.media = validated_data.get("media", instance.media)
         instance.save()
         return instance
-
-    def to_representation(self, instance):
-        rep = super().to_representation(instance)
-        if rep.get("media"):
-            request = self.context.get("request")
-            rep["media"] = (
-                request.build_absolute_uri(instance.media.url)
-                if request
-                else instance.media.url
-            )
-        return rep
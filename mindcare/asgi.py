@@ -3,15 +3,22 @@ import os
 from django.core.asgi import get_asgi_application
 from channels.routing import ProtocolTypeRouter, URLRouter
 from core.middleware import UnifiedWebSocketAuthMiddleware
+from core import lazy
+from feeds.routing import websocket_urlpatterns as feeds_websocket_urlpatterns
 from messaging.routing import websocket_urlpatterns
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mindcare.settings")
 
 django_asgi_app = get_asgi_application()
 
+# Build the services configured for web processes (see core.lazy)
+lazy.warm_up("web")
+
 application = ProtocolTypeRouter(
     {
         "http": django_asgi_app,
-        "websocket": UnifiedWebSocketAuthMiddleware(URLRouter(websocket_urlpatterns)),
+        "websocket": UnifiedWebSocketAuthMiddleware(
+            URLRouter(websocket_urlpatterns + feeds_websocket_urlpatterns)
+        ),
     }
 )
@@ -2,6 +2,7 @@
 import os
 from celery import Celery
 from celery.schedules import crontab  # <-- Import crontab
+from celery.signals import celeryd_after_setup, worker_process_init
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mindcare.settings")
 
@@ -9,10 +10,64 @@ app = Celery("mindcare")
 app.config_from_object("django.conf:settings", namespace="CELERY")
 app.autodiscover_tasks()
 
+# Warm-up roles of this worker, noted before the pool forks
+_worker_roles = ("worker",)
+
+
+@celeryd_after_setup.connect
+def _note_worker_roles(sender, instance, **kwargs):
+    global _worker_roles
+    queues = instance.app.amqp.queues.consume_from or {}
+    _worker_roles = ("worker", *queues)
+
+
+@worker_process_init.connect
+def _warm_up_services(**kwargs):
+    # Built in each pool process, not in the parent before the fork
+    from core import lazy
+
+    lazy.warm_up(*_worker_roles)
+
 app.conf.beat_schedule = {
-    "cleanup-notifications": {
-        "task": "notifications.tasks.cleanup_old_notifications",
-        "schedule": crontab(hour=3, minute=0),  # Daily at 3 AM
-        "kwargs": {"days": 30},
+    "maintain-partitions": {
+        "task": "core.tasks.maintain_partitions",
+        "schedule": crontab(hour=2, minute=30),  # Daily, before the retention purges
+    },
+    "flush-feed-counters": {
+        "task": "feeds.tasks.flush_feed_counters",
+        "schedule": 30.0,  # Every 30 seconds
+    },
+    "refresh-trending-labels": {
+        "task": "feeds.tasks.refresh_trending_labels",
+        "schedule": 300.0,  # Every 5 minutes
+    },
+    "reconcile-poll-tallies": {
+        "task": "feeds.tasks.reconcile_poll_tallies",
+        "schedule": 60.0,  # Every minute
+    },
+    "flush-user-activity": {
+        "task": "users.tasks.flush_user_activity",
+        "schedule": 60.0,  # Every minute
+    },
+    "deliver-interaction-notifications": {
+        "task": "notifications.tasks.deliver_interaction_notifications",
+        "schedule": 30.0,  # Backstop for the per-event delayed flush
+    },
+    "match-waiting-list": {
+        "task": "appointments.tasks.match_waiting_list",
+        "schedule": 300.0,  # Every 5 minutes
+    },
+    "chain-audit-log": {
+        "task": "datawarehouse.tasks.chain_audit_log",
+        "schedule": 60.0,  # Backstop for the in-process audit chainer
     },
 }
+
+
+@app.on_after_configure.connect
+def _add_retention_schedules(sender, **kwargs):
+    # One "purge-<model label>" entry per retention policy; settings are
+    # loaded by now
+    from core.retention import beat_schedule
+
+    sender.conf.beat_schedule.update(beat_schedule())
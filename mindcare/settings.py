@@ -41,6 +41,7 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "django.contrib.sites",
+    "django.contrib.postgres",
     "allauth",
     "allauth.account",
     "allauth.socialaccount",
@@ -93,6 +94,7 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "messaging.middleware.OnlineStatusMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -381,6 +383,13 @@ ALLOWED_MEDIA_TYPES = {
     ],
 }
 
+# Uploads are served from signed URLs (see media_handler/delivery.py):
+# "x-accel" behind nginx, "x-sendfile" behind Apache, "django" to stream
+# from the worker (development), "storage" for the storage's own URLs
+MEDIA_DELIVERY_BACKEND = os.getenv("MEDIA_DELIVERY_BACKEND", "django")
+MEDIA_ACCEL_PREFIX = "/protected-media/"
+MEDIA_SIGNED_URL_TTL = 3600
+
 MEDIA_FILE_STORAGE = {
     "max_files_per_user": 100,
     "allowed_extensions": [".jpg", ".jpeg", ".png", ".gif", ".mp4", ".pdf", ".doc"],
@@ -546,7 +555,13 @@ CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = TIME_ZONE
 CELERY_TASK_ACKS_LATE = True
 CELERY_TASK_REJECT_ON_WORKER_LOST = True
-CELERY_TASK_ROUTES = {"messaging.tasks.process_chatbot_response": {"queue": "chatbot"}}
+CELERY_TASK_ROUTES = {
+    "messaging.tasks.process_chatbot_response": {"queue": "chatbot"},
+    # CPU-heavy OCR and face analysis run on their own prefork pool
+    "therapist.tasks.run_verification_job": {"queue": "verification"},
+    # Thumbnails and WebP variants of uploaded images
+    "media_handler.tasks.generate_media_variants": {"queue": "media"},
+}
 CELERY_TASK_DEFAULT_QUEUE = "default"
 
 
@@ -868,3 +883,18 @@ AI_ENGINE_SETTINGS = {
     "ENABLED_MODELS": ["sentiment", "topic", "risk"],
     "CACHE_TIMEOUT": 3600,  # 1 hour cache for AI results
 }
+
+# Pooling, concurrency caps and circuit breaking of LLM calls, merged over
+# AI_engine.services.llm_gateway.default_backends(). Ollama serves at most
+# OLLAMA_MAX_CONCURRENCY generations at once across all processes.
+LLM_BACKENDS = {
+    "ollama": {
+        "global_concurrency": int(os.environ.get("OLLAMA_MAX_CONCURRENCY", 2)),
+    },
+}
+
+# Generated responses are cached by (model, prompt, options): fresh for
+# LLM_CACHE_TTL, then served stale for LLM_CACHE_STALE_TTL while one caller
+# regenerates them (AI_engine.services.llm_cache)
+LLM_CACHE_TTL = 6 * 3600
+LLM_CACHE_STALE_TTL = 24 * 3600
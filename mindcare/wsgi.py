@@ -3,6 +3,7 @@
 import os
 import logging
 from django.core.wsgi import get_wsgi_application
+from core import lazy
 
 # Configure Django settings
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mindcare.settings")
@@ -18,3 +19,6 @@ try:
 except Exception as e:
     logger = logging.getLogger(__name__)
     logger.error(f"Failed to set up Ollama model: {e}")
+
+# Build the services configured for web processes (see core.lazy)
+lazy.warm_up("web")
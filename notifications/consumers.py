@@ -74,6 +74,15 @@ class NotificationConsumer(AsyncJsonWebsocketConsumer):
             logger.error(f"Error sending notification message: {str(e)}")
             await self.close()
 
+    async def notification_batch(self, event):
+        try:
+            await self.send_json(
+                {"type": "notification_batch", "notifications": event["notifications"]}
+            )
+        except Exception as e:
+            logger.error(f"Error sending notification batch: {str(e)}")
+            await self.close()
+
     async def send_heartbeat(self):
         """Send periodic heartbeats to ensure connection is still alive"""
         try:
@@ -0,0 +1,411 @@
+# notifications/fanout.py
+"""
+Asynchronous, coalescing fan-out of interaction notifications
+
+Requests only append a small event ("user 7 reacted to post 12") to a Redis
+list once their transaction commits. A Celery task drains the list in
+batches, each moved to a processing list of its own and removed from there
+only once its notifications are committed; a batch that fails is put back
+on the queue (up to ``NOTIFICATION_FANOUT_MAX_ATTEMPTS`` times), and one
+left behind by a worker that died is re-queued after
+``NOTIFICATION_FANOUT_PROCESSING_TIMEOUT`` seconds. Recipients, actor names, notification types and preferences are
+resolved with one query each, events about the same target are merged into
+one notification ("Ana and 4 others reacted to your post"), and the result
+is written with ``bulk_create``/``bulk_update``. An unread notification for
+the same target created within ``NOTIFICATION_COALESCE_WINDOW`` seconds is
+updated instead of adding another row. WebSocket pushes are sent once per
+recipient per batch.
+
+Without Redis the event is handed to the Celery task directly.
+"""
+
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from django_redis import get_redis_connection
+
+from . import inbox, preferences
+from .models import Notification, NotificationType
+
+logger = logging.getLogger(__name__)
+
+QUEUE_KEY = "notifications:fanout:queue"
+SCHEDULED_KEY = "notifications:fanout:scheduled"
+# Sorted set of the processing lists of batches in flight, by start time
+PROCESSING_KEY = "notifications:fanout:processing"
+
+# Actor ids kept on a coalesced notification
+MAX_ACTORS = 100
+
+
+class Kind:
+    """How one kind of interaction is addressed and worded"""
+
+    def __init__(self, type_name, description, target, verb, message):
+        self.type_name = type_name
+        self.description = description
+        # "post", "comment" or "poll_option": whose author is notified
+        self.target = target
+        self.verb = verb
+        # Message template; {actor} and {detail} come from the latest event
+        self.message = message
+
+
+KINDS = {
+    "post_reaction": Kind(
+        "reaction",
+        "Reaction to your content",
+        "post",
+        "reacted to your post",
+        "{actor} reacted with {detail}",
+    ),
+    "comment_reaction": Kind(
+        "reaction",
+        "Reaction to your content",
+        "comment",
+        "reacted to your comment",
+        "{actor} reacted with {detail}",
+    ),
+    "post_comment": Kind(
+        "post_comment",
+        "Comment on your post",
+        "post",
+        "commented on your post",
+        "{detail}",
+    ),
+    "comment_reply": Kind(
+        "comment_reply",
+        "Reply to your comment",
+        "comment",
+        "replied to your comment",
+        "{detail}",
+    ),
+    "poll_vote": Kind(
+        "poll_vote",
+        "Vote on your poll",
+        "poll_option",
+        "voted on your poll",
+        "Option: {detail}",
+    ),
+}
+
+
+def _redis():
+    return get_redis_connection("default")
+
+
+def _delay() -> int:
+    return getattr(settings, "NOTIFICATION_FANOUT_DELAY", 5)
+
+
+def notify(kind: str, target_id: int, actor_id: int, detail: str = "") -> None:
+    """Queue an interaction notification for the author of ``target_id``"""
+    if kind not in KINDS:
+        raise ValueError(f"Unknown notification kind: {kind}")
+    event = {"kind": kind, "target": target_id, "actor": actor_id, "detail": detail}
+    transaction.on_commit(lambda: _enqueue(event))
+
+
+def _enqueue(event: Dict) -> None:
+    from .tasks import deliver_interaction_notifications
+
+    try:
+        client = _redis()
+        client.rpush(QUEUE_KEY, json.dumps(event))
+        # One delayed flush per window; events arriving meanwhile join it
+        if client.set(SCHEDULED_KEY, 1, nx=True, ex=_delay()):
+            deliver_interaction_notifications.apply_async(countdown=_delay())
+    except Exception as e:
+        logger.warning(f"Notification queue unavailable, sending directly: {e}")
+        try:
+            deliver_interaction_notifications.delay([event])
+        except Exception as e:
+            logger.error(f"Could not queue notification: {e}")
+
+
+def drain(batch_size: Optional[int] = None) -> Tuple[Optional[str], List[Dict]]:
+    """
+    Move up to ``batch_size`` queued events to a new processing list.
+
+    Returns the list's key and the events; pass the key to ``ack`` once the
+    events are delivered, or to ``requeue`` if delivering them failed.
+    """
+    batch_size = batch_size or getattr(settings, "NOTIFICATION_FANOUT_BATCH", 1000)
+    client = _redis()
+    if not client.llen(QUEUE_KEY):
+        return None, []
+    processing = f"{PROCESSING_KEY}:{uuid.uuid4().hex}"
+    pipe = client.pipeline()
+    pipe.zadd(PROCESSING_KEY, {processing: time.time()})
+    for _ in range(batch_size):
+        pipe.lmove(QUEUE_KEY, processing, "LEFT", "RIGHT")
+    raw = [item for item in pipe.execute()[1:] if item is not None]
+    if not raw:
+        client.zrem(PROCESSING_KEY, processing)
+        return None, []
+
+    events = []
+    for item in raw:
+        try:
+            events.append(json.loads(item))
+        except (TypeError, ValueError):
+            logger.error(f"Dropping malformed notification event {item!r}")
+    return processing, events
+
+
+def ack(processing: str) -> None:
+    """Forget a processing list whose events are delivered"""
+    pipe = _redis().pipeline()
+    pipe.delete(processing)
+    pipe.zrem(PROCESSING_KEY, processing)
+    pipe.execute()
+
+
+def requeue(processing: str, events: List[Dict]) -> None:
+    """Put a failed batch back at the head of the queue, counting the attempt"""
+    max_attempts = getattr(settings, "NOTIFICATION_FANOUT_MAX_ATTEMPTS", 5)
+    retry = []
+    for event in events:
+        event = {**event, "attempts": event.get("attempts", 0) + 1}
+        if event["attempts"] >= max_attempts:
+            logger.error(f"Giving up on notification event {event!r}")
+        else:
+            retry.append(json.dumps(event))
+
+    pipe = _redis().pipeline()
+    if retry:
+        pipe.lpush(QUEUE_KEY, *reversed(retry))
+    pipe.delete(processing)
+    pipe.zrem(PROCESSING_KEY, processing)
+    pipe.execute()
+
+
+def recover_stale() -> int:
+    """Re-queue batches whose worker died mid-delivery; returns events moved"""
+    timeout = getattr(settings, "NOTIFICATION_FANOUT_PROCESSING_TIMEOUT", 600)
+    client = _redis()
+    moved = 0
+    for processing in client.zrangebyscore(PROCESSING_KEY, 0, time.time() - timeout):
+        # From the tail, so the batch keeps its order at the queue head
+        while client.lmove(processing, QUEUE_KEY, "RIGHT", "LEFT") is not None:
+            moved += 1
+        client.zrem(PROCESSING_KEY, processing)
+    if moved:
+        logger.warning(f"Re-queued {moved} notification events of stalled batches")
+    return moved
+
+
+def flush_pending(max_batches: int = 20) -> int:
+    """Deliver queued events in batches; returns the notifications written"""
+    recover_stale()
+    written = 0
+    for _ in range(max_batches):
+        processing, events = drain()
+        if processing is None:
+            break
+        try:
+            notifications = write(events)
+        except Exception:
+            requeue(processing, events)
+            raise
+        ack(processing)
+        _push(notifications)
+        written += len(notifications)
+    return written
+
+
+def _recipients(events: Iterable[Dict]) -> Dict[tuple, int]:
+    """Author of every event target, one query per target model"""
+    from feeds.models import Comment, PollOption, Post
+
+    lookups = {
+        "post": (Post, "author_id"),
+        "comment": (Comment, "author_id"),
+        "poll_option": (PollOption, "post__author_id"),
+    }
+    targets = defaultdict(set)
+    for event in events:
+        targets[KINDS[event["kind"]].target].add(event["target"])
+
+    authors = {}
+    for target, ids in targets.items():
+        model, author_field = lookups[target]
+        for pk, author_id in model.objects.filter(pk__in=ids).values_list(
+            "pk", author_field
+        ):
+            authors[(target, pk)] = author_id
+    return authors
+
+
+def _notification_types(kinds: Iterable[Kind]) -> Dict[str, NotificationType]:
+    wanted = {kind.type_name: kind.description for kind in kinds}
+    types = {
+        nt.name: nt for nt in NotificationType.objects.filter(name__in=list(wanted))
+    }
+    missing = [name for name in wanted if name not in types]
+    if missing:
+        NotificationType.objects.bulk_create(
+            [
+                NotificationType(
+                    name=name,
+                    description=wanted[name],
+                    default_enabled=True,
+                    is_global=True,
+                )
+                for name in missing
+            ],
+            ignore_conflicts=True,
+        )
+        types.update(
+            {nt.name: nt for nt in NotificationType.objects.filter(name__in=missing)}
+        )
+    return types
+
+
+def _actor_names(actor_ids: Iterable[int]) -> Dict[int, str]:
+    names = {}
+    for pk, first, last, username in (
+        get_user_model()
+        .objects.filter(pk__in=set(actor_ids))
+        .values_list("pk", "first_name", "last_name", "username")
+    ):
+        names[pk] = f"{first} {last}".strip() or username
+    return names
+
+
+def _title(names: Dict[int, str], actor_ids: List[int], count: int, verb: str) -> str:
+    latest = names.get(actor_ids[-1], "Someone")
+    if count == 1:
+        return f"{latest} {verb}"
+    if count == 2 and len(actor_ids) >= 2:
+        return f"{latest} and {names.get(actor_ids[-2], 'someone')} {verb}"
+    return f"{latest} and {count - 1} others {verb}"
+
+
+def deliver(events: List[Dict]) -> int:
+    """Coalesce ``events`` into notifications, write them and push them"""
+    notifications = write(events)
+    _push(notifications)
+    return len(notifications)
+
+
+def write(events: List[Dict]) -> List[Notification]:
+    """Coalesce ``events`` into notifications and commit them"""
+    events = [event for event in events if event.get("kind") in KINDS]
+    if not events:
+        return []
+
+    authors = _recipients(events)
+
+    # (recipient, kind, target) -> ordered distinct actors and latest detail
+    groups: Dict[tuple, Dict] = OrderedDict()
+    for event in events:
+        kind = KINDS[event["kind"]]
+        recipient = authors.get((kind.target, event["target"]))
+        if recipient is None or recipient == event["actor"]:
+            continue  # Target gone, or a self-interaction
+        group = groups.setdefault(
+            (recipient, event["kind"], event["target"]),
+            {"actors": OrderedDict(), "detail": ""},
+        )
+        group["actors"].pop(event["actor"], None)
+        group["actors"][event["actor"]] = True
+        group["detail"] = event.get("detail") or group["detail"]
+
+    muted = preferences.muted(recipient for recipient, _, _ in groups)
+    groups = OrderedDict(
+        (key, group) for key, group in groups.items() if key[0] not in muted
+    )
+    if not groups:
+        return []
+
+    types = _notification_types(KINDS[kind] for _, kind, _ in groups)
+
+    # Unread notifications about the same targets, still open for coalescing
+    window = getattr(settings, "NOTIFICATION_COALESCE_WINDOW", 3600)
+    group_keys = {f"{key[1]}:{key[2]}": key for key in groups}
+    existing = {}
+    for notification in Notification.objects.filter(
+        user_id__in={recipient for recipient, _, _ in groups},
+        read=False,
+        created_at__gte=timezone.now() - timedelta(seconds=window),
+        metadata__group__in=list(group_keys),
+    ).select_related("notification_type"):
+        key = group_keys.get(notification.metadata.get("group"))
+        if key and key[0] == notification.user_id:
+            existing.setdefault(key, notification)
+
+    names = _actor_names(
+        [actor for group in groups.values() for actor in group["actors"]]
+        + [
+            actor
+            for notification in existing.values()
+            for actor in notification.metadata.get("actor_ids", [])[-2:]
+        ]
+    )
+
+    now = timezone.now()
+    to_create, to_update = [], []
+    for key, group in groups.items():
+        recipient, kind_name, target = key
+        kind = KINDS[kind_name]
+        notification = existing.get(key)
+        actor_ids = list(group["actors"])
+        count = len(actor_ids)
+        if notification is not None:
+            previous = notification.metadata.get("actor_ids", [])
+            new_actors = [actor for actor in actor_ids if actor not in previous]
+            count = notification.metadata.get("actor_count", len(previous)) + len(
+                new_actors
+            )
+            actor_ids = [a for a in previous if a not in group["actors"]] + actor_ids
+        else:
+            notification = Notification(
+                user_id=recipient, notification_type=types[kind.type_name]
+            )
+
+        actor_ids = actor_ids[-MAX_ACTORS:]
+        notification.title = _title(names, actor_ids, count, kind.verb)
+        notification.message = kind.message.format(
+            actor=names.get(actor_ids[-1], "Someone"), detail=group["detail"]
+        )[:500]
+        notification.created_at = now
+        notification.metadata = {
+            "group": f"{kind_name}:{target}",
+            "kind": kind_name,
+            f"{kind.target}_id": target,
+            "actor_ids": actor_ids,
+            "actor_count": count,
+        }
+        (to_update if notification.pk else to_create).append(notification)
+
+    with transaction.atomic():
+        Notification.objects.bulk_create(to_create)
+        Notification.objects.bulk_update(
+            to_update, ["title", "message", "created_at", "metadata"]
+        )
+        # Coalesced updates stay unread, so only the new rows are counted
+        inbox.record_created(to_create)
+
+    return to_create + to_update
+
+
+def _push(notifications: List[Notification]) -> None:
+    """One WebSocket message per recipient"""
+    from .services import UnifiedNotificationService
+
+    service = UnifiedNotificationService()
+    by_recipient = defaultdict(list)
+    for notification in notifications:
+        by_recipient[notification.user_id].append(notification)
+    for user_id, items in by_recipient.items():
+        service.send_in_app_batch(user_id, items)
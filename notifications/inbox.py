@@ -0,0 +1,210 @@
+# notifications/inbox.py
+"""
+Notification inbox: per-user counters and keyset pages
+
+A user's unread and total counts live in one ``InboxCounter`` row. Every
+write path adjusts it with F() expressions in the same transaction as the
+write, so reading the counts is a primary-key lookup rather than two
+COUNTs over the notification table. Marking read and deleting are single
+set-based statements, and the counters move by exactly the number of
+rows they changed. A missing counter row is built from the table on first
+use, and ``rebuild`` recomputes counters after deletes that bypass this
+module (such as the retention cleanup).
+
+Pages are keyset pages over (user, -created_at, -id), served by the index
+of the same shape. The cursor is the (created_at, id) of the last
+notification served, so a deep page costs the same as the first.
+"""
+
+import logging
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import InboxCounter, Notification
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def encode_cursor(created_at: datetime, notification_id: int) -> str:
+    # Whole microseconds, so the cursor survives a query string unescaped
+    return f"{(created_at - EPOCH) // timedelta(microseconds=1)}:{notification_id}"
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    micros, notification_id = cursor.split(":")
+    return EPOCH + timedelta(microseconds=int(micros)), int(notification_id)
+
+
+def page(
+    user_id: int,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+    read: Optional[bool] = None,
+) -> Tuple[List[Notification], Optional[str]]:
+    """
+    One page of ``user_id``'s notifications, newest first, as
+    ``(notifications, next_cursor)``. Raises ValueError for a bad cursor.
+    """
+    queryset = Notification.objects.filter(user_id=user_id)
+    if read is not None:
+        queryset = queryset.filter(read=read)
+    if cursor:
+        created_at, notification_id = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at)
+            | Q(created_at=created_at, id__lt=notification_id)
+        )
+    notifications = list(
+        queryset.select_related("notification_type").order_by("-created_at", "-id")[
+            : limit + 1
+        ]
+    )
+    next_cursor = None
+    if len(notifications) > limit:
+        notifications = notifications[:limit]
+        last = notifications[-1]
+        next_cursor = encode_cursor(last.created_at, last.pk)
+    return notifications, next_cursor
+
+
+def counts(user_id: int) -> Dict[str, int]:
+    """``{"unread_count", "total_count"}`` for ``user_id``"""
+    row = (
+        InboxCounter.objects.filter(user_id=user_id)
+        .values("unread_count", "total_count")
+        .first()
+    )
+    if row is None:
+        rebuild([user_id])
+        row = InboxCounter.objects.values("unread_count", "total_count").get(
+            user_id=user_id
+        )
+    return row
+
+
+def rebuild(user_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Recompute the counters of ``user_ids`` (default: every user with a
+    counter or a notification) from the table. Returns the rows written.
+
+    The counter rows are created if missing and locked before counting, so
+    an ``_adjust`` that already holds one commits first and its change is
+    part of the count instead of being overwritten by a stale one.
+    """
+    if user_ids is None:
+        user_ids = set(
+            Notification.objects.order_by().values_list("user_id", flat=True).distinct()
+        ) | set(InboxCounter.objects.values_list("user_id", flat=True))
+    user_ids = sorted(set(user_ids))
+    if not user_ids:
+        return 0
+
+    now = timezone.now()
+    with transaction.atomic():
+        # Waits for a concurrent first insert of the same row to commit
+        InboxCounter.objects.bulk_create(
+            [InboxCounter(user_id=user_id, updated_at=now) for user_id in user_ids],
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+        counters = list(
+            InboxCounter.objects.select_for_update()
+            .filter(user_id__in=user_ids)
+            .order_by("user_id")
+        )
+        totals = {
+            row["user_id"]: row
+            for row in Notification.objects.filter(user_id__in=user_ids)
+            .order_by()
+            .values("user_id")
+            .annotate(total=Count("id"), unread=Count("id", filter=Q(read=False)))
+        }
+        for counter in counters:
+            counter.unread_count = totals.get(counter.user_id, {}).get("unread", 0)
+            counter.total_count = totals.get(counter.user_id, {}).get("total", 0)
+            counter.updated_at = now
+        InboxCounter.objects.bulk_update(
+            counters,
+            ["unread_count", "total_count", "updated_at"],
+            batch_size=1000,
+        )
+    return len(counters)
+
+
+def _adjust(deltas: Dict[int, Tuple[int, int]]) -> None:
+    """Apply ``{user_id: (unread_delta, total_delta)}`` to the counters"""
+    by_delta = defaultdict(list)
+    for user_id, delta in deltas.items():
+        if delta != (0, 0):
+            by_delta[delta].append(user_id)
+
+    # One UPDATE per distinct delta, however many users share it
+    missing = set()
+    now = timezone.now()
+    for (unread, total), user_ids in by_delta.items():
+        updated = InboxCounter.objects.filter(user_id__in=user_ids).update(
+            unread_count=Greatest(F("unread_count") + unread, Value(0)),
+            total_count=Greatest(F("total_count") + total, Value(0)),
+            updated_at=now,
+        )
+        if updated < len(user_ids):
+            missing.update(
+                set(user_ids)
+                - set(
+                    InboxCounter.objects.filter(user_id__in=user_ids).values_list(
+                        "user_id", flat=True
+                    )
+                )
+            )
+    if missing:
+        # Built from the table, which already includes this change
+        rebuild(missing)
+
+
+def record_created(notifications: Iterable[Notification]) -> None:
+    """Count newly inserted ``notifications``; call in the inserting transaction"""
+    unread, total = Counter(), Counter()
+    for notification in notifications:
+        total[notification.user_id] += 1
+        if not notification.read:
+            unread[notification.user_id] += 1
+    _adjust({user_id: (unread[user_id], total[user_id]) for user_id in total})
+
+
+def set_read(
+    user_id: int, notification_ids: Optional[Iterable[int]] = None, read: bool = True
+) -> int:
+    """
+    Mark ``user_id``'s notifications (all, or ``notification_ids``) read or
+    unread in one UPDATE. Returns the notifications that changed.
+    """
+    queryset = Notification.objects.filter(user_id=user_id, read=not read)
+    if notification_ids is not None:
+        queryset = queryset.filter(pk__in=list(notification_ids))
+    with transaction.atomic():
+        changed = queryset.update(read=read)
+        if changed:
+            _adjust({user_id: (-changed if read else changed, 0)})
+    return changed
+
+
+def delete(user_id: int, notification_ids: Iterable[int]) -> int:
+    """Delete ``user_id``'s ``notification_ids``; returns the number deleted"""
+    queryset = Notification.objects.filter(
+        user_id=user_id, pk__in=list(notification_ids)
+    )
+    with transaction.atomic():
+        # Unread first, so each statement's row count is exact
+        unread, _ = queryset.filter(read=False).delete()
+        already_read, _ = queryset.delete()
+        if unread or already_read:
+            _adjust({user_id: (-unread, -(unread + already_read))})
+    return unread + already_read
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:30
+
+from django.db import migrations
+
+import core.partitioning
+
+
+class Migration(migrations.Migration):
+    """
+    Rebuild notifications as monthly partitions.
+
+    The table is copied in full inside this migration's transaction and is
+    locked (ACCESS EXCLUSIVE, no reads or writes) until it commits, so the
+    migration takes about as long as rewriting the table and its indexes.
+    Apply it in a maintenance window.
+    """
+
+    dependencies = [
+        ("notifications", "0002_initial"),
+    ]
+
+    operations = [
+        core.partitioning.PartitionByMonth(
+            model_name="notification", column="created_at"
+        ),
+    ]
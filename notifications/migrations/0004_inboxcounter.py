@@ -0,0 +1,46 @@
+# Generated by Django 4.2.7 on 2026-10-18 21:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("notifications", "0003_partition_notification"),
+    ]
+
+    operations = [
+        # Counters are built from the table on each user's first inbox access
+        migrations.CreateModel(
+            name="InboxCounter",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="notification_inbox",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("unread_count", models.PositiveIntegerField(default=0)),
+                ("total_count", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["user", "-created_at", "-id"],
+                name="notificatio_user_id_90f3d6_idx",
+            ),
+        ),
+        # Covered by the index above
+        migrations.RemoveIndex(
+            model_name="notification",
+            name="notificatio_user_id_05b4bc_idx",
+        ),
+    ]
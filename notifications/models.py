@@ -63,7 +63,8 @@ class Notification(models.Model):
             models.Index(fields=["-created_at"]),
             models.Index(fields=["read"]),
             models.Index(fields=["priority"]),
-            models.Index(fields=["user", "-created_at"]),
+            # Inbox keyset pages: (created_at, id) below the cursor
+            models.Index(fields=["user", "-created_at", "-id"]),
             models.Index(fields=["user", "read"]),
             models.Index(fields=["notification_type", "-created_at"]),
         ]
@@ -72,11 +73,28 @@ class Notification(models.Model):
         return f"{self.user}: {self.title}"
 
     def mark_read(self):
-        """Mark notification as read with cache invalidation"""
-        from django.core.cache import cache
+        """Mark notification as read, adjusting the inbox counter"""
+        from . import inbox
 
+        inbox.set_read(self.user_id, [self.pk])
         self.read = True
-        self.save()
-        # Invalidate relevant caches
-        cache.delete(f"user_notifications_{self.user.id}")
-        cache.delete(f"notification_count_{self.user.id}")
+
+
+class InboxCounter(models.Model):
+    """
+    A user's notification counts, kept current by every write path
+    (see ``notifications.inbox``)
+    """
+
+    user = models.OneToOneField(
+        CustomUser,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="notification_inbox",
+    )
+    unread_count = models.PositiveIntegerField(default=0)
+    total_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user}: {self.unread_count}/{self.total_count}"
@@ -0,0 +1,88 @@
+# notifications/preferences.py
+"""
+Compact notification-preference snapshots
+
+Delivery only needs three facts about a recipient: whether in-app and
+email notifications are on, and which notification types they disabled.
+These are cached per user as a small dict (``{"in_app": True, "email":
+True, "disabled": [3, 7]}``) rather than as a pickled ``UserPreferences``
+instance, fetched for many recipients with one ``get_many``, and dropped
+whenever the preferences change (see ``notifications.signals``). Users
+without a preferences row get the model defaults.
+"""
+
+from typing import Dict, Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def _cache_key(user_id: int) -> str:
+    return f"notification_prefs_{user_id}"
+
+
+def _defaults() -> dict:
+    from users.models import UserPreferences
+
+    field = UserPreferences._meta.get_field
+    return {
+        "in_app": field("in_app_notifications").default,
+        "email": field("email_notifications").default,
+        "disabled": [],
+    }
+
+
+def snapshots(user_ids: Iterable[int]) -> Dict[int, dict]:
+    """``{user_id: snapshot}``; one cache round trip and at most two queries"""
+    from users.models import UserPreferences
+
+    user_ids = set(user_ids)
+    cached = cache.get_many([_cache_key(user_id) for user_id in user_ids])
+    result = {
+        user_id: cached[_cache_key(user_id)]
+        for user_id in user_ids
+        if _cache_key(user_id) in cached
+    }
+    missing = user_ids - set(result)
+    if not missing:
+        return result
+
+    fetched = {user_id: _defaults() for user_id in missing}
+    rows = UserPreferences.objects.filter(user_id__in=missing)
+    for user_id, in_app, email in rows.values_list(
+        "user_id", "in_app_notifications", "email_notifications"
+    ):
+        fetched[user_id].update(in_app=in_app, email=email)
+    for user_id, type_id in rows.filter(
+        disabled_notification_types__isnull=False
+    ).values_list("user_id", "disabled_notification_types"):
+        fetched[user_id]["disabled"].append(type_id)
+
+    cache.set_many(
+        {_cache_key(user_id): snapshot for user_id, snapshot in fetched.items()},
+        timeout=getattr(settings, "NOTIFICATION_CACHE_TIMEOUT", 3600),
+    )
+    result.update(fetched)
+    return result
+
+
+def snapshot(user_id: int) -> dict:
+    return snapshots([user_id])[user_id]
+
+
+def allows(snapshot: dict, notification_type, channel: str = "in_app") -> bool:
+    """Whether ``snapshot`` accepts ``notification_type`` on ``channel``"""
+    return snapshot[channel] and notification_type.id not in snapshot["disabled"]
+
+
+def muted(user_ids: Iterable[int]) -> set:
+    """Recipients who switched in-app notifications off"""
+    return {
+        user_id
+        for user_id, preferences in snapshots(user_ids).items()
+        if not preferences["in_app"]
+    }
+
+
+def invalidate(user_id: int) -> None:
+    cache.delete(_cache_key(user_id))
@@ -1,11 +1,12 @@
 # notifications/services.py
 from .models import Notification, NotificationType
-from users.models import UserPreferences
+from . import preferences as notification_preferences
 import logging
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
 from django.core.cache import cache
 from django.conf import settings
+from django.db import transaction
 
 logger = logging.getLogger(__name__)
 
@@ -45,13 +46,8 @@ class UnifiedNotificationService:
                 notification_type_name
             )
 
-            # Get cached preferences
-            pref_cache_key = f"user_preferences_{user.id}"
-            preferences = cache.get(pref_cache_key)
-
-            if preferences is None:
-                preferences, _ = UserPreferences.objects.get_or_create(user=user)
-                cache.set(pref_cache_key, preferences, timeout=self.cache_timeout)
+            # Cached preference snapshot
+            preferences = notification_preferences.snapshot(user.id)
 
             if not self._check_notification_allowed(preferences, notification_type):
                 logger.debug(
@@ -59,19 +55,17 @@ class UnifiedNotificationService:
                 )
                 return None
 
-            # Create notification
-            notification = Notification.objects.create(
-                user=user,
-                notification_type=notification_type,
-                title=title,
-                message=message,
-                priority=kwargs.get("priority", "medium"),
-                metadata=kwargs.get("metadata", {}),
-                content_object=kwargs.get("content_object"),
-            )
-
-            # Invalidate relevant caches
-            self._invalidate_user_caches(user.id)
+            # Create notification; the inbox counter moves in the same transaction
+            with transaction.atomic():
+                notification = Notification.objects.create(
+                    user=user,
+                    notification_type=notification_type,
+                    title=title,
+                    message=message,
+                    priority=kwargs.get("priority", "medium"),
+                    metadata=kwargs.get("metadata", {}),
+                    content_object=kwargs.get("content_object"),
+                )
 
             # Handle different channels
             if kwargs.get("send_email", False):
@@ -86,47 +80,51 @@ class UnifiedNotificationService:
             logger.error(f"Error sending notification: {str(e)}", exc_info=True)
             return None
 
-    def _invalidate_user_caches(self, user_id):
-        """Invalidate all caches related to a user's notifications."""
-        cache_keys = [
-            f"user_notifications_{user_id}",
-            f"notification_count_{user_id}",
-            f"user_preferences_{user_id}",
-        ]
-        cache.delete_many(cache_keys)
-
     def _check_notification_allowed(self, preferences, notification_type):
-        """Check if notification is allowed with caching."""
-        cache_key = f"notification_allowed_{preferences.user.id}_{notification_type.id}"
-        allowed = cache.get(cache_key)
-
-        if allowed is None:
-            allowed = preferences.in_app_notifications
-            cache.set(cache_key, allowed, timeout=300)  # Cache for 5 minutes
-
-        return allowed
+        """Check the preference snapshot allows this type in-app."""
+        return notification_preferences.allows(preferences, notification_type)
 
     def _send_email_notification(self, user, notification, preferences):
-        if preferences.email_notifications:
+        if notification_preferences.allows(
+            preferences, notification.notification_type, "email"
+        ):
             # Implement actual email sending logic here.
             logger.info(f"Sent email notification to {user.email}")
 
+    def _notification_payload(self, notification):
+        return {
+            "id": notification.id,
+            "type": notification.notification_type.name,
+            "title": notification.title,
+            "message": notification.message,
+            "timestamp": notification.created_at.isoformat(),
+            "priority": notification.priority,
+        }
+
     def _send_in_app_notification(self, user, notification):
+        return self.send_in_app_batch(user.id, [notification])
+
+    def send_in_app_batch(self, user_id, notifications):
+        """
+        Push notifications to one recipient in a single channel layer message.
+
+        A lone notification keeps the ``notification.message`` format; several
+        go out together as one ``notification.batch``.
+        """
+        if not notifications:
+            return True
         try:
-            channel_layer = get_channel_layer()
-            notification_data = {
-                "id": notification.id,
-                "type": notification.notification_type.name,
-                "title": notification.title,
-                "message": notification.message,
-                "timestamp": notification.created_at.isoformat(),
-                "priority": notification.priority,
-            }
-            async_to_sync(channel_layer.group_send)(
-                f"user_{user.id}_notifications",
-                {"type": "notification.message", "message": notification_data},
+            payloads = [self._notification_payload(n) for n in notifications]
+            if len(payloads) == 1:
+                event = {"type": "notification.message", "message": payloads[0]}
+            else:
+                event = {"type": "notification.batch", "notifications": payloads}
+            async_to_sync(get_channel_layer().group_send)(
+                f"user_{user_id}_notifications", event
+            )
+            logger.info(
+                f"Sent {len(payloads)} WebSocket notification(s) to user {user_id}"
             )
-            logger.info(f"Sent WebSocket notification to user {user.username}")
             return True
         except Exception as e:
             logger.error(f"Error sending WebSocket notification: {str(e)}")
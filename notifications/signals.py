@@ -1,8 +1,10 @@
 # notifications/signals.py
-from django.db.models.signals import post_migrate, post_save, pre_delete, post_delete
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_migrate, post_save, post_delete
 from django.dispatch import receiver
-from django.core.cache import cache
+from users.models import UserPreferences
 from .models import NotificationType, Notification
+from . import inbox, preferences
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
 import logging
@@ -44,16 +46,11 @@ def create_default_notification_types(sender, **kwargs):
 
 @receiver(post_save, sender=Notification)
 def notification_post_save(sender, instance, created, **kwargs):
-    """Handle notification creation/update with cache invalidation"""
+    """Count new notifications in the inbox and push them over the WebSocket"""
+    if created:
+        # Not caught: the counter must move with the insert or not at all
+        inbox.record_created([instance])
     try:
-        # Invalidate user's notification caches
-        cache_keys = [
-            f"user_notifications_{instance.user.id}",
-            f"notification_count_{instance.user.id}",
-            f"user_unread_notifications_{instance.user.id}",
-        ]
-        cache.delete_many(cache_keys)
-
         # Send WebSocket notification only for new notifications
         if created:
             channel_layer = get_channel_layer()
@@ -76,41 +73,40 @@ def notification_post_save(sender, instance, created, **kwargs):
         logger.error(f"Error in notification post_save signal: {str(e)}", exc_info=True)
 
 
-@receiver([pre_delete, post_delete], sender=Notification)
-def notification_delete(sender, instance, **kwargs):
-    """Handle notification deletion with cache cleanup"""
-    try:
-        # Invalidate all related caches
-        cache_keys = [
-            f"user_notifications_{instance.user.id}",
-            f"notification_count_{instance.user.id}",
-            f"user_unread_notifications_{instance.user.id}",
-            f"notification_{instance.id}",
-        ]
-        cache.delete_many(cache_keys)
+# Notifications are deleted through notifications.inbox, which adjusts the
+# counters; no delete receiver, so those deletes stay single statements.
 
-    except Exception as e:
-        logger.error(f"Error in notification delete signal: {str(e)}", exc_info=True)
+
+@receiver(post_save, sender=UserPreferences)
+@receiver(post_delete, sender=UserPreferences)
+def preferences_changed(sender, instance, **kwargs):
+    preferences.invalidate(instance.user_id)
 
 
-def notification_handler(sender, instance, **kwargs):
-    cache_key = f"notification_{instance.id}"
-    if cached := cache.get(cache_key):
-        return cached
-    # ...existing notification handling code...
-    cache.set(cache_key, instance, 300)
-    return instance
+@receiver(m2m_changed, sender=UserPreferences.disabled_notification_types.through)
+def disabled_types_changed(sender, instance, action, pk_set=None, **kwargs):
+    if not action.startswith("post_"):
+        return
+    if isinstance(instance, UserPreferences):
+        user_ids = [instance.user_id]
+    else:
+        # Changed from the NotificationType side
+        user_ids = UserPreferences.objects.filter(pk__in=pk_set or ()).values_list(
+            "user_id", flat=True
+        )
+    for user_id in user_ids:
+        preferences.invalidate(user_id)
 
 
 def bulk_create_notifications(notifications_data):
     """
-    Efficiently create multiple notifications with proper cache handling
+    Efficiently create multiple notifications with inbox counting
 
     Args:
         notifications_data: List of dictionaries containing notification data
     """
     try:
-        # Group notifications by user for efficient cache invalidation
+        # Group notifications by user for the WebSocket pushes
         user_notifications = {}
         notifications_to_create = []
 
@@ -134,23 +130,17 @@ def bulk_create_notifications(notifications_data):
                 user_notifications[user.id] = []
             user_notifications[user.id].append(notification)
 
-        # Bulk create all notifications
-        created_notifications = Notification.objects.bulk_create(
-            notifications_to_create
-        )
+        # Bulk create all notifications and count them in the inboxes
+        with transaction.atomic():
+            created_notifications = Notification.objects.bulk_create(
+                notifications_to_create
+            )
+            inbox.record_created(created_notifications)
 
-        # Invalidate caches and send WebSocket notifications for each user
+        # Send WebSocket notifications for each user
         channel_layer = get_channel_layer()
 
         for user_id, user_notifs in user_notifications.items():
-            # Invalidate user's caches
-            cache_keys = [
-                f"user_notifications_{user_id}",
-                f"notification_count_{user_id}",
-                f"user_unread_notifications_{user_id}",
-            ]
-            cache.delete_many(cache_keys)
-
             # Send WebSocket notifications
             for notification in user_notifs:
                 async_to_sync(channel_layer.group_send)(
@@ -0,0 +1,35 @@
+# notifications/tasks.py
+import logging
+from dataclasses import replace
+
+from celery import shared_task
+
+from core import retention
+from . import fanout
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def cleanup_old_notifications(days=30):
+    """
+    Remove notifications older than ``days`` through the retention engine
+    (see core.retention, which also schedules it): expired partitions are
+    dropped, remaining rows deleted in batches and the inbox counters of
+    the affected users recomputed.
+    """
+    policy = replace(retention.get_policy("notifications.Notification"), days=days)
+    return retention.purge(policy)
+
+
+@shared_task
+def deliver_interaction_notifications(events=None):
+    """
+    Write and push queued interaction notifications.
+
+    ``events`` is only passed when the Redis queue was unavailable;
+    otherwise the queue is drained in batches.
+    """
+    if events:
+        return fanout.deliver(events)
+    return fanout.flush_pending()
@@ -0,0 +1,223 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from feeds.models import Post
+from notifications import fanout, inbox
+from notifications.models import InboxCounter, Notification, NotificationType
+from notifications.signals import bulk_create_notifications
+
+
+class FakeRedisLists:
+    """The list, sorted set and pipeline commands ``fanout`` uses, on dicts"""
+
+    def __init__(self):
+        self.lists = {}
+        self.zsets = {}
+        self.strings = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.strings:
+            return None
+        self.strings[key] = value
+        return True
+
+    def rpush(self, key, *values):
+        self.lists.setdefault(key, []).extend(v.encode() for v in values)
+
+    def lpush(self, key, *values):
+        for value in values:
+            self.lists.setdefault(key, []).insert(0, value.encode())
+
+    def llen(self, key):
+        return len(self.lists.get(key, []))
+
+    def lmove(self, src, dst, src_side, dst_side):
+        items = self.lists.get(src)
+        if not items:
+            return None
+        item = items.pop(0 if src_side == "LEFT" else -1)
+        target = self.lists.setdefault(dst, [])
+        target.insert(0 if dst_side == "LEFT" else len(target), item)
+        return item
+
+    def delete(self, key):
+        self.lists.pop(key, None)
+
+    def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    def zrem(self, key, member):
+        self.zsets.get(key, {}).pop(member, None)
+
+    def zrangebyscore(self, key, low, high):
+        return [
+            m for m, score in self.zsets.get(key, {}).items() if low <= score <= high
+        ]
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.redis = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        method = getattr(self.redis, name)
+        return lambda *args, **kwargs: self.calls.append((method, args, kwargs))
+
+    def execute(self):
+        return [method(*args, **kwargs) for method, args, kwargs in self.calls]
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class FanoutTest(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.author, self.ana, self.ben = (
+            User.objects.create_user(
+                username=name, email=f"{name}@example.com", password="x"
+            )
+            for name in ("author", "ana", "ben")
+        )
+        self.post = Post.objects.create(
+            author=self.author, content="hi", tags="therapy"
+        )
+        self.redis = FakeRedisLists()
+        for target, value in (
+            ("_redis", lambda: self.redis),
+            ("_push", lambda notifications: None),
+        ):
+            patcher = mock.patch.object(fanout, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch(
+            "notifications.tasks.deliver_interaction_notifications.apply_async"
+        )
+        self.scheduled = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def react(self, *users):
+        with self.captureOnCommitCallbacks(execute=True):
+            for user in users:
+                fanout.notify("post_reaction", self.post.pk, user.pk, "like")
+
+    def test_reactions_are_coalesced_into_one_notification(self):
+        self.react(self.ana, self.ben, self.ana)
+        self.assertEqual(self.scheduled.call_count, 1)  # One flush per window
+
+        self.assertEqual(fanout.flush_pending(), 1)
+        notification = Notification.objects.get(user=self.author)
+        self.assertEqual(notification.metadata["actor_ids"], [self.ben.pk, self.ana.pk])
+        self.assertIn("ben", notification.title)
+        self.assertEqual(self.redis.llen(fanout.QUEUE_KEY), 0)
+        self.assertEqual(self.redis.zsets[fanout.PROCESSING_KEY], {})
+
+        # A later reaction within the window updates the same notification
+        self.react(self.author, self.ben)
+        fanout.flush_pending()
+        self.assertEqual(Notification.objects.filter(user=self.author).count(), 1)
+
+    def test_failed_delivery_puts_the_batch_back(self):
+        self.react(self.ana, self.ben)
+
+        with mock.patch.object(fanout, "write", side_effect=RuntimeError("db down")):
+            with self.assertRaises(RuntimeError):
+                fanout.flush_pending()
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(self.redis.llen(fanout.QUEUE_KEY), 2)
+        self.assertEqual(self.redis.zsets[fanout.PROCESSING_KEY], {})
+
+        self.assertEqual(fanout.flush_pending(), 1)
+        notification = Notification.objects.get(user=self.author)
+        self.assertEqual(notification.metadata["actor_ids"], [self.ana.pk, self.ben.pk])
+
+    @override_settings(NOTIFICATION_FANOUT_PROCESSING_TIMEOUT=0)
+    def test_batch_of_a_dead_worker_is_requeued(self):
+        self.react(self.ana)
+        processing, events = fanout.drain()
+        self.assertEqual(len(events), 1)
+        self.assertEqual(self.redis.llen(fanout.QUEUE_KEY), 0)
+
+        # The worker died before ack; the next run picks the batch up again
+        self.assertEqual(fanout.flush_pending(), 1)
+        self.assertEqual(self.redis.llen(processing), 0)
+        self.assertTrue(Notification.objects.filter(user=self.author).exists())
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+)
+class InboxCounterTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="reader", email="reader@example.com", password="x"
+        )
+        self.type = NotificationType.objects.create(
+            name="inbox_test", description="", default_enabled=True, is_global=True
+        )
+
+    def assertCountsMatchTable(self):
+        notifications = Notification.objects.filter(user=self.user)
+        self.assertEqual(
+            inbox.counts(self.user.pk),
+            {
+                "unread_count": notifications.filter(read=False).count(),
+                "total_count": notifications.count(),
+            },
+        )
+
+    def send(self, title="hello"):
+        return Notification.objects.create(
+            user=self.user, notification_type=self.type, title=title, message=""
+        )
+
+    def test_counters_follow_every_write_path(self):
+        first = self.send()
+        self.assertCountsMatchTable()
+
+        bulk_create_notifications(
+            [
+                {
+                    "user": self.user,
+                    "notification_type": self.type,
+                    "title": f"bulk {i}",
+                    "message": "",
+                }
+                for i in range(3)
+            ]
+        )
+        self.assertCountsMatchTable()
+
+        inbox.set_read(self.user.pk, [first.pk])
+        self.assertCountsMatchTable()
+        inbox.set_read(self.user.pk)
+        self.assertCountsMatchTable()
+        inbox.set_read(self.user.pk, [first.pk], read=False)
+        self.assertCountsMatchTable()
+
+        ids = list(
+            Notification.objects.filter(user=self.user).values_list("pk", flat=True)
+        )
+        self.assertEqual(inbox.delete(self.user.pk, ids[:2]), 2)
+        self.assertCountsMatchTable()
+
+    def test_rebuild_restores_drifted_counters(self):
+        self.send()
+        self.send()
+        Notification.objects.filter(user=self.user).update(read=True)
+        InboxCounter.objects.filter(user=self.user).update(
+            unread_count=7, total_count=9
+        )
+
+        self.assertEqual(inbox.rebuild([self.user.pk]), 1)
+        self.assertCountsMatchTable()
+
+        InboxCounter.objects.filter(user=self.user).delete()
+        self.assertCountsMatchTable()  # Built on first read
@@ -2,11 +2,10 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db import transaction
 from django.core.exceptions import ValidationError
 from drf_spectacular.utils import extend_schema, extend_schema_view
-from django.core.cache import cache
 from rest_framework.pagination import LimitOffsetPagination
+from . import inbox
 from .models import Notification, NotificationType
 from .serializers import (
     NotificationSerializer,
@@ -27,7 +26,6 @@ class NotificationPagination(LimitOffsetPagination):
 class NotificationViewSet(viewsets.ModelViewSet):
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
-    pagination_class = NotificationPagination
     http_method_names = [
         "get",
         "post",
@@ -36,42 +34,59 @@ class NotificationViewSet(viewsets.ModelViewSet):
         "options",
     ]  # Ensure "post" is included
 
+    def _read_param(self):
+        read_param = self.request.query_params.get("read", None)
+        if read_param is None:
+            return None
+        return read_param.lower() == "true"
+
     def get_queryset(self):
-        """Get notifications for the current user with type information and caching."""
-        cache_key = f"user_notifications_{self.request.user.id}"
-        queryset = cache.get(cache_key)
-
-        if queryset is None:
-            queryset = (
-                Notification.objects.filter(user=self.request.user)
-                .select_related("notification_type")
-                .order_by("-created_at")
-            )
-            cache.set(cache_key, queryset, timeout=300)  # Cache for 5 minutes
+        """Notifications of the current user with type information."""
+        queryset = (
+            Notification.objects.filter(user=self.request.user)
+            .select_related("notification_type")
+            .order_by("-created_at", "-id")
+        )
 
         # Add filtering for read/unread
-        read_param = self.request.query_params.get("read", None)
-        if read_param is not None:
-            is_read = read_param.lower() == "true"
-            # We need to create a new queryset for filtering since we got it from cache
-            # This ensures we don't modify the cached queryset
+        is_read = self._read_param()
+        if is_read is not None:
             queryset = queryset.filter(read=is_read)
 
         return queryset
 
+    @extend_schema(
+        description="The current user's notifications, newest first. Pass the "
+        "returned next_cursor as ?cursor= to get the following page; "
+        "?read=true/false filters, ?limit= sets the page size.",
+        responses={200: NotificationSerializer(many=True)},
+    )
     def list(self, request, *args, **kwargs):
-        """Override list method to use pagination"""
-        queryset = self.filter_queryset(self.get_queryset())
+        """Keyset-paginated inbox with the counters alongside"""
+        limit = request.query_params.get("limit", "")
+        limit = int(limit) if limit.isdigit() else NotificationPagination.default_limit
+        limit = max(1, min(limit, NotificationPagination.max_limit))
 
-        # Check if pagination is needed
-        page = self.paginate_queryset(queryset)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+        try:
+            notifications, next_cursor = inbox.page(
+                request.user.id,
+                request.query_params.get("cursor"),
+                limit,
+                read=self._read_param(),
+            )
+        except ValueError:
+            return Response(
+                {"error": "Invalid cursor"}, status=status.HTTP_400_BAD_REQUEST
+            )
 
-        # If no pagination requested, return all results
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        serializer = self.get_serializer(notifications, many=True)
+        return Response(
+            {
+                "results": serializer.data,
+                "next_cursor": next_cursor,
+                **inbox.counts(request.user.id),
+            }
+        )
 
     @extend_schema(
         description="Update notification status",
@@ -79,15 +94,17 @@ class NotificationViewSet(viewsets.ModelViewSet):
         responses={200: NotificationSerializer},
     )
     def partial_update(self, request, *args, **kwargs):
-        """Update notification with cache invalidation"""
+        """Mark a notification read or unread, adjusting the inbox counter"""
+        notification = self.get_object()
+        serializer = NotificationUpdateSerializer(data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+
         try:
-            with transaction.atomic():
-                response = super().partial_update(request, *args, **kwargs)
-                if response.status_code == 200:
-                    # Invalidate caches
-                    cache.delete(f"user_notifications_{request.user.id}")
-                    cache.delete(f"notification_count_{request.user.id}")
-                return response
+            if "read" in serializer.validated_data:
+                read = serializer.validated_data["read"]
+                inbox.set_read(request.user.id, [notification.pk], read=read)
+                notification.read = read
+            return Response(self.get_serializer(notification).data)
         except ValidationError as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
@@ -111,15 +128,8 @@ class NotificationViewSet(viewsets.ModelViewSet):
     )
     @action(detail=False, methods=["get"], url_path="count")
     def count(self, request):
-        """Return counts of notifications"""
-        user = request.user
-
-        # Get counts - using 'user' instead of 'recipient'
-        unread_count = self.get_queryset().filter(user=user, read=False).count()
-
-        total_count = self.get_queryset().filter(user=user).count()
-
-        return Response({"unread_count": unread_count, "total_count": total_count})
+        """Return counts of notifications from the inbox counter"""
+        return Response(inbox.counts(request.user.id))
 
     @extend_schema(
         description="Mark all unread notifications as read",
@@ -135,16 +145,10 @@ class NotificationViewSet(viewsets.ModelViewSet):
     )
     @action(detail=False, methods=["post"])
     def mark_all_read(self, request):
-        """Mark all notifications as read with cache invalidation"""
+        """Mark all notifications as read in one UPDATE"""
         try:
-            with transaction.atomic():
-                updated = request.user.notifications.filter(read=False).update(
-                    read=True
-                )
-                # Invalidate user's notification cache
-                cache.delete(f"user_notifications_{request.user.id}")
-                cache.delete(f"notification_count_{request.user.id}")
-                return Response({"status": "success", "count": updated})
+            updated = inbox.set_read(request.user.id)
+            return Response({"status": "success", "count": updated})
         except Exception as e:
             logger.error(f"Error marking notifications as read: {str(e)}")
             return Response(
@@ -193,26 +197,16 @@ class NotificationViewSet(viewsets.ModelViewSet):
         notification_ids = serializer.validated_data["notification_ids"]
 
         try:
-            with transaction.atomic():
-                notifications = Notification.objects.filter(
-                    user=request.user, id__in=notification_ids
-                )
-
-                count = notifications.count()
-                notifications.delete()
-
-                # Cache invalidation
-                cache.delete(f"user_notifications_{request.user.id}")
-                cache.delete(f"notification_count_{request.user.id}")
-
-                return Response(
-                    {
-                        "message": f"{count} notifications deleted successfully",
-                        "deleted_count": count,
-                        "notification_ids": notification_ids,
-                    },
-                    status=status.HTTP_200_OK,
-                )
+            count = inbox.delete(request.user.id, notification_ids)
+
+            return Response(
+                {
+                    "message": f"{count} notifications deleted successfully",
+                    "deleted_count": count,
+                    "notification_ids": notification_ids,
+                },
+                status=status.HTTP_200_OK,
+            )
 
         except Exception as e:
             logger.error(f"Error bulk deleting notifications: {str(e)}", exc_info=True)
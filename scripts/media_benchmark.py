@@ -0,0 +1,192 @@
+# scripts/media_benchmark.py
+"""
+Media delivery benchmark: throughput and latency of signed media URLs
+
+Writes a test file to media storage, builds a signed URL for it (see
+media_handler/delivery.py) and downloads it repeatedly, whole and as
+random byte ranges (what a player does when seeking):
+
+    # Against a running server, e.g. nginx from docker-compose.nginx.yml
+    python scripts/media_benchmark.py --url http://localhost:8080 --size-mb 64
+
+    # In-process, no server: the worker time each backend costs per request
+    python scripts/media_benchmark.py --backend django --backend x-accel
+
+With ``--url`` the numbers are end to end, so run it once against the
+app directly (MEDIA_DELIVERY_BACKEND=django) and once through nginx
+(x-accel). In-process runs call the view directly and show how long a
+worker is tied up per request. For "x-accel" that is just the
+authorization, because nginx sends the bytes.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHUNK = 256 * 1024
+
+
+def setup_django():
+    sys.path.insert(0, ROOT)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mindcare.settings")
+    import django
+
+    django.setup()
+
+
+def make_file(size_mb):
+    from django.core.files.base import ContentFile
+    from django.core.files.storage import default_storage
+
+    block = os.urandom(1024 * 1024)
+    name = default_storage.save(
+        f"benchmark/{uuid.uuid4().hex}.bin", ContentFile(block * size_mb)
+    )
+    return name, size_mb * 1024 * 1024
+
+
+def random_range(size, range_kb):
+    length = range_kb * 1024
+    start = random.randrange(0, max(size - length, 1))
+    return start, min(start + length, size) - 1
+
+
+def fetch_remote(url, byte_range):
+    request = urllib.request.Request(url)
+    if byte_range:
+        request.add_header("Range", "bytes=%d-%d" % byte_range)
+    started = time.perf_counter()
+    received = 0
+    with urllib.request.urlopen(request) as response:
+        status = response.status
+        while True:
+            data = response.read(CHUNK)
+            if not data:
+                break
+            received += len(data)
+    return status, received, time.perf_counter() - started
+
+
+def fetch_in_process(name, path, byte_range):
+    from django.test import RequestFactory
+
+    from media_handler.views import serve_media
+
+    headers = {"HTTP_RANGE": "bytes=%d-%d" % byte_range} if byte_range else {}
+    request = RequestFactory().get(path, **headers)
+    started = time.perf_counter()
+    response = serve_media(request, name)
+    received = 0
+    if response.streaming:
+        for data in response.streaming_content:
+            received += len(data)
+        response.close()
+    return response.status_code, received, time.perf_counter() - started
+
+
+def run(fetch, requests, concurrency, size, range_kb, scenario):
+    def one(_):
+        byte_range = random_range(size, range_kb) if scenario == "range" else None
+        return fetch(byte_range)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(one, range(requests)))
+    elapsed = time.perf_counter() - started
+
+    statuses = sorted({status for status, _, _ in results})
+    latencies = sorted(seconds for _, _, seconds in results)
+    received = sum(count for _, count, _ in results)
+    return {
+        "scenario": scenario,
+        "requests": requests,
+        "concurrency": concurrency,
+        "statuses": statuses,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(requests / elapsed, 1),
+        "mb_per_second": round(received / elapsed / 1024 / 1024, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+    }
+
+
+def report(label, summary):
+    print(
+        f"{label:>10} {summary['scenario']:>6}: "
+        f"{summary['requests_per_second']:>8} req/s "
+        f"{summary['mb_per_second']:>8} MB/s  "
+        f"p50 {summary['p50_ms']:>8} ms  p95 {summary['p95_ms']:>8} ms  "
+        f"status {summary['statuses']}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", help="Base URL of a running server")
+    parser.add_argument(
+        "--backend",
+        action="append",
+        choices=["django", "x-accel", "x-sendfile"],
+        help="In-process backend to measure; repeat for several (default: django)",
+    )
+    parser.add_argument("--size-mb", type=int, default=32)
+    parser.add_argument("--range-kb", type=int, default=1024)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.core.files.storage import default_storage
+
+    from media_handler import delivery
+
+    name, size = make_file(args.size_mb)
+    print(f"{args.size_mb} MB test file: {name}")
+    summaries = []
+    try:
+        if args.url:
+            url = args.url.rstrip("/") + delivery.media_url(name)
+            targets = [("remote", None, lambda r: fetch_remote(url, r))]
+        else:
+            path = delivery.media_url(name)
+            targets = [
+                (backend, backend, lambda r: fetch_in_process(name, path, r))
+                for backend in args.backend or ["django"]
+            ]
+
+        for label, backend, fetch in targets:
+            if backend:
+                settings.MEDIA_DELIVERY_BACKEND = backend
+            for scenario in ("full", "range"):
+                summary = run(
+                    fetch,
+                    args.requests,
+                    args.concurrency,
+                    size,
+                    args.range_kb,
+                    scenario,
+                )
+                summary["target"] = label
+                report(label, summary)
+                summaries.append(summary)
+    finally:
+        default_storage.delete(name)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summaries, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
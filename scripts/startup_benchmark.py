@@ -0,0 +1,176 @@
+# scripts/startup_benchmark.py
+"""
+Startup benchmark: boot time, peak RSS and the slowest imports
+
+Each scenario boots the project in a fresh interpreter under
+``python -X importtime`` a few times and reports the median wall time,
+the peak RSS and the imports with the largest cumulative cost:
+
+    python scripts/startup_benchmark.py
+    python scripts/startup_benchmark.py --scenario urls --runs 5 --top 25
+    python scripts/startup_benchmark.py --json startup.json --baseline old.json
+
+Scenarios:
+    setup   django.setup(), what every manage.py command pays (e.g. migrate)
+    urls    setup plus the URLconf, i.e. every view a web worker imports
+    celery  setup plus the task modules a Celery worker imports
+
+Heavy services are built on first use (see core/lazy.py), so none of the
+scenarios should import spaCy, torch, easyocr or face_recognition.
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must stay out of a plain boot
+HEAVY_MODULES = ("spacy", "torch", "easyocr", "face_recognition", "transformers")
+
+SCENARIOS = {
+    "setup": "django.setup()",
+    "urls": (
+        "django.setup()\n"
+        "from django.conf import settings\n"
+        "from django.urls import get_resolver\n"
+        "get_resolver(settings.ROOT_URLCONF).url_patterns"
+    ),
+    "celery": (
+        "django.setup()\n"
+        "from mindcare.celery import app\n"
+        "app.loader.import_default_modules()"
+    ),
+}
+
+PROBE = """
+import json, os, resource, sys, time
+started = time.perf_counter()
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mindcare.settings")
+import django
+{body}
+elapsed = time.perf_counter() - started
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+# Linux reports kilobytes, macOS bytes
+rss_mb = rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+heavy = sorted(name for name in {heavy!r} if name in sys.modules)
+print(json.dumps({{"seconds": elapsed, "rss_mb": rss_mb, "heavy": heavy}}))
+"""
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s+)(\S+)")
+
+
+def parse_importtime(stderr):
+    """{module: (self_us, cumulative_us, depth)} from ``-X importtime`` output"""
+    modules = {}
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        depth = (len(indent) - 1) // 2
+        modules[name] = (int(self_us), int(cumulative_us), depth)
+    return modules
+
+
+def run_once(scenario):
+    code = PROBE.format(body=SCENARIOS[scenario], heavy=HEAVY_MODULES)
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        tail = "\n".join(completed.stderr.splitlines()[-15:])
+        raise RuntimeError(f"{scenario} failed to boot:\n{tail}")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["imports"] = parse_importtime(completed.stderr)
+    return result
+
+
+def benchmark(scenario, runs, top):
+    results = [run_once(scenario) for _ in range(runs)]
+    imports = results[-1]["imports"]
+    # Top-level imports only, so a package and its children are not both listed
+    slowest = sorted(
+        (
+            (name, cumulative)
+            for name, (_, cumulative, depth) in imports.items()
+            if depth == 0
+        ),
+        key=lambda item: item[1],
+        reverse=True,
+    )[:top]
+    return {
+        "scenario": scenario,
+        "runs": runs,
+        "seconds": statistics.median(r["seconds"] for r in results),
+        "rss_mb": max(r["rss_mb"] for r in results),
+        "modules": len(imports),
+        "import_seconds": sum(self_us for self_us, _, _ in imports.values()) / 1e6,
+        "heavy_modules": results[-1]["heavy"],
+        "slowest_imports": [
+            {"module": name, "ms": round(cumulative / 1000, 1)}
+            for name, cumulative in slowest
+        ],
+    }
+
+
+def report(summary, baseline=None):
+    print(f"\n== {summary['scenario']} ({summary['runs']} runs) ==")
+    lines = [
+        ("boot time", f"{summary['seconds']:.2f}s", "seconds", "{:+.2f}s"),
+        ("peak RSS", f"{summary['rss_mb']:.0f} MB", "rss_mb", "{:+.0f} MB"),
+        ("modules", str(summary["modules"]), "modules", "{:+d}"),
+    ]
+    for label, value, key, delta_format in lines:
+        delta = ""
+        if baseline:
+            delta = "  (" + delta_format.format(summary[key] - baseline[key]) + ")"
+        print(f"{label:>10}: {value}{delta}")
+    if summary["heavy_modules"]:
+        print(f"   WARNING: heavy modules imported: {summary['heavy_modules']}")
+    print("  slowest top-level imports (cumulative):")
+    for item in summary["slowest_imports"]:
+        print(f"    {item['ms']:>9.1f} ms  {item['module']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--scenario",
+        choices=sorted(SCENARIOS),
+        action="append",
+        help="Scenario to run; repeat for several (default: all)",
+    )
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--baseline", help="Results file to compare against")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = {item["scenario"]: item for item in json.load(f)}
+
+    summaries = []
+    for scenario in args.scenario or list(SCENARIOS):
+        summary = benchmark(scenario, args.runs, args.top)
+        report(summary, baseline.get(scenario))
+        summaries.append(summary)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summaries, f, indent=2)
+    # Non-zero exit lets CI catch a heavy import creeping back in
+    return 1 if any(s["heavy_modules"] for s in summaries) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
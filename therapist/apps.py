@@ -1,7 +1,10 @@
-# therapist/apps.py
 from django.apps import AppConfig
 
 
 class TherapistConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "therapist"
+
+    def ready(self):
+        """Import signal handlers when the app is ready"""
+        import therapist.signals  # noqa
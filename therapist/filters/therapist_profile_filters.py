@@ -4,7 +4,9 @@ from therapist.models.therapist_profile import TherapistProfile
 
 
 class TherapistProfileFilter(django_filters.FilterSet):
-    specialization = django_filters.CharFilter(lookup_expr="icontains")
+    """Filters served by the GIN indexes on specializations, languages and available_days"""
+
+    specialization = django_filters.CharFilter(method="filter_specialization")
     languages = django_filters.CharFilter(method="filter_languages")
     available_day = django_filters.CharFilter(method="filter_available_day")
 
@@ -12,8 +14,14 @@ class TherapistProfileFilter(django_filters.FilterSet):
         model = TherapistProfile
         fields = ["specialization", "languages", "available_day"]
 
+    def filter_specialization(self, queryset, name, value):
+        # Exact choice key; a substring of search_text would also match
+        # "disorders" or a therapist's name
+        return queryset.filter(specializations__contains=[value.strip()])
+
     def filter_languages(self, queryset, name, value):
-        return queryset.filter(languages_spoken__contains=value.split(","))
+        languages = [language.strip() for language in value.split(",") if language]
+        return queryset.filter(languages__contains=languages)
 
     def filter_available_day(self, queryset, name, value):
         return queryset.filter(available_days__has_key=value.lower())
@@ -0,0 +1,65 @@
+# Generated by Django 4.2.7 on 2026-10-18 16:10
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+from core.search import normalize_search_text
+
+
+def backfill_search_text(apps, schema_editor):
+    TherapistProfile = apps.get_model("therapist", "TherapistProfile")
+
+    batch = []
+    for profile in TherapistProfile.objects.select_related("user").iterator(
+        chunk_size=2000
+    ):
+        profile.search_text = normalize_search_text(
+            profile.user.first_name,
+            profile.user.last_name,
+            profile.user.username,
+            profile.specializations,
+            profile.therapy_types,
+            profile.languages,
+        )
+        batch.append(profile)
+        if len(batch) >= 2000:
+            TherapistProfile.objects.bulk_update(batch, ["search_text"])
+            batch = []
+    TherapistProfile.objects.bulk_update(batch, ["search_text"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("therapist", "0006_alter_therapistprofile_experience"),
+        # Creates the pg_trgm extension
+        ("users", "0005_customuser_search_text"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="therapistprofile",
+            name="search_text",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.RunPython(backfill_search_text, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="therapistprofile",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_text"],
+                name="therapist_search_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="therapistprofile",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["languages"], name="therapist_languages_gin"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="therapistprofile",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["available_days"], name="therapist_available_days_gin"
+            ),
+        ),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:10
+
+import uuid
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("therapist", "0007_therapistprofile_search_text"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TherapistVerificationJob",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("queued", "Queued"),
+                            ("processing", "Processing"),
+                            ("completed", "Completed"),
+                            ("failed", "Failed"),
+                        ],
+                        default="queued",
+                        max_length=20,
+                    ),
+                ),
+                ("license_number", models.CharField(max_length=100)),
+                ("issuing_authority", models.CharField(max_length=100)),
+                (
+                    "license_image",
+                    models.FileField(
+                        blank=True, null=True, upload_to="verification_jobs/%Y/%m/"
+                    ),
+                ),
+                (
+                    "selfie_image",
+                    models.FileField(
+                        blank=True, null=True, upload_to="verification_jobs/%Y/%m/"
+                    ),
+                ),
+                ("decision", models.CharField(blank=True, max_length=20)),
+                ("result", models.JSONField(blank=True, default=dict)),
+                ("error", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("started_at", models.DateTimeField(blank=True, null=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "profile",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="verification_jobs",
+                        to="therapist.therapistprofile",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["profile", "-created_at"],
+                        name="therapist_t_profile_1c8ec6_idx",
+                    ),
+                    models.Index(
+                        fields=["status"], name="therapist_t_status_395c6f_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:20
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("therapist", "0008_therapistverificationjob"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="therapistprofile",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["specializations"], name="therapist_specializations_gin"
+            ),
+        ),
+    ]
@@ -1,8 +1,10 @@
 # therapist/models/__init__.py
 from .therapist_profile import TherapistProfile
 from .session_note import SessionNote
+from .verification_job import TherapistVerificationJob
 
 __all__ = [
     "TherapistProfile",
     "SessionNote",
+    "TherapistVerificationJob",
 ]
@@ -1,13 +1,14 @@
 # therapist/models/therapist_profile.py
 import logging
 from datetime import datetime, timedelta, date
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
-from django.db.models import Q
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from django.conf import settings
-from appointments.models import Appointment
+from appointments import availability
+from core.search import normalize_search_text
 
 logger = logging.getLogger(__name__)
 
@@ -86,12 +87,22 @@ class TherapistProfile(models.Model):
         help_text="Default session duration in minutes",
         validators=[MinValueValidator(15), MaxValueValidator(180)],
     )
+    # Normalized name, specializations, therapy types and languages for search
+    search_text = models.TextField(blank=True, default="", editable=False)
 
     class Meta:
         ordering = ["user__username"]
         indexes = [
             models.Index(fields=["user"]),
             models.Index(fields=["is_verified", "verification_status"]),
+            GinIndex(
+                fields=["search_text"],
+                opclasses=["gin_trgm_ops"],
+                name="therapist_search_trgm",
+            ),
+            GinIndex(fields=["specializations"], name="therapist_specializations_gin"),
+            GinIndex(fields=["languages"], name="therapist_languages_gin"),
+            GinIndex(fields=["available_days"], name="therapist_available_days_gin"),
         ]
         # Add a custom constraint that only enforces uniqueness when license_number is not null
         constraints = [
@@ -173,8 +184,22 @@ class TherapistProfile(models.Model):
             self.experience = []
 
         self.profile_completion = self._calculate_profile_completion()
+        self.search_text = self.build_search_text()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "search_text"}
         super().save(*args, **kwargs)
 
+    def build_search_text(self):
+        return normalize_search_text(
+            self.user.first_name,
+            self.user.last_name,
+            self.user.username,
+            self.specializations,
+            self.therapy_types,
+            self.languages,
+        )
+
     def _calculate_profile_completion(self):
         """Calculate profile completion percentage"""
         required_fields = {
@@ -201,54 +226,8 @@ class TherapistProfile(models.Model):
         return (completed / total) * 100 if total > 0 else 0
 
     def check_availability(self, date_time, duration=60):
-        if not self.available_days:
-            return False
-
-        day = date_time.strftime("%A").lower()
-
-        if day not in self.available_days:
-            return False
-
-        requested_start_time = date_time.time()
-        requested_end_time = (date_time + timedelta(minutes=duration)).time()
-        requested_date = date_time.date()
-
-        is_slot_available = False
-        for slot in self.available_days[day]:
-            slot_start = datetime.strptime(slot["start"], "%H:%M").time()
-            slot_end = datetime.strptime(slot["end"], "%H:%M").time()
-
-            if slot_start <= requested_start_time and requested_end_time <= slot_end:
-                is_slot_available = True
-                break
-
-        if not is_slot_available:
-            return False
-
-        requested_start_datetime = timezone.make_aware(
-            datetime.combine(requested_date, requested_start_time)
-        )
-        requested_end_datetime = timezone.make_aware(
-            datetime.combine(requested_date, requested_end_time)
-        )
-
-        conflicting_appointments = (
-            Appointment.objects.filter(
-                therapist=self,
-                appointment_date__date=requested_date,
-                status__in=["scheduled", "confirmed"],
-            )
-            .filter(
-                Q(appointment_date__lt=requested_end_datetime)
-                & Q(
-                    appointment_date__gte=requested_start_datetime
-                    - timedelta(minutes=duration)
-                )
-            )
-            .exists()
-        )
-
-        return not conflicting_appointments
+        """Whether a ``duration``-minute session can start at ``date_time``"""
+        return availability.is_available(self, date_time, duration)
 
     def get_available_days(self):
         # Example: return next 7 weekdays starting tomorrow
@@ -0,0 +1,53 @@
+# therapist/models/verification_job.py
+import uuid
+
+from django.db import models
+
+
+class TherapistVerificationJob(models.Model):
+    """A license and identity verification run by the background pipeline"""
+
+    STATUS_CHOICES = [
+        ("queued", "Queued"),
+        ("processing", "Processing"),
+        ("completed", "Completed"),
+        ("failed", "Failed"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    profile = models.ForeignKey(
+        "therapist.TherapistProfile",
+        on_delete=models.CASCADE,
+        related_name="verification_jobs",
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="queued")
+    license_number = models.CharField(max_length=100)
+    issuing_authority = models.CharField(max_length=100)
+    # Removed once the job has run
+    license_image = models.FileField(
+        upload_to="verification_jobs/%Y/%m/", null=True, blank=True
+    )
+    selfie_image = models.FileField(
+        upload_to="verification_jobs/%Y/%m/", null=True, blank=True
+    )
+    # "verified", "pending_review" or "rejected"
+    decision = models.CharField(max_length=20, blank=True)
+    result = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["profile", "-created_at"]),
+            models.Index(fields=["status"]),
+        ]
+
+    def __str__(self):
+        return f"Verification {self.id} ({self.status})"
+
+    @property
+    def is_active(self):
+        return self.status in ("queued", "processing")
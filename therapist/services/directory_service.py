@@ -0,0 +1,83 @@
+# therapist/services/directory_service.py
+"""
+Public therapist directory
+
+The unfiltered listing of verified therapists is serialized once
+(availability included) and cached under a version number;
+``invalidate_public_listing`` bumps the version whenever a therapist
+profile or its user changes, so the next request rebuilds it. Searches and
+filtered listings go to the database through the trigram and JSONB GIN
+indexes instead.
+"""
+
+import logging
+import time
+from typing import Dict, List
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.search import ranked_search
+from therapist.filters.therapist_profile_filters import TherapistProfileFilter
+from therapist.models.therapist_profile import TherapistProfile
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "therapist_directory_version"
+
+# Query parameters that turn the listing into a database search
+SEARCH_PARAMS = ("q", "specialization", "languages", "available_day")
+
+
+def public_queryset():
+    return TherapistProfile.objects.filter(is_verified=True).select_related("user")
+
+
+def _version() -> int:
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Seeded from the clock so an evicted counter never reuses old versions
+        cache.add(VERSION_KEY, int(time.time()), timeout=None)
+        version = cache.get(VERSION_KEY, 0)
+    return version
+
+
+def invalidate_public_listing() -> None:
+    """Make the next request rebuild the cached listing"""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, int(time.time()), timeout=None)
+
+
+def serialize(therapists) -> List[Dict]:
+    from therapist.serializers.therapist_profile import (
+        TherapistProfilePublicSerializer,
+    )
+
+    return TherapistProfilePublicSerializer(
+        therapists, many=True, context={"include_availability": True}
+    ).data
+
+
+def public_listing() -> List[Dict]:
+    """Every verified therapist, serialized, from cache when still current"""
+    key = f"therapist_directory_public_v{_version()}"
+    listing = cache.get(key)
+    if listing is None:
+        listing = serialize(public_queryset())
+        cache.set(
+            key,
+            listing,
+            timeout=getattr(settings, "THERAPIST_DIRECTORY_CACHE_TIMEOUT", 3600),
+        )
+    return listing
+
+
+def search(params):
+    """Verified therapists matching ``q`` and the filter parameters, ranked"""
+    queryset = public_queryset()
+    query = params.get("q", "").strip()
+    if query:
+        queryset = ranked_search(queryset, query)
+    return TherapistProfileFilter(params, queryset=queryset).qs
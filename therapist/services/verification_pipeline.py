@@ -0,0 +1,321 @@
+# therapist/services/verification_pipeline.py
+"""
+Background therapist verification
+
+The verify endpoint only stores the uploaded license and selfie on a
+``TherapistVerificationJob`` and returns its id. The CPU-bound work (OCR,
+template matching, security features, face matching and liveness) runs
+in ``therapist.tasks.run_verification_job`` on the ``verification``
+queue, served by a dedicated prefork pool:
+
+    celery -A mindcare worker -Q verification -P prefork -c 2 --max-tasks-per-child 200
+
+Each process of that pool builds ``TherapistVerificationService`` (the
+easyocr reader and the rest) once at start-up (see ``core.lazy``). Images are downscaled to
+``VERIFICATION_MAX_IMAGE_SIDE`` pixels before analysis. Status changes
+reach the therapist over the notifications WebSocket as
+``verification_status`` messages, and the outcome is also stored as a
+notification.
+"""
+
+import io
+import json
+import logging
+import uuid
+from typing import Any, Dict, List
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core.lazy import lazy_service
+from therapist.models import TherapistVerificationJob
+
+logger = logging.getLogger(__name__)
+
+QUEUE = "verification"
+
+# Built on first use, or at start-up in the verification pool processes
+service = lazy_service(
+    f"{__name__}.service",
+    "therapist.services.therapist_verification_service.TherapistVerificationService",
+)
+
+
+def downscale(image_file, max_side=None) -> io.BytesIO:
+    """
+    ``image_file`` upright, in RGB and at most ``max_side`` pixels on its
+    longer side, as PNG bytes
+    """
+    from PIL import Image, ImageOps
+
+    max_side = max_side or getattr(settings, "VERIFICATION_MAX_IMAGE_SIDE", 1600)
+    image_file.seek(0)
+    image = Image.open(image_file)
+    # JPEG decoding can skip straight to a reduced scale
+    image.draft("RGB", (max_side, max_side))
+    image = ImageOps.exif_transpose(image).convert("RGB")
+    image.thumbnail((max_side, max_side), Image.LANCZOS)
+    out = io.BytesIO()
+    image.save(out, format="PNG")
+    out.seek(0)
+    return out
+
+
+def submit(profile, validated_data) -> TherapistVerificationJob:
+    """Store the uploads on a new job and queue it after commit"""
+    from therapist.tasks import run_verification_job
+
+    job = TherapistVerificationJob.objects.create(
+        profile=profile,
+        license_number=validated_data["license_number"],
+        issuing_authority=validated_data["issuing_authority"],
+        license_image=validated_data["license_image"],
+        selfie_image=validated_data["selfie_image"],
+    )
+    job_id = str(job.pk)
+    transaction.on_commit(lambda: run_verification_job.delay(job_id))
+    return job
+
+
+def job_summary(job: TherapistVerificationJob) -> Dict[str, Any]:
+    summary = {
+        "job_id": str(job.pk),
+        "status": job.status,
+        "created_at": job.created_at.isoformat(),
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+    if job.status == "completed":
+        decision = job.result.get("decision", {})
+        summary["decision"] = job.decision
+        summary["confidence_score"] = decision.get("confidence")
+        summary["issues_identified"] = decision.get("issues", [])
+        summary["reasons"] = decision.get("rejection_reasons", [])
+        summary["retry_suggestions"] = decision.get("suggestions", [])
+    elif job.status == "failed":
+        summary["support_reference"] = job.result.get("support_reference")
+    return summary
+
+
+def push_status(job: TherapistVerificationJob) -> None:
+    """Send the job's status to the therapist's notification socket"""
+    try:
+        async_to_sync(get_channel_layer().group_send)(
+            f"user_{job.profile.user_id}_notifications",
+            {
+                "type": "notification.message",
+                "message": {"type": "verification_status", **job_summary(job)},
+            },
+        )
+    except Exception as e:
+        logger.error(f"Error pushing verification status: {str(e)}")
+
+
+def run(job_id) -> TherapistVerificationJob:
+    """Analyse the job's images, decide and update the profile"""
+    with transaction.atomic():
+        job = (
+            TherapistVerificationJob.objects.select_for_update()
+            .select_related("profile__user")
+            .get(pk=job_id)
+        )
+        if not job.is_active:
+            return job  # Already finished, e.g. a duplicate message
+        job.status = "processing"
+        job.started_at = timezone.now()
+        job.save(update_fields=["status", "started_at"])
+    push_status(job)
+
+    try:
+        results = _analyse(job)
+        decision = make_decision(results)
+        job.result = _jsonable({"results": results, "decision": decision})
+        job.decision = _update_profile(job, decision)
+        job.status = "completed"
+    except Exception as e:
+        logger.error(f"Verification job {job.pk} failed: {str(e)}", exc_info=True)
+        job.status = "failed"
+        job.error = str(e)
+        job.result = {"support_reference": generate_support_reference()}
+
+    job.finished_at = timezone.now()
+    # The identity documents are not kept once analysed
+    for field in (job.license_image, job.selfie_image):
+        if field:
+            field.delete(save=False)
+    job.save()
+
+    push_status(job)
+    _notify(job)
+    return job
+
+
+def _analyse(job: TherapistVerificationJob) -> Dict[str, Any]:
+    with job.license_image.open("rb") as license_file:
+        license_image = downscale(license_file)
+    with job.selfie_image.open("rb") as selfie_file:
+        selfie_image = downscale(selfie_file)
+
+    license_result = service.comprehensive_license_verification(
+        license_image, job.license_number, job.issuing_authority
+    )
+    face_result = service.enhanced_face_verification(license_image, selfie_image)
+    database_result = cross_reference_license_database(
+        job.license_number, job.issuing_authority
+    )
+    background_result = perform_background_verification(
+        job.license_number, job.issuing_authority
+    )
+    return {
+        "license_verification": license_result,
+        "face_verification": face_result,
+        "database_verification": database_result,
+        "background_verification": background_result,
+        "overall_confidence": calculate_overall_confidence(
+            [license_result, face_result, database_result, background_result]
+        ),
+    }
+
+
+def _jsonable(value):
+    """``value`` with numpy scalars and other stray types made JSON-safe"""
+
+    def convert(item):
+        return item.item() if hasattr(item, "item") else str(item)
+
+    return json.loads(json.dumps(value, default=convert))
+
+
+def cross_reference_license_database(license_number, authority) -> Dict[str, Any]:
+    """Cross-reference license with official databases"""
+    # Placeholder for database integration
+    return {
+        "success": True,
+        "verified_in_database": True,
+        "license_status": "active",
+        "expiry_date": "2025-12-31",
+        "confidence": 0.9,
+    }
+
+
+def perform_background_verification(license_number, authority) -> Dict[str, Any]:
+    """Perform additional background verification"""
+    # Placeholder for background checks
+    return {
+        "success": True,
+        "clean_record": True,
+        "additional_certifications": [],
+        "confidence": 0.8,
+    }
+
+
+def calculate_overall_confidence(results) -> float:
+    """Calculate overall confidence from all verification methods"""
+    successful_results = [r for r in results if r and r.get("success")]
+    if not successful_results:
+        return 0.0
+
+    confidences = [r.get("confidence", 0.5) for r in successful_results]
+    confidences = [c for c in confidences if isinstance(c, (int, float))]
+    return sum(confidences) / len(confidences) if confidences else 0.5
+
+
+def _failed_checks(results) -> List[str]:
+    return [
+        name
+        for name, result in results.items()
+        if isinstance(result, dict) and not result.get("success")
+    ]
+
+
+def make_decision(results) -> Dict[str, Any]:
+    """Make final verification decision based on all results"""
+    overall_confidence = results["overall_confidence"]
+
+    # High confidence - auto approve
+    if overall_confidence >= 0.85:
+        return {
+            "approved": True,
+            "requires_review": False,
+            "confidence": overall_confidence,
+            "verification_id": f"VER-{uuid.uuid4().hex[:12].upper()}",
+        }
+
+    failed = _failed_checks(results)
+
+    # Medium confidence - manual review
+    if overall_confidence >= 0.6:
+        return {
+            "approved": False,
+            "requires_review": True,
+            "confidence": overall_confidence,
+            "issues": [f"{name.replace('_', ' ')} inconclusive" for name in failed],
+        }
+
+    # Low confidence - reject
+    return {
+        "approved": False,
+        "requires_review": False,
+        "confidence": overall_confidence,
+        "rejection_reasons": [f"{name.replace('_', ' ')} failed" for name in failed]
+        or ["Overall verification confidence too low"],
+        "can_retry": True,
+        "suggestions": [
+            "Upload a sharp, well-lit photo of the whole license",
+            "Take the selfie facing the camera in even lighting",
+        ],
+    }
+
+
+def _update_profile(job: TherapistVerificationJob, decision) -> str:
+    """Update profile with verification results; returns the new status"""
+    profile = job.profile
+    if decision["approved"]:
+        profile.is_verified = True
+        profile.verification_status = "verified"
+        profile.verified_at = timezone.now()
+    elif decision["requires_review"]:
+        profile.verification_status = "pending_review"
+    else:
+        profile.verification_status = "rejected"
+
+    profile.license_number = job.license_number
+    profile.save()
+    return profile.verification_status
+
+
+def _notify(job: TherapistVerificationJob) -> None:
+    from notifications.services import UnifiedNotificationService
+
+    titles = {
+        "verified": ("Verification successful", "Your profile is now verified."),
+        "pending_review": (
+            "Verification submitted for manual review",
+            "We will review your documents within 2-5 business days.",
+        ),
+        "rejected": (
+            "Verification failed",
+            "We could not verify your license. Please check the suggestions and retry.",
+        ),
+    }
+    title, message = titles.get(
+        job.decision,
+        (
+            "Verification could not be completed",
+            "Please try again later or contact support.",
+        ),
+    )
+    UnifiedNotificationService().send_notification(
+        user=job.profile.user,
+        notification_type_name="therapist_verification",
+        title=title,
+        message=message,
+        metadata=job_summary(job),
+        priority="high",
+    )
+
+
+def generate_support_reference() -> str:
+    return f"SUP-{uuid.uuid4().hex[:10].upper()}"
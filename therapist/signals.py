@@ -0,0 +1,32 @@
+# therapist/signals.py
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from therapist.models.therapist_profile import TherapistProfile
+from therapist.services import directory_service
+
+
+@receiver(post_save, sender=TherapistProfile)
+@receiver(post_delete, sender=TherapistProfile)
+def invalidate_directory(sender, instance, **kwargs):
+    transaction.on_commit(directory_service.invalidate_public_listing)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def refresh_therapist_search_text(sender, instance, created, **kwargs):
+    """Keep a therapist's search column and listing entry in step with renames"""
+    update_fields = kwargs.get("update_fields")
+    if created or instance.user_type != "therapist":
+        return
+    if update_fields and not set(update_fields) & set(instance.SEARCH_FIELDS):
+        return
+    profile = TherapistProfile.objects.filter(user=instance).first()
+    if profile is None:
+        return
+    profile.user = instance
+    search_text = profile.build_search_text()
+    if search_text != profile.search_text:
+        TherapistProfile.objects.filter(pk=profile.pk).update(search_text=search_text)
+        transaction.on_commit(directory_service.invalidate_public_listing)
@@ -0,0 +1,16 @@
+# therapist/tasks.py
+import logging
+
+from celery import shared_task
+
+from therapist.services import verification_pipeline
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(soft_time_limit=600)
+def run_verification_job(job_id):
+    """Run the license and identity checks of a verification job"""
+    job = verification_pipeline.run(job_id)
+    logger.info(f"Verification job {job_id} finished: {job.status} {job.decision}")
+    return job.status
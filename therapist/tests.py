@@ -1 +1,39 @@
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from therapist.filters.therapist_profile_filters import TherapistProfileFilter
+from therapist.models.therapist_profile import TherapistProfile
+
+
+class TherapistProfileFilterTest(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        for username, specializations in (
+            ("anna", ["anxiety_disorders"]),
+            ("eating_disorders_expert", ["eating_disorders", "ocd"]),
+        ):
+            User.objects.create_user(
+                username=username,
+                email=f"{username}@example.com",
+                password="x",
+                user_type="therapist",
+            )
+            TherapistProfile.objects.filter(user__username=username).update(
+                specializations=specializations
+            )
+
+    def filtered(self, **params):
+        return list(
+            TherapistProfileFilter(
+                params, TherapistProfile.objects.all()
+            ).qs.values_list("user__username", flat=True)
+        )
+
+    def test_specialization_matches_whole_choices(self):
+        self.assertEqual(
+            self.filtered(specialization="ocd"), ["eating_disorders_expert"]
+        )
+        self.assertEqual(self.filtered(specialization="anxiety_disorders"), ["anna"])
+        # Neither part of a choice nor a name in search_text matches
+        self.assertEqual(self.filtered(specialization="disorders"), [])
+        self.assertEqual(self.filtered(specialization="anna"), [])
@@ -3,6 +3,7 @@ from django.urls import path
 from therapist.views.therapist_profile_views import (
     TherapistProfileViewSet,
     PublicTherapistListView,
+    TherapistSlotsView,
 )
 from therapist.views.session_note_views import SessionNoteViewSet
 
@@ -47,6 +48,11 @@ urlpatterns = [
         ),
         name="therapist-verify",
     ),
+    path(
+        "profiles/<int:pk>/slots/",
+        TherapistSlotsView.as_view(),
+        name="therapist-slots",
+    ),
     path(
         "profiles/all/",
         PublicTherapistListView.as_view(),
@@ -6,10 +6,7 @@ from rest_framework.response import Response
 from drf_spectacular.utils import extend_schema, extend_schema_view
 from typing import Dict, Any
 from therapist.models.therapist_profile import TherapistProfile
-from therapist.serializers.therapist_profile import (
-    TherapistProfileSerializer,
-    TherapistProfilePublicSerializer,
-)
+from therapist.serializers.therapist_profile import TherapistProfileSerializer
 from therapist.serializers.verification import (
     TherapistVerificationSerializer,
     VerificationStatusSerializer,
@@ -22,17 +19,19 @@ from therapist.permissions.therapist_permissions import (
 import logging
 from rest_framework.exceptions import ValidationError as DRFValidationError
 from django.core.exceptions import ValidationError as DjangoValidationError
-from therapist.services.therapist_verification_service import (
-    TherapistVerificationService,
-)
 from django.db import transaction
 from django.utils import timezone
-from datetime import timedelta
+from datetime import datetime, time, timedelta
 from django.core.cache import cache
 from rest_framework.parsers import MultiPartParser, FormParser
 from django.core.exceptions import ValidationError
 from rest_framework.permissions import AllowAny
 from rest_framework.views import APIView
+from rest_framework.pagination import LimitOffsetPagination
+from therapist.services import directory_service, verification_pipeline
+from appointments import availability
+from django.shortcuts import get_object_or_404
+from django.utils.dateparse import parse_date
 
 logger = logging.getLogger(__name__)
 
@@ -240,7 +239,9 @@ class TherapistProfileViewSet(viewsets.ModelViewSet):
         },
         responses={
             200: VerificationStatusSerializer,
+            202: {"description": "Verification queued; poll or await the job"},
             400: {"description": "Bad request - invalid data"},
+            409: {"description": "A verification is already in progress"},
             429: {"description": "Too many verification attempts"},
             500: {"description": "Internal server error"},
         },
@@ -259,7 +260,12 @@ class TherapistProfileViewSet(viewsets.ModelViewSet):
         # Handle GET request to check verification status
         if request.method == "GET":
             serializer = VerificationStatusSerializer(profile)
-            return Response(serializer.data)
+            data = dict(serializer.data)
+            latest_job = profile.verification_jobs.first()
+            data["latest_job"] = (
+                verification_pipeline.job_summary(latest_job) if latest_job else None
+            )
+            return Response(data)
 
         # Handle POST request for verification
         if profile.is_verified:
@@ -275,6 +281,18 @@ class TherapistProfileViewSet(viewsets.ModelViewSet):
         logger.info(f"Files: {list(request.FILES.keys())}")
         logger.info(f"Data fields: {list(request.data.keys())}")
 
+        active_job = profile.verification_jobs.filter(
+            status__in=["queued", "processing"]
+        ).first()
+        if active_job:
+            return Response(
+                {
+                    "error": "A verification is already in progress",
+                    **verification_pipeline.job_summary(active_job),
+                },
+                status=status.HTTP_409_CONFLICT,
+            )
+
         # Validate rate limiting
         rate_limit_result = self._check_verification_rate_limit(profile.user)
         if not rate_limit_result["allowed"]:
@@ -296,217 +314,33 @@ class TherapistProfileViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        validated_data = serializer.validated_data
-
         try:
-            # Initialize enhanced verification service
-            from ..services.therapist_verification_service import TherapistVerificationService
-
-            verification_service = TherapistVerificationService()
-
-            # Step 1: Comprehensive License Verification
-            logger.info("Starting comprehensive license verification...")
-            license_result = verification_service.comprehensive_license_verification(
-                validated_data["license_image"],
-                validated_data["license_number"],
-                validated_data["issuing_authority"],
-            )
-
-            # Step 2: Enhanced Face Verification
-            logger.info("Starting enhanced face verification...")
-            face_result = verification_service.enhanced_face_verification(
-                validated_data["license_image"], validated_data["selfie_image"]
-            )
-
-            # Step 3: Cross-reference with licensing databases (if available)
-            logger.info("Cross-referencing with licensing databases...")
-            database_result = self._cross_reference_license_database(
-                validated_data["license_number"],
-                validated_data["issuing_authority"],
-                profile.user,
-            )
-
-            # Step 4: Background verification
-            logger.info("Performing background verification...")
-            background_result = self._perform_background_verification(
-                validated_data["license_number"],
-                validated_data["issuing_authority"],
-            )
-
-            # Combine all verification results
-            verification_results = {
-                "license_verification": license_result,
-                "face_verification": face_result,
-                "database_verification": database_result,
-                "background_verification": background_result,
-                "overall_confidence": self._calculate_overall_confidence(
-                    [license_result, face_result, database_result, background_result]
-                ),
-            }
-
-            # Make final verification decision
-            verification_decision = self._make_verification_decision(verification_results)
-
-            # Update profile based on decision
-            self._update_profile_verification_status(
-                profile, verification_decision, verification_results, validated_data
-            )
-
-            # Log verification attempt
-            self._log_verification_attempt(profile.user, verification_results, verification_decision)
-
-            # Send appropriate response
-            if verification_decision["approved"]:
-                # Send approval notification
-                self._send_verification_notification(profile.user, "approved", verification_decision)
-
-                return Response(
-                    {
-                        "message": "Verification successful",
-                        "status": "verified",
-                        "confidence_score": verification_decision["confidence"],
-                        "verification_id": verification_decision.get("verification_id"),
-                        "verified_at": timezone.now().isoformat(),
-                    },
-                    status=status.HTTP_200_OK,
-                )
-
-            elif verification_decision["requires_review"]:
-                # Send manual review notification
-                self._send_verification_notification(profile.user, "review", verification_decision)
-
-                return Response(
-                    {
-                        "message": "Verification submitted for manual review",
-                        "status": "pending_review",
-                        "review_timeline": "2-5 business days",
-                        "confidence_score": verification_decision["confidence"],
-                        "issues_identified": verification_decision.get("issues", []),
-                    },
-                    status=status.HTTP_202_ACCEPTED,
-                )
-
-            else:
-                # Send rejection notification
-                self._send_verification_notification(profile.user, "rejected", verification_decision)
-
-                return Response(
-                    {
-                        "error": "Verification failed",
-                        "status": "rejected",
-                        "reasons": verification_decision.get("rejection_reasons", []),
-                        "can_retry": verification_decision.get("can_retry", True),
-                        "retry_suggestions": verification_decision.get("suggestions", []),
-                    },
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
+            # The analysis runs on the verification worker pool
+            job = verification_pipeline.submit(profile, serializer.validated_data)
         except Exception as e:
-            logger.error(f"Verification process error: {str(e)}", exc_info=True)
-
-            # Log the error attempt
-            self._log_verification_error(profile.user, str(e))
-
+            logger.error(f"Verification submission error: {str(e)}", exc_info=True)
             return Response(
                 {
                     "error": "Verification processing failed",
                     "message": "Please try again later or contact support",
-                    "support_reference": self._generate_support_reference(),
+                    "support_reference": verification_pipeline.generate_support_reference(),
                 },
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
+        return Response(
+            {
+                "message": "Verification submitted; results will follow as a notification",
+                **verification_pipeline.job_summary(job),
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
+
     def _check_verification_rate_limit(self, user) -> Dict[str, Any]:
         """Check if user has exceeded verification rate limits"""
         # Implementation for rate limiting
         return {"allowed": True, "attempts_remaining": 5, "retry_after": None}
 
-    def _cross_reference_license_database(self, license_number, authority, user) -> Dict[str, Any]:
-        """Cross-reference license with official databases"""
-        # Placeholder for database integration
-        return {
-            "success": True,
-            "verified_in_database": True,
-            "license_status": "active",
-            "expiry_date": "2025-12-31",
-            "confidence": 0.9,
-        }
-
-    def _perform_background_verification(self, license_number, authority) -> Dict[str, Any]:
-        """Perform additional background verification"""
-        # Placeholder for background checks
-        return {
-            "success": True,
-            "clean_record": True,
-            "additional_certifications": [],
-            "confidence": 0.8,
-        }
-
-    def _calculate_overall_confidence(self, results) -> float:
-        """Calculate overall confidence from all verification methods"""
-        successful_results = [r for r in results if r and r.get("success")]
-        if not successful_results:
-            return 0.0
-
-        confidences = [r.get("confidence", 0.5) for r in successful_results]
-        return sum(confidences) / len(confidences)
-
-    def _make_verification_decision(self, results) -> Dict[str, Any]:
-        """Make final verification decision based on all results"""
-        overall_confidence = results["overall_confidence"]
-
-        # High confidence - auto approve
-        if overall_confidence >= 0.85:
-            return {
-                "approved": True,
-                "requires_review": False,
-                "confidence": overall_confidence,
-                "verification_id": self._generate_verification_id(),
-            }
-
-        # Medium confidence - manual review
-        elif overall_confidence >= 0.6:
-            return {
-                "approved": False,
-                "requires_review": True,
-                "confidence": overall_confidence,
-                "issues": self._identify_verification_issues(results),
-            }
-
-        # Low confidence - reject
-        else:
-            return {
-                "approved": False,
-                "requires_review": False,
-                "confidence": overall_confidence,
-                "rejection_reasons": self._generate_rejection_reasons(results),
-                "can_retry": True,
-                "suggestions": self._generate_improvement_suggestions(results),
-            }
-
-    def _update_profile_verification_status(self, profile, decision, results, validated_data):
-        """Update profile with verification results"""
-        if decision["approved"]:
-            profile.is_verified = True
-            profile.verification_status = "verified"
-            profile.verified_at = timezone.now()
-            profile.verification_expiry = timezone.now().date() + timedelta(days=365)
-        elif decision["requires_review"]:
-            profile.verification_status = "pending_review"
-        else:
-            profile.verification_status = "rejected"
-
-        # Store verification data
-        profile.license_number = validated_data["license_number"]
-        profile.issuing_authority = validated_data["issuing_authority"]
-        profile.verification_data = {
-            "results": results,
-            "decision": decision,
-            "timestamp": timezone.now().isoformat(),
-        }
-
-        profile.save()
-
     @extend_schema(
         description="Get therapist's appointments",
         summary="Get Appointments",
@@ -533,10 +367,71 @@ class TherapistProfileViewSet(viewsets.ModelViewSet):
             )
 
 
+class TherapistDirectoryPagination(LimitOffsetPagination):
+    default_limit = 20
+    max_limit = 100
+
+
 class PublicTherapistListView(APIView):
+    """
+    Verified therapists, paginated. Without search parameters the page comes
+    from the cached listing; ``q`` (ranked name/specialization search),
+    ``specialization``, ``languages`` and ``available_day`` query the
+    indexed columns.
+    """
+
     def get(self, request):
-        therapists = TherapistProfile.objects.filter(is_verified=True)
-        serializer = TherapistProfilePublicSerializer(
-            therapists, many=True, context={"include_availability": True}
+        paginator = TherapistDirectoryPagination()
+        if any(request.query_params.get(p) for p in directory_service.SEARCH_PARAMS):
+            therapists = directory_service.search(request.query_params)
+            page = paginator.paginate_queryset(therapists, request, view=self)
+            data = directory_service.serialize(page)
+        else:
+            data = paginator.paginate_queryset(
+                directory_service.public_listing(), request, view=self
+            )
+        return paginator.get_paginated_response(data)
+
+
+class TherapistSlotsView(APIView):
+    """
+    Bookable start times of a verified therapist: ``start`` (a date, default
+    today) and the following ``days`` days (default 7, at most 31), for
+    sessions of ``duration`` minutes (default: the therapist's session length).
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk):
+        therapist = get_object_or_404(TherapistProfile, pk=pk, is_verified=True)
+        try:
+            first_day = parse_date(request.query_params.get("start", "")) or (
+                timezone.localdate()
+            )
+            days = min(max(int(request.query_params.get("days", 7)), 1), 31)
+            duration = int(
+                request.query_params.get("duration", therapist.session_duration)
+            )
+        except ValueError:
+            return Response(
+                {"error": "start must be YYYY-MM-DD; days and duration integers"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if not 15 <= duration <= 180:
+            return Response(
+                {"error": "duration must be between 15 and 180 minutes"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        start = timezone.make_aware(datetime.combine(first_day, time.min))
+        end = start + timedelta(days=days)
+        slots = availability.free_slots(
+            therapist, max(start, timezone.now()), end, duration
+        )
+        return Response(
+            {
+                "therapist": therapist.pk,
+                "duration": duration,
+                "slots": [timezone.localtime(slot).isoformat() for slot in slots],
+            }
         )
-        return Response(serializer.data)
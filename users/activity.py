@@ -0,0 +1,90 @@
+# users/activity.py
+"""
+Write-coalescing last-activity tracking
+
+Requests never write the user row. ``touch`` records "user 7 was seen at t"
+in a Redis sorted set (one ``ZADD``, so a user active on every request
+still has a single entry), and ``flush_activity``, run periodically by
+Celery, copies the set into ``CustomUser.last_seen``/``is_online`` with
+batched ``bulk_update`` calls. Users not seen for
+``USER_ONLINE_TIMEOUT`` seconds are marked offline in the same run.
+
+Without Redis the user row is updated directly with a single UPDATE.
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from django_redis import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+ACTIVITY_KEY = "users:activity:last_seen"
+FLUSHING_KEY = "users:activity:flushing"
+
+
+def _redis():
+    return get_redis_connection("default")
+
+
+def touch(user_id: int, seen_at: Optional[datetime] = None) -> None:
+    """Record that ``user_id`` was active at ``seen_at`` (default: now)"""
+    seen_at = seen_at or timezone.now()
+    try:
+        _redis().zadd(ACTIVITY_KEY, {user_id: seen_at.timestamp()})
+    except Exception as e:
+        logger.warning(f"Activity tracker unavailable, writing directly: {e}")
+        get_user_model().objects.filter(pk=user_id).update(
+            last_seen=seen_at, is_online=True
+        )
+
+
+def flush_activity(batch_size: int = 500) -> int:
+    """
+    Copy recorded activity to the user rows and mark idle users offline.
+
+    The set is renamed to a flushing key first, so activity arriving during
+    the flush starts a fresh set; a flushing key left by a crashed run is
+    flushed before anything new. Returns the number of users updated.
+    """
+    client = _redis()
+    lock = client.lock("users:activity:flush-lock", timeout=300, blocking=False)
+    if not lock.acquire(blocking=False):
+        return 0
+    try:
+        updated = _flush(client, batch_size)
+    finally:
+        lock.release()
+
+    timeout = getattr(settings, "USER_ONLINE_TIMEOUT", 300)
+    get_user_model().objects.filter(
+        is_online=True, last_seen__lt=timezone.now() - timedelta(seconds=timeout)
+    ).update(is_online=False)
+    return updated
+
+
+def _flush(client, batch_size: int) -> int:
+    if not client.exists(FLUSHING_KEY):
+        if not client.exists(ACTIVITY_KEY):
+            return 0
+        client.renamenx(ACTIVITY_KEY, FLUSHING_KEY)
+
+    User = get_user_model()
+    entries = client.zrange(FLUSHING_KEY, 0, -1, withscores=True)
+    users = [
+        User(
+            pk=int(member),
+            last_seen=datetime.fromtimestamp(score, tz=dt_timezone.utc),
+            is_online=True,
+        )
+        for member, score in entries
+    ]
+    # Rows of deleted users simply match nothing
+    User.objects.bulk_update(users, ["last_seen", "is_online"], batch_size=batch_size)
+
+    client.delete(FLUSHING_KEY)
+    return len(users)
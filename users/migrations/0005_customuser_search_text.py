@@ -0,0 +1,48 @@
+# Generated by Django 4.2.7 on 2026-10-18 16:05
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+from core.search import normalize_search_text
+
+
+def backfill_search_text(apps, schema_editor):
+    CustomUser = apps.get_model("users", "CustomUser")
+
+    batch = []
+    for user in CustomUser.objects.only(
+        "username", "first_name", "last_name", "email"
+    ).iterator(chunk_size=2000):
+        user.search_text = normalize_search_text(
+            user.username, user.first_name, user.last_name, user.email
+        )
+        batch.append(user)
+        if len(batch) >= 2000:
+            CustomUser.objects.bulk_update(batch, ["search_text"])
+            batch = []
+    CustomUser.objects.bulk_update(batch, ["search_text"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0004_alter_userpreferences_options_and_more"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name="customuser",
+            name="search_text",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.RunPython(backfill_search_text, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="customuser",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_text"],
+                name="users_user_search_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+    ]
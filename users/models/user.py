@@ -1,11 +1,13 @@
 # users/models/user.py
 from django.db import models, transaction
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import GinIndex
 from django.utils import timezone
 import logging
 from model_utils import FieldTracker
 from django.apps import apps
 from appointments.models import Appointment
+from core.search import normalize_search_text
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +36,10 @@ class CustomUser(AbstractUser):
     is_online = models.BooleanField(default=False)
     last_seen = models.DateTimeField(null=True, blank=True)
     is_online = models.BooleanField(default=False, null=False)
+    # Normalized username, names and email for the directory search
+    search_text = models.TextField(blank=True, default="", editable=False)
+
+    SEARCH_FIELDS = ("username", "first_name", "last_name", "email")
 
     tracker = FieldTracker(
         ["user_type", "email", "phone_number", "crisis_alert_enabled"]
@@ -46,6 +52,13 @@ class CustomUser(AbstractUser):
         verbose_name = "User"
         verbose_name_plural = "Users"
         ordering = ["-date_joined"]
+        indexes = [
+            GinIndex(
+                fields=["search_text"],
+                opclasses=["gin_trgm_ops"],
+                name="users_user_search_trgm",
+            )
+        ]
 
     def __str__(self):
         return self.email
@@ -55,8 +68,19 @@ class CustomUser(AbstractUser):
         """Save user and create corresponding profile if needed"""
         creating = self._state.adding
         old_type = None
-
-        if not creating:
+        # Saves limited to other fields cannot change the profile type
+        update_fields = kwargs.get("update_fields")
+        type_may_change = not creating and (
+            update_fields is None or "user_type" in update_fields
+        )
+
+        self.search_text = normalize_search_text(
+            *(getattr(self, field) for field in self.SEARCH_FIELDS)
+        )
+        if update_fields is not None and set(update_fields) & set(self.SEARCH_FIELDS):
+            kwargs["update_fields"] = {*update_fields, "search_text"}
+
+        if type_may_change:
             try:
                 old_type = type(self).objects.get(pk=self.pk).user_type
             except type(self).DoesNotExist:
@@ -67,7 +91,7 @@ class CustomUser(AbstractUser):
         # Handle profile creation/updates
         if creating and self.user_type:
             self._create_profile()
-        elif not creating and old_type != self.user_type:
+        elif type_may_change and old_type != self.user_type:
             self._handle_user_type_change(old_type)
 
     def get_profile_model(self, user_type):
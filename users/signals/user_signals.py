@@ -17,6 +17,15 @@ logger = logging.getLogger(__name__)
 User = get_user_model()
 
 
+def _field_only_save(created, kwargs):
+    """
+    True for ``save(update_fields=[...])`` calls that leave ``user_type``
+    alone (presence, login timestamps), which have nothing to bootstrap
+    """
+    update_fields = kwargs.get("update_fields")
+    return not created and bool(update_fields) and "user_type" not in update_fields
+
+
 @receiver(post_save, sender=CustomUser)
 def create_user_related_models(sender, instance, created, **kwargs):
     """
@@ -25,6 +34,8 @@ def create_user_related_models(sender, instance, created, **kwargs):
     - User settings
     - User profile (patient/therapist)
     """
+    if _field_only_save(created, kwargs):
+        return
     try:
         with transaction.atomic():
             if created:
@@ -76,5 +87,7 @@ def create_user_related_models(sender, instance, created, **kwargs):
 @receiver(post_save, sender=User)
 def update_user_jwt_claims(sender, instance, created, **kwargs):
     """Update JWT claims when user type changes"""
+    if _field_only_save(created, kwargs):
+        return
     if not created and instance.tracker.has_changed("user_type"):
         RefreshToken.for_user(instance)
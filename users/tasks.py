@@ -0,0 +1,17 @@
+# users/tasks.py
+import logging
+
+from celery import shared_task
+
+from users.activity import flush_activity
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def flush_user_activity():
+    """Write last-seen times recorded in Redis to the user rows"""
+    updated = flush_activity()
+    if updated:
+        logger.info(f"Flushed activity of {updated} users")
+    return updated
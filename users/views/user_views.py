@@ -9,6 +9,7 @@ from drf_spectacular.utils import extend_schema, extend_schema_view
 from django.apps import apps
 from users.models.user import CustomUser
 from users.models.settings import UserSettings
+from core.search import ranked_search
 
 from ..models.preferences import UserPreferences
 from ..permissions.user import IsSuperUserOrSelf
@@ -24,7 +25,6 @@ from ..serializers.user import (
 from rest_framework.decorators import api_view, permission_classes, renderer_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.renderers import JSONRenderer, BrowsableAPIRenderer
-from django.db.models import Q
 from drf_spectacular.utils import OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
 
@@ -46,6 +46,10 @@ class UserListPagination(PageNumberPagination):
     max_page_size = 100
 
 
+class UserSearchPagination(UserListPagination):
+    page_size = 20
+
+
 @extend_schema(
     description="Get authenticated user's full profile with related data",
     summary="Get User Details",
@@ -209,22 +213,18 @@ class UserViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            queryset = CustomUser.objects.filter(
-                Q(username__icontains=query)
-                | Q(email__icontains=query)
-                | Q(first_name__icontains=query)
-                | Q(last_name__icontains=query)
-            )
-
+            queryset = CustomUser.objects.all()
             if user_type:
                 queryset = queryset.filter(user_type=user_type)
+            # Best matches first, served by the trigram index on search_text
+            queryset = ranked_search(queryset, query)
 
-            # Limit results for performance
-            queryset = queryset[:20]
+            paginator = UserSearchPagination()
+            page = paginator.paginate_queryset(queryset, request, view=self)
 
             # Use a simpler serializer to avoid potential relation issues
-            serializer = CustomUserSerializer(queryset, many=True)
-            return Response(serializer.data)
+            serializer = CustomUserSerializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
 
         except Exception as e:
             logger.error(f"Error in user search: {str(e)}", exc_info=True)